@@ -320,13 +320,18 @@ class MailDomainAdmin(admin.ModelAdmin):
     list_display = (
         "name",
         "identity_sync",
+        "dns_checked_at",
         "created_at",
         "updated_at",
     )
     list_filter = ("identity_sync",)
     search_fields = ("name",)
     autocomplete_fields = ("alias_of",)
-    readonly_fields = ("throttle_status_display",)
+    readonly_fields = (
+        "throttle_status_display",
+        "dns_check_results",
+        "dns_checked_at",
+    )
     change_form_template = "admin/core/maildomain/change_form.html"
 
     @admin.display(description="Throttle Status (External Recipients)")
@@ -1323,6 +1328,7 @@ class ContactAdmin(admin.ModelAdmin):
     ordering = ("-created_at", "email")
     search_fields = ("name", "email")
     autocomplete_fields = ("mailbox",)
+    readonly_fields = ("last_used_at",)
 
 
 @admin.register(models.MessageRecipient)
@@ -1526,7 +1532,9 @@ class InboundMessageAdmin(admin.ModelAdmin):
         "mailbox",
         "channel",
         "has_error",
+        "attempts",
         "created_at",
+        "available_at",
     )
     list_filter = ("created_at",)
     search_fields = (
@@ -1536,7 +1544,15 @@ class InboundMessageAdmin(admin.ModelAdmin):
     )
     autocomplete_fields = ("mailbox", "channel")
     readonly_fields = ("created_at", "updated_at")
-    fields = ("mailbox", "channel", "error_message", "created_at", "updated_at")
+    fields = (
+        "mailbox",
+        "channel",
+        "error_message",
+        "attempts",
+        "available_at",
+        "created_at",
+        "updated_at",
+    )
 
     def has_error(self, obj):
         """Return whether the message has an error."""
@@ -0,0 +1,220 @@
+"""Debounced work queue for AI thread summaries and auto-labels.
+
+Inbound delivery used to call the LLM inline, after every message, which
+put a full round trip to the AI endpoint on the delivery path and
+re-summarized a thread once per reply during a burst. Delivery now only
+schedules the thread here; a periodic task (``process_pending_ai_task``)
+hands due entries to the ``ai`` queue.
+
+Two Redis sorted sets are tracked, scored by the timestamp at which the
+entry becomes due:
+
+* ``ai:pending_summary`` — thread IDs whose summary must be refreshed.
+* ``ai:pending_autolabels`` — ``thread_id:mailbox_id`` pairs to classify
+  (labels are per-mailbox, so the pair is the unit of work).
+
+Each schedule pushes the due time to ``now + AI_DEBOUNCE_SECONDS``
+(trailing-edge debounce), so a flurry of replies produces a single
+summary once the thread has been quiet for that long. A companion
+``<key>:first_seen`` set caps the delay at ``AI_DEBOUNCE_MAX_WAIT_SECONDS``
+after the first schedule, so a thread that never goes quiet is still
+processed.
+
+Like the search coalescer, this requires ``django_redis`` for
+``CACHES['default']``. Other backends fall back to dispatching the task
+immediately (which runs inline under ``CELERY_TASK_ALWAYS_EAGER``), so
+development setups without Redis keep working, just without debouncing.
+
+Calls to the AI endpoint are additionally bounded cluster-wide by
+``AI_MAX_CONCURRENCY`` slots held in the default cache (see
+``ai_concurrency_slot``).
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from redis.exceptions import RedisError
+
+from core.utils import (
+    acquire_cache_slot,
+    get_redis_client,
+    is_redis_backend,
+    release_cache_slot,
+)
+
+logger = logging.getLogger(__name__)
+
+PENDING_SUMMARY_KEY = "ai:pending_summary"
+PENDING_AUTOLABELS_KEY = "ai:pending_autolabels"
+_FIRST_SEEN_SUFFIX = ":first_seen"
+
+# Separator used to encode ``(thread_id, mailbox_id)`` pairs. UUIDs never
+# contain a colon, so the split is unambiguous.
+PAIR_SEPARATOR = ":"
+
+_SLOT_KEY_PREFIX = "ai:concurrency_slot"
+# Must outlive the slowest AI call (``AIService`` uses a 60s timeout with
+# one retry) so a slot is never reclaimed while its holder still runs,
+# while still freeing slots leaked by a killed worker.
+AI_SLOT_TIMEOUT = 180
+
+
+def _schedule(key: str, member: str) -> None:
+    """Add ``member`` to ``key`` (or push its due time back)."""
+    now = time.time()
+    client = get_redis_client()
+    first_seen_key = f"{key}{_FIRST_SEEN_SUFFIX}"
+    pipe = client.pipeline()
+    pipe.zadd(first_seen_key, {member: now}, nx=True)
+    pipe.zscore(first_seen_key, member)
+    _, first_seen = pipe.execute()
+    due_at = min(
+        now + settings.AI_DEBOUNCE_SECONDS,
+        float(first_seen or now) + settings.AI_DEBOUNCE_MAX_WAIT_SECONDS,
+    )
+    client.zadd(key, {member: due_at})
+
+
+def schedule_thread_ai(
+    thread_id, mailbox_id, *, summary: bool = False, autolabels: bool = False
+) -> None:
+    """Schedule a debounced summary and/or auto-label run for a thread.
+
+    Safe to call inside a transaction: the schedule is deferred with
+    ``transaction.on_commit`` so the task never runs against a message
+    that is not visible yet (or that was rolled back). A Redis outage
+    drops the request with an error log; AI output is best-effort and
+    the next message on the thread schedules it again.
+    """
+    if not summary and not autolabels:
+        return
+
+    def _push():
+        # pylint: disable-next=import-outside-toplevel
+        from core.ai.tasks import autolabel_thread_task, summarize_thread_task
+
+        try:
+            if not is_redis_backend():
+                if summary:
+                    summarize_thread_task.delay(str(thread_id))
+                if autolabels:
+                    autolabel_thread_task.delay(str(thread_id), str(mailbox_id))
+                return
+
+            if summary:
+                _schedule(PENDING_SUMMARY_KEY, str(thread_id))
+            if autolabels:
+                _schedule(
+                    PENDING_AUTOLABELS_KEY,
+                    f"{thread_id}{PAIR_SEPARATOR}{mailbox_id}",
+                )
+        except RedisError as exc:
+            logger.error(
+                "Redis unavailable while scheduling AI processing for thread %s "
+                "(%s: %s); request dropped",
+                thread_id,
+                type(exc).__name__,
+                exc,
+            )
+        # pylint: disable=broad-exception-caught
+        except Exception:
+            logger.exception(
+                "Failed to schedule AI processing for thread %s", thread_id
+            )
+
+    transaction.on_commit(_push)
+
+
+def _claim_due(key: str, batch_size: int) -> list[str] | None:
+    """Atomically claim up to ``batch_size`` due members of ``key``.
+
+    ``ZREM`` returns 1 only for the caller that actually removed the
+    member, so overlapping drains never hand off the same entry twice.
+    Returns ``None`` if Redis failed, signalling the caller to stop.
+    """
+    try:
+        client = get_redis_client()
+        due = client.zrangebyscore(key, "-inf", time.time(), start=0, num=batch_size)
+        if not due:
+            return []
+        pipe = client.pipeline()
+        for member in due:
+            pipe.zrem(key, member)
+        removed = pipe.execute()
+        claimed = [
+            member.decode() if isinstance(member, bytes) else str(member)
+            for member, was_removed in zip(due, removed, strict=True)
+            if was_removed
+        ]
+        if claimed:
+            client.zrem(f"{key}{_FIRST_SEEN_SUFFIX}", *claimed)
+        return claimed
+    except RedisError as exc:
+        logger.error(
+            "Redis unavailable while draining %s (%s: %s); skipping this cycle",
+            key,
+            type(exc).__name__,
+            exc,
+        )
+        return None
+    # pylint: disable=broad-exception-caught
+    except Exception:
+        logger.exception("Failed to drain %s", key)
+        return None
+
+
+def process_pending_ai(batch_size: int | None = None) -> dict:
+    """Hand due summary and auto-label entries off to the ``ai`` queue.
+
+    ``batch_size`` defaults to ``settings.AI_FLUSH_BATCH_SIZE`` and bounds
+    how many entries of each kind are dispatched per call; the remainder
+    stays scheduled for the next beat tick.
+
+    Returns ``{"summaries": int, "autolabels": int}``, the number of
+    tasks enqueued for each kind.
+    """
+    if batch_size is None:
+        batch_size = settings.AI_FLUSH_BATCH_SIZE
+
+    if not is_redis_backend():
+        return {"summaries": 0, "autolabels": 0}
+
+    # pylint: disable-next=import-outside-toplevel
+    from core.ai.tasks import autolabel_thread_task, summarize_thread_task
+
+    summaries = 0
+    for thread_id in _claim_due(PENDING_SUMMARY_KEY, batch_size) or []:
+        summarize_thread_task.delay(thread_id)
+        summaries += 1
+
+    autolabels = 0
+    for pair in _claim_due(PENDING_AUTOLABELS_KEY, batch_size) or []:
+        thread_id, mailbox_id = pair.split(PAIR_SEPARATOR, 1)
+        autolabel_thread_task.delay(thread_id, mailbox_id)
+        autolabels += 1
+
+    return {"summaries": summaries, "autolabels": autolabels}
+
+
+@contextmanager
+def ai_concurrency_slot():
+    """Try to hold one of the ``AI_MAX_CONCURRENCY`` AI-endpoint slots.
+
+    Yields True when a slot was acquired (and releases it on exit), False
+    when every slot is busy — the caller is expected to retry later
+    rather than pile more requests onto a saturated endpoint.
+    """
+    slot = acquire_cache_slot(
+        _SLOT_KEY_PREFIX, settings.AI_MAX_CONCURRENCY, AI_SLOT_TIMEOUT
+    )
+    if slot is None:
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        release_cache_slot(*slot)
@@ -0,0 +1,95 @@
+"""AI summary and auto-label tasks, routed to the ``ai`` queue."""
+
+# pylint: disable=unused-argument, broad-exception-caught
+
+from celery.utils.log import get_task_logger
+
+from core import models
+from core.ai.call_label import assign_label_to_thread
+from core.ai.queue import ai_concurrency_slot, process_pending_ai
+from core.ai.thread_summarizer import summarize_thread
+from core.ai.utils import (
+    get_messages_from_thread,
+    get_messages_text,
+    is_ai_summary_enabled,
+    is_auto_labels_enabled,
+)
+
+from messages.celery_app import app as celery_app
+
+logger = get_task_logger(__name__)
+
+TOKEN_THRESHOLD_FOR_SUMMARY = 200  # Minimum token count to trigger summarization
+MINIMUM_MESSAGES_FOR_SUMMARY = 3  # Minimum number of messages to trigger summarization
+
+# How long to wait before retrying when every AI slot is busy, and how
+# many times. Past that, the run is dropped: the next message on the
+# thread will schedule it again.
+_SLOT_RETRY_COUNTDOWN = 30
+_SLOT_MAX_RETRIES = 20
+
+
+@celery_app.task(bind=True)
+def process_pending_ai_task(self):
+    """Periodic task: dispatch debounced AI work that became due."""
+    return process_pending_ai()
+
+
+@celery_app.task(bind=True, max_retries=_SLOT_MAX_RETRIES)
+def summarize_thread_task(self, thread_id: str):
+    """Refresh the AI summary of a thread if it has enough content."""
+    if not is_ai_summary_enabled():
+        return {"success": False, "reason": "disabled"}
+
+    try:
+        thread = models.Thread.objects.get(id=thread_id)
+    except models.Thread.DoesNotExist:
+        return {"success": False, "reason": "not_found"}
+
+    messages = get_messages_from_thread(thread)
+    token_count = sum(tokens for _, tokens in get_messages_text(messages))
+
+    # Only summarize if the thread has enough content (more than 200 tokens or at least 3 messages)
+    if (
+        token_count < TOKEN_THRESHOLD_FOR_SUMMARY
+        and len(messages) < MINIMUM_MESSAGES_FOR_SUMMARY
+    ):
+        return {"success": True, "summarized": False}
+
+    with ai_concurrency_slot() as acquired:
+        if not acquired:
+            raise self.retry(countdown=_SLOT_RETRY_COUNTDOWN)
+        try:
+            new_summary = summarize_thread(thread)
+        except Exception as e:
+            logger.exception("Error summarizing thread %s: %s", thread_id, e)
+            return {"success": False, "error": str(e)}
+
+    if new_summary:
+        thread.summary = new_summary
+        thread.save(update_fields=["summary"])
+
+    return {"success": True, "summarized": bool(new_summary)}
+
+
+@celery_app.task(bind=True, max_retries=_SLOT_MAX_RETRIES)
+def autolabel_thread_task(self, thread_id: str, mailbox_id: str):
+    """Assign AI auto-labels of ``mailbox_id`` to a thread."""
+    if not is_auto_labels_enabled():
+        return {"success": False, "reason": "disabled"}
+
+    try:
+        thread = models.Thread.objects.get(id=thread_id)
+    except models.Thread.DoesNotExist:
+        return {"success": False, "reason": "not_found"}
+
+    with ai_concurrency_slot() as acquired:
+        if not acquired:
+            raise self.retry(countdown=_SLOT_RETRY_COUNTDOWN)
+        try:
+            assign_label_to_thread(thread, mailbox_id)
+        except Exception as e:
+            logger.exception("Error auto-labelling thread %s: %s", thread_id, e)
+            return {"success": False, "error": str(e)}
+
+    return {"success": True}
@@ -1,12 +1,15 @@
 """AI thread label classification"""
 
 import json
-from pathlib import Path
 
 from django.conf import settings
 from django.utils import timezone
 
-from core.ai.utils import get_messages_from_thread
+from core.ai.utils import (
+    get_messages_from_thread,
+    get_messages_text,
+    get_prompt_template,
+)
 from core.models import Thread
 from core.services.ai_service import AIService
 
@@ -27,18 +30,9 @@ def get_most_relevant_labels(thread: Thread, labels: list) -> list[str]:
 
     # Extract messages from the thread
     messages = get_messages_from_thread(thread)
-    messages_as_text = "\n\n".join([message.get_as_text() for message in messages])
-
-    # Load prompt templates from ai_prompts.json
-    prompts_path = Path(__file__).parent / "ai_prompts.json"
-    with open(prompts_path, encoding="utf-8") as f:
-        prompts = json.load(f)
-
-    # Get the prompt for the active language, fallback to en-us
-    prompt_template = prompts.get(active_language) or prompts.get("en-us")
-    if prompt_template is None:
-        raise ValueError(f"No AI prompt template for language '{active_language}'")
-    prompt_query = prompt_template["autolabels_query"]
+    messages_as_text = "\n\n".join(text for text, _ in get_messages_text(messages))
+
+    prompt_query = get_prompt_template(active_language)["autolabels_query"]
     prompt = prompt_query.format(
         messages=messages_as_text,
         labels=labels,
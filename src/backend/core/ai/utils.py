@@ -1,21 +1,80 @@
 """Utility functions for AI features."""
 
+import json
+from functools import lru_cache
+from pathlib import Path
 from typing import List
 
 from django.conf import settings
+from django.core.cache import cache
 
 from core.models import Message, Thread
 
+# Extracted text only depends on the message blob (immutable once the
+# message leaves draft state) and on its recipients, which don't change
+# after delivery. Keying on ``blob_id`` means a re-stored message body
+# naturally misses the cache instead of serving stale text.
+_MESSAGE_TEXT_CACHE_KEY = "ai:message_text:{message_id}:{blob_id}"
+
 
 def get_messages_from_thread(thread: Thread) -> List[Message]:
     """
     Extract messages from a thread and return them as a list of text representations using Message.get_as_text().
     """
-    messages = []
-    for message in thread.messages.all():
-        if not (message.is_draft or message.is_trashed):
-            messages.append(message)
-    return messages
+    return list(
+        thread.messages.filter(is_draft=False, is_trashed=False).select_related(
+            "sender"
+        )
+    )
+
+
+@lru_cache(maxsize=1)
+def load_prompts() -> dict:
+    """Load the prompt templates from ``ai_prompts.json`` once per process."""
+    prompts_path = Path(__file__).parent / "ai_prompts.json"
+    with open(prompts_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_prompt_template(language: str) -> dict:
+    """Return the prompt templates for ``language``, falling back to en-us."""
+    prompts = load_prompts()
+    prompt_template = prompts.get(language) or prompts.get("en-us")
+    if prompt_template is None:
+        raise ValueError(f"No AI prompt template for language '{language}'")
+    return prompt_template
+
+
+def get_messages_text(messages: List[Message]) -> List[tuple[str, int]]:
+    """Return ``(text, tokens_count)`` for each message, in order.
+
+    Parsing a message blob is the expensive part of building a prompt
+    (fetch, decrypt, decompress, MIME parse), and the same messages are
+    read again on every summary or label refresh of their thread. The
+    extracted text is cached per message in the default cache so each
+    blob is parsed at most once per ``AI_MESSAGE_TEXT_CACHE_TIMEOUT``.
+    """
+    keys = [
+        _MESSAGE_TEXT_CACHE_KEY.format(message_id=message.id, blob_id=message.blob_id)
+        for message in messages
+    ]
+    cached = cache.get_many(keys)
+
+    results = []
+    missing = {}
+    for key, message in zip(keys, messages, strict=True):
+        entry = cached.get(key)
+        if entry is None:
+            # get_as_text and get_tokens_count share the instance-level
+            # parsed-email cache, so this is a single parse per message.
+            entry = (message.get_as_text(), message.get_tokens_count())
+            missing[key] = entry
+        results.append(tuple(entry))
+
+    if missing:
+        cache.set_many(missing, timeout=settings.AI_MESSAGE_TEXT_CACHE_TIMEOUT)
+
+    return results
 
 
 ## Check if AI features are enabled based on settings
@@ -15,6 +15,7 @@ from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied
 
 from core import enums, models
+from core.mda.draft import get_buffered_draft_bodies, get_draft_body
 from core.mda.inline_images import extract_inline_images_html
 from core.services.blob_gc import schedule_for_gc
 from core.services.identity import keycloak as keycloak_service
@@ -748,6 +749,8 @@ class TreeLabelSerializer(serializers.ModelSerializer):
     children = serializers.SerializerMethodField(read_only=True)
     description = serializers.CharField(read_only=True)
     is_auto = serializers.BooleanField(read_only=True)
+    threads_count = serializers.IntegerField(read_only=True)
+    unread_threads_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = models.Label
@@ -760,6 +763,8 @@ class TreeLabelSerializer(serializers.ModelSerializer):
             "children",
             "description",
             "is_auto",
+            "threads_count",
+            "unread_threads_count",
         ]
         read_only_fields = fields
 
@@ -1070,6 +1075,15 @@ class MessageSenderUserSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class MessageListSerializer(serializers.ListSerializer):  # pylint: disable=abstract-method
+    """Serialize a list of messages, reading buffered draft bodies in one batch."""
+
+    def to_representation(self, data):
+        messages = list(data.all() if hasattr(data, "all") else data)
+        self.context["buffered_draft_bodies"] = get_buffered_draft_bodies(messages)
+        return super().to_representation(messages)
+
+
 class MessageSerializer(serializers.ModelSerializer):
     """
     Serialize messages, getting parsed details from the Message model.
@@ -1139,11 +1153,7 @@ class MessageSerializer(serializers.ModelSerializer):
     @extend_schema_field(serializers.CharField(allow_null=True))
     def get_draftBody(self, instance):  # pylint: disable=invalid-name
         """Return an arbitrary JSON object representing the draft body."""
-        return (
-            instance.draft_blob.get_content().decode("utf-8")
-            if instance.draft_blob
-            else None
-        )
+        return get_draft_body(instance, self.context.get("buffered_draft_bodies"))
 
     @extend_schema_field(AttachmentSerializer(many=True))
     def get_attachments(self, instance):
@@ -1253,6 +1263,7 @@ class MessageSerializer(serializers.ModelSerializer):
             "stmsg_headers",
         ]
         read_only_fields = fields  # Mark all as read-only
+        list_serializer_class = MessageListSerializer
 
 
 class ThreadAccessSerializer(CreateOnlyFieldsMixin, serializers.ModelSerializer):
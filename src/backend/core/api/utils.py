@@ -71,11 +71,12 @@ def generate_presigned_url(storage, *args, **kwargs):
     return s3_client.generate_presigned_url(*args, **kwargs)
 
 
-def get_attachment_from_blob_id(blob_id, user):
+def get_message_from_blob_id(blob_id, user):
     """
-    Parse a given blob ID to get the attachment data from the related message raw mime.
-    Blob IDs in the form msg_[message_id]_[attachment_number] are looked up
-    directly in the message's attachments.
+    Resolve a msg_[message_id]_[attachment_number] blob ID to its message,
+    checking the user has access to it, without parsing the raw mime.
+
+    Returns a ``(message, attachment_number)`` tuple.
     """
     if not blob_id.startswith("msg_"):
         raise ValueError("Invalid blob ID")
@@ -111,6 +112,23 @@ def get_attachment_from_blob_id(blob_id, user):
     if not message.has_attachments:
         raise models.Blob.DoesNotExist()
 
+    return message, attachment_number
+
+
+def get_attachment_from_blob_id(blob_id, user):
+    """
+    Parse a given blob ID to get the attachment data from the related message raw mime.
+    Blob IDs in the form msg_[message_id]_[attachment_number] are looked up
+    directly in the message's attachments.
+    """
+    return get_message_attachment(*get_message_from_blob_id(blob_id, user))
+
+
+def get_message_attachment(message, attachment_number):
+    """
+    Return attachment ``attachment_number`` of an already authorized message,
+    as resolved by ``get_message_from_blob_id``.
+    """
     # Parse the raw mime message to get the attachment
     parsed_email = message.get_parsed_data()
     attachments = parsed_email.get("attachments", [])
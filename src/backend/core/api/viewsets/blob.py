@@ -1,13 +1,14 @@
 """API ViewSet for handling binary data upload and download (JMAP-inspired implementation)."""
 
+import hashlib
 import logging
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseNotModified
 from django.utils.http import content_disposition_header
 
-import magic
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from rest_framework import status
@@ -24,13 +25,18 @@ from rest_framework.viewsets import ViewSet
 
 from core import enums, models
 from core.api import permissions, utils
+from core.services import blob_preview
 from core.services.blob_gc import upload_and_reserve_blob
 
-# Number of leading bytes inspected by python-magic on the preview endpoint.
-# Every format we allowlist is identified by a signature in its first few hundred
-# bytes, so 2 KiB is a comfortable margin — not a tight bound. We cap the slice
-# only to avoid handing magic the whole payload before deciding to refuse.
-_PREVIEW_MAGIC_SNIFF_BYTES = 2048
+# Metadata of ``msg_*`` attachments, kept so previews served from a
+# rendering don't re-parse the parent message. Attachments of a stored
+# message never change.
+_MSG_SOURCE_CACHE_KEY_PREFIX = "blob_preview:msg_source:"
+
+# Inline previews: originals may be re-rendered, renderings are keyed on
+# the immutable content they were made from.
+_PREVIEW_CACHE_CONTROL = "private, max-age=2592000"
+_RENDERING_CACHE_CONTROL = "private, max-age=31536000, immutable"
 
 # Define logger
 logger = logging.getLogger(__name__)
@@ -133,8 +139,8 @@ class BlobViewSet(ViewSet):
             uploaded_file = request.FILES["file"]
             content_type = uploaded_file.content_type or "application/octet-stream"
 
-            # Cap before ``.read()`` so an oversize upload never lands
-            # in worker RAM. The draft-attach flow re-checks the
+            # Cap before storing so an oversize upload is never even
+            # hashed. The draft-attach flow re-checks the
             # cumulative size; this cap is per-blob, that one per-message.
             if uploaded_file.size > settings.MAX_OUTGOING_ATTACHMENT_SIZE:
                 max_mb = settings.MAX_OUTGOING_ATTACHMENT_SIZE / (1024 * 1024)
@@ -148,12 +154,10 @@ class BlobViewSet(ViewSet):
                     status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                 )
 
-            # Read file content
-            content = uploaded_file.read()
-
             # JMAP upload step: register a reservation so the blob_id
-            # survives until the follow-up attach call.
-            blob = upload_and_reserve_blob(mailbox, content, content_type)
+            # survives until the follow-up attach call. The file is
+            # streamed into blob storage, never read whole into memory.
+            blob = upload_and_reserve_blob(mailbox, uploaded_file, content_type)
 
             # Return a response with the blob details
             # Following JMAP endpoint response structure
@@ -161,7 +165,7 @@ class BlobViewSet(ViewSet):
                 {
                     "blobId": str(blob.id),
                     "type": content_type,
-                    "size": len(content),
+                    "size": blob.size,
                     "sha256": blob.sha256.hex(),
                 },
                 status=status.HTTP_201_CREATED,
@@ -178,14 +182,21 @@ class BlobViewSet(ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-    def _resolve_blob_source(self, pk, user):
+    def _resolve_blob_source(self, pk, user, with_content=True):
         """Resolve a blob to its bytes and metadata.
 
         `msg_*` IDs are served from the parsed message attachment cache
 
+        With ``with_content=False`` the bytes are not loaded when the
+        metadata is known without them (a Blob row, or a `msg_*`
+        attachment parsed before): ``content`` is then ``None`` and
+        ``_source_content`` loads it from the resolved row or message
+        without resolving the ID again.
+
         Returns:
             A dict with keys `content` (bytes), `declared_type` (str),
-            `filename` (str), `size` (int).
+            `filename` (str), `size` (int), `sha256` (hex str) and
+            `load_content` (callable, only when `content` is None).
 
         Raises:
             ParseError: malformed `msg_*` ID.
@@ -193,18 +204,32 @@ class BlobViewSet(ViewSet):
             PermissionDenied: blob doesn't exist or user has no access
         """
         if pk.startswith("msg_"):
+            cache_key = f"{_MSG_SOURCE_CACHE_KEY_PREFIX}{pk}"
             try:
+                if not with_content:
+                    source = cache.get(cache_key)
+                    if source is not None:
+                        message, number = utils.get_message_from_blob_id(pk, user)
+                        return {
+                            **source,
+                            "content": None,
+                            "load_content": lambda: utils.get_message_attachment(
+                                message, number
+                            )["content"],
+                        }
                 attachment = utils.get_attachment_from_blob_id(pk, user)
             except ValueError as e:
                 raise ParseError("Invalid blob ID") from e
             except models.Blob.DoesNotExist as e:
                 raise NotFound("Blob not found") from e
-            return {
-                "content": attachment["content"],
+            source = {
                 "declared_type": attachment["type"],
                 "filename": attachment["name"],
                 "size": attachment["size"],
+                "sha256": hashlib.sha256(attachment["content"]).hexdigest(),
             }
+            cache.set(cache_key, source, settings.BLOB_PREVIEW_TTL)
+            return {**source, "content": attachment["content"]}
 
         try:
             blob = models.Blob.objects.get(id=pk)
@@ -221,14 +246,32 @@ class BlobViewSet(ViewSet):
             raise PermissionDenied("You do not have permission to access this blob")
         attachment_row = models.Attachment.objects.filter(blob=blob).first()
 
-        return {
-            "content": blob.get_content(),
+        source = {
+            "content": blob.get_content() if with_content else None,
             "declared_type": blob.content_type,
             "filename": (
                 attachment_row.name if attachment_row else f"blob-{blob.id}.bin"
             ),
             "size": blob.size,
+            "sha256": bytes(blob.sha256).hex(),
         }
+        if not with_content:
+            source["load_content"] = blob.get_content
+        return source
+
+    @staticmethod
+    def _source_content(source):
+        """Return the bytes of ``source``, loading them once if deferred.
+
+        Raises:
+            NotFound: the `msg_*` attachment is gone from its message.
+        """
+        if source["content"] is None:
+            try:
+                source["content"] = source.pop("load_content")()
+            except models.Blob.DoesNotExist as e:
+                raise NotFound("Blob not found") from e
+        return source["content"]
 
     @action(detail=True, methods=["get"])
     def download(self, request, pk=None):
@@ -270,10 +313,14 @@ class BlobViewSet(ViewSet):
                 description=(
                     "Inline preview of the blob. The Content-Type is the MIME "
                     "type detected server-side and is guaranteed to belong to "
-                    "``PREVIEWABLE_MIME_TYPES``."
+                    "``PREVIEWABLE_MIME_TYPES``. Large images are served as a "
+                    "downscaled ``image/webp`` rendering once one has been made."
                 ),
                 response=OpenApiTypes.BINARY,
             ),
+            304: OpenApiResponse(
+                description="The rendering matches the ETag sent in If-None-Match"
+            ),
             400: OpenApiResponse(description="Invalid blob ID"),
             403: OpenApiResponse(
                 description="Forbidden - User does not have permission to preview this blob"
@@ -310,17 +357,25 @@ class BlobViewSet(ViewSet):
         contract that lets the frontend render the response inline: any byte
         we send back has been re-classified server-side as one of the safe
         previewable types.
+
+        Large images are rendered once per content in the background (see
+        ``core.services.blob_preview``); once the rendering exists it is
+        served instead of the original, after the same checks, with an
+        ``ETag`` and long-lived cache headers.
         """
         try:
-            source = self._resolve_blob_source(pk, request.user)
-            content = source["content"]
-            declared_type = source["declared_type"]
+            source = self._resolve_blob_source(pk, request.user, with_content=False)
+            preview = blob_preview.get_preview(source["sha256"])
+            if preview is not None:
+                # Sniffed from the very same bytes when the preview was
+                # made: no need to load them again.
+                detected_type = preview.source_type
+            else:
+                detected_type = blob_preview.sniff(self._source_content(source))
 
             # Normalize the declared Content-Type (e.g. image/PNG; charset=binary)
+            declared_type = source["declared_type"]
             declared_media_type = declared_type.partition(";")[0].strip().lower()
-            detected_type = magic.from_buffer(
-                content[:_PREVIEW_MAGIC_SNIFF_BYTES], mime=True
-            ).lower()
 
             # A preview is served only when the detected bytes are an
             # allowlisted type AND match the declared Content-Type. Anything
@@ -356,23 +411,19 @@ class BlobViewSet(ViewSet):
                     status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
                 )
 
-            response = HttpResponse(content, content_type=detected_type)
-            response["Content-Disposition"] = content_disposition_header(
-                False, source["filename"]
-            )
-            response["Content-Length"] = source["size"]
-            response["Cache-Control"] = "private, max-age=2592000"
-            # Defense in depth on top of the global SECURE_CONTENT_TYPE_NOSNIFF.
-            response["X-Content-Type-Options"] = "nosniff"
-            response["Referrer-Policy"] = "no-referrer"
-            # Strict CSP: the response is expected to be loaded only via
-            # <img>, <video>, <audio> or fetch() (PDF.js) — never as a
-            # top-level document with scripts.
-            response["Content-Security-Policy"] = (
-                "default-src 'none'; img-src 'self' blob: data:; "
-                "media-src 'self' blob:; sandbox"
+            if preview is None:
+                blob_preview.schedule_preview(
+                    pk, source["sha256"], detected_type, source["size"]
+                )
+            elif preview.blob is not None:
+                return self._rendering_response(request, preview.blob, source)
+
+            return self._inline_response(
+                self._source_content(source),
+                detected_type,
+                source["filename"],
+                _PREVIEW_CACHE_CONTROL,
             )
-            return response
 
         except APIException:
             # Let DRF convert ParseError / NotFound / PermissionDenied raised by
@@ -385,3 +436,48 @@ class BlobViewSet(ViewSet):
                 {"error": "Error previewing file"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+    def _rendering_response(self, request, blob, source):
+        """Serve the preview rendering ``blob`` made from ``source``.
+
+        The rendering is addressed by its own sha256: a revalidation
+        matching it is answered without loading the content.
+        """
+        etag = f'"{bytes(blob.sha256).hex()}"'
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            response["Cache-Control"] = _RENDERING_CACHE_CONTROL
+            return response
+
+        content = blob.get_content()
+        # Made by us, but held to the same contract as the originals.
+        if blob_preview.sniff(content) != blob_preview.PREVIEW_MIME_TYPE:
+            raise ValueError(f"Preview rendering {blob.id} is not a WebP image")
+        response = self._inline_response(
+            content,
+            blob_preview.PREVIEW_MIME_TYPE,
+            source["filename"],
+            _RENDERING_CACHE_CONTROL,
+        )
+        response["ETag"] = etag
+        return response
+
+    @staticmethod
+    def _inline_response(content, content_type, filename, cache_control):
+        """Inline preview response with the hardening headers set."""
+        response = HttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = content_disposition_header(False, filename)
+        response["Content-Length"] = len(content)
+        response["Cache-Control"] = cache_control
+        # Defense in depth on top of the global SECURE_CONTENT_TYPE_NOSNIFF.
+        response["X-Content-Type-Options"] = "nosniff"
+        response["Referrer-Policy"] = "no-referrer"
+        # Strict CSP: the response is expected to be loaded only via
+        # <img>, <video>, <audio> or fetch() (PDF.js) — never as a
+        # top-level document with scripts.
+        response["Content-Security-Policy"] = (
+            "default-src 'none'; img-src 'self' blob: data:; "
+            "media-src 'self' blob:; sandbox"
+        )
+        return response
@@ -244,10 +244,11 @@ class CalendarConflictsView(CalDAVChannelMixin, APIView):
     the user is waiting for the result before interacting with the UI.
 
     Throttled per user under the ``caldav_conflicts`` scope. Each call
-    PROPFINDs the home set and REPORTs every calendar in it, so a tight
-    polling loop both stresses the CalDAV server and ties up request
-    workers; a 30/min cap is generous for legitimate UI use (one call
-    per opened invite) and bounds the cost of a runaway script.
+    REPORTs every calendar of the user (the home set and calendar list are
+    cached for ``CALDAV_DISCOVERY_CACHE_TTL``), so a tight polling loop
+    both stresses the CalDAV server and ties up request workers; a 30/min
+    cap is generous for legitimate UI use (one call per opened invite) and
+    bounds the cost of a runaway script.
     """
 
     permission_classes = [HasAccessToMailbox]
@@ -1,6 +1,7 @@
 """API ViewSet for Contact model."""
 
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import BooleanField, Case, F, Q, Value, When
 
 from drf_spectacular.utils import OpenApiParameter, OpenApiTypes, extend_schema
 from rest_framework import mixins, status, viewsets
@@ -10,6 +11,9 @@ from core import models
 
 from .. import permissions, serializers
 
+# Trigram indexes only help substring searches of at least this many characters.
+MIN_SUBSTRING_LENGTH = 3
+
 
 class ContactViewSet(
     viewsets.GenericViewSet, mixins.ListModelMixin, mixins.RetrieveModelMixin
@@ -55,22 +59,20 @@ class ContactViewSet(
         For a mailbox, it returns all contacts in the mailbox and all contacts
         in the same domain as the mailbox.
 
+        Results are ranked for autocomplete: contacts whose name or email
+        starts with the query first, then the most recently written to, then
+        by name. At most ``CONTACTS_AUTOCOMPLETE_LIMIT`` contacts are returned.
+
         Query parameters:
         - mailbox_id: Optional UUID to filter contacts by mailbox
         - q: Optional search query for name or email (case insensitive)
         """
-        # base queryset will be used to store contacts of the selected mailbox
         queryset = self.get_queryset()
 
-        # extended_queryset will be used to store contacts from the same domain
-        # as the selected mailbox
-        extended_queryset = models.Contact.objects.none()
-
         # filter by search query on name and email (multi-word)
-        search_query = request.query_params.get("q", "")
-        queryset = (
-            self.filter_by_search(queryset, search_query) if search_query else queryset
-        )
+        search_query = request.query_params.get("q", "").strip()
+        search_words = search_query.split()
+        queryset = self.filter_by_search(queryset, search_words)
 
         # Filter by mailbox if specified
         if mailbox_id := request.query_params.get("mailbox_id"):
@@ -86,43 +88,85 @@ class ContactViewSet(
                     {"detail": "Invalid mailbox_id or access denied."},
                     status=status.HTTP_403_FORBIDDEN,
                 )
+            mailbox = mailbox_access.mailbox
 
-            # get all contacts of the selected mailbox
-            queryset = queryset.filter(mailbox=mailbox_access.mailbox)
-
-            # get all contacts with same domain as the selected mailbox
+            # contacts of the selected mailbox, plus the contacts of the
+            # mailboxes of its domain that the mailbox doesn't already know
             domain_contacts_ids = models.Mailbox.objects.filter(
-                domain=mailbox_access.mailbox.domain
-            ).values_list("contact__id", flat=True)
-            extended_queryset = models.Contact.objects.filter(
-                id__in=domain_contacts_ids
-            ).select_related("mailbox", "mailbox__domain")
-
-            # some contacts from the same domain may appear in the contacts
-            # of the selected mailbox, so we need to exclude them
-            extended_queryset = extended_queryset.exclude(
-                email__in=queryset.values_list("email", flat=True)
+                domain=mailbox.domain
+            ).values("contact_id")
+            mailbox_emails = self.filter_by_search(
+                models.Contact.objects.filter(mailbox=mailbox), search_words
+            ).values("email")
+            queryset = self.filter_by_search(
+                models.Contact.objects.select_related("mailbox", "mailbox__domain"),
+                search_words,
+            ).filter(
+                Q(mailbox=mailbox)
+                | (Q(id__in=domain_contacts_ids) & ~Q(email__in=mailbox_emails))
             )
-            # apply search filter to extended queryset
-            if search_query:
-                extended_queryset = self.filter_by_search(
-                    extended_queryset, search_query
-                )
 
-        # finally merge base and extended querysets
-        queryset = queryset.union(extended_queryset).order_by("name", "email")
+        queryset = self.rank(queryset, search_words)[
+            : settings.CONTACTS_AUTOCOMPLETE_LIMIT
+        ]
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
-    def filter_by_search(self, queryset, search_query):
-        """Search contacts by name or email (case insensitive)."""
-        search_words = search_query.strip().split()
+    @staticmethod
+    def filter_by_search(queryset, search_words):
+        """Search contacts by name or email (case and accent insensitive).
+
+        Every word must appear in the name or the email. Lookups go through
+        the trigram indexes on the normalized columns. Words shorter than a
+        trigram only match the start of the email or of a word of the name,
+        which those indexes can still serve.
+        """
+        if not search_words:
+            return queryset
+        queryset = queryset.annotate(
+            search_name=models.normalize_for_search(F("name")),
+            search_email=models.normalize_for_search(F("email")),
+        )
+        search_filters = Q()
+        for word in search_words:
+            term = models.normalize_for_search(Value(word))
+            if len(word) < MIN_SUBSTRING_LENGTH:
+                search_filters &= (
+                    Q(search_name__startswith=term)
+                    | Q(
+                        search_name__contains=models.normalize_for_search(
+                            Value(f" {word}")
+                        )
+                    )
+                    | Q(search_email__startswith=term)
+                )
+            else:
+                search_filters &= Q(search_name__contains=term) | Q(
+                    search_email__contains=term
+                )
+        return queryset.filter(search_filters)
+
+    @staticmethod
+    def rank(queryset, search_words):
+        """Order contacts by prefix match, then recency of use, then name."""
+        ordering = [
+            F("last_used_at").desc(nulls_last=True),
+            "name",
+            "email",
+        ]
         if search_words:
-            search_filters = Q()
-            for word in search_words:
-                word_filter = Q(name__unaccent__icontains=word) | Q(
-                    email__unaccent__icontains=word
+            prefix = models.normalize_for_search(Value(" ".join(search_words)))
+            first_word = models.normalize_for_search(Value(search_words[0]))
+            queryset = queryset.annotate(
+                prefix_match=Case(
+                    When(
+                        Q(search_name__startswith=prefix)
+                        | Q(search_email__startswith=first_word),
+                        then=Value(True),
+                    ),
+                    default=Value(False),
+                    output_field=BooleanField(),
                 )
-                search_filters &= word_filter
-            queryset = queryset.filter(search_filters)
-        return queryset
+            )
+            ordering.insert(0, F("prefix_match").desc())
+        return queryset.order_by(*ordering)
@@ -84,6 +84,14 @@ logger = logging.getLogger(__name__)
                 allow_null=True,
                 help_text="ID of the signature template to use",
             ),
+            "autosave": drf_serializers.BooleanField(
+                required=False,
+                default=False,
+                help_text=(
+                    "Periodic save of a draft being edited: the body may be "
+                    "buffered and stored later (updates only)"
+                ),
+            ),
         },
     ),
     responses={
@@ -117,6 +125,7 @@ logger = logging.getLogger(__name__)
     For updating an existing draft:
     - Include messageId of the draft to update
     - Only the fields that are provided will be updated
+    - Set autosave for periodic saves while the user is typing
 
     At least one of draftBody must be provided.
 
@@ -188,6 +197,7 @@ class DraftMessageView(APIView):
         - bcc: list[str] (optional)
         - attachmentIds: list[str] (optional, IDs of previously uploaded blobs)
         - signatureId: str (optional, ID of the signature template to use)
+        - autosave: bool (optional, periodic save while editing)
         Return updated draft message
     """
 
@@ -292,14 +302,16 @@ class DraftMessageView(APIView):
                 "Draft message not found, is not a draft, or access denied."
             ) from exc
 
-        # Update draft using the new function
+        # Update draft using the new function (also refreshes the thread
+        # stats when needed)
         updated_message = update_draft(
-            sender_mailbox, message, request.data, user=request.user
+            sender_mailbox,
+            message,
+            request.data,
+            user=request.user,
+            autosave=request.data.get("autosave") is True,
         )
 
-        # Update thread stats
-        updated_message.thread.update_stats()
-
         # Re-query with read-state annotation for accurate is_unread
         updated_message = models.Message.objects.with_read_state(sender_mailbox.id).get(
             id=updated_message.id
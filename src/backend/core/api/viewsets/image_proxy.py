@@ -15,6 +15,7 @@ from rest_framework.viewsets import ViewSet
 
 from core import enums, models
 from core.api import permissions
+from core.services import image_proxy
 from core.services.ssrf import SSRFSafeSession, SSRFValidationError
 
 logger = logging.getLogger(__name__)
@@ -33,13 +34,27 @@ class ImageProxySuspiciousResponse(HttpResponse):
         )
 
 
+def image_response(content: bytes, mime_type: str) -> HttpResponse:
+    """Serve a proxied image, locked down so it can't run anything."""
+    return HttpResponse(
+        content,
+        content_type=mime_type,
+        headers={
+            "Cache-Control": f"public, max-age={settings.IMAGE_PROXY_CACHE_TTL}",
+            "Content-Security-Policy": "default-src 'none'",
+            "Permissions-Policy": "()",
+        },
+    )
+
+
 class ImageProxyViewSet(ViewSet):
     """
     ViewSet for proxying external images to protect user privacy.
 
     Images are fetched on-demand from external sources and served through
     the application. This prevents tracking pixels from leaking user IP
-    addresses and browsing behavior to external servers.
+    addresses and browsing behavior to external servers. Fetched images
+    are kept in a server-side cache (see ``core.services.image_proxy``).
     """
 
     permission_classes = [permissions.IsAuthenticated]
@@ -104,6 +119,10 @@ class ImageProxyViewSet(ViewSet):
 
         url = unquote(url)
 
+        cached = image_proxy.get_cached_image(url)
+        if cached is not None:
+            return image_response(*cached)
+
         try:
             response = SSRFSafeSession().get(
                 url,
@@ -173,7 +192,7 @@ class ImageProxyViewSet(ViewSet):
             # Last check the real file size of the image
             # Stream content in chunks to prevent memory exhaustion
             total_size = len(head_chunk)
-            image_content = head_chunk
+            chunks = [head_chunk]
             size_exceeded = total_size > settings.IMAGE_PROXY_MAX_SIZE
 
             for chunk in content_iter:
@@ -187,7 +206,7 @@ class ImageProxyViewSet(ViewSet):
                     size_exceeded = True
                     break
 
-                image_content += chunk
+                chunks.append(chunk)
 
             if size_exceeded:
                 logger.warning(
@@ -198,15 +217,14 @@ class ImageProxyViewSet(ViewSet):
                     status=http_status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                 )
 
-            return HttpResponse(
+            image_content = b"".join(chunks)
+            image_proxy.store_image(
+                url,
                 image_content,
-                content_type=mime_type,
-                headers={
-                    "Cache-Control": f"public, max-age={settings.IMAGE_PROXY_CACHE_TTL}",
-                    "Content-Security-Policy": "default-src 'none'",
-                    "Permissions-Policy": "()",
-                },
+                mime_type,
+                ttl=image_proxy.cache_ttl(response.headers),
             )
+            return image_response(image_content, mime_type)
 
         except SSRFValidationError:
             logger.warning("Blocked unsafe URL: %s", url)
@@ -3,7 +3,7 @@
 
 import uuid
 
-from django.db.models import Exists, OuterRef
+from django.db.models import Count, Exists, F, OuterRef, Q
 from django.shortcuts import get_object_or_404
 from django.utils.text import slugify
 
@@ -83,6 +83,8 @@ class LabelViewSet(
         The response returns labels in a tree structure where:
         - Labels are ordered alphabetically by name
         - Each label includes its children (sub-labels)
+        - Each label includes its number of threads and unread threads, not
+          counting trashed and spam threads
         - The hierarchy is determined by the label's name (e.g., "Inbox/Important" is a child of "Inbox")
 
         You can filter labels by mailbox using the mailbox_id query parameter.
@@ -106,16 +108,17 @@ class LabelViewSet(
     )
     def list(self, request, *args, **kwargs):
         """List labels in a hierarchical structure, ordered alphabetically by name."""
-        queryset = self.get_queryset().order_by("slug")
+        queryset = self.get_queryset()
+        labels = sorted(queryset, key=lambda label: label.slug)
+        counts = self.get_thread_counts(queryset) if labels else {}
 
-        # Get all labels and build the tree structure
-        labels = list(queryset)
+        # Labels are sorted by slug once, so children and roots are appended
+        # in order. Parents are looked up by (mailbox, name) as names are
+        # only unique within a mailbox.
         label_dict = {}
-        root_labels = []
-
-        # First pass: create dictionary of all labels
         for label in labels:
-            label_dict[label.id] = {
+            total, unread = counts.get(label.id, (0, 0))
+            label_dict[label.mailbox_id, label.name] = {
                 "id": str(label.id),
                 "name": label.name,
                 "slug": label.slug,
@@ -124,40 +127,50 @@ class LabelViewSet(
                 "children": [],
                 "description": label.description,
                 "is_auto": label.is_auto,
+                "threads_count": total,
+                "unread_threads_count": unread,
             }
 
-        # Second pass: build the tree structure
+        root_labels = []
         for label in labels:
-            label_data = label_dict[label.id]
-            parts = label.name.split("/")
-
-            if len(parts) == 1:
-                # This is a root label
-                root_labels.append(label_data)
+            label_data = label_dict[label.mailbox_id, label.name]
+            parent_name, separator, _ = label.name.rpartition("/")
+            parent = label_dict.get((label.mailbox_id, parent_name))
+            if separator and parent is not None:
+                parent["children"].append(label_data)
             else:
-                # This is a child label
-                parent_name = "/".join(parts[:-1])
-                # Find parent label
-                parent_found = False
-                for potential_parent in labels:
-                    if potential_parent.name == parent_name:
-                        label_dict[potential_parent.id]["children"].append(label_data)
-                        parent_found = True
-                        break
-
-                # If parent not found, treat as root label (orphaned child)
-                if not parent_found:
-                    root_labels.append(label_data)
-
-        # Sort children alphabetically by name
-        for label_data in label_dict.values():
-            label_data["children"].sort(key=lambda x: x["slug"])
-
-        # Sort root labels alphabetically
-        root_labels.sort(key=lambda x: x["slug"])
+                # Root label, or orphaned child whose parent doesn't exist
+                root_labels.append(label_data)
 
         return Response(root_labels)
 
+    @staticmethod
+    def get_thread_counts(queryset):
+        """Return ``{label_id: (threads, unread threads)}`` in one grouped query.
+
+        Counts match the thread stats of a label view: trashed and spam
+        threads are left out, and read state is the one of the label's
+        mailbox.
+        """
+        unread = Q(
+            thread__accesses__read_at__isnull=True,
+            thread__messaged_at__isnull=False,
+        ) | Q(thread__accesses__read_at__lt=F("thread__messaged_at"))
+        rows = (
+            models.Label.threads.through.objects.filter(
+                label_id__in=queryset.order_by().values("id"),
+                thread__accesses__mailbox_id=F("label__mailbox_id"),
+                thread__is_trashed=False,
+                thread__is_spam=False,
+            )
+            .values("label_id")
+            .annotate(
+                total=Count("thread_id"), unread=Count("thread_id", filter=unread)
+            )
+            .values_list("label_id", "total", "unread")
+        )
+        return {label_id: (total, unread) for label_id, total, unread in rows}
+
     @extend_schema(
         request=serializers.LabelSerializer,
         responses={
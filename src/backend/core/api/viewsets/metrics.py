@@ -4,8 +4,7 @@ from collections import defaultdict
 from datetime import timedelta
 
 from django.conf import settings
-from django.db.models import Count, OuterRef, Subquery, Sum, Value
-from django.db.models.expressions import RawSQL
+from django.db.models import Count, Sum, Value
 from django.db.models.functions import Coalesce
 from django.utils import timezone
 
@@ -16,15 +15,8 @@ from rest_framework.views import APIView
 from core.api.authentication import ChannelApiKeyAuthentication
 from core.api.permissions import IsGlobalChannelMixin, channel_scope
 from core.enums import ChannelApiKeyScope
-from core.models import (
-    Attachment,
-    Blob,
-    Mailbox,
-    MailboxAccess,
-    MailDomain,
-    Message,
-    MessageTemplate,
-)
+from core.models import Mailbox, MailboxAccess, MailDomain
+from core.services.storage_usage import storage_used_expression
 
 # name: threshold (in days)
 ACTIVE_USER_METRICS = {
@@ -97,88 +89,13 @@ class MailDomainUsersMetricsApiView(IsGlobalChannelMixin, APIView):
                     metrics[group_value][group_key] = group_value
                 metrics[group_value]["metrics"][metric] = result["count"]
 
-        # Compute storage_used per domain in a single query.
+        # Storage used per domain, maintained by core.services.storage_usage.
         # When multiple mailboxes in the same domain share a thread,
         # messages and blobs are counted once per domain.
-        overhead = settings.METRICS_STORAGE_USED_OVERHEAD_BY_MESSAGE
-
-        # Count(distinct=True) deduplicates by PK — correct for message counts.
-        msg_count_subquery = Subquery(
-            Message.objects.filter(thread__accesses__mailbox__domain=OuterRef("pk"))
-            .order_by()
-            .values("thread__accesses__mailbox__domain")
-            .annotate(cnt=Count("id", distinct=True))
-            .values("cnt")[:1]
-        )
-
-        # For blob sizes, Sum(distinct=True) deduplicates by *value* (wrong),
-        # and .distinct() before .values().annotate() puts DISTINCT on the
-        # aggregated output (also wrong).  Use a raw subselect that first
-        # deduplicates blob rows by PK, then sums.
-        mime_size_subquery = RawSQL(
-            """
-            SELECT COALESCE(SUM(sub.size_compressed), 0)
-            FROM (
-                SELECT DISTINCT b.id, b.size_compressed
-                FROM messages_blob b
-                JOIN messages_message m ON m.blob_id = b.id
-                JOIN messages_thread t ON m.thread_id = t.id
-                JOIN messages_threadaccess ta ON ta.thread_id = t.id
-                JOIN messages_mailbox mb ON ta.mailbox_id = mb.id
-                WHERE mb.domain_id = messages_maildomain.id
-            ) sub
-            """,
-            (),
-        )
-
-        draft_size_subquery = RawSQL(
-            """
-            SELECT COALESCE(SUM(sub.size_compressed), 0)
-            FROM (
-                SELECT DISTINCT b.id, b.size_compressed
-                FROM messages_blob b
-                JOIN messages_message m ON m.draft_blob_id = b.id
-                JOIN messages_thread t ON m.thread_id = t.id
-                JOIN messages_threadaccess ta ON ta.thread_id = t.id
-                JOIN messages_mailbox mb ON ta.mailbox_id = mb.id
-                WHERE mb.domain_id = messages_maildomain.id
-            ) sub
-            """,
-            (),
-        )
-
-        att_size_subquery = Subquery(
-            Attachment.objects.filter(mailbox__domain=OuterRef("pk"))
-            .order_by()
-            .values("mailbox__domain")
-            .annotate(total=Sum("blob__size_compressed"))
-            .values("total")[:1]
-        )
-
-        template_size_subquery = Subquery(
-            MessageTemplate.objects.filter(
-                maildomain=OuterRef("pk"), blob__isnull=False
-            )
-            .order_by()
-            .values("maildomain")
-            .annotate(total=Sum("blob__size_compressed"))
-            .values("total")[:1]
-        )
-
         for domain in MailDomain.objects.annotate(
-            msg_count=Coalesce(msg_count_subquery, Value(0)),
-            mime_size=mime_size_subquery,
-            draft_size=draft_size_subquery,
-            att_size=Coalesce(att_size_subquery, Value(0)),
-            template_size=Coalesce(template_size_subquery, Value(0)),
+            storage_used=storage_used_expression()
         ):
-            storage = (
-                domain.msg_count * overhead
-                + domain.mime_size
-                + domain.draft_size
-                + domain.att_size
-                + domain.template_size
-            )
+            storage = domain.storage_used
 
             if group_by_custom_attribute_key:
                 group_value = domain.custom_attributes.get(
@@ -217,57 +134,8 @@ class MailboxUsageMetricsApiView(IsGlobalChannelMixin, APIView):
 
         Returns per-mailbox storage usage computed as:
         storage_used = messages_count * OVERHEAD + sum(blobs.size_compressed)
+        from the rows maintained by ``core.services.storage_usage``.
         """
-        overhead = settings.METRICS_STORAGE_USED_OVERHEAD_BY_MESSAGE
-
-        # Use subqueries to avoid cross-product issues.
-        # All blob sizes are counted through their message/attachment
-        # relationships (via ThreadAccess), NOT through blob.mailbox.
-
-        messages_count_subquery = Subquery(
-            Message.objects.filter(thread__accesses__mailbox=OuterRef("pk"))
-            .order_by()
-            .values("thread__accesses__mailbox")
-            .annotate(cnt=Count("id", distinct=True))
-            .values("cnt")[:1]
-        )
-
-        # Raw MIME blobs linked via Message.blob
-        mime_blobs_subquery = Subquery(
-            Blob.objects.filter(messages__thread__accesses__mailbox=OuterRef("pk"))
-            .order_by()
-            .values("messages__thread__accesses__mailbox")
-            .annotate(total=Sum("size_compressed"))
-            .values("total")[:1]
-        )
-
-        # Draft body blobs linked via Message.draft_blob
-        draft_blobs_subquery = Subquery(
-            Blob.objects.filter(drafts__thread__accesses__mailbox=OuterRef("pk"))
-            .order_by()
-            .values("drafts__thread__accesses__mailbox")
-            .annotate(total=Sum("size_compressed"))
-            .values("total")[:1]
-        )
-
-        # Attachment blobs linked via Attachment.mailbox
-        attachment_blobs_subquery = Subquery(
-            Attachment.objects.filter(mailbox=OuterRef("pk"))
-            .order_by()
-            .values("mailbox")
-            .annotate(total=Sum("blob__size_compressed"))
-            .values("total")[:1]
-        )
-
-        # Template/signature blobs linked via MessageTemplate.mailbox
-        template_blobs_subquery = Subquery(
-            MessageTemplate.objects.filter(mailbox=OuterRef("pk"), blob__isnull=False)
-            .order_by()
-            .values("mailbox")
-            .annotate(total=Sum("blob__size_compressed"))
-            .values("total")[:1]
-        )
-
         queryset = Mailbox.objects.select_related("domain")
 
         # Apply filters
@@ -309,13 +177,7 @@ class MailboxUsageMetricsApiView(IsGlobalChannelMixin, APIView):
                 status=400,
             )
 
-        storage_expr = (
-            Coalesce(messages_count_subquery, Value(0)) * overhead
-            + Coalesce(mime_blobs_subquery, Value(0))
-            + Coalesce(draft_blobs_subquery, Value(0))
-            + Coalesce(attachment_blobs_subquery, Value(0))
-            + Coalesce(template_blobs_subquery, Value(0))
-        )
+        storage_expr = storage_used_expression()
 
         # Build results based on account_type
         if account_type == "organization":
@@ -18,6 +18,7 @@ from rest_framework.views import APIView
 
 from core import enums, models
 from core.api.viewsets.task import register_task_owner
+from core.mda.draft import discard_draft_autosave
 from core.mda.outbound import prepare_outbound_message
 from core.mda.outbound_tasks import send_message_task
 
@@ -155,6 +156,9 @@ class SendMessageView(APIView):
 
             register_task_owner(task_id, request.user.id)
 
+            # The draft body is dropped on send: so is its autosave buffer.
+            discard_draft_autosave(message.id)
+
             # Dispatch only once the message's finalized state is durable.
             transaction.on_commit(
                 lambda: send_message_task.apply_async(
@@ -3,7 +3,18 @@
 
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Count, Exists, OuterRef, Prefetch, Q
+from django.db.models import (
+    BooleanField,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    F,
+    FilteredRelation,
+    OuterRef,
+    Prefetch,
+    Q,
+    Value,
+)
 from django.db.models.functions import Coalesce
 
 import rest_framework as drf
@@ -22,6 +33,7 @@ from rest_framework.response import Response
 from core import enums, models
 from core.ai.thread_summarizer import summarize_thread
 from core.mda.utils import thread_snippet
+from core.services import thread_events as thread_events_service
 from core.services.search import search_threads
 
 from .. import permissions, serializers
@@ -165,9 +177,13 @@ class ThreadViewSet(
         """Attach permission/state annotations and prefetches expected by ThreadSerializer.
 
         Shared between the regular DB queryset and the OpenSearch fallback so
-        both code paths always expose the same fields (e.g. ``events_count``,
-        ``assigned_users``), avoiding silent divergence in the serialized
-        payload.
+        both code paths always expose the same fields (e.g. ``assigned_users``),
+        avoiding silent divergence in the serialized payload.
+
+        Mention and assignment flags come from the denormalized
+        ``Thread.has_assignees`` and ``ThreadUserState`` (joined on its
+        unique (user, thread) key), and ``events_count`` is a column, so
+        the query needs neither a GROUP BY nor a subquery per flag.
         """
         can_edit_qs = models.ThreadAccess.objects.filter(
             thread=OuterRef("pk"),
@@ -179,37 +195,19 @@ class ThreadViewSet(
             can_edit_qs = can_edit_qs.filter(mailbox_id=mailbox_id)
 
         return queryset.annotate(
+            _user_state=FilteredRelation(
+                "user_states", condition=Q(user_states__user=user)
+            ),
             _has_unread=models.ThreadAccess.thread_unread_filter(user, mailbox_id),
             _has_starred=models.ThreadAccess.thread_starred_filter(user, mailbox_id),
-            _has_unread_mention=Exists(
-                models.UserEvent.objects.filter(
-                    thread=OuterRef("pk"),
-                    user=user,
-                    type=enums.UserEventTypeChoices.MENTION,
-                    read_at__isnull=True,
-                )
+            _has_unread_mention=Coalesce(
+                F("_user_state__has_unread_mention"), Value(False)
             ),
-            _has_mention=Exists(
-                models.UserEvent.objects.filter(
-                    thread=OuterRef("pk"),
-                    user=user,
-                    type=enums.UserEventTypeChoices.MENTION,
-                )
-            ),
-            _has_assigned_to_me=Exists(
-                models.UserEvent.objects.filter(
-                    thread=OuterRef("pk"),
-                    user=user,
-                    type=enums.UserEventTypeChoices.ASSIGN,
-                )
-            ),
-            _has_unassigned=~Exists(
-                models.UserEvent.objects.filter(
-                    thread=OuterRef("pk"),
-                    type=enums.UserEventTypeChoices.ASSIGN,
-                )
+            _has_mention=Coalesce(F("_user_state__has_mention"), Value(False)),
+            _has_assigned_to_me=Coalesce(F("_user_state__is_assigned"), Value(False)),
+            _has_unassigned=ExpressionWrapper(
+                Q(has_assignees=False), output_field=BooleanField()
             ),
-            events_count=Count("events", distinct=True),
             _can_edit=Exists(can_edit_qs),
         ).prefetch_related(
             # Feeds ThreadSerializer.get_assigned_users without N+1. UserEvent
@@ -991,11 +989,12 @@ class ThreadViewSet(
                     thread=new_thread
                 )
                 # Keep the `UserEvent.thread` denormalization in sync with
-                # `thread_event.thread` — the ThreadViewSet annotations rely
-                # on filtering UserEvent by `thread` directly to avoid a JOIN.
+                # `thread_event.thread`, then the event state of both threads.
                 models.UserEvent.objects.filter(thread_event_id__in=event_ids).update(
                     thread=new_thread
                 )
+                thread_events_service.refresh_thread_state(old_thread)
+                thread_events_service.refresh_thread_state(new_thread)
 
             # Recalculate old thread snippet from its most recent remaining message
             last_remaining = old_thread.messages.order_by("-created_at").first()
@@ -3,7 +3,6 @@
 from django.db import transaction
 from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
 
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from rest_framework import mixins, status, viewsets
@@ -88,6 +87,10 @@ class ThreadEventViewSet(
         # that changes the mentions list adds/removes notifications.
         thread_events_service.sync_im_mentions(thread_event=thread_event)
 
+    def perform_destroy(self, instance):
+        """Delete through the service so the thread state stays in sync."""
+        thread_events_service.delete_thread_event(thread_event=instance)
+
     @extend_schema(
         request=None,
         responses={
@@ -104,12 +107,9 @@ class ThreadEventViewSet(
         missing event yields 404.
         """
         thread_event = self.get_object()
-        models.UserEvent.objects.filter(
-            user=request.user,
-            thread_event=thread_event,
-            type=enums.UserEventTypeChoices.MENTION,
-            read_at__isnull=True,
-        ).update(read_at=timezone.now())
+        thread_events_service.read_mentions(
+            thread_event=thread_event, user=request.user
+        )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @transaction.atomic
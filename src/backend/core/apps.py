@@ -27,6 +27,9 @@ class CoreConfig(AppConfig):
 
             REGISTRY.register(CustomDBPrometheusMetricsCollector())
 
+            # Connect the Celery task instrumentation signal handlers
+            import core.task_metrics
+
         # Import signal handlers to register them
         # pylint: disable=unused-import, import-outside-toplevel
         import core.signals  # noqa
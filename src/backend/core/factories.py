@@ -196,6 +196,7 @@ class ThreadEventFactory(factory.django.DjangoModelFactory):
                 thread_events_service._delete_user_event_assigns(  # noqa: SLF001
                     self.thread, assignees, context=str(self.id)
                 )
+        thread_events_service.refresh_thread_state(self.thread)
 
 
 class UserEventFactory(factory.django.DjangoModelFactory):
@@ -203,6 +204,7 @@ class UserEventFactory(factory.django.DjangoModelFactory):
 
     class Meta:
         model = models.UserEvent
+        skip_postgeneration_save = True
 
     user = factory.SubFactory(UserFactory)
     thread = factory.SubFactory(ThreadFactory)
@@ -212,6 +214,17 @@ class UserEventFactory(factory.django.DjangoModelFactory):
     )
     type = UserEventTypeChoices.MENTION
 
+    @factory.post_generation
+    def _refresh_thread_state(self, create, _extracted, **_kwargs):
+        """Mirror the denormalized state production code maintains."""
+        # pylint: disable=import-outside-toplevel
+        from core.services import thread_events as thread_events_service
+
+        if create:
+            thread_events_service.refresh_thread_state(
+                self.thread, user_ids=[self.user_id]
+            )
+
 
 class ContactFactory(factory.django.DjangoModelFactory):
     """A factory to random contacts for testing purposes."""
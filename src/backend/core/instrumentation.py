@@ -0,0 +1,109 @@
+"""Per-unit-of-work resource counters (SQL, Redis, OpenSearch, blob reads).
+
+A unit of work (an HTTP request) opens a scope with
+``collect()``; low-level call sites report what they consume with
+``record(name, amount)``. Counters live in a ``ContextVar``, so
+concurrent requests never mix and ``record`` is a cheap no-op when no
+scope is open (management commands, shell, tests).
+
+Call sites:
+
+* SQL: ``query_timer`` is installed as a connection execute wrapper by
+  ``collect(track_db=True)``.
+* Redis: ``InstrumentedRedis`` is the ``REDIS_CLIENT_CLASS`` of the
+  default cache, so both ``django.core.cache`` and ``get_redis_client``
+  traffic is counted. A pipeline counts as one call (one round trip).
+* OpenSearch: ``InstrumentedTransport`` is the transport class of the
+  search client.
+* Blob reads: ``Blob.get_content`` records the decoded size.
+"""
+
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+from opensearchpy import Transport
+from redis import Redis
+from redis.client import Pipeline
+
+DB_QUERIES = "db_queries"
+DB_SECONDS = "db_seconds"
+REDIS_CALLS = "redis_calls"
+OPENSEARCH_CALLS = "opensearch_calls"
+BLOB_BYTES_READ = "blob_bytes_read"
+
+_counters: ContextVar[dict | None] = ContextVar(
+    "instrumentation_counters", default=None
+)
+
+
+def record(name: str, amount: float = 1) -> None:
+    """Add ``amount`` to counter ``name`` of the current scope, if any."""
+    counters = _counters.get()
+    if counters is not None:
+        counters[name] += amount
+
+
+def query_timer(execute, sql, params, many, context):
+    """Database execute wrapper counting queries and their duration."""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record(DB_QUERIES)
+        record(DB_SECONDS, time.perf_counter() - start)
+
+
+@contextmanager
+def collect(track_db: bool = True):
+    """Open a counting scope and yield its counters (a ``defaultdict``).
+
+    Scopes don't nest: an inner scope shadows the outer one until it
+    exits.
+    """
+    counters = defaultdict(float)
+    token = _counters.set(counters)
+    try:
+        with ExitStack() as stack:
+            if track_db:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(query_timer))
+            yield counters
+    finally:
+        _counters.reset(token)
+
+
+class InstrumentedPipeline(Pipeline):
+    """Redis pipeline counting each ``execute`` as one call."""
+
+    def execute(self, raise_on_error=True):
+        """Send the queued commands in one round trip."""
+        record(REDIS_CALLS)
+        return super().execute(raise_on_error=raise_on_error)
+
+
+class InstrumentedRedis(Redis):
+    """Redis client counting commands sent to the server."""
+
+    def execute_command(self, *args, **options):
+        """Send a single command to the server."""
+        record(REDIS_CALLS)
+        return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        """Return a pipeline that is counted on ``execute``."""
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class InstrumentedTransport(Transport):
+    """OpenSearch transport counting HTTP requests."""
+
+    def perform_request(self, *args, **kwargs):
+        """Send one HTTP request to the cluster."""
+        record(OPENSEARCH_CALLS)
+        return super().perform_request(*args, **kwargs)
@@ -2,10 +2,11 @@
 Django management command to check DNS records for mail domains.
 """
 
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
 from core.models import MailDomain
-from core.services.dns.check import check_dns_records
+from core.services.dns.check import check_maildomains_dns
 
 
 class Command(BaseCommand):
@@ -19,6 +20,12 @@ class Command(BaseCommand):
             type=str,
             help="Specific domain to check (if not provided, checks all domains)",
         )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.DNS_CHECK_CONCURRENCY,
+            help="Number of domains checked at the same time",
+        )
 
     def handle(self, *args, **options):
         domain_name = options["domain"]
@@ -30,24 +37,23 @@ class Command(BaseCommand):
             except MailDomain.DoesNotExist:
                 raise CommandError(f"Domain '{domain_name}' not found") from None
         else:
-            domains = MailDomain.objects.all()
+            domains = list(MailDomain.objects.order_by("name"))
 
         self.stdout.write(f"Checking DNS records for {len(domains)} domain(s)...")
         self.stdout.write("")
 
+        results = check_maildomains_dns(domains, concurrency=options["concurrency"])
+
         for maildomain in domains:
-            self.check_domain(maildomain)
+            self.print_domain(maildomain, results[maildomain.pk])
 
-    def check_domain(self, maildomain):
-        """Check DNS records for a specific domain."""
+    def print_domain(self, maildomain, check_results):
+        """Print the DNS check results of a specific domain."""
         domain = maildomain.name
 
         self.stdout.write(f"Domain: {domain}")
         self.stdout.write("-" * (len(domain) + 8))
 
-        # Get DNS check results
-        check_results = check_dns_records(maildomain)
-
         self.print_detailed_results(check_results)
 
         self.stdout.write("")
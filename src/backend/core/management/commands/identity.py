@@ -7,6 +7,7 @@ from django.core.management.base import BaseCommand, CommandError
 from keycloak.exceptions import KeycloakError
 
 from core.services.identity.keycloak import (
+    RESYNC_CONCURRENCY,
     list_keycloak_users,
     reset_keycloak_user_password,
     resync_all_mailboxes_to_keycloak,
@@ -45,10 +46,19 @@ class Command(BaseCommand):
         )
 
         # Resync all command
-        subparsers.add_parser(
+        resync_parser = subparsers.add_parser(
             "resync-all",
             help="Resync all mailboxes with identity_sync enabled to Keycloak",
         )
+        resync_parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=RESYNC_CONCURRENCY,
+            help=(
+                "Number of users pushed to Keycloak in parallel "
+                f"(default: {RESYNC_CONCURRENCY})"
+            ),
+        )
 
     def handle(self, *args, **options):
         command = options.get("command")
@@ -130,13 +140,21 @@ class Command(BaseCommand):
         except ValueError as e:
             raise CommandError(str(e)) from e
 
-    def resync_all(self, _options):
+    def resync_all(self, options):
         """Resync all mailboxes with identity_sync enabled to Keycloak."""
         self.stdout.write(
             self.style.SUCCESS("Starting resync of all mailboxes to Keycloak...")
         )
 
-        result = resync_all_mailboxes_to_keycloak()
+        result = resync_all_mailboxes_to_keycloak(
+            concurrency=options.get("concurrency", RESYNC_CONCURRENCY)
+        )
         self.stdout.write(self.style.SUCCESS("Resync completed!"))
         self.stdout.write(f"Synced domains: {result['synced_domains']}")
-        self.stdout.write(f"Synced mailboxes: {result['synced_mailboxes']}")
+        self.stdout.write(f"Created users: {result['created']}")
+        self.stdout.write(f"Updated users: {result['updated']}")
+        self.stdout.write(f"Unchanged users: {result['unchanged']}")
+        if result["failed"]:
+            self.stdout.write(
+                self.style.ERROR(f"Failed users: {result['failed']} (see logs)")
+            )
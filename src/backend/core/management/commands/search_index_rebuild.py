@@ -0,0 +1,89 @@
+"""Management command to rebuild the OpenSearch index without downtime."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import models
+from core.services.search.exceptions import IndexBuildInProgressError
+from core.services.search.rebuild import (
+    cancel_build,
+    get_build_progress,
+    start_build,
+)
+from core.services.search.tasks import enqueue_index_build
+
+
+class Command(BaseCommand):
+    """Rebuild the OpenSearch index by partitions, then swap it in."""
+
+    help = (
+        "Rebuild the OpenSearch index into a new index, loaded by partitions "
+        "on the reindex queue workers, then swap the alias to it"
+    )
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            "action",
+            choices=["start", "status", "resume", "cancel"],
+            help=(
+                "start a build, show the progress of the latest one, re-enqueue "
+                "the partitions left of the current one, or cancel it"
+            ),
+        )
+        parser.add_argument(
+            "--partition-size",
+            type=int,
+            help="Threads per partition (defaults to SEARCH_REBUILD_PARTITION_SIZE)",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        action = options["action"]
+        if action == "start":
+            try:
+                build = start_build(options["partition_size"])
+            except IndexBuildInProgressError as e:
+                raise CommandError(f"{e} Use resume or cancel.") from e
+            count = enqueue_index_build(build)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Building {build.index_name}: {count} partitions scheduled"
+                )
+            )
+            return
+
+        if action == "status":
+            build = models.SearchIndexBuild.objects.order_by("-created_at").first()
+            if build is None:
+                raise CommandError("No search index build found.")
+            self._write_progress(get_build_progress(build))
+            return
+
+        build = models.SearchIndexBuild.objects.filter(
+            completed_at__isnull=True
+        ).first()
+        if build is None:
+            raise CommandError("No search index build in progress.")
+        if action == "resume":
+            count = enqueue_index_build(build)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Resuming {build.index_name}: {count} partitions scheduled"
+                )
+            )
+        else:
+            cancel_build(build.id)
+            self.stdout.write(self.style.SUCCESS(f"Cancelled {build.index_name}"))
+
+    def _write_progress(self, progress):
+        """Write the progress of a build to the console."""
+        state = "live" if progress["completed"] else "loading"
+        self.stdout.write(
+            f"{progress['index']} ({state}): "
+            f"{progress['loaded_partitions']}/{progress['partitions']} partitions, "
+            f"{progress['indexed_threads']}/{progress['threads_count']} threads, "
+            f"{progress['indexed_messages']} messages, "
+            f"{progress['failure_count']} failed, "
+            f"{progress['threads_per_second']:.1f} threads/s "
+            f"over {progress['elapsed']:.0f}s"
+        )
@@ -1,10 +1,27 @@
-"""Draft message creation and management functionality."""
-
+"""Draft message creation and management functionality.
+
+Draft bodies are stored as content-addressed ``Blob`` rows, which makes
+every write costly: hash, compress, encrypt, advisory lock, and an orphan
+left behind for the GC. Updates therefore skip everything that didn't
+change (same body hash, same recipients) and only recompute thread stats
+when ``has_attachments`` flips.
+
+Autosaves (``update_draft(..., autosave=True)``) go further: with a
+``django_redis`` cache the body is only buffered in the cache and a
+``checkpoint_draft_task`` is scheduled to persist it at most every
+``DRAFT_AUTOSAVE_CHECKPOINT_SECONDS``. Reads go through
+``get_draft_body``, which prefers the buffered body. Sending a draft
+drops the buffer along with the draft body. Without Redis, or with the
+setting at 0, autosaves are written through like any other update.
+"""
+
+import hashlib
 import logging
 import uuid
 from typing import Optional
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 from django.utils import timezone
 
@@ -13,9 +30,149 @@ import rest_framework as drf
 from core import enums, models
 from core.api.utils import get_attachment_from_blob_id
 from core.services.blob_gc import release_upload, schedule_for_gc
+from core.utils import is_redis_backend
 
 logger = logging.getLogger(__name__)
 
+_AUTOSAVE_BODY_KEY = "draft_autosave:body:{message_id}"
+_AUTOSAVE_CHECKPOINT_KEY = "draft_autosave:checkpoint:{message_id}"
+
+# A buffered body outlives many checkpoints: if checkpoints can't run
+# (broker outage), the latest body stays readable for a day.
+AUTOSAVE_BUFFER_TIMEOUT = 24 * 3600
+
+
+def _can_buffer_autosave() -> bool:
+    return settings.DRAFT_AUTOSAVE_CHECKPOINT_SECONDS > 0 and is_redis_backend()
+
+
+def _stored_body_matches(message: models.Message, body_bytes: Optional[bytes]) -> bool:
+    """Whether ``message.draft_blob`` already holds ``body_bytes``."""
+    if body_bytes is None:
+        return message.draft_blob_id is None
+    if message.draft_blob_id is None:
+        return False
+    return bytes(message.draft_blob.sha256) == hashlib.sha256(body_bytes).digest()
+
+
+def _store_draft_body(message: models.Message, body_bytes: Optional[bytes]) -> bool:
+    """Point ``message.draft_blob`` at ``body_bytes`` (unsaved).
+
+    Must run inside ``transaction.atomic()`` together with the
+    ``Message.save`` that persists the FK, so the GC sweep never sees the
+    new Blob row without its reference. Returns False, without touching
+    the blob pipeline, when the body is unchanged.
+    """
+    if _stored_body_matches(message, body_bytes):
+        return False
+    if message.draft_blob_id:
+        # Old draft body may now be orphan; let the GC sweep
+        # collect it if no other row references the same content.
+        schedule_for_gc(message.draft_blob_id)
+    message.draft_blob = None
+    if body_bytes is not None:
+        message.draft_blob = models.Blob.objects.create_blob(
+            content=body_bytes,
+            content_type="application/json",
+        )
+    return True
+
+
+def _buffer_draft_body(message: models.Message, draft_body: str) -> None:
+    """Keep an autosaved body in the cache and schedule its checkpoint."""
+    # pylint: disable-next=import-outside-toplevel
+    from core.mda.draft_tasks import checkpoint_draft_task
+
+    cache.set(
+        _AUTOSAVE_BODY_KEY.format(message_id=message.id),
+        draft_body,
+        timeout=AUTOSAVE_BUFFER_TIMEOUT,
+    )
+    # One pending checkpoint per draft. The marker expires when the
+    # checkpoint runs, so an autosave the checkpoint didn't see always
+    # schedules the next one.
+    delay = settings.DRAFT_AUTOSAVE_CHECKPOINT_SECONDS
+    if cache.add(
+        _AUTOSAVE_CHECKPOINT_KEY.format(message_id=message.id), 1, timeout=delay
+    ):
+        message_id = str(message.id)
+        transaction.on_commit(
+            lambda: checkpoint_draft_task.apply_async(
+                args=[message_id], countdown=delay
+            )
+        )
+
+
+def get_buffered_draft_bodies(messages) -> dict:
+    """Return the buffered autosave bodies of ``messages``, keyed by message id.
+
+    One ``get_many`` round trip for a whole page; non-drafts are skipped.
+    Pass the result to ``get_draft_body`` to avoid a cache read per message.
+    """
+    if not is_redis_backend():
+        return {}
+    keys = {
+        _AUTOSAVE_BODY_KEY.format(message_id=message.id): message.id
+        for message in messages
+        if message.is_draft
+    }
+    if not keys:
+        return {}
+    return {keys[key]: body for key, body in cache.get_many(list(keys)).items()}
+
+
+def get_draft_body(
+    message: models.Message, buffered_bodies: Optional[dict] = None
+) -> Optional[str]:
+    """Return the current draft body, including a not yet checkpointed autosave.
+
+    ``buffered_bodies`` is the result of ``get_buffered_draft_bodies`` for a
+    batch including ``message``; without it the cache is read directly.
+    """
+    if not message.is_draft:
+        return None
+    if is_redis_backend():
+        if buffered_bodies is not None:
+            buffered = buffered_bodies.get(message.id)
+        else:
+            buffered = cache.get(_AUTOSAVE_BODY_KEY.format(message_id=message.id))
+        if buffered is not None:
+            return buffered or None
+    if message.draft_blob_id is None:
+        return None
+    return message.draft_blob.get_content().decode("utf-8")
+
+
+def discard_draft_autosave(message_id) -> None:
+    """Drop the buffered autosave body of a draft, if any."""
+    if is_redis_backend():
+        cache.delete(_AUTOSAVE_BODY_KEY.format(message_id=message_id))
+
+
+def checkpoint_draft(message_id) -> bool:
+    """Persist the buffered autosave body of a draft, if it changed.
+
+    Returns True when a new body was stored.
+    """
+    if not is_redis_backend():
+        return False
+    draft_body = cache.get(_AUTOSAVE_BODY_KEY.format(message_id=message_id))
+    if draft_body is None:
+        return False
+    body_bytes = draft_body.encode("utf-8") if draft_body else None
+
+    with transaction.atomic():
+        message = (
+            models.Message.objects.select_for_update(of=("self",))
+            .select_related("draft_blob")
+            .filter(id=message_id)
+            .first()
+        )
+        if message is None or not _store_draft_body(message, body_bytes):
+            return False
+        message.save(update_fields=["draft_blob", "updated_at"])
+    return True
+
 
 def validate_body_size(body_bytes: bytes) -> None:
     """Validate the size of the body."""
@@ -433,7 +590,9 @@ def create_draft(
         "attachments": attachments or [],
     }
 
-    message = update_draft(mailbox, message, update_data, user=user)
+    message = update_draft(
+        mailbox, message, update_data, user=user, update_thread_stats=False
+    )
 
     # Update thread stats
     thread.update_stats()
@@ -446,6 +605,9 @@ def update_draft(
     message: models.Message,
     update_data: dict,
     user: Optional[models.User] = None,
+    *,
+    autosave: bool = False,
+    update_thread_stats: bool = True,
 ) -> models.Message:
     """
     Update draft details (subject, recipients, body, attachments).
@@ -455,6 +617,10 @@ def update_draft(
         message: The draft message to update
         update_data: Dictionary containing fields to update
         user: The user making the update (needed for forwarded attachments)
+        autosave: Buffer the body until the next checkpoint instead of
+            storing it now (when the cache allows it)
+        update_thread_stats: Recompute the thread stats if a field they
+            depend on changed
 
     Returns:
         The updated message
@@ -506,6 +672,15 @@ def update_draft(
     recipient_types = ["to", "cc", "bcc"]
     for recipient_type in recipient_types:
         if recipient_type in update_data:
+            # Autosaves resend the full recipient lists: leave them alone
+            # when nothing changed.
+            if message.pk and set(update_data.get(recipient_type) or []) == set(
+                message.recipients.filter(
+                    type=recipient_type_mapping[recipient_type]
+                ).values_list("contact__email", flat=True)
+            ):
+                continue
+
             # Delete existing recipients of this type
             if message.pk:
                 message.recipients.filter(
@@ -534,9 +709,17 @@ def update_draft(
     # Pre-validate the new body (no DB writes yet) so we can keep
     # the atomic block below tight around the blob+save pair.
     new_draft_body_bytes = None
-    if "draftBody" in update_data and update_data["draftBody"]:
-        new_draft_body_bytes = update_data["draftBody"].encode("utf-8")
-        validate_body_size(new_draft_body_bytes)
+    store_draft_body = "draftBody" in update_data
+    if store_draft_body:
+        if update_data["draftBody"]:
+            new_draft_body_bytes = update_data["draftBody"].encode("utf-8")
+            validate_body_size(new_draft_body_bytes)
+        if autosave and message.pk and _can_buffer_autosave():
+            _buffer_draft_body(message, update_data["draftBody"] or "")
+            store_draft_body = False
+        else:
+            # Written through: a buffered autosave is now stale.
+            discard_draft_autosave(message.id)
 
     # Atomic block: any new draft-body Blob INSERT must commit
     # together with the Message.save that establishes the FK on
@@ -544,19 +727,8 @@ def update_draft(
     # be visible to other transactions before the FK row, and the
     # GC sweep could reap it as an orphan.
     with transaction.atomic():
-        # Update draft body if provided
-        if "draftBody" in update_data:
-            old_draft_blob_id = message.draft_blob_id
-            message.draft_blob = None
-            if old_draft_blob_id:
-                # Old draft body may now be orphan; let the GC sweep
-                # collect it if no other row references the same content.
-                schedule_for_gc(old_draft_blob_id)
-            if new_draft_body_bytes is not None:
-                message.draft_blob = models.Blob.objects.create_blob(
-                    content=new_draft_body_bytes,
-                    content_type="application/json",
-                )
+        # Update draft body if provided and changed
+        if store_draft_body and _store_draft_body(message, new_draft_body_bytes):
             updated_fields.append("draft_blob")
 
         # Update attachments if provided
@@ -580,4 +752,8 @@ def update_draft(
         if len(thread_updated_fields) > 0 and message.thread.pk:  # Check thread exists
             message.thread.save(update_fields=thread_updated_fields + ["updated_at"])
 
+    # Only has_attachments feeds the thread stats among the draft fields.
+    if update_thread_stats and "has_attachments" in updated_fields:
+        message.thread.update_stats()
+
     return message
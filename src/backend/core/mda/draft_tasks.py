@@ -0,0 +1,18 @@
+"""Draft autosave checkpoint tasks."""
+
+from celery.utils.log import get_task_logger
+
+from core.mda.draft import checkpoint_draft
+
+from messages.celery_app import app as celery_app
+
+logger = get_task_logger(__name__)
+
+
+@celery_app.task
+def checkpoint_draft_task(message_id):
+    """Persist the autosaved body of a draft buffered in the cache."""
+    stored = checkpoint_draft(message_id)
+    if stored:
+        logger.debug("Checkpointed autosaved body of draft %s", message_id)
+    return {"success": True, "stored": stored}
@@ -16,7 +16,7 @@ from core.services.importer.labels import (
     handle_duplicate_message,
 )
 
-from .inbound_create import _create_message_from_inbound
+from .inbound_create import ImportThreadResolver, _create_message_from_inbound
 
 logger = logging.getLogger(__name__)
 
@@ -140,6 +140,7 @@ def deliver_inbound_message(
     imap_flags: list[str] | None = None,
     channel: models.Channel | None = None,
     skip_inbound_queue: bool = False,
+    thread_resolver: ImportThreadResolver | None = None,
 ) -> bool:  # Return True on success, False on failure
     """Deliver a parsed inbound email message.
 
@@ -147,7 +148,8 @@ def deliver_inbound_message(
     directly without spam checking. For regular messages, they are queued for spam
     processing via rspamd. Warning: messages imported here could be is_sender=True.
 
-    raw_data is not parsed again, just stored as is.
+    raw_data is not parsed again, just stored as is. Imports of many messages
+    should share one ``thread_resolver`` so that thread lookups are cached.
     """
     # --- 1. Find or Create Mailbox --- #
     try:
@@ -195,6 +197,7 @@ def deliver_inbound_message(
             imap_flags=imap_flags,
             channel=channel,
             is_spam=False,  # Bypassed messages are never marked as spam
+            thread_resolver=thread_resolver,
         )
 
         # Send autoreply for internal messages (not imports, which are historical)
@@ -209,9 +212,9 @@ def deliver_inbound_message(
 
     # Regular messages: queue for spam processing
     try:
-        inbound_message = models.InboundMessage.objects.create(
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
+            raw_data,
             mailbox=mailbox,
-            raw_data=raw_data,
             channel=channel,
         )
         logger.info(
@@ -106,7 +106,8 @@ def _scrub_ar_value(value: str) -> str:
 
 
 def _rspamd_outcome(check: str, rspamd_result: dict[str, Any] | None) -> str | None:
-    if not rspamd_result:
+    # Body hashes can't match on a truncated scan (see core.mda.rspamd).
+    if not rspamd_result or rspamd_result.get("truncated"):
         return None
     symbols = rspamd_result.get("symbols") or {}
     if not isinstance(symbols, dict):
@@ -3,12 +3,13 @@
 # pylint: disable=broad-exception-caught
 
 import logging
-import re
 import uuid
 from contextlib import contextmanager, nullcontext
+from typing import Iterable
 
 from django.core.exceptions import ValidationError
 from django.db import connection, transaction
+from django.db.models import F
 from django.db.utils import Error as DjangoDbError
 from django.utils import timezone
 
@@ -21,23 +22,16 @@ from jmap_email import (
 )
 
 from core import enums, models
-from core.ai.call_label import assign_label_to_thread
-from core.ai.thread_summarizer import summarize_thread
-from core.ai.utils import (
-    get_messages_from_thread,
-    is_ai_summary_enabled,
-    is_auto_labels_enabled,
-)
+from core.ai.queue import schedule_thread_ai
+from core.ai.utils import is_ai_summary_enabled, is_auto_labels_enabled
 from core.mda.utils import thread_snippet
 from core.services.importer.labels import (
     compute_labels_and_flags,
 )
+from core.utils import canonicalize_subject
 
 logger = logging.getLogger(__name__)
 
-TOKEN_THRESHOLD_FOR_SUMMARY = 200  # Minimum token count to trigger summarization
-MINIMUM_MESSAGES_FOR_SUMMARY = 3  # Minimum number of messages to trigger summarization
-
 # Advisory-lock namespace for inbound delivery. Distinct ``classid`` from the
 # blob-cohort locks (see core.services.tiered_storage) so the two never
 # collide in Postgres' single global advisory-lock keyspace.
@@ -75,16 +69,6 @@ def inbound_mailbox_lock(mailbox_id: uuid.UUID):
         yield
 
 
-def _canonicalize_subject(subject: str | None) -> str:
-    """Strip leading ``Re:`` / ``Fwd:`` (and i18n variants) for thread match."""
-    return re.sub(
-        r"^((re|fwd|fw|rep|tr|rép)\s*:\s+)+",
-        "",
-        (subject or "").lower(),
-        flags=re.IGNORECASE,
-    ).strip()
-
-
 def find_thread_for_inbound_message(
     parsed_email: JmapEmail, mailbox: models.Mailbox
 ) -> models.Thread | None:
@@ -117,9 +101,9 @@ def find_thread_for_inbound_message(
         return None  # No matching messages found by ID in this mailbox
 
     # Strategy 1: Match by reference AND canonical subject
-    incoming_subject_canonical = _canonicalize_subject(parsed_email.get("subject"))
+    incoming_subject_canonical = canonicalize_subject(parsed_email.get("subject"))
     for parent in potential_parents:
-        parent_subject_canonical = _canonicalize_subject(parent.subject)
+        parent_subject_canonical = canonicalize_subject(parent.subject)
         if incoming_subject_canonical == parent_subject_canonical:
             return parent.thread  # Found a match!
 
@@ -128,6 +112,106 @@ def find_thread_for_inbound_message(
     return None  # potential_parents.first().thread
 
 
+def _referenced_message_ids(parsed_email: JmapEmail) -> list[str]:
+    """``In-Reply-To`` then ``References`` message IDs, in match priority."""
+    in_reply_to = first_msgid(parsed_email.get("inReplyTo"))
+    references = parsed_email.get("references") or []
+    return [
+        mime_id
+        for mime_id in dict.fromkeys([in_reply_to, *references])
+        if isinstance(mime_id, str) and mime_id
+    ]
+
+
+# Messages the import tasks parse ahead, so that the threads of each
+# batch are looked up at once with ``ImportThreadResolver.prefetch``.
+THREAD_PREFETCH_BATCH_SIZE = 50
+
+
+class ImportThreadResolver:
+    """Find the threads of imported messages with batched, indexed lookups.
+
+    A message joins the thread of the first message it references
+    (``In-Reply-To``, then ``References``) or, failing that, the reply
+    thread (subject starting with ``Re:``, ``Fwd:``, ...) whose
+    ``Thread.subject_key`` is the message's canonical subject.
+
+    ``prefetch()`` resolves the references and subjects of a whole batch
+    of parsed messages in two queries; ``record()`` adds the threads the
+    import itself creates or extends, so that resolving the messages of a
+    prefetched batch needs no query at all. Misses are cached too, which
+    assumes the import is the only writer of the mailbox while it runs.
+    """
+
+    def __init__(self, mailbox: models.Mailbox):
+        self.mailbox = mailbox
+        self._threads_by_mime_id: dict[str, models.Thread | None] = {}
+        self._threads_by_subject_key: dict[str, models.Thread | None] = {}
+
+    def prefetch(self, parsed_emails: Iterable[JmapEmail]) -> None:
+        """Look up the threads of a batch of messages in two queries."""
+        parsed_emails = list(parsed_emails)
+        self._prefetch_mime_ids(
+            mime_id
+            for parsed_email in parsed_emails
+            for mime_id in _referenced_message_ids(parsed_email)
+        )
+        self._prefetch_subject_keys(
+            canonicalize_subject(parsed_email.get("subject"))
+            for parsed_email in parsed_emails
+        )
+
+    def _prefetch_mime_ids(self, mime_ids: Iterable[str]) -> None:
+        mime_ids = set(mime_ids) - self._threads_by_mime_id.keys()
+        if not mime_ids:
+            return
+        self._threads_by_mime_id.update(dict.fromkeys(mime_ids))
+        threads = models.Thread.objects.filter(
+            accesses__mailbox=self.mailbox, messages__mime_id__in=mime_ids
+        ).annotate(matched_mime_id=F("messages__mime_id"))
+        for thread in threads:
+            if self._threads_by_mime_id[thread.matched_mime_id] is None:
+                self._threads_by_mime_id[thread.matched_mime_id] = thread
+
+    def _prefetch_subject_keys(self, subject_keys: Iterable[str]) -> None:
+        subject_keys = set(subject_keys) - {""} - self._threads_by_subject_key.keys()
+        if not subject_keys:
+            return
+        self._threads_by_subject_key.update(dict.fromkeys(subject_keys))
+        threads = models.Thread.objects.filter(
+            accesses__mailbox=self.mailbox,
+            subject_key__in=subject_keys,
+        )
+        for thread in threads:
+            if self._threads_by_subject_key[thread.subject_key] is None:
+                self._threads_by_subject_key[thread.subject_key] = thread
+
+    def resolve(self, parsed_email: JmapEmail) -> models.Thread | None:
+        """Return the existing thread ``parsed_email`` belongs to, if any."""
+        mime_ids = _referenced_message_ids(parsed_email)
+        self._prefetch_mime_ids(mime_ids)
+        for mime_id in mime_ids:
+            if thread := self._threads_by_mime_id[mime_id]:
+                return thread
+
+        subject_key = canonicalize_subject(parsed_email.get("subject"))
+        if not subject_key:
+            return None
+        self._prefetch_subject_keys([subject_key])
+        return self._threads_by_subject_key[subject_key]
+
+    def record(self, parsed_email: JmapEmail, thread: models.Thread) -> None:
+        """Remember that ``parsed_email`` was imported into ``thread``."""
+        mime_id = first_msgid(parsed_email.get("messageId"))
+        if mime_id and self._threads_by_mime_id.get(mime_id) is None:
+            self._threads_by_mime_id[mime_id] = thread
+        if (
+            thread.subject_key
+            and self._threads_by_subject_key.get(thread.subject_key) is None
+        ):
+            self._threads_by_subject_key[thread.subject_key] = thread
+
+
 def find_thread_for_import(
     parsed_email: JmapEmail, mailbox: models.Mailbox
 ) -> models.Thread | None:
@@ -135,24 +219,7 @@ def find_thread_for_import(
     During import, try to find an existing thread that contains messages
     with the same subject or referenced message IDs.
     """
-
-    subject = parsed_email.get("subject", "")
-    in_reply_to = first_msgid(parsed_email.get("inReplyTo"))
-    references = parsed_email.get("references") or []
-
-    # First try to find a thread by message IDs
-    thread = _find_thread_by_message_ids(in_reply_to, references, mailbox)
-
-    # If no thread found by message IDs, try by subject
-    if not thread and subject:
-        # Look for threads with similar subjects
-        canonical_subject = _canonicalize_subject(subject)
-        thread = models.Thread.objects.filter(
-            subject__iregex=rf"^(re|fwd|fw|rep|tr|rép)\s*:\s*{re.escape(canonical_subject)}$",
-            accesses__mailbox=mailbox,
-        ).first()
-
-    return thread
+    return ImportThreadResolver(mailbox).resolve(parsed_email)
 
 
 def _create_thread(parsed_email: JmapEmail, mailbox: models.Mailbox) -> models.Thread:
@@ -182,24 +249,6 @@ def _create_thread(parsed_email: JmapEmail, mailbox: models.Mailbox) -> models.T
     return thread
 
 
-def _find_thread_by_message_ids(
-    in_reply_to: str, references: list[str], mailbox: models.Mailbox
-) -> models.Thread | None:
-    """Find thread by message IDs (``inReplyTo`` and ``references``)."""
-    if in_reply_to or references:
-        thread = models.Thread.objects.filter(
-            messages__mime_id__in=[in_reply_to] if in_reply_to else [],
-            accesses__mailbox=mailbox,
-        ).first()
-        if not thread and references:
-            thread = models.Thread.objects.filter(
-                messages__mime_id__in=references,
-                accesses__mailbox=mailbox,
-            ).first()
-        return thread
-    return None
-
-
 def _create_message_from_inbound(  # pylint: disable=too-many-arguments
     recipient_email: str,
     parsed_email: JmapEmail,
@@ -212,6 +261,7 @@ def _create_message_from_inbound(  # pylint: disable=too-many-arguments
     channel: models.Channel | None = None,
     is_spam: bool = False,
     is_outbound: bool = False,
+    thread_resolver: ImportThreadResolver | None = None,
 ) -> models.Message | None:
     """Create a message and thread from parsed email data.
 
@@ -219,6 +269,9 @@ def _create_message_from_inbound(  # pylint: disable=too-many-arguments
     Returns the created Message on success, or None on failure.
     Callers that only need a boolean can check truthiness of the return value.
 
+    Imports may share a ``thread_resolver`` across their messages to
+    batch the thread lookups (see ``ImportThreadResolver``).
+
     When ``is_outbound`` is True:
     - ``is_sender`` is forced to True
     - No blob is created (the caller handles DKIM signing + blob via prepare_outbound_message)
@@ -261,12 +314,13 @@ def _create_message_from_inbound(  # pylint: disable=too-many-arguments
 
         # --- 3. Find or Create Thread --- #
         try:
-            thread = None
+            # The import lookup also matches every thread the inbound one
+            # would, by referenced message IDs, so it replaces it.
             if is_import:
-                thread = find_thread_for_import(parsed_email, mailbox)
-
-            # If no thread found or not an import, use normal thread finding logic
-            if not thread:
+                thread = (thread_resolver or ImportThreadResolver(mailbox)).resolve(
+                    parsed_email
+                )
+            else:
                 thread = find_thread_for_inbound_message(parsed_email, mailbox)
 
             if not thread:
@@ -491,6 +545,9 @@ def _create_message_from_inbound(  # pylint: disable=too-many-arguments
             transaction.set_rollback(True)
             return None
 
+    if thread_resolver is not None:
+        thread_resolver.record(parsed_email, thread)
+
     # --- 6. Create Recipient Contacts and Links --- #
     # deduplicate recipients
     recipient_types_to_process = []
@@ -591,29 +648,20 @@ def _create_message_from_inbound(  # pylint: disable=too-many-arguments
             thread.snippet = new_snippet
             thread.save(update_fields=["snippet"])
 
-        # Do not trigger AI features on import, spam, or outbound
+        # Do not trigger AI features on import, spam, or outbound. The
+        # LLM calls themselves run off the delivery path: the thread is
+        # only scheduled here, debounced per thread (see core.ai.queue).
         if not is_import and not is_spam and not is_outbound:
-            # Update summary if needed is ai is enabled
-            if is_ai_summary_enabled():
-                messages = get_messages_from_thread(thread)
-                token_count = sum(message.get_tokens_count() for message in messages)
-
-                # Only summarize if the thread has enough content (more than 200 tokens or at least 3 messages)
-                if (
-                    token_count >= TOKEN_THRESHOLD_FOR_SUMMARY
-                    or len(messages) >= MINIMUM_MESSAGES_FOR_SUMMARY
-                ):
-                    new_summary = summarize_thread(thread)
-                    if new_summary:
-                        thread.summary = new_summary
-                        thread.save(update_fields=["summary"])
-
             # Assign labels to the thread (skip if channel already applied tags)
             has_channel_tags = (
                 channel and channel.settings and channel.settings.get("tags")
             )
-            if is_auto_labels_enabled() and not has_channel_tags:
-                assign_label_to_thread(thread, mailbox.id)
+            schedule_thread_ai(
+                thread.id,
+                mailbox.id,
+                summary=is_ai_summary_enabled(),
+                autolabels=is_auto_labels_enabled() and not has_channel_tags,
+            )
 
     except Exception as e:
         logger.exception(
@@ -0,0 +1,123 @@
+"""Recovery of the inbound queue: re-dispatch messages whose processing stalled.
+
+``deliver_inbound_message`` dispatches ``process_inbound_message_task``
+as soon as it queues a message; the row is deleted once processed. Rows
+left behind (worker killed, task lost, processing error) are picked up
+again by the periodic ``process_inbound_messages_queue_task``:
+
+* Leases: ``InboundMessage.available_at`` is the time a row becomes
+  visible to recovery. Queueing sets it ``INBOUND_RECOVERY_LEASE``
+  seconds ahead (the immediate dispatch gets that long); each claim
+  bumps ``attempts`` and pushes it further, doubling per attempt up to
+  ``INBOUND_RECOVERY_MAX_BACKOFF``. A message that keeps failing backs
+  off instead of being retried every tick.
+* Claims take the rows ``FOR UPDATE SKIP LOCKED`` and commit the new
+  lease before dispatching, so overlapping ticks never hand out the same
+  message twice and never wait on each other.
+* Fairness: each mailbox with visible rows gets an equal share of the
+  batch, and the dispatch order interleaves mailboxes, so one flooded
+  mailbox doesn't starve the others.
+* Batch size follows the backlog: everything visible, up to
+  ``INBOUND_RECOVERY_MAX_BATCH`` minus the messages already waiting in
+  the ``inbound`` broker queue.
+
+``process_inbound_message_task`` keeps its own per-message lock as the
+final guard against concurrent processing.
+"""
+
+import math
+from collections import defaultdict
+from datetime import timedelta
+from itertools import zip_longest
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from core import models
+from core.task_metrics import get_queue_lengths
+
+INBOUND_QUEUE = "inbound"
+
+
+def lease_expiry(attempts: int, now=None):
+    """When a row claimed for its ``attempts``-th time becomes visible again."""
+    now = now or timezone.now()
+    lease = settings.INBOUND_RECOVERY_LEASE * 2 ** max(attempts - 1, 0)
+    return now + timedelta(seconds=min(lease, settings.INBOUND_RECOVERY_MAX_BACKOFF))
+
+
+def batch_size(limit: int | None = None) -> int:
+    """Number of messages one recovery tick may dispatch."""
+    limit = settings.INBOUND_RECOVERY_MAX_BATCH if limit is None else limit
+    backlog = get_queue_lengths().get(INBOUND_QUEUE, 0)
+    return max(limit - backlog, 0)
+
+
+def claim_messages(limit: int, now=None) -> list[str]:
+    """Lease up to about ``limit`` visible messages, fairly across mailboxes.
+
+    Returns the claimed ids in dispatch order: the oldest message of
+    every mailbox first, then the second oldest of each, and so on. A
+    batch may exceed ``limit`` by less than one message per mailbox.
+    """
+    if limit <= 0:
+        return []
+    now = now or timezone.now()
+    visible = models.InboundMessage.objects.filter(available_at__lte=now)
+    mailboxes = visible.aggregate(count=Count("mailbox_id", distinct=True))["count"]
+    if not mailboxes:
+        return []
+    per_mailbox = math.ceil(limit / mailboxes)
+
+    oldest_first = visible.annotate(
+        rank=Window(
+            RowNumber(),
+            partition_by=F("mailbox_id"),
+            order_by=[F("available_at").asc(), F("id").asc()],
+        )
+    ).filter(rank__lte=per_mailbox)
+
+    with transaction.atomic():
+        rows = list(
+            models.InboundMessage.objects.filter(
+                id__in=oldest_first.values("id"), available_at__lte=now
+            )
+            .select_for_update(skip_locked=True)
+            .only("id", "mailbox_id", "attempts", "available_at")
+            .order_by("available_at", "id")
+        )
+        for row in rows:
+            row.attempts += 1
+            row.available_at = lease_expiry(row.attempts, now)
+        models.InboundMessage.objects.bulk_update(rows, ["attempts", "available_at"])
+
+    by_mailbox = defaultdict(list)
+    for row in rows:
+        by_mailbox[row.mailbox_id].append(str(row.id))
+    return [
+        message_id
+        for round_ids in zip_longest(*by_mailbox.values())
+        for message_id in round_ids
+        if message_id is not None
+    ]
+
+
+def get_queue_stats(now=None) -> dict:
+    """Queued messages, by visibility, and the creation time of the oldest.
+
+    ``{"visible": int, "leased": int, "oldest_created_at": datetime | None}``
+    """
+    now = now or timezone.now()
+    stats = models.InboundMessage.objects.aggregate(
+        total=Count("id"),
+        visible=Count("id", filter=Q(available_at__lte=now)),
+        oldest_created_at=Min("created_at"),
+    )
+    return {
+        "visible": stats["visible"],
+        "leased": stats["total"] - stats["visible"],
+        "oldest_created_at": stats["oldest_created_at"],
+    }
@@ -7,7 +7,6 @@ from typing import Any
 
 from django.conf import settings
 from django.core.cache import cache
-from django.utils import timezone
 
 import requests
 from celery.utils.log import get_task_logger
@@ -19,6 +18,7 @@ from jmap_email import (
 )
 
 from core import models
+from core.mda import inbound_recovery, rspamd
 from core.mda.inbound_auth import (
     check_inbound_authentication,
     get_inbound_auth_mode,
@@ -169,20 +169,7 @@ def _check_spam_with_rspamd(
         return False, None, None
 
     try:
-        headers = {"Content-Type": "message/rfc822"}
-        spam_auth = spam_config.get("rspamd_auth")
-        if spam_auth:
-            headers["Authorization"] = spam_auth
-
-        response = requests.post(
-            f"{spam_url}/checkv2",
-            data=raw_data,
-            headers=headers,
-            timeout=10,
-        )
-        response.raise_for_status()
-
-        result = response.json()
+        result = rspamd.scan(raw_data, spam_url, auth=spam_config.get("rspamd_auth"))
         # rspamd returns action: "reject", "add header", "greylist", or "no action"
         # We consider it spam if action is "reject"
         action = result.get("action", "")
@@ -201,6 +188,9 @@ def _check_spam_with_rspamd(
 
         return is_spam, None, result
 
+    except rspamd.RspamdScanSkipped as e:
+        logger.warning("Skipping rspamd check: %s", e)
+        return False, str(e), None
     except requests.exceptions.RequestException as e:
         logger.exception("Error checking spam with rspamd: %s", e)
         # On error, treat as not spam to avoid blocking legitimate messages
@@ -246,7 +236,7 @@ def process_inbound_message_task(self, inbound_message_id: str):
         recipient_email = str(mailbox)  # Use mailbox email as recipient_email
 
         # Parse the email from raw_data
-        raw_data_bytes = bytes(inbound_message.raw_data)
+        raw_data_bytes = inbound_message.get_raw_data()
         parsed_email = parse_email(raw_data_bytes)
         if parsed_email is None:
             error_msg = "Failed to parse email message"
@@ -362,25 +352,25 @@ def process_inbound_message_task(self, inbound_message_id: str):
 
 
 @celery_app.task(bind=True)
-def process_inbound_messages_queue_task(self, batch_size: int = 10):
-    """Retry processing of inbound messages that are older than 5 minutes.
+def process_inbound_messages_queue_task(self, batch_size: int | None = None):
+    """Re-dispatch queued inbound messages whose processing stalled.
 
-    This task only handles retries for messages that may have failed or gotten stuck.
-    Regular messages are processed immediately when created via process_inbound_message_task.delay().
+    Messages are claimed with a lease, fairly across mailboxes, in a
+    batch sized from the backlog (see ``core.mda.inbound_recovery``).
 
     Args:
-        batch_size: Number of messages to process in this batch
+        batch_size: Maximum number of messages to dispatch, before
+            deducting the broker backlog. Defaults to
+            ``INBOUND_RECOVERY_MAX_BATCH``.
 
     Returns:
         dict: A dictionary with processing results
     """
-    # Only retry messages older than 5 minutes
-    retry_threshold = timezone.now() - timezone.timedelta(minutes=5)
-    old_messages = models.InboundMessage.objects.filter(
-        created_at__lt=retry_threshold
-    ).order_by("created_at")[:batch_size]
+    message_ids = inbound_recovery.claim_messages(
+        inbound_recovery.batch_size(batch_size)
+    )
 
-    total = len(old_messages)
+    total = len(message_ids)
     if total == 0:
         return {
             "success": True,
@@ -391,15 +381,15 @@ def process_inbound_messages_queue_task(self, batch_size: int = 10):
     processed = 0
     errors = 0
 
-    for inbound_message in old_messages:
+    for inbound_message_id in message_ids:
         try:
             # Trigger async task for each old message (retry)
-            process_inbound_message_task.delay(str(inbound_message.id))
+            process_inbound_message_task.delay(inbound_message_id)
             processed += 1
         except Exception as e:
             logger.exception(
                 "Error queuing inbound message %s for retry: %s",
-                inbound_message.id,
+                inbound_message_id,
                 e,
             )
             errors += 1
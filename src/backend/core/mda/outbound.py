@@ -474,6 +474,11 @@ def _finalize_sent_message(
         mailbox=mailbox_sender,
     ).update(read_at=message.created_at)
 
+    # Recently written-to contacts rank first in the autocomplete
+    models.Contact.objects.filter(
+        id__in=message.recipients.values("contact_id")
+    ).update(last_used_at=message.created_at)
+
     message.thread.update_stats()
 
 
@@ -2,17 +2,16 @@
 
 # pylint: disable=unused-argument, broad-exception-raised, broad-exception-caught, too-many-lines
 
-import math
-
-from django.db.models import Exists, OuterRef, Q
+from django.conf import settings
 from django.utils import timezone
 
 from celery.utils.log import get_task_logger
 
 from core import models
-from core.enums import MessageDeliveryStatusChoices
+from core.mda import retry_scheduler
 from core.mda.outbound import send_message
 from core.mda.selfcheck import run_selfcheck
+from core.utils import acquire_cache_slot, release_cache_slot
 
 from messages.celery_app import app as celery_app
 
@@ -121,49 +120,112 @@ def selfcheck_task(self):
         raise
 
 
+def _retry_messages(messages, force_mta_out=False) -> dict:
+    """Call ``send_message`` for each of ``messages`` and count outcomes."""
+    processed_count = 0
+    success_count = 0
+    error_count = 0
+
+    for message in messages:
+        # The ready-recipients filter is the gate: any message reaching
+        # this loop has at least one ready recipient. ``send_message``
+        # re-checks recipient state itself, so a recipient turning
+        # terminal between the outer scan and this call is handled
+        # there.
+        try:
+            send_message(message, force_mta_out=force_mta_out)
+            success_count += 1
+            logger.info("Successfully retried message %s", message.id)
+            processed_count += 1
+
+        except Exception as e:
+            error_count += 1
+            logger.exception("Failed to retry message %s: %s", message.id, e)
+
+    return {
+        "processed_messages": processed_count,
+        "success_count": success_count,
+        "error_count": error_count,
+    }
+
+
+def _dispatch_retry_batches(
+    messages, batch_size, max_batches, force_mta_out=False
+) -> tuple[int, int]:
+    """Plan ready ``messages`` into batches and dispatch them to free slots.
+
+    Returns:
+        tuple: The number of dispatched batches and messages
+    """
+    batches = retry_scheduler.plan_batches(messages, batch_size, max_batches)
+    # Mark every planned message up front, so that a batch completing
+    # (and dispatching the next ones) before this loop ends doesn't plan
+    # them a second time.
+    retry_scheduler.mark_queued(
+        [message_id for batch in batches for message_id in batch.message_ids]
+    )
+    dispatched_batches = 0
+    dispatched_messages = 0
+
+    for batch in batches:
+        slot = acquire_cache_slot(
+            retry_scheduler.BATCH_SLOT_PREFIX,
+            settings.OUTBOUND_RETRY_MAX_BATCHES,
+            retry_scheduler.SLOT_TIMEOUT,
+        )
+        if slot is None:
+            # Backpressure: every batch slot is busy. What's left stays
+            # ready in the database until a slot frees up.
+            break
+
+        try:
+            retry_messages_batch_task.delay(
+                batch.message_ids,
+                batch.domain,
+                force_mta_out=force_mta_out,
+                batch_slot=list(slot),
+                batch_size=batch_size,
+            )
+        except Exception as e:
+            release_cache_slot(*slot)
+            logger.exception("Failed to dispatch retry batch: %s", e)
+            break
+
+        dispatched_batches += 1
+        dispatched_messages += len(batch.message_ids)
+
+    retry_scheduler.unmark_queued(
+        [
+            message_id
+            for batch in batches[dispatched_batches:]
+            for message_id in batch.message_ids
+        ]
+    )
+    return dispatched_batches, dispatched_messages
+
+
 @celery_app.task(bind=True)
-def retry_messages_task(self, message_ids=None, force_mta_out=False, batch_size=100):
+def retry_messages_task(self, message_ids=None, force_mta_out=False, batch_size=None):
     """Retry sending messages with retryable recipients (respects retry timing).
 
+    With ``message_ids`` (admin actions), the selected messages are retried
+    inline. Otherwise this is the periodic scheduler: ready messages are
+    fanned out into per-domain ``retry_messages_batch_task`` batches, see
+    ``core.mda.retry_scheduler``.
+
     Args:
         message_ids: Optional message IDs list to retry
         force_mta_out: Whether to force sending via MTA
-        batch_size: Number of messages to process in each batch
+        batch_size: Number of messages per batch, defaults to
+            ``settings.OUTBOUND_RETRY_BATCH_SIZE``
 
     Returns:
         dict: A dictionary with task status and results
     """
-    # Find all messages with at least one recipient ready for retry.
-    # ``is_spam=False`` is a defence-in-depth filter: should any code path
-    # mint an is_sender=True spam record, it must never re-enter the
-    # outbound pipeline.
-    #
-    # ``Exists`` keeps the outer query linear at multi-million recipient
-    # scale — PG short-circuits on the first matching recipient per
-    # message instead of materialising a join.
-    now = timezone.now()
-    ready_recipients = models.MessageRecipient.objects.filter(
-        message_id=OuterRef("pk"),
-    ).filter(
-        Q(delivery_status=MessageDeliveryStatusChoices.RETRY)
-        | Q(delivery_status__isnull=True),
-        Q(retry_at__isnull=True) | Q(retry_at__lte=now),
-    )
-
-    message_filter_q = Q(
-        is_draft=False,
-        is_sender=True,
-        is_spam=False,
-    ) & Exists(ready_recipients)
+    if batch_size is None:
+        batch_size = settings.OUTBOUND_RETRY_BATCH_SIZE
 
-    if message_ids is not None:
-        message_filter_q &= Q(id__in=message_ids)
-
-    # ``sender__mailbox__domain`` is hit per message on the external-send
-    # path (SPF check, DKIM verify, MTA-out envelope) in send_message.
-    messages_to_process = models.Message.objects.filter(
-        message_filter_q
-    ).select_related("sender", "sender__mailbox__domain")
+    messages_to_process = retry_scheduler.ready_messages(message_ids)
     total_messages = messages_to_process.count()
 
     if total_messages == 0:
@@ -179,53 +241,112 @@ def retry_messages_task(self, message_ids=None, force_mta_out=False, batch_size=
             result["message_ids"] = message_ids
         return result
 
-    # Process messages in batches
-    processed_count = 0
-    success_count = 0
-    error_count = 0
-
-    for index, message in enumerate(
-        messages_to_process.iterator(chunk_size=batch_size)
-    ):
-        # Update progress for bulk operations
-        if index % batch_size == 0:
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "current_batch": index // batch_size + 1,
-                    "total_batches": math.ceil(total_messages / batch_size),
-                    "processed_messages": processed_count,
-                    "total_messages": total_messages,
-                    "success_count": success_count,
-                    "error_count": error_count,
-                },
-            )
-
-        # The outer ``Exists`` filter is the gate: any message reaching
-        # this loop has at least one ready recipient. ``send_message``
-        # re-checks recipient state itself, so a recipient turning
-        # terminal between the outer scan and this call is handled
-        # there.
-        try:
-            send_message(message, force_mta_out=force_mta_out)
-            success_count += 1
-            logger.info("Successfully retried message %s", message.id)
-            processed_count += 1
+    if message_ids is not None:
+        # ``sender__mailbox__domain`` is hit per message on the
+        # external-send path (SPF check, DKIM verify, MTA-out envelope)
+        # in send_message.
+        counts = _retry_messages(
+            messages_to_process.select_related(
+                "sender", "sender__mailbox__domain"
+            ).iterator(chunk_size=batch_size),
+            force_mta_out=force_mta_out,
+        )
+        retry_scheduler.record_stats(
+            sent=counts["success_count"], failed=counts["error_count"]
+        )
+        return {
+            "success": True,
+            "total_messages": total_messages,
+            **counts,
+            "message_ids": message_ids,
+        }
 
-        except Exception as e:
-            error_count += 1
-            logger.exception("Failed to retry message %s: %s", message.id, e)
+    dispatched_batches, dispatched_messages = _dispatch_retry_batches(
+        messages_to_process,
+        batch_size,
+        settings.OUTBOUND_RETRY_MAX_BATCHES,
+        force_mta_out=force_mta_out,
+    )
 
-    # Return appropriate result format
-    result = {
+    return {
         "success": True,
         "total_messages": total_messages,
-        "processed_messages": processed_count,
-        "success_count": success_count,
-        "error_count": error_count,
+        "dispatched_batches": dispatched_batches,
+        "dispatched_messages": dispatched_messages,
     }
 
-    if message_ids is not None:
-        result["message_ids"] = message_ids
 
-    return result
+@celery_app.task(bind=True)
+def retry_messages_batch_task(
+    self, message_ids, domain, force_mta_out=False, batch_slot=None, *, batch_size=None
+):
+    """Retry one batch of messages planned by ``retry_messages_task``.
+
+    Once done, the batch hands its slot over to the next batches of the
+    backlog rather than leaving it idle until the next beat tick.
+
+    Args:
+        message_ids: IDs of the messages of this batch
+        domain: Destination domain the batch was grouped by
+        force_mta_out: Whether to force sending via MTA
+        batch_slot: ``(key, token)`` of the global batch slot reserved by
+            the scheduler, released when the batch is done
+        batch_size: Number of messages per batch for the next batches,
+            defaults to ``settings.OUTBOUND_RETRY_BATCH_SIZE``
+
+    Returns:
+        dict: A dictionary with batch status and results
+    """
+    try:
+        domain_slot = acquire_cache_slot(
+            retry_scheduler.domain_slot_prefix(domain),
+            settings.OUTBOUND_RETRY_DOMAIN_CONCURRENCY,
+            retry_scheduler.SLOT_TIMEOUT,
+        )
+        if domain_slot is None:
+            # The domain is already served by enough batches; leave these
+            # messages for the next tick rather than pile onto its MX.
+            retry_scheduler.record_stats(deferred=len(message_ids))
+            retry_scheduler.unmark_queued(message_ids)
+            return {"success": True, "deferred": True, "domain": domain}
+
+        try:
+            # Re-apply the readiness filter: recipients may have been sent
+            # or cancelled since the batch was planned.
+            counts = _retry_messages(
+                retry_scheduler.ready_messages(message_ids).select_related(
+                    "sender", "sender__mailbox__domain"
+                ),
+                force_mta_out=force_mta_out,
+            )
+        finally:
+            release_cache_slot(*domain_slot)
+
+        retry_scheduler.record_stats(
+            sent=counts["success_count"],
+            failed=counts["error_count"],
+            batches=1,
+        )
+        # Messages whose send raised are still ready: keep them out of
+        # the next batches until the next tick.
+        retry_scheduler.mark_queued(message_ids, retry_scheduler.RETRIED_TIMEOUT)
+    except Exception:
+        retry_scheduler.unmark_queued(message_ids)
+        raise
+    finally:
+        if batch_slot:
+            release_cache_slot(*batch_slot)
+
+    if batch_slot:
+        free_slots = (
+            settings.OUTBOUND_RETRY_MAX_BATCHES
+            - retry_scheduler.count_batches_in_flight()
+        )
+        if free_slots > 0:
+            _dispatch_retry_batches(
+                retry_scheduler.ready_messages(),
+                batch_size or settings.OUTBOUND_RETRY_BATCH_SIZE,
+                free_slots,
+                force_mta_out=force_mta_out,
+            )
+    return {"success": True, "deferred": False, "domain": domain, **counts}
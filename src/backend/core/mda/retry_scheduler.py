@@ -0,0 +1,269 @@
+"""Fan-out scheduling for the outbound retry queue.
+
+``retry_messages_task`` used to walk every ready message and call
+``send_message`` one after another in a single task, so after an MTA
+outage thousands of RETRY recipients drained one message at a time
+behind the slowest remote MX. The periodic run is now a scheduler:
+
+* Ready messages are read in ``retry_at`` order (never-attempted
+  recipients first) and grouped by the destination domain of their
+  first ready recipient, so one slow or throttling domain only ever
+  occupies its own batches.
+* Each group is cut into batches of ``OUTBOUND_RETRY_BATCH_SIZE``
+  messages, handed to ``retry_messages_batch_task`` on the outbound
+  queue.
+* Backpressure: at most ``OUTBOUND_RETRY_MAX_BATCHES`` batches are in
+  flight cluster-wide. The scheduler stops dispatching when every slot
+  is taken. Each batch that completes plans and dispatches the next
+  ones into the slots left free, so a backlog keeps draining between
+  beat ticks instead of waiting for the next one.
+* At most ``OUTBOUND_RETRY_DOMAIN_CONCURRENCY`` batches of one domain
+  run at the same time. A batch that finds its domain saturated is
+  deferred to the next tick instead of blocking a worker.
+
+Slots are ``cache.add`` keys (see ``core.utils.acquire_cache_slot``)
+that expire after ``SLOT_TIMEOUT``, so a killed worker cannot wedge the
+queue. Messages handed to a batch are marked as queued in the cache so
+overlapping ticks don't dispatch them twice; ``send_message`` still
+holds its own per-message lock as the final guard. Once retried, a
+message stays marked until the next beat tick: one whose send raised
+is still ready, and must not be picked again by the next batch.
+
+Progress is reported as cumulative counters in a Redis hash, exposed by
+``CustomDBPrometheusMetricsCollector`` rather than through per-batch
+``update_state`` calls nobody polls.
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from redis.exceptions import RedisError
+
+from core import models
+from core.enums import MessageDeliveryStatusChoices
+from core.utils import get_redis_client, is_redis_backend
+
+logger = logging.getLogger(__name__)
+
+BATCH_SLOT_PREFIX = "outbound_retry:batch_slot"
+_DOMAIN_SLOT_PREFIX = "outbound_retry:domain_slot:{domain}"
+_QUEUED_KEY = "outbound_retry:queued:{message_id}"
+STATS_KEY = "outbound_retry:stats"
+STATS_FIELDS = ("sent", "failed", "deferred", "batches")
+
+# Matches the ``send_message`` lock: a batch holding a slot longer than
+# this has almost certainly lost its worker.
+SLOT_TIMEOUT = 1800
+
+# Beat interval of ``retry_messages_task``: a message is retried at most
+# once per tick, as with the former serial loop.
+RETRIED_TIMEOUT = 300
+
+# Upper bound on the number of ready messages one tick inspects while
+# filling batches, so a backlog dominated by a saturated domain doesn't
+# turn the scheduler into a full table scan.
+_SCAN_LIMIT = 10_000
+_SCAN_CHUNK_SIZE = 500
+
+
+@dataclass
+class RetryBatch:
+    """Messages of one destination domain, retried together."""
+
+    domain: str
+    message_ids: list[str] = field(default_factory=list)
+
+
+def ready_recipients_q(now=None) -> Q:
+    """Recipients that are due for a (re)try at ``now``."""
+    now = now or timezone.now()
+    return (
+        Q(delivery_status=MessageDeliveryStatusChoices.RETRY)
+        | Q(delivery_status__isnull=True)
+    ) & (Q(retry_at__isnull=True) | Q(retry_at__lte=now))
+
+
+def ready_messages(message_ids=None):
+    """Outbound messages with at least one recipient ready for retry.
+
+    ``is_spam=False`` is a defence-in-depth filter: should any code path
+    mint an is_sender=True spam record, it must never re-enter the
+    outbound pipeline.
+
+    ``Exists`` keeps the outer query linear at multi-million recipient
+    scale — PG short-circuits on the first matching recipient per
+    message instead of materialising a join. Messages are ordered by
+    their earliest due recipient, never-attempted ones first.
+    """
+    ready_recipients = models.MessageRecipient.objects.filter(
+        ready_recipients_q(), message_id=OuterRef("pk")
+    )
+
+    message_filter_q = Q(
+        is_draft=False,
+        is_sender=True,
+        is_spam=False,
+    ) & Exists(ready_recipients)
+
+    if message_ids is not None:
+        message_filter_q &= Q(id__in=message_ids)
+
+    next_retry_at = ready_recipients.order_by(
+        F("retry_at").asc(nulls_first=True)
+    ).values("retry_at")[:1]
+
+    return (
+        models.Message.objects.filter(message_filter_q)
+        .annotate(next_retry_at=Subquery(next_retry_at))
+        .order_by(F("next_retry_at").asc(nulls_first=True), "created_at")
+    )
+
+
+def _recipient_domains(message_ids) -> dict:
+    """Map each message ID to the domain of its first ready recipient."""
+    domains = {}
+    rows = (
+        models.MessageRecipient.objects.filter(
+            ready_recipients_q(), message_id__in=message_ids
+        )
+        .order_by("contact__email")
+        .values_list("message_id", "contact__email")
+    )
+    for message_id, email in rows:
+        domains.setdefault(str(message_id), email.rpartition("@")[2].lower())
+    return domains
+
+
+def plan_batches(messages, batch_size: int, max_batches: int) -> list[RetryBatch]:
+    """Group ready ``messages`` into at most ``max_batches`` domain batches.
+
+    Messages already handed to an in-flight batch are skipped. No domain
+    gets more than ``OUTBOUND_RETRY_DOMAIN_CONCURRENCY`` batches per
+    tick, since extra ones would only be deferred again. Batches are
+    returned in the order of their most overdue message.
+    """
+    per_domain_limit = settings.OUTBOUND_RETRY_DOMAIN_CONCURRENCY * batch_size
+    capacity = max_batches * batch_size
+    groups: dict[str, list[str]] = {}
+    planned = 0
+    scanned = 0
+
+    positions: dict[str, int] = {}
+
+    ids = messages.values_list("id", flat=True)
+    chunk = []
+    for message_id in ids.iterator(chunk_size=_SCAN_CHUNK_SIZE):
+        chunk.append(str(message_id))
+        positions[chunk[-1]] = scanned
+        scanned += 1
+        if len(chunk) < _SCAN_CHUNK_SIZE and scanned < _SCAN_LIMIT:
+            continue
+
+        planned += _assign_chunk(chunk, groups, per_domain_limit, capacity - planned)
+        chunk = []
+        if planned >= capacity or scanned >= _SCAN_LIMIT:
+            break
+    if chunk and planned < capacity:
+        _assign_chunk(chunk, groups, per_domain_limit, capacity - planned)
+
+    batches = [
+        RetryBatch(domain=domain, message_ids=group_ids[start : start + batch_size])
+        for domain, group_ids in groups.items()
+        for start in range(0, len(group_ids), batch_size)
+    ]
+    batches.sort(key=lambda batch: positions[batch.message_ids[0]])
+    return batches[:max_batches]
+
+
+def _assign_chunk(chunk, groups, per_domain_limit, room) -> int:
+    """Append not-yet-queued messages of ``chunk`` to their domain group."""
+    queued = cache.get_many([_QUEUED_KEY.format(message_id=i) for i in chunk])
+    candidates = [i for i in chunk if _QUEUED_KEY.format(message_id=i) not in queued]
+    if not candidates:
+        return 0
+
+    domains = _recipient_domains(candidates)
+    assigned = 0
+    for message_id in candidates:
+        if assigned >= room:
+            break
+        group = groups.setdefault(domains.get(message_id, ""), [])
+        if len(group) < per_domain_limit:
+            group.append(message_id)
+            assigned += 1
+    return assigned
+
+
+def mark_queued(message_ids, timeout: int = SLOT_TIMEOUT) -> None:
+    """Flag messages as handed to a batch so later ticks skip them."""
+    cache.set_many(
+        {_QUEUED_KEY.format(message_id=i): 1 for i in message_ids},
+        timeout=timeout,
+    )
+
+
+def unmark_queued(message_ids) -> None:
+    """Make messages eligible for scheduling again."""
+    cache.delete_many([_QUEUED_KEY.format(message_id=i) for i in message_ids])
+
+
+def domain_slot_prefix(domain: str) -> str:
+    """Cache key prefix of the concurrency slots of ``domain``."""
+    return _DOMAIN_SLOT_PREFIX.format(domain=domain or "-")
+
+
+def record_stats(**counts: int) -> None:
+    """Add ``counts`` to the cumulative retry counters.
+
+    Best-effort: without Redis, or if Redis fails, counters are dropped
+    — they are observability only.
+    """
+    if not is_redis_backend():
+        return
+    try:
+        pipe = get_redis_client().pipeline()
+        for name, value in counts.items():
+            if value:
+                pipe.hincrby(STATS_KEY, name, value)
+        pipe.execute()
+    except RedisError as exc:
+        logger.warning(
+            "Redis unavailable while recording retry stats (%s: %s)",
+            type(exc).__name__,
+            exc,
+        )
+
+
+def get_stats() -> dict:
+    """Return the cumulative retry counters, zero-filled."""
+    stats = dict.fromkeys(STATS_FIELDS, 0)
+    if not is_redis_backend():
+        return stats
+    try:
+        raw = get_redis_client().hgetall(STATS_KEY)
+    except RedisError as exc:
+        logger.warning(
+            "Redis unavailable while reading retry stats (%s: %s)",
+            type(exc).__name__,
+            exc,
+        )
+        return stats
+    for raw_name, value in raw.items():
+        name = raw_name.decode() if isinstance(raw_name, bytes) else raw_name
+        if name in stats:
+            stats[name] = int(value)
+    return stats
+
+
+def count_batches_in_flight() -> int:
+    """Number of global batch slots currently held."""
+    keys = [
+        f"{BATCH_SLOT_PREFIX}:{index}"
+        for index in range(settings.OUTBOUND_RETRY_MAX_BATCHES)
+    ]
+    return len(cache.get_many(keys))
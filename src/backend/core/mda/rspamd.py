@@ -0,0 +1,256 @@
+"""Pooled rspamd client with a bounded scan budget and a circuit breaker.
+
+Every queued inbound message is scanned by rspamd (``/checkv2``) before
+it is delivered, so a slow or failing rspamd directly stalls the inbound
+workers. ``scan`` bounds that cost:
+
+* Connections are kept alive in a per-process ``requests.Session``
+  (``RSPAMD_POOL_SIZE`` connections per rspamd host) instead of being
+  set up again for every message.
+* A scan gets ``RSPAMD_TIMEOUT`` seconds, waiting for a slot included.
+  At most ``RSPAMD_MAX_CONCURRENCY`` scans run cluster-wide (cache
+  slots, see ``core.utils.acquire_cache_slot``); a scan that can't get
+  one within its budget is skipped.
+* Messages over ``RSPAMD_MAX_SCAN_SIZE`` bytes are truncated before the
+  scan, so its cost doesn't grow with the attachments. Body signatures
+  can't verify on a truncated copy: such results are flagged
+  ``truncated`` and ignored by the rspamd sender-auth backend.
+* After ``RSPAMD_CIRCUIT_FAILURE_THRESHOLD`` failed scans within
+  ``RSPAMD_CIRCUIT_COOLDOWN`` seconds, the circuit of that rspamd URL
+  opens: scans are skipped without contacting it until the cooldown has
+  elapsed.
+
+Skipped scans raise ``RspamdScanSkipped``; callers fail open, as they do
+on errors. Scan latencies and outcomes are kept as cumulative counters
+in a Redis hash (``STATS_KEY``) and read by
+``CustomDBPrometheusMetricsCollector`` at scrape time, like the Celery
+task metrics.
+"""
+
+import bisect
+import logging
+import os
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+
+import requests
+from redis.exceptions import RedisError
+from requests.adapters import HTTPAdapter
+
+from core.utils import (
+    acquire_cache_slot,
+    get_redis_client,
+    is_redis_backend,
+    release_cache_slot,
+)
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "rspamd:stats"
+
+# Upper bounds of the latency histogram buckets (the implicit last one is +Inf).
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RESULTS = ("ok", "error", "timeout", "circuit_open", "saturated")
+
+_SLOT_PREFIX = "rspamd:slot"
+_CIRCUIT_FAILURES_KEY = "rspamd:circuit:failures:{url}"
+_CIRCUIT_OPEN_KEY = "rspamd:circuit:open:{url}"
+
+# A connection that takes longer than this to set up won't get a scan
+# through in time anyway.
+_CONNECT_TIMEOUT = 2
+_SLOT_POLL_INTERVAL = 0.05
+# Distinct rspamd hosts (global and per-domain SPAM_CONFIG) pooled per process.
+_POOLED_HOSTS = 4
+
+_session: requests.Session | None = None  # pylint: disable=invalid-name
+_session_pid: int | None = None  # pylint: disable=invalid-name
+
+
+class RspamdScanSkipped(Exception):
+    """The scan was not attempted: circuit open or no free slot in time."""
+
+
+def _get_session() -> requests.Session:
+    """The keep-alive session of this process.
+
+    Rebuilt after a fork so that prefork workers never share sockets
+    with their parent.
+    """
+    global _session, _session_pid  # pylint: disable=global-statement
+    if _session is None or _session_pid != os.getpid():
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=_POOLED_HOSTS,
+            pool_maxsize=settings.RSPAMD_POOL_SIZE,
+            max_retries=0,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def _record_scan(result: str, seconds: float | None = None, truncated=False) -> None:
+    """Add one scan to the counters. Samples are dropped without Redis."""
+    if not is_redis_backend():
+        return
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.hincrby(STATS_KEY, f"result|{result}", 1)
+        if seconds is not None:
+            bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+            pipe.hincrby(STATS_KEY, f"latency|{bucket}", 1)
+            pipe.hincrbyfloat(STATS_KEY, "latency|sum", seconds)
+        if truncated:
+            pipe.hincrby(STATS_KEY, "truncated", 1)
+        pipe.execute()
+    except RedisError as exc:
+        logger.warning(
+            "Redis unavailable while recording rspamd metrics (%s: %s)",
+            type(exc).__name__,
+            exc,
+        )
+
+
+def get_stats() -> dict:
+    """Return the scan counters.
+
+    ``{"latency": {"buckets": [...], "sum": float}, "results": {result:
+    int}, "truncated": int}``, the last latency bucket being +Inf.
+    """
+    stats = {
+        "latency": {"buckets": [0] * (len(LATENCY_BUCKETS) + 1), "sum": 0.0},
+        "results": dict.fromkeys(RESULTS, 0),
+        "truncated": 0,
+    }
+    if not is_redis_backend():
+        return stats
+    try:
+        raw = get_redis_client().hgetall(STATS_KEY)
+    except RedisError as exc:
+        logger.warning(
+            "Redis unavailable while reading rspamd metrics (%s: %s)",
+            type(exc).__name__,
+            exc,
+        )
+        return stats
+
+    for raw_field, raw_value in raw.items():
+        name = raw_field.decode() if isinstance(raw_field, bytes) else raw_field
+        metric, _, rest = name.partition("|")
+        if metric == "truncated":
+            stats["truncated"] = int(raw_value)
+        elif metric == "result" and rest in stats["results"]:
+            stats["results"][rest] = int(raw_value)
+        elif metric == "latency" and rest == "sum":
+            stats["latency"]["sum"] = float(raw_value)
+        elif metric == "latency" and rest.isdigit():
+            index = int(rest)
+            if index < len(stats["latency"]["buckets"]):
+                stats["latency"]["buckets"][index] = int(raw_value)
+    return stats
+
+
+def is_circuit_open(url: str) -> bool:
+    """Whether scans against ``url`` are currently skipped."""
+    return bool(cache.get(_CIRCUIT_OPEN_KEY.format(url=url)))
+
+
+def _record_failure(url: str) -> None:
+    """Count a failed scan, and open the circuit past the threshold."""
+    cooldown = settings.RSPAMD_CIRCUIT_COOLDOWN
+    key = _CIRCUIT_FAILURES_KEY.format(url=url)
+    cache.add(key, 0, timeout=cooldown)
+    try:
+        failures = cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr().
+        cache.add(key, 1, timeout=cooldown)
+        failures = 1
+    if failures >= settings.RSPAMD_CIRCUIT_FAILURE_THRESHOLD:
+        cache.set(_CIRCUIT_OPEN_KEY.format(url=url), True, timeout=cooldown)
+        cache.delete(key)
+        logger.warning(
+            "rspamd circuit opened for %s after %d failed scans, "
+            "skipping scans for %ds",
+            url,
+            failures,
+            cooldown,
+        )
+
+
+def _acquire_slot(deadline: float):
+    """Wait for a cluster-wide scan slot until ``deadline``.
+
+    Returns the slot, ``()`` when concurrency is not capped, or ``None``
+    when no slot freed up in time.
+    """
+    limit = settings.RSPAMD_MAX_CONCURRENCY
+    if not limit:
+        return ()
+    while True:
+        slot = acquire_cache_slot(
+            _SLOT_PREFIX, limit, timeout=settings.RSPAMD_TIMEOUT + _CONNECT_TIMEOUT
+        )
+        if slot is not None or time.monotonic() + _SLOT_POLL_INTERVAL > deadline:
+            return slot
+        time.sleep(_SLOT_POLL_INTERVAL)
+
+
+def scan(raw_data: bytes, url: str, auth: str | None = None) -> dict[str, Any]:
+    """Scan a message with the rspamd instance at ``url``.
+
+    Returns the parsed ``/checkv2`` response, with ``"truncated": True``
+    added when only the start of the message was scanned. Raises
+    ``RspamdScanSkipped`` when the scan was not attempted, or the
+    ``requests`` exception of a failed scan.
+    """
+    if is_circuit_open(url):
+        _record_scan("circuit_open")
+        raise RspamdScanSkipped(f"rspamd circuit open for {url}")
+
+    deadline = time.monotonic() + settings.RSPAMD_TIMEOUT
+    slot = _acquire_slot(deadline)
+    if slot is None:
+        _record_scan("saturated")
+        raise RspamdScanSkipped("no rspamd scan slot freed up in time")
+
+    try:
+        truncated = len(raw_data) > settings.RSPAMD_MAX_SCAN_SIZE
+        if truncated:
+            raw_data = raw_data[: settings.RSPAMD_MAX_SCAN_SIZE]
+        headers = {"Content-Type": "message/rfc822"}
+        if auth:
+            headers["Authorization"] = auth
+
+        remaining = max(deadline - time.monotonic(), _SLOT_POLL_INTERVAL)
+        start = time.perf_counter()
+        try:
+            response = _get_session().post(
+                f"{url}/checkv2",
+                data=raw_data,
+                headers=headers,
+                timeout=(min(_CONNECT_TIMEOUT, remaining), remaining),
+            )
+            response.raise_for_status()
+            result = response.json()
+        except requests.exceptions.Timeout:
+            _record_scan("timeout", time.perf_counter() - start)
+            _record_failure(url)
+            raise
+        except (requests.exceptions.RequestException, ValueError):
+            _record_scan("error", time.perf_counter() - start)
+            _record_failure(url)
+            raise
+        _record_scan("ok", time.perf_counter() - start, truncated=truncated)
+    finally:
+        if slot:
+            release_cache_slot(*slot)
+
+    if truncated:
+        result["truncated"] = True
+    return result
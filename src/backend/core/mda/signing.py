@@ -3,13 +3,13 @@
 import base64
 import logging
 
-import dns.resolver
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 from dkim import DKIM
 from dkim import sign as dkim_sign
 
 from core.enums import DKIMAlgorithmChoices
+from core.services.dns.cache import resolve_txt
 
 logger = logging.getLogger(__name__)
 
@@ -116,6 +116,17 @@ def sign_message_dkim(raw_mime_message: bytes, maildomain) -> bytes | None:
         return None
 
 
+def get_dkim_txt(fqdn, **kwargs):
+    """DNS function for dkimpy: the first TXT record of ``fqdn``, or None.
+
+    Lookups go through the shared DNS cache, so a burst of messages
+    signed with the same key costs a single DNS query.
+    """
+    values = resolve_txt(fqdn)
+    # DKIM key records should be unique; like dkimpy, use the first one.
+    return values[0] if values else None
+
+
 def verify_message_dkim(raw_mime_message: bytes) -> str | None:
     """Verify a DKIM signature on a raw MIME message using public DNS.
 
@@ -136,47 +147,12 @@ def verify_message_dkim(raw_mime_message: bytes) -> str | None:
         exists can treat the result as truthy/falsy.
     """
     try:
-        # Create a DNS function that performs actual DNS lookups
-        def get_dns_txt(fqdn, **kwargs):
-            # Convert FQDN to string if it's bytes
-            fqdn_str = fqdn.decode("ascii") if isinstance(fqdn, bytes) else fqdn
-            # Remove trailing dot if present
-            if fqdn_str.endswith("."):
-                fqdn_str = fqdn_str[:-1]
-
-            try:
-                # Query DNS for TXT records
-                answers = dns.resolver.resolve(fqdn_str, "TXT", lifetime=10)
-                # Combine all TXT record strings (TXT records can be split across multiple strings)
-                txt_values = []
-                for answer in answers:
-                    # answer.strings is a list of bytes, join them
-                    txt_value = b"".join(answer.strings)
-                    txt_values.append(txt_value)
-
-                # Return the first TXT record value (DKIM should only have one)
-                if txt_values:
-                    return txt_values[0]
-            except (
-                dns.resolver.NXDOMAIN,
-                dns.resolver.NoAnswer,
-                dns.resolver.NoNameservers,
-            ):
-                # Domain or record doesn't exist
-                logger.warning("DNS lookup error for %s", fqdn_str)
-                return None
-            except dns.resolver.Timeout:
-                logger.warning("DNS timeout while looking up DKIM record: %s", fqdn_str)
-                return None
-
-            return None
-
         # Verify the DKIM signature using public DNS. We drive the DKIM object
         # directly (rather than the module-level ``verify`` helper) so we can
         # read back the ``d=`` domain of the signature that validated: ``verify``
         # records it on ``self.domain``.
         dkim_obj = DKIM(raw_mime_message)
-        if not dkim_obj.verify(dnsfunc=get_dns_txt):
+        if not dkim_obj.verify(dnsfunc=get_dkim_txt):
             return None
         signing_domain = dkim_obj.domain
         if not signing_domain:
@@ -1,37 +1,141 @@
 """
-Custom Prometheus metrics collector for the messages core application.
+Custom Prometheus metrics for the messages core application.
 
-This module defines a collector that exposes database-related metrics
-(such as message counts by status, attachment counts, and total attachment size)
-to Prometheus via the /metrics endpoint.
+This module defines:
+
+- a collector that exposes database-related metrics (such as message
+  counts by status, attachment counts, and total attachment size) to
+  Prometheus via the /metrics endpoint. Those are full-table aggregates,
+  so they are computed by ``refresh_db_gauges`` (periodic task) and
+  served from the cache at scrape time;
+- per-endpoint request histograms (latency, SQL queries and time, Redis
+  and OpenSearch calls, blob bytes read), fed by
+  ``core.middlewares.RequestMetricsMiddleware``.
 """
 
 from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Count, Sum
+from django.utils import timezone
 
-from prometheus_client.core import GaugeMetricFamily
+from prometheus_client import Histogram
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    HistogramMetricFamily,
+)
 
+from . import instrumentation, task_metrics
 from .enums import MessageDeliveryStatusChoices
+from .mda import inbound_recovery, retry_scheduler, rspamd
 from .models import Attachment, MessageRecipient
 
+DB_GAUGES_CACHE_KEY = "metrics:db_gauges"
+
+# A few missed refreshes are tolerated before a scrape has to compute
+# the gauges itself.
+_DB_GAUGES_CACHE_INTERVALS = 3
+
+_REQUEST_LABELS = ["view", "method"]
+_REQUEST_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, float("inf"))
+
+REQUEST_LATENCY = Histogram(
+    "messages_request_latency_seconds",
+    "Request latency by endpoint",
+    _REQUEST_LABELS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "messages_request_db_queries",
+    "SQL queries per request by endpoint",
+    _REQUEST_LABELS,
+    buckets=_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "messages_request_db_seconds",
+    "Time spent in SQL per request by endpoint",
+    _REQUEST_LABELS,
+)
+REQUEST_REDIS_CALLS = Histogram(
+    "messages_request_redis_calls",
+    "Redis round trips per request by endpoint",
+    _REQUEST_LABELS,
+    buckets=_COUNT_BUCKETS,
+)
+REQUEST_OPENSEARCH_CALLS = Histogram(
+    "messages_request_opensearch_calls",
+    "OpenSearch requests per request by endpoint",
+    _REQUEST_LABELS,
+    buckets=_COUNT_BUCKETS,
+)
+REQUEST_BLOB_BYTES_READ = Histogram(
+    "messages_request_blob_bytes_read",
+    "Decoded blob bytes read per request by endpoint",
+    _REQUEST_LABELS,
+    buckets=(0, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, float("inf")),
+)
+
+
+def observe_request(view: str, method: str, seconds: float, counters) -> None:
+    """Record one request in the per-endpoint histograms."""
+    labels = (view, method if method in _REQUEST_METHODS else "other")
+    REQUEST_LATENCY.labels(*labels).observe(seconds)
+    REQUEST_DB_QUERIES.labels(*labels).observe(counters[instrumentation.DB_QUERIES])
+    REQUEST_DB_SECONDS.labels(*labels).observe(counters[instrumentation.DB_SECONDS])
+    REQUEST_REDIS_CALLS.labels(*labels).observe(counters[instrumentation.REDIS_CALLS])
+    REQUEST_OPENSEARCH_CALLS.labels(*labels).observe(
+        counters[instrumentation.OPENSEARCH_CALLS]
+    )
+    REQUEST_BLOB_BYTES_READ.labels(*labels).observe(
+        counters[instrumentation.BLOB_BYTES_READ]
+    )
+
+
+def refresh_db_gauges() -> dict:
+    """Compute the database gauges and store them in the cache."""
+    status_counts = MessageRecipient.objects.values("delivery_status").annotate(
+        count=Count("id")
+    )
+    gauges = {
+        "message_status": {
+            row["delivery_status"]: row["count"] for row in status_counts
+        },
+        "draft_attachment_count": Attachment.objects.count(),
+        "draft_attachments_total_size": (
+            Attachment.objects.aggregate(Sum("blob__size"))["blob__size__sum"] or 0
+        ),
+        "inbound_queue": inbound_recovery.get_queue_stats(),
+    }
+    cache.set(
+        DB_GAUGES_CACHE_KEY,
+        gauges,
+        timeout=settings.METRICS_DB_GAUGES_REFRESH_INTERVAL
+        * _DB_GAUGES_CACHE_INTERVALS,
+    )
+    return gauges
+
+
+def get_db_gauges() -> dict:
+    """Return the cached database gauges, computing them on a cold cache."""
+    gauges = cache.get(DB_GAUGES_CACHE_KEY)
+    if gauges is None:
+        gauges = refresh_db_gauges()
+    return gauges
+
 
 class CustomDBPrometheusMetricsCollector:
     """
     Prometheus collector for custom database metrics.
     """
 
-    def get_messages_with_status(self):
+    def get_messages_with_status(self, gauges):
         """
         Yields a GaugeMetricFamily for each possible message delivery status,
         with the count of messages for that status. If no messages exist for a status,
         the count is 0.
         """
-        messages_statuses_count = MessageRecipient.objects.values(
-            "delivery_status"
-        ).annotate(count=Count("id"))
-        status_count_map = {
-            row["delivery_status"]: row["count"] for row in messages_statuses_count
-        }
+        status_count_map = gauges["message_status"]
 
         gauge = GaugeMetricFamily(
             "message_status_count",
@@ -46,29 +150,165 @@ class CustomDBPrometheusMetricsCollector:
 
         yield gauge
 
-    def get_draft_attachments_count(self):
+    def get_draft_attachments_count(self, gauges):
         """
         Yields a GaugeMetricFamily with the total number of draft attachments.
         """
-        attachments_count = Attachment.objects.count()
         yield GaugeMetricFamily(
             "draft_attachment_count",
             "Number of draft attachments",
-            value=attachments_count,
+            value=gauges["draft_attachment_count"],
         )
 
-    def get_draft_attachments_total_size(self):
+    def get_draft_attachments_total_size(self, gauges):
         """
         Yields a GaugeMetricFamily with the total size (in bytes) of all draft attachments.
         """
-        total_size = (
-            Attachment.objects.aggregate(Sum("blob__size"))["blob__size__sum"] or 0
-        )
         yield GaugeMetricFamily(
             "draft_attachments_total_size_bytes",
             "Total size of all draft attachments in bytes",
-            value=total_size,
+            value=gauges["draft_attachments_total_size"],
+        )
+
+    def get_inbound_queue_metrics(self, gauges):
+        """
+        Yields the number of queued inbound messages, by state (``visible``
+        to the recovery task or ``leased`` to a worker), and the age of the
+        oldest one.
+        """
+        stats = gauges.get("inbound_queue")
+        if stats is None:  # cached before the queue gauges existed
+            return
+
+        queued = GaugeMetricFamily(
+            "inbound_queue_messages",
+            "Inbound messages waiting for processing, by state",
+            labels=["state"],
+        )
+        for state in ("visible", "leased"):
+            queued.add_metric([state], stats[state])
+        yield queued
+
+        oldest = stats["oldest_created_at"]
+        yield GaugeMetricFamily(
+            "inbound_queue_oldest_age_seconds",
+            "Age of the oldest inbound message waiting for processing",
+            value=(timezone.now() - oldest).total_seconds() if oldest else 0,
+        )
+
+    def get_outbound_retry_metrics(self):
+        """
+        Yields the cumulative outcomes of the outbound retry batches, and the
+        number of batches currently in flight.
+        """
+        stats = retry_scheduler.get_stats()
+
+        messages = CounterMetricFamily(
+            "outbound_retry_messages",
+            "Messages handled by outbound retry, by result",
+            labels=["result"],
+        )
+        for result in ("sent", "failed", "deferred"):
+            messages.add_metric([result], stats[result])
+        yield messages
+
+        yield CounterMetricFamily(
+            "outbound_retry_batches",
+            "Outbound retry batches processed",
+            value=stats["batches"],
+        )
+        yield GaugeMetricFamily(
+            "outbound_retry_batches_in_flight",
+            "Outbound retry batches currently holding a slot",
+            value=retry_scheduler.count_batches_in_flight(),
+        )
+
+    def get_rspamd_metrics(self):
+        """
+        Yields the rspamd scan latency histogram and the scan counters, by
+        result (``ok``, ``error``, ``timeout``, ``circuit_open``, ``saturated``).
+        """
+        stats = rspamd.get_stats()
+
+        bounds = [*map(str, rspamd.LATENCY_BUCKETS), "+Inf"]
+        cumulative, total = [], 0
+        for bound, count in zip(bounds, stats["latency"]["buckets"], strict=True):
+            total += count
+            cumulative.append((bound, total))
+        latency = HistogramMetricFamily(
+            "rspamd_scan_seconds", "Duration of the rspamd scans that were attempted"
+        )
+        latency.add_metric([], cumulative, stats["latency"]["sum"])
+        yield latency
+
+        scans = CounterMetricFamily(
+            "rspamd_scans",
+            "rspamd scans of inbound messages, by result",
+            labels=["result"],
+        )
+        for result, count in stats["results"].items():
+            scans.add_metric([result], count)
+        yield scans
+
+        yield CounterMetricFamily(
+            "rspamd_truncated_scans",
+            "rspamd scans of messages truncated to RSPAMD_MAX_SCAN_SIZE",
+            value=stats["truncated"],
+        )
+
+    def get_celery_task_metrics(self):
+        """
+        Yields the per-task queue wait, run time and payload size histograms,
+        the retry and failure counters, and the length of each broker queue.
+        """
+        stats = task_metrics.get_stats()
+        histograms = {
+            "wait": HistogramMetricFamily(
+                "celery_task_queue_wait_seconds",
+                "Time between enqueue (or ETA) and start, by task",
+                labels=["task"],
+            ),
+            "run": HistogramMetricFamily(
+                "celery_task_run_seconds",
+                "Task execution time, by task",
+                labels=["task"],
+            ),
+            "payload": HistogramMetricFamily(
+                "celery_task_payload_bytes",
+                "Serialized task arguments size, by task",
+                labels=["task"],
+            ),
+        }
+        retries = CounterMetricFamily(
+            "celery_task_retries", "Task runs ending in a retry", labels=["task"]
+        )
+        failures = CounterMetricFamily(
+            "celery_task_failures", "Task runs ending in a failure", labels=["task"]
+        )
+        for task_name, task_stats in sorted(stats.items()):
+            for metric, family in histograms.items():
+                bounds = [*map(str, task_metrics.HISTOGRAMS[metric]), "+Inf"]
+                cumulative, total = [], 0
+                for bound, count in zip(
+                    bounds, task_stats[metric]["buckets"], strict=True
+                ):
+                    total += count
+                    cumulative.append((bound, total))
+                family.add_metric([task_name], cumulative, task_stats[metric]["sum"])
+            retries.add_metric([task_name], task_stats["retries"])
+            failures.add_metric([task_name], task_stats["failures"])
+        yield from histograms.values()
+        yield retries
+        yield failures
+
+        queue_length = GaugeMetricFamily(
+            "celery_queue_length",
+            "Messages waiting in the broker, by queue",
+            labels=["queue"],
         )
+        for queue, length in task_metrics.get_queue_lengths().items():
+            queue_length.add_metric([queue], length)
+        yield queue_length
 
     def collect(self):
         """
@@ -81,6 +321,11 @@ class CustomDBPrometheusMetricsCollector:
         if not apps.ready or not apps.is_installed("core"):
             return
 
-        yield from self.get_messages_with_status()
-        yield from self.get_draft_attachments_count()
-        yield from self.get_draft_attachments_total_size()
+        gauges = get_db_gauges()
+        yield from self.get_messages_with_status(gauges)
+        yield from self.get_draft_attachments_count(gauges)
+        yield from self.get_draft_attachments_total_size(gauges)
+        yield from self.get_inbound_queue_metrics(gauges)
+        yield from self.get_outbound_retry_metrics()
+        yield from self.get_rspamd_metrics()
+        yield from self.get_celery_task_metrics()
@@ -0,0 +1,26 @@
+"""Periodic refresh of the database-backed Prometheus gauges."""
+
+from django.conf import settings
+
+from celery.utils.log import get_task_logger
+
+from core.metrics import refresh_db_gauges
+
+from messages.celery_app import app as celery_app
+
+logger = get_task_logger(__name__)
+
+
+@celery_app.task
+def refresh_db_metrics_task():
+    """Recompute the database gauges served by the Prometheus endpoint.
+
+    The aggregates scan whole tables, so they are computed here on a
+    fixed schedule instead of on every scrape.
+    """
+    if not settings.ENABLE_PROMETHEUS:
+        return {"success": True, "skipped": True}
+
+    gauges = refresh_db_gauges()
+    logger.debug("Refreshed database metrics: %s", gauges)
+    return {"success": True, "skipped": False}
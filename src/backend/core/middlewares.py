@@ -2,6 +2,7 @@
 Custom middleware for the messages application.
 """
 
+import time
 from secrets import compare_digest
 
 from django.conf import settings
@@ -10,6 +11,8 @@ from django.utils.cache import patch_vary_headers
 
 from corsheaders.middleware import CorsMiddleware
 
+from core import instrumentation
+
 
 class PrometheusAuthMiddleware:
     """
@@ -31,6 +34,38 @@ class PrometheusAuthMiddleware:
         return self.get_response(request)
 
 
+class RequestMetricsMiddleware:
+    """
+    Middleware recording per-endpoint latency and resource usage.
+
+    Counts SQL queries (and their time), Redis round trips, OpenSearch
+    requests and blob bytes read while the request is handled, and feeds
+    them to the histograms of ``core.metrics``, labelled by URL name.
+    Only installed when ENABLE_PROMETHEUS is True.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Imported here: core.metrics depends on the models, which aren't
+        # loaded yet when the middleware chain is built.
+        # pylint: disable=import-outside-toplevel
+        from core.metrics import observe_request
+
+        start = time.perf_counter()
+        with instrumentation.collect() as counters:
+            response = self.get_response(request)
+        match = getattr(request, "resolver_match", None)
+        observe_request(
+            match.view_name if match else "<unresolved>",
+            request.method,
+            time.perf_counter() - start,
+            counters,
+        )
+        return response
+
+
 class CustomCorsMiddleware(CorsMiddleware):
     """
     Custom CORS middleware that allows all origins for specific API paths.
@@ -0,0 +1,43 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+import core.models
+
+CREATE_IMMUTABLE_UNACCENT = """
+CREATE OR REPLACE FUNCTION messages_immutable_unaccent(text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $func$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $func$;
+"""
+
+DROP_IMMUTABLE_UNACCENT = "DROP FUNCTION IF EXISTS messages_immutable_unaccent(text);"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_message_mime_id_index'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(
+            sql=CREATE_IMMUTABLE_UNACCENT,
+            reverse_sql=DROP_IMMUTABLE_UNACCENT,
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='last_used_at',
+            field=models.DateTimeField(blank=True, help_text='Last time the mailbox sent a message to this contact', null=True, verbose_name='last used at'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=GinIndex(OpClass(Lower(core.models.ImmutableUnaccent(models.F('name'))), name='gin_trgm_ops'), name='contact_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=GinIndex(OpClass(Lower(core.models.ImmutableUnaccent(models.F('email'))), name='gin_trgm_ops'), name='contact_email_trgm'),
+        ),
+    ]
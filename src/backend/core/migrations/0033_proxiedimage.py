@@ -0,0 +1,84 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:12
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_contact_autocomplete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProxiedImage',
+            fields=[
+                (
+                    'id',
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text='primary key for the record as UUID',
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='id',
+                    ),
+                ),
+                (
+                    'created_at',
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        editable=False,
+                        help_text='date and time at which a record was created',
+                        verbose_name='created on',
+                    ),
+                ),
+                (
+                    'updated_at',
+                    models.DateTimeField(
+                        auto_now=True,
+                        editable=False,
+                        help_text='date and time at which a record was last updated',
+                        verbose_name='updated on',
+                    ),
+                ),
+                (
+                    'url_hash',
+                    models.CharField(
+                        help_text='SHA-256 (hex) of the normalized image URL',
+                        max_length=64,
+                        unique=True,
+                        verbose_name='url hash',
+                    ),
+                ),
+                (
+                    'expires_at',
+                    models.DateTimeField(
+                        help_text='When the cached copy must be fetched again.',
+                    ),
+                ),
+                (
+                    'blob',
+                    models.ForeignKey(
+                        help_text='The blob holding the image content.',
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name='proxied_images',
+                        to='core.blob',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'proxied image',
+                'verbose_name_plural': 'proxied images',
+                'db_table': 'messages_proxiedimage',
+                'indexes': [
+                    models.Index(
+                        fields=['expires_at'], name='proxiedimage_expires_idx'
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.11 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_proxiedimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maildomain',
+            name='dns_check_results',
+            field=models.JSONField(
+                blank=True,
+                help_text='Expected DNS records with their status at the last check.',
+                null=True,
+                verbose_name='DNS check results',
+            ),
+        ),
+        migrations.AddField(
+            model_name='maildomain',
+            name='dns_checked_at',
+            field=models.DateTimeField(
+                blank=True,
+                help_text='When the DNS records were last checked.',
+                null=True,
+                verbose_name='DNS checked at',
+            ),
+        ),
+    ]
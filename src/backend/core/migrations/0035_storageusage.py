@@ -0,0 +1,261 @@
+# Generated by Django 5.2.11 on 2026-10-18 15:31
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 500
+
+# Blobs of the messages of the threads a domain has access to, each
+# counted once. ``{column}`` is the message column linking the blob.
+DOMAIN_BLOBS_SIZE_SQL = """
+    SELECT COALESCE(SUM(sub.size_compressed), 0)
+    FROM (
+        SELECT DISTINCT b.id, b.size_compressed
+        FROM messages_blob b
+        JOIN messages_message m ON m.{column} = b.id
+        JOIN messages_threadaccess ta ON ta.thread_id = m.thread_id
+        JOIN messages_mailbox mb ON ta.mailbox_id = mb.id
+        WHERE mb.domain_id = messages_maildomain.id
+    ) sub
+"""
+
+
+def _sum(queryset, group_by, field):
+    """Subquery summing ``field`` over ``queryset`` grouped by ``group_by``."""
+    return Coalesce(
+        models.Subquery(
+            queryset.order_by()
+            .values(group_by)
+            .annotate(total=models.Sum(field))
+            .values('total')[:1]
+        ),
+        models.Value(0),
+    )
+
+
+def _count_messages(Message, lookup):
+    return Coalesce(
+        models.Subquery(
+            Message.objects.filter(**{lookup: models.OuterRef('pk')})
+            .order_by()
+            .values(lookup)
+            .annotate(cnt=models.Count('id', distinct=True))
+            .values('cnt')[:1]
+        ),
+        models.Value(0),
+    )
+
+
+def _backfill(owner_model, StorageUsage, owner_field, annotations):
+    queryset = (
+        owner_model.objects.filter(storage_usage__isnull=True)
+        .order_by('pk')
+        .annotate(**annotations)
+        .values('pk', 'messages_count', 'blobs_size')
+    )
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(page[:BATCH_SIZE])
+        if not rows:
+            return
+        last_pk = rows[-1]['pk']
+        StorageUsage.objects.bulk_create(
+            [
+                StorageUsage(
+                    **{f'{owner_field}_id': row['pk']},
+                    messages_count=row['messages_count'],
+                    blobs_size=row['blobs_size'],
+                )
+                for row in rows
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def backfill_storage_usage(apps, schema_editor):
+    """Create the rows of existing mailboxes and domains with exact values.
+
+    Signal handlers only add deltas to existing rows, and the metrics API
+    reports owners without a row as empty: without this backfill, existing
+    mailboxes and domains would read 0 bytes and drop every delta until the
+    first run of ``reconcile_storage_usage_task``. The exact values are
+    computed as that task does (``core.services.storage_usage``).
+    """
+    Attachment = apps.get_model('core', 'Attachment')
+    Blob = apps.get_model('core', 'Blob')
+    Mailbox = apps.get_model('core', 'Mailbox')
+    MailDomain = apps.get_model('core', 'MailDomain')
+    Message = apps.get_model('core', 'Message')
+    MessageTemplate = apps.get_model('core', 'MessageTemplate')
+    StorageUsage = apps.get_model('core', 'StorageUsage')
+
+    mailbox = models.OuterRef('pk')
+    _backfill(
+        Mailbox,
+        StorageUsage,
+        'mailbox',
+        {
+            'messages_count': _count_messages(Message, 'thread__accesses__mailbox'),
+            'blobs_size': (
+                _sum(
+                    Blob.objects.filter(messages__thread__accesses__mailbox=mailbox),
+                    'messages__thread__accesses__mailbox',
+                    'size_compressed',
+                )
+                + _sum(
+                    Blob.objects.filter(drafts__thread__accesses__mailbox=mailbox),
+                    'drafts__thread__accesses__mailbox',
+                    'size_compressed',
+                )
+                + _sum(
+                    Attachment.objects.filter(mailbox=mailbox),
+                    'mailbox',
+                    'blob__size_compressed',
+                )
+                + _sum(
+                    MessageTemplate.objects.filter(mailbox=mailbox, blob__isnull=False),
+                    'mailbox',
+                    'blob__size_compressed',
+                )
+            ),
+        },
+    )
+
+    maildomain = models.OuterRef('pk')
+    _backfill(
+        MailDomain,
+        StorageUsage,
+        'maildomain',
+        {
+            'messages_count': _count_messages(
+                Message, 'thread__accesses__mailbox__domain'
+            ),
+            'blobs_size': (
+                RawSQL(
+                    DOMAIN_BLOBS_SIZE_SQL.format(column='blob_id'),
+                    (),
+                    output_field=models.BigIntegerField(),
+                )
+                + RawSQL(
+                    DOMAIN_BLOBS_SIZE_SQL.format(column='draft_blob_id'),
+                    (),
+                    output_field=models.BigIntegerField(),
+                )
+                + _sum(
+                    Attachment.objects.filter(mailbox__domain=maildomain),
+                    'mailbox__domain',
+                    'blob__size_compressed',
+                )
+                + _sum(
+                    MessageTemplate.objects.filter(
+                        maildomain=maildomain, blob__isnull=False
+                    ),
+                    'maildomain',
+                    'blob__size_compressed',
+                )
+            ),
+        },
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0034_maildomain_dns_check'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageUsage',
+            fields=[
+                (
+                    'id',
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text='primary key for the record as UUID',
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='id',
+                    ),
+                ),
+                (
+                    'created_at',
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        editable=False,
+                        help_text='date and time at which a record was created',
+                        verbose_name='created on',
+                    ),
+                ),
+                (
+                    'updated_at',
+                    models.DateTimeField(
+                        auto_now=True,
+                        editable=False,
+                        help_text='date and time at which a record was last updated',
+                        verbose_name='updated on',
+                    ),
+                ),
+                (
+                    'messages_count',
+                    models.BigIntegerField(
+                        default=0,
+                        help_text='Messages in the threads the mailbox or domain has access to.',
+                        verbose_name='messages count',
+                    ),
+                ),
+                (
+                    'blobs_size',
+                    models.BigIntegerField(
+                        default=0,
+                        help_text='Compressed size, in bytes, of the blobs of those messages and of the attachments and templates.',
+                        verbose_name='blobs size',
+                    ),
+                ),
+                (
+                    'mailbox',
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='storage_usage',
+                        to='core.mailbox',
+                    ),
+                ),
+                (
+                    'maildomain',
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='storage_usage',
+                        to='core.maildomain',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'storage usage',
+                'verbose_name_plural': 'storage usages',
+                'db_table': 'messages_storageusage',
+                'constraints': [
+                    models.CheckConstraint(
+                        condition=models.Q(
+                            models.Q(('mailbox__isnull', False), ('maildomain__isnull', True)),
+                            models.Q(('mailbox__isnull', True), ('maildomain__isnull', False)),
+                            _connector='OR',
+                        ),
+                        name='storageusage_single_owner',
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(
+            backfill_storage_usage, migrations.RunPython.noop, elidable=True
+        ),
+    ]
@@ -0,0 +1,162 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:40
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_thread_event_state(apps, schema_editor):
+    """Backfill events_count, has_assignees and the ThreadUserState rows
+    from the existing ThreadEvent and UserEvent rows."""
+    Thread = apps.get_model('core', 'Thread')
+    ThreadEvent = apps.get_model('core', 'ThreadEvent')
+    UserEvent = apps.get_model('core', 'UserEvent')
+    ThreadUserState = apps.get_model('core', 'ThreadUserState')
+
+    # These values match UserEventTypeChoices from core/enums.py
+    ASSIGN = 'assign'
+    MENTION = 'mention'
+
+    events_count = (
+        ThreadEvent.objects.filter(thread=models.OuterRef('pk'))
+        .order_by()
+        .values('thread')
+        .annotate(count=models.Count('id'))
+        .values('count')[:1]
+    )
+    Thread.objects.filter(
+        models.Exists(ThreadEvent.objects.filter(thread=models.OuterRef('pk')))
+    ).update(events_count=models.Subquery(events_count))
+    Thread.objects.filter(
+        models.Exists(
+            UserEvent.objects.filter(thread=models.OuterRef('pk'), type=ASSIGN)
+        )
+    ).update(has_assignees=True)
+
+    rows = (
+        UserEvent.objects.order_by()
+        .values('thread_id', 'user_id')
+        .annotate(
+            assigns=models.Count('id', filter=models.Q(type=ASSIGN)),
+            mentions=models.Count('id', filter=models.Q(type=MENTION)),
+            unread_mentions=models.Count(
+                'id', filter=models.Q(type=MENTION, read_at__isnull=True)
+            ),
+        )
+        .iterator(chunk_size=2000)
+    )
+    batch = []
+    for row in rows:
+        batch.append(
+            ThreadUserState(
+                thread_id=row['thread_id'],
+                user_id=row['user_id'],
+                is_assigned=row['assigns'] > 0,
+                has_mention=row['mentions'] > 0,
+                has_unread_mention=row['unread_mentions'] > 0,
+            )
+        )
+        if len(batch) >= 2000:
+            ThreadUserState.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    ThreadUserState.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0035_storageusage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='events_count',
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text='Number of events in the thread timeline.',
+                verbose_name='events count',
+            ),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='has_assignees',
+            field=models.BooleanField(
+                default=False,
+                help_text='True if at least one user is assigned to the thread.',
+                verbose_name='has assignees',
+            ),
+        ),
+        migrations.CreateModel(
+            name='ThreadUserState',
+            fields=[
+                (
+                    'id',
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text='primary key for the record as UUID',
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='id',
+                    ),
+                ),
+                (
+                    'created_at',
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        editable=False,
+                        help_text='date and time at which a record was created',
+                        verbose_name='created on',
+                    ),
+                ),
+                (
+                    'updated_at',
+                    models.DateTimeField(
+                        auto_now=True,
+                        editable=False,
+                        help_text='date and time at which a record was last updated',
+                        verbose_name='updated on',
+                    ),
+                ),
+                ('is_assigned', models.BooleanField(default=False, verbose_name='is assigned')),
+                ('has_mention', models.BooleanField(default=False, verbose_name='has mention')),
+                (
+                    'has_unread_mention',
+                    models.BooleanField(default=False, verbose_name='has unread mention'),
+                ),
+                (
+                    'thread',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='user_states',
+                        to='core.thread',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='thread_states',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'thread user state',
+                'verbose_name_plural': 'thread user states',
+                'db_table': 'messages_threaduserstate',
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('user', 'thread'), name='thrdusrst_user_thread_uniq'
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(
+            backfill_thread_event_state, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.11 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+from core.utils import reply_subject_key
+
+
+def backfill_subject_key(apps, schema_editor):
+    """Compute subject_key, the subject after its reply prefix, for existing threads."""
+    Thread = apps.get_model('core', 'Thread')
+
+    batch = []
+    for thread in Thread.objects.only('id', 'subject').iterator(chunk_size=2000):
+        thread.subject_key = reply_subject_key(thread.subject)
+        if thread.subject_key:
+            batch.append(thread)
+        if len(batch) >= 2000:
+            Thread.objects.bulk_update(batch, ['subject_key'])
+            batch = []
+    Thread.objects.bulk_update(batch, ['subject_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_thread_events_count_threaduserstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='subject_key',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                help_text='Lowercased subject after its Re:/Fwd: prefix, empty without one.',
+                max_length=255,
+                verbose_name='subject key',
+            ),
+        ),
+        migrations.RunPython(backfill_subject_key, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0037_thread_subject_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inboundmessage',
+            name='blob',
+            field=models.ForeignKey(
+                blank=True,
+                help_text='Raw email message bytes',
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='inbound_messages',
+                to='core.blob',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='inboundmessage',
+            name='raw_data',
+            field=models.BinaryField(
+                blank=True,
+                help_text='Raw email message bytes of messages queued before blob storage',
+                null=True,
+                verbose_name='raw data',
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.11 on 2026-10-18 18:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_inboundmessage_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inboundmessage',
+            name='attempts',
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text='Number of times the recovery task re-dispatched the message',
+                verbose_name='attempts',
+            ),
+        ),
+        migrations.AddField(
+            model_name='inboundmessage',
+            name='available_at',
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                help_text='Time from which the recovery task may re-dispatch the message',
+                verbose_name='available at',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='inboundmessage',
+            index=models.Index(fields=['available_at'], name='messages_in_availab_14a011_idx'),
+        ),
+    ]
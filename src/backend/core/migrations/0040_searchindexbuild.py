@@ -0,0 +1,166 @@
+# Generated by Django 5.2.11 on 2026-10-18 19:42
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0039_inboundmessage_recovery_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexBuild',
+            fields=[
+                (
+                    'id',
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text='primary key for the record as UUID',
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='id',
+                    ),
+                ),
+                (
+                    'created_at',
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        editable=False,
+                        help_text='date and time at which a record was created',
+                        verbose_name='created on',
+                    ),
+                ),
+                (
+                    'updated_at',
+                    models.DateTimeField(
+                        auto_now=True,
+                        editable=False,
+                        help_text='date and time at which a record was last updated',
+                        verbose_name='updated on',
+                    ),
+                ),
+                (
+                    'index_name',
+                    models.CharField(max_length=255, unique=True, verbose_name='index name'),
+                ),
+                (
+                    'threads_count',
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text='Number of threads when the build started.',
+                        verbose_name='threads count',
+                    ),
+                ),
+                (
+                    'cutover_started_at',
+                    models.DateTimeField(
+                        blank=True,
+                        help_text='When a worker started swapping the alias to this index.',
+                        null=True,
+                        verbose_name='cutover started at',
+                    ),
+                ),
+                (
+                    'completed_at',
+                    models.DateTimeField(
+                        blank=True,
+                        help_text='When the alias was swapped to this index.',
+                        null=True,
+                        verbose_name='completed at',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'search index build',
+                'verbose_name_plural': 'search index builds',
+                'db_table': 'messages_searchindexbuild',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchIndexBuildPartition',
+            fields=[
+                (
+                    'id',
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text='primary key for the record as UUID',
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='id',
+                    ),
+                ),
+                (
+                    'created_at',
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        editable=False,
+                        help_text='date and time at which a record was created',
+                        verbose_name='created on',
+                    ),
+                ),
+                (
+                    'updated_at',
+                    models.DateTimeField(
+                        auto_now=True,
+                        editable=False,
+                        help_text='date and time at which a record was last updated',
+                        verbose_name='updated on',
+                    ),
+                ),
+                (
+                    'lower_id',
+                    models.UUIDField(
+                        blank=True,
+                        help_text='Inclusive; null if unbounded.',
+                        null=True,
+                        verbose_name='lower id',
+                    ),
+                ),
+                (
+                    'upper_id',
+                    models.UUIDField(
+                        blank=True,
+                        help_text='Exclusive; null if unbounded.',
+                        null=True,
+                        verbose_name='upper id',
+                    ),
+                ),
+                (
+                    'indexed_threads',
+                    models.PositiveIntegerField(default=0, verbose_name='indexed threads'),
+                ),
+                (
+                    'indexed_messages',
+                    models.PositiveIntegerField(default=0, verbose_name='indexed messages'),
+                ),
+                (
+                    'failure_count',
+                    models.PositiveIntegerField(default=0, verbose_name='failure count'),
+                ),
+                (
+                    'completed_at',
+                    models.DateTimeField(blank=True, null=True, verbose_name='completed at'),
+                ),
+                (
+                    'build',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='partitions',
+                        to='core.searchindexbuild',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'search index build partition',
+                'verbose_name_plural': 'search index build partitions',
+                'db_table': 'messages_searchindexbuildpartition',
+            },
+        ),
+    ]
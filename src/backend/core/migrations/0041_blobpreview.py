@@ -0,0 +1,94 @@
+# Generated by Django 5.2.11 on 2026-10-18 23:31
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0040_searchindexbuild'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobPreview',
+            fields=[
+                (
+                    'id',
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text='primary key for the record as UUID',
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='id',
+                    ),
+                ),
+                (
+                    'created_at',
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        editable=False,
+                        help_text='date and time at which a record was created',
+                        verbose_name='created on',
+                    ),
+                ),
+                (
+                    'updated_at',
+                    models.DateTimeField(
+                        auto_now=True,
+                        editable=False,
+                        help_text='date and time at which a record was last updated',
+                        verbose_name='updated on',
+                    ),
+                ),
+                (
+                    'source_sha256',
+                    models.CharField(
+                        help_text='SHA-256 (hex) of the original content',
+                        max_length=64,
+                        unique=True,
+                        verbose_name='source sha256',
+                    ),
+                ),
+                (
+                    'source_type',
+                    models.CharField(
+                        help_text='MIME type detected from the original content',
+                        max_length=127,
+                        verbose_name='source type',
+                    ),
+                ),
+                (
+                    'expires_at',
+                    models.DateTimeField(
+                        help_text='When the derivative must be rendered again.',
+                    ),
+                ),
+                (
+                    'blob',
+                    models.ForeignKey(
+                        blank=True,
+                        help_text='The blob holding the derivative, null to serve the original.',
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name='previews',
+                        to='core.blob',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'blob preview',
+                'verbose_name_plural': 'blob previews',
+                'db_table': 'messages_blobpreview',
+                'indexes': [
+                    models.Index(
+                        fields=['expires_at'], name='blobpreview_expires_idx'
+                    )
+                ],
+            },
+        ),
+    ]
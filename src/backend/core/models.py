@@ -8,22 +8,26 @@ import hashlib
 import json
 import re
 import secrets
+import tempfile
 import uuid
 from datetime import datetime as dt
 from datetime import time, timedelta
 from functools import cached_property
 from logging import getLogger
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 from zoneinfo import ZoneInfo
 
 from django.conf import settings
 from django.contrib.auth import models as auth_models
 from django.contrib.auth.base_user import AbstractBaseUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core import validators
 from django.core.exceptions import ValidationError
+from django.core.files import File
 from django.db import connection, models, transaction
 from django.db.models import Case, Exists, F, Q, Value, When
 from django.db.models.fields import BooleanField
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.utils.html import escape
 from django.utils.text import slugify
@@ -33,6 +37,7 @@ from encrypted_fields.fields import EncryptedJSONField, EncryptedTextField
 from jmap_email import EmailHeader, JmapEmail, body_part_text, parse_email
 from timezone_field import TimeZoneField
 
+from core import instrumentation
 from core.enums import (
     MAILBOX_ROLES_CAN_EDIT,
     BlobStorageLocationChoices,
@@ -57,7 +62,7 @@ from core.enums import (
 )
 from core.mda.signing import generate_dkim_key as _generate_dkim_key
 from core.services.tiered_storage import TieredStorageService, sha256_advisory_lock
-from core.utils import validate_json_schema
+from core.utils import reply_subject_key, validate_json_schema
 
 logger = getLogger(__name__)
 
@@ -303,6 +308,20 @@ class MailDomain(BaseModel):
         ),
     )
 
+    dns_check_results = models.JSONField(
+        "DNS check results",
+        null=True,
+        blank=True,
+        help_text="Expected DNS records with their status at the last check.",
+    )
+
+    dns_checked_at = models.DateTimeField(
+        "DNS checked at",
+        null=True,
+        blank=True,
+        help_text="When the DNS records were last checked.",
+    )
+
     class Meta:
         db_table = "messages_maildomain"
         verbose_name = "mail domain"
@@ -935,6 +954,14 @@ class Thread(BaseModel):
     """Thread model to group messages."""
 
     subject = models.CharField("subject", max_length=255, null=True, blank=True)
+    subject_key = models.CharField(
+        "subject key",
+        max_length=255,
+        blank=True,
+        default="",
+        db_index=True,
+        help_text="Lowercased subject after its Re:/Fwd: prefix, empty without one.",
+    )
     snippet = models.TextField("snippet", blank=True)
     has_trashed = models.BooleanField("has trashed", default=False)
     is_trashed = models.BooleanField(
@@ -1002,6 +1029,16 @@ class Thread(BaseModel):
     )
     sender_names = models.JSONField("sender names", null=True, blank=True)
     summary = models.TextField("summary", null=True, blank=True, default=None)
+    events_count = models.PositiveIntegerField(
+        "events count",
+        default=0,
+        help_text="Number of events in the thread timeline.",
+    )
+    has_assignees = models.BooleanField(
+        "has assignees",
+        default=False,
+        help_text="True if at least one user is assigned to the thread.",
+    )
 
     class Meta:
         db_table = "messages_thread"
@@ -1011,6 +1048,14 @@ class Thread(BaseModel):
     def __str__(self):
         return str(self.subject) if self.subject else "(no subject)"
 
+    def save(self, *args, **kwargs):
+        """Keep ``subject_key`` in sync with ``subject``."""
+        self.subject_key = reply_subject_key(self.subject)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "subject" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "subject_key"}
+        super().save(*args, **kwargs)
+
     def update_stats(self):
         """Update the denormalized stats of the thread."""
         # Fetch all message metadata in a single query to avoid multiple DB hits
@@ -1750,8 +1795,8 @@ class UserEvent(BaseModel):
     on ``type``, or live in a separate model.
 
     Note: ``thread`` is denormalized from ``thread_event.thread`` so that the
-    ``Exists(...)`` annotations used by ThreadViewSet.get_queryset() can filter
-    on the thread FK directly, avoiding an extra JOIN on every thread list.
+    per-thread queries (``ThreadUserState`` refresh, mailbox counters) can
+    filter on the thread FK directly, avoiding an extra JOIN.
     """
 
     user = models.ForeignKey(
@@ -1815,6 +1860,61 @@ class UserEvent(BaseModel):
         return f"{self.user} - {self.type} - {self.thread} - {self.created_at}"
 
 
+class ThreadUserState(BaseModel):
+    """Per-user state of a thread, derived from its ``UserEvent`` rows.
+
+    Lets thread listings filter and flag mentions and assignments with one
+    join on a unique (user, thread) key instead of an ``Exists`` subquery
+    per flag. Maintained by ``core.services.thread_events``; a row only
+    exists while one of its flags is set.
+    """
+
+    user = models.ForeignKey(
+        "User",
+        on_delete=models.CASCADE,
+        related_name="thread_states",
+    )
+    thread = models.ForeignKey(
+        "Thread",
+        on_delete=models.CASCADE,
+        related_name="user_states",
+    )
+    is_assigned = models.BooleanField("is assigned", default=False)
+    has_mention = models.BooleanField("has mention", default=False)
+    has_unread_mention = models.BooleanField("has unread mention", default=False)
+
+    class Meta:
+        db_table = "messages_threaduserstate"
+        verbose_name = "thread user state"
+        verbose_name_plural = "thread user states"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "thread"],
+                name="thrdusrst_user_thread_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.thread}"
+
+
+class ImmutableUnaccent(models.Func):  # pylint: disable=abstract-method
+    """``unaccent()`` wrapped in a function declared IMMUTABLE.
+
+    PostgreSQL refuses ``unaccent()`` in index expressions because its
+    dictionary can change; the wrapper (created in migration 0032) pins
+    the dictionary so normalized names and emails can be indexed.
+    """
+
+    function = "messages_immutable_unaccent"
+    output_field = models.TextField()
+
+
+def normalize_for_search(expression):
+    """Lowercased, unaccented form of ``expression``, as indexed on contacts."""
+    return Lower(ImmutableUnaccent(expression))
+
+
 class Contact(BaseModel):
     """Contact model to store contact information."""
 
@@ -1825,12 +1925,29 @@ class Contact(BaseModel):
         on_delete=models.CASCADE,
         related_name="contacts",
     )
+    last_used_at = models.DateTimeField(
+        "last used at",
+        null=True,
+        blank=True,
+        help_text="Last time the mailbox sent a message to this contact",
+    )
 
     class Meta:
         db_table = "messages_contact"
         verbose_name = "contact"
         verbose_name_plural = "contacts"
         unique_together = ("email", "mailbox")
+        indexes = [
+            # Trigram indexes serving the autocomplete's LIKE lookups
+            GinIndex(
+                OpClass(normalize_for_search(F("name")), name="gin_trgm_ops"),
+                name="contact_name_trgm",
+            ),
+            GinIndex(
+                OpClass(normalize_for_search(F("email")), name="gin_trgm_ops"),
+                name="contact_email_trgm",
+            ),
+        ]
 
     def __str__(self):
         if self.name:
@@ -2136,6 +2253,29 @@ class Message(BaseModel):
         return len(counted_text.split())
 
 
+class InboundMessageManager(models.Manager):
+    """Custom Manager for InboundMessage model."""
+
+    def create_inbound_message(self, raw_data: bytes, **kwargs) -> "InboundMessage":
+        """Queue ``raw_data`` for processing.
+
+        The bytes go through ``Blob.objects.create_blob``: the queue row
+        only holds a reference, and a message queued once per local
+        recipient is stored (compressed, encrypted) a single time. The
+        transaction keeps the blob locked against the GC sweep until the
+        reference is inserted.
+        """
+        kwargs.setdefault(
+            "available_at",
+            timezone.now() + timedelta(seconds=settings.INBOUND_RECOVERY_LEASE),
+        )
+        with transaction.atomic():
+            blob = Blob.objects.create_blob(
+                content=raw_data, content_type="message/rfc822"
+            )
+            return self.create(blob=blob, **kwargs)
+
+
 class InboundMessage(BaseModel):
     """Temporary queue model for inbound messages waiting to be processed by spam filter."""
 
@@ -2144,7 +2284,22 @@ class InboundMessage(BaseModel):
         on_delete=models.CASCADE,
         related_name="inbound_messages",
     )
-    raw_data = models.BinaryField("raw data", help_text="Raw email message bytes")
+    blob = models.ForeignKey(
+        "Blob",
+        # PROTECT, like every other Blob FK: the GC sweep is the only
+        # authorised deleter and re-checks references under lock.
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="inbound_messages",
+        help_text="Raw email message bytes",
+    )
+    raw_data = models.BinaryField(
+        "raw data",
+        null=True,
+        blank=True,
+        help_text="Raw email message bytes of messages queued before blob storage",
+    )
     channel = models.ForeignKey(
         "Channel",
         on_delete=models.SET_NULL,
@@ -2157,6 +2312,18 @@ class InboundMessage(BaseModel):
         blank=True,
         help_text="Error message if processing failed",
     )
+    attempts = models.PositiveIntegerField(
+        "attempts",
+        default=0,
+        help_text="Number of times the recovery task re-dispatched the message",
+    )
+    available_at = models.DateTimeField(
+        "available at",
+        default=timezone.now,
+        help_text="Time from which the recovery task may re-dispatch the message",
+    )
+
+    objects = InboundMessageManager()
 
     class Meta:
         db_table = "messages_inboundmessage"
@@ -2165,15 +2332,84 @@ class InboundMessage(BaseModel):
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["created_at"]),
+            models.Index(fields=["available_at"]),
         ]
 
     def __str__(self):
         return f"InboundMessage {self.id} - {self.mailbox}"
 
+    def get_raw_data(self) -> bytes:
+        """Raw email message bytes."""
+        if self.blob_id is None:
+            return bytes(self.raw_data)
+        return self.blob.get_content()
+
+
+def _zstd_compress_chunks(
+    chunks: Iterable[bytes], level: int | None
+) -> Iterator[bytes]:
+    """Compress ``chunks`` into a single zstd frame, one chunk at a time."""
+    compressor = pyzstd.ZstdCompressor(level_or_option=level)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
 
 class BlobManager(models.Manager):
     """Custom Manager for Blob model."""
 
+    # Caller-supplied kwargs that would collide with the fields
+    # ``create_blob`` / ``create_blob_from_file`` set explicitly —
+    # silently overriding sha256 / size / raw_content from kwargs would
+    # corrupt the row, and a duplicate would raise TypeError.
+    _RESERVED_KWARGS = (
+        "sha256",
+        "size",
+        "size_compressed",
+        "content_type",
+        "compression",
+        "raw_content",
+        "encryption_key_id",
+        "storage_location",
+    )
+
+    def _find_existing(self, sha256_hash: bytes) -> "Optional[Blob]":
+        """Dedup hot path: the existing row with this hash, if any.
+
+        When called inside ``transaction.atomic()`` we take
+        ``select_for_update`` on the matched row so a concurrent
+        ``gc_orphan_blobs_task`` can't ``select_for_update + delete``
+        the same row between our SELECT and the caller's next
+        write (FK insert or MailboxBlob INSERT). Without the
+        lock, GC could race in that window and the caller would
+        end up with a dangling blob_id.
+
+        If GC already holds the row lock, our SELECT blocks; when
+        GC commits its delete we get back zero rows and fall
+        through to the slow path, which INSERTs a fresh row under
+        the per-sha advisory lock — different blob id, same
+        content. Either branch is correct.
+
+        Outside an atomic block ``select_for_update`` is illegal
+        (Django raises). Such callers also have no FK race to
+        worry about — no transaction, no cross-statement
+        consistency guarantee anything else can rely on — so the
+        unlocked SELECT is correct there too.
+        """
+        if connection.in_atomic_block:
+            return self.select_for_update().filter(sha256=sha256_hash).first()
+        return self.filter(sha256=sha256_hash).first()
+
+    @staticmethod
+    def _compression_spec() -> tuple[CompressionTypeChoices, int | None]:
+        """Algorithm + level from the configured spec ("zstd:3" etc.)."""
+        try:
+            return parse_compression_spec(settings.MESSAGES_BLOBS_COMPRESS)
+        except ValueError as exc:
+            raise ValidationError({"compression": str(exc)}) from exc
+
     def create_blob(
         self,
         content: bytes,
@@ -2201,40 +2437,11 @@ class BlobManager(models.Manager):
 
         # Hot path: hash matches an existing row → return it (no
         # compress, no encrypt, no INSERT).
-        #
-        # When called inside ``transaction.atomic()`` we take
-        # ``select_for_update`` on the matched row so a concurrent
-        # ``gc_orphan_blobs_task`` can't ``select_for_update + delete``
-        # the same row between our SELECT and the caller's next
-        # write (FK insert or MailboxBlob INSERT). Without the
-        # lock, GC could race in that window and the caller would
-        # end up with a dangling blob_id.
-        #
-        # If GC already holds the row lock, our SELECT blocks; when
-        # GC commits its delete we get back zero rows and fall
-        # through to the slow path, which INSERTs a fresh row under
-        # the per-sha advisory lock — different blob id, same
-        # content. Either branch is correct.
-        #
-        # Outside an atomic block ``select_for_update`` is illegal
-        # (Django raises). Such callers also have no FK race to
-        # worry about — no transaction, no cross-statement
-        # consistency guarantee anything else can rely on — so the
-        # unlocked SELECT is correct there too.
-        if connection.in_atomic_block:
-            existing = self.select_for_update().filter(sha256=sha256_hash).first()
-        else:
-            existing = self.filter(sha256=sha256_hash).first()
+        existing = self._find_existing(sha256_hash)
         if existing is not None:
             return existing
 
-        # Resolve algorithm + level from the configured spec ("zstd:3" etc.).
-        try:
-            compression, zstd_level = parse_compression_spec(
-                settings.MESSAGES_BLOBS_COMPRESS
-            )
-        except ValueError as exc:
-            raise ValidationError({"compression": str(exc)}) from exc
+        compression, zstd_level = self._compression_spec()
 
         original_size = len(content)
         if compression == CompressionTypeChoices.ZSTD:
@@ -2257,19 +2464,7 @@ class BlobManager(models.Manager):
             compressed_content, sha256_hash
         )
 
-        # Drop any caller-supplied kwargs that would collide with the
-        # explicit parameters below — silently overriding sha256 / size /
-        # raw_content from kwargs would corrupt the row, and a duplicate
-        # would raise TypeError.
-        for reserved in (
-            "sha256",
-            "size",
-            "size_compressed",
-            "content_type",
-            "compression",
-            "raw_content",
-            "encryption_key_id",
-        ):
+        for reserved in self._RESERVED_KWARGS:
             kwargs.pop(reserved, None)
 
         # Re-check under the per-sha advisory lock so two concurrent
@@ -2300,10 +2495,128 @@ class BlobManager(models.Manager):
 
         return blob
 
+    def create_blob_from_file(
+        self,
+        file: File,
+        content_type: str,
+        **kwargs,
+    ) -> "Blob":
+        """Streaming ``create_blob`` for uploads that must not sit in RAM.
+
+        Reads ``file`` twice through ``chunks()``: once to hash it (the
+        sha256 is both the dedup key and the AAD, so it has to be known
+        before the first byte is encrypted), then to compress and
+        encrypt it chunk by chunk. A dedup hit stops after the first
+        pass, exactly like ``create_blob``.
+
+        New content goes straight to object storage when offload is
+        enabled with no delay and the blob is at least
+        ``MESSAGES_BLOBS_OFFLOAD_MIN_SIZE``: the ciphertext is spooled
+        to a temporary file and uploaded under the per-sha advisory
+        lock, so memory stays bounded by the chunk and spool sizes
+        whatever the upload size. Otherwise the row lands in Postgres
+        and holds one copy of the compressed ciphertext, which the
+        bytea INSERT needs in full.
+
+        Args:
+            file: A Django ``File`` (e.g. an ``UploadedFile``).
+            content_type: MIME type.
+        Returns:
+            A ``Blob`` row (newly created or existing).
+        """
+        hasher = hashlib.sha256()
+        original_size = 0
+        for chunk in file.chunks():
+            hasher.update(chunk)
+            original_size += len(chunk)
+        if not original_size:
+            raise ValidationError({"content": "Content cannot be empty"})
+        sha256_hash = hasher.digest()
+
+        existing = self._find_existing(sha256_hash)
+        if existing is not None:
+            return existing
+
+        compression, zstd_level = self._compression_spec()
+        chunks = file.chunks()
+        if compression == CompressionTypeChoices.ZSTD:
+            chunks = _zstd_compress_chunks(chunks, zstd_level)
+
+        service = TieredStorageService()
+        encrypted_chunks, encryption_key_id = service.encrypt_stream(
+            chunks, sha256_hash
+        )
+
+        for reserved in self._RESERVED_KWARGS:
+            kwargs.pop(reserved, None)
+
+        offload = (
+            settings.MESSAGES_BLOBS_OFFLOAD_ENABLED
+            and service.enabled
+            and settings.MESSAGES_BLOBS_OFFLOAD_DELAY == 0
+            and original_size >= settings.MESSAGES_BLOBS_OFFLOAD_MIN_SIZE
+        )
+        if not offload:
+            raw_content = b"".join(encrypted_chunks)
+            with transaction.atomic(), sha256_advisory_lock(sha256_hash):
+                existing = self.filter(sha256=sha256_hash).first()
+                if existing is not None:
+                    return existing
+                blob = self.create(
+                    sha256=sha256_hash,
+                    size=original_size,
+                    content_type=content_type,
+                    compression=compression,
+                    raw_content=raw_content,
+                    encryption_key_id=encryption_key_id,
+                    **kwargs,
+                )
+        else:
+            with tempfile.SpooledTemporaryFile(
+                max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+            ) as spool:
+                for part in encrypted_chunks:
+                    spool.write(part)
+                size_compressed = spool.tell()
+                spool.seek(0)
+                # No row holds this sha once the re-check passes, so there
+                # is no sibling to adopt: the object is written at our own
+                # key_id, the same path ``upload_blob`` would pick.
+                with transaction.atomic(), sha256_advisory_lock(sha256_hash):
+                    existing = self.filter(sha256=sha256_hash).first()
+                    if existing is not None:
+                        return existing
+                    service.storage.save(
+                        service.compute_storage_key(sha256_hash, encryption_key_id),
+                        File(spool),
+                    )
+                    blob = self.create(
+                        sha256=sha256_hash,
+                        size=original_size,
+                        size_compressed=size_compressed,
+                        content_type=content_type,
+                        compression=compression,
+                        raw_content=None,
+                        storage_location=BlobStorageLocationChoices.OBJECT_STORAGE,
+                        encryption_key_id=encryption_key_id,
+                        **kwargs,
+                    )
+
+        logger.debug(
+            "Created blob %s from stream: %d bytes, %s compression, %s content type",
+            blob.id,
+            original_size,
+            compression.label,
+            content_type,
+        )
+
+        return blob
+
     def is_referenced(self, blob_id) -> bool:
         """True if any row in the schema FKs this blob, OR an active
-        upload reservation (``MailboxBlob`` with ``expires_at > now()``)
-        is held for it.
+        upload reservation (``MailboxBlob`` with ``expires_at > now()``),
+        image proxy cache entry (``ProxiedImage``, same rule) or preview
+        derivative (``BlobPreview``, same rule) is held for it.
 
         Authoritative answer for "is this blob still alive". The GC
         sweep consults this before deleting; stale ``MailboxBlob``
@@ -2319,6 +2632,13 @@ class BlobManager(models.Manager):
             ).exists()
             or Attachment.objects.filter(blob_id=blob_id).exists()
             or MessageTemplate.objects.filter(blob_id=blob_id).exists()
+            or InboundMessage.objects.filter(blob_id=blob_id).exists()
+            or ProxiedImage.objects.filter(
+                blob_id=blob_id, expires_at__gt=timezone.now()
+            ).exists()
+            or BlobPreview.objects.filter(
+                blob_id=blob_id, expires_at__gt=timezone.now()
+            ).exists()
         )
 
     def user_can_access(self, user, blob_id) -> bool:
@@ -2514,6 +2834,7 @@ class Blob(BaseModel):
                     f"Blob {self.id} content hash mismatch (corruption or substitution)"
                 )
 
+        instrumentation.record(instrumentation.BLOB_BYTES_READ, len(plaintext))
         return plaintext
 
 
@@ -2690,6 +3011,241 @@ class MailboxBlob(BaseModel):
         return f"MailboxBlob({self.blob_id} for {self.mailbox_id})"
 
 
+class ProxiedImage(BaseModel):
+    """Server-side cache entry of the image proxy.
+
+    Maps the hash of a normalized external image URL to the Blob holding
+    its content, so an image embedded in a message sent to many mailboxes
+    is fetched once and then read locally. Identical images served under
+    different URLs share one Blob through ``create_blob``'s sha256 dedup.
+
+    Like ``MailboxBlob``, a row protects its Blob from the GC only until
+    ``expires_at``; ``prune_image_proxy_cache_task`` drops expired rows
+    (and the oldest ones beyond ``IMAGE_PROXY_STORAGE_MAX_SIZE``) and
+    hands their Blobs to the GC.
+    """
+
+    url_hash = models.CharField(
+        "url hash",
+        max_length=64,
+        unique=True,
+        help_text="SHA-256 (hex) of the normalized image URL",
+    )
+    blob = models.ForeignKey(
+        "Blob",
+        # PROTECT, like every other Blob FK: the GC sweep clears stale
+        # rows itself before deleting the blob.
+        on_delete=models.PROTECT,
+        related_name="proxied_images",
+        help_text="The blob holding the image content.",
+    )
+    expires_at = models.DateTimeField(
+        help_text="When the cached copy must be fetched again.",
+    )
+
+    class Meta:
+        db_table = "messages_proxiedimage"
+        verbose_name = "proxied image"
+        verbose_name_plural = "proxied images"
+        indexes = [
+            # Serves the ``expires_at > now()`` reference check and the
+            # expiry/size-cap pruning, which walks rows by expiry.
+            models.Index(fields=["expires_at"], name="proxiedimage_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"ProxiedImage({self.url_hash[:12]} -> {self.blob_id})"
+
+
+class BlobPreview(BaseModel):
+    """Preview derivative of an attachment's content.
+
+    Keyed on the sha256 of the original content, so an attachment
+    forwarded to many mailboxes (or stored both as a Blob and inside a
+    message) is rendered once. Records the MIME type sniffed from the
+    original, which lets the preview endpoint apply its checks without
+    loading the original again, and points at the downscaled rendering
+    (``None`` when the original is served as-is: animated images,
+    renderings that wouldn't be smaller, unreadable images).
+
+    Like ``ProxiedImage``, a row protects its Blob from the GC only until
+    ``expires_at``; ``prune_blob_previews_task`` drops expired rows and
+    hands their Blobs to the GC.
+    """
+
+    source_sha256 = models.CharField(
+        "source sha256",
+        max_length=64,
+        unique=True,
+        help_text="SHA-256 (hex) of the original content",
+    )
+    source_type = models.CharField(
+        "source type",
+        max_length=127,
+        help_text="MIME type detected from the original content",
+    )
+    blob = models.ForeignKey(
+        "Blob",
+        # PROTECT, like every other Blob FK: the GC sweep clears stale
+        # rows itself before deleting the blob.
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="previews",
+        help_text="The blob holding the derivative, null to serve the original.",
+    )
+    expires_at = models.DateTimeField(
+        help_text="When the derivative must be rendered again.",
+    )
+
+    class Meta:
+        db_table = "messages_blobpreview"
+        verbose_name = "blob preview"
+        verbose_name_plural = "blob previews"
+        indexes = [
+            # Serves the ``expires_at > now()`` reference check and the
+            # expiry pruning.
+            models.Index(fields=["expires_at"], name="blobpreview_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"BlobPreview({self.source_sha256[:12]} -> {self.blob_id})"
+
+
+class StorageUsage(BaseModel):
+    """Storage used by a mailbox or by a mail domain.
+
+    Served by the metrics API instead of aggregating messages and blobs on
+    every request. ``core.services.storage_usage`` keeps the rows up to
+    date: signal handlers apply deltas as messages, thread accesses,
+    attachments and templates come and go, and
+    ``reconcile_storage_usage_task`` periodically recomputes the exact
+    values to correct the drift deltas can't avoid.
+    """
+
+    mailbox = models.OneToOneField(
+        "Mailbox",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="storage_usage",
+    )
+    maildomain = models.OneToOneField(
+        "MailDomain",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="storage_usage",
+    )
+    messages_count = models.BigIntegerField(
+        "messages count",
+        default=0,
+        help_text="Messages in the threads the mailbox or domain has access to.",
+    )
+    blobs_size = models.BigIntegerField(
+        "blobs size",
+        default=0,
+        help_text=(
+            "Compressed size, in bytes, of the blobs of those messages and of "
+            "the attachments and templates."
+        ),
+    )
+
+    class Meta:
+        db_table = "messages_storageusage"
+        verbose_name = "storage usage"
+        verbose_name_plural = "storage usages"
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    models.Q(mailbox__isnull=False, maildomain__isnull=True)
+                    | models.Q(mailbox__isnull=True, maildomain__isnull=False)
+                ),
+                name="storageusage_single_owner",
+            ),
+        ]
+
+    def __str__(self):
+        owner = self.mailbox_id or self.maildomain_id
+        return f"StorageUsage({owner}: {self.messages_count}, {self.blobs_size})"
+
+
+class SearchIndexBuild(BaseModel):
+    """A full rebuild of the search index into a new, versioned index.
+
+    Threads are loaded by ``SearchIndexBuildPartition`` in parallel;
+    once they are all done, the ``MESSAGE_INDEX`` alias is swapped to
+    the new index and ``completed_at`` is set. Until then, live index
+    writes go to the new index too. See ``core.services.search.rebuild``.
+    """
+
+    index_name = models.CharField("index name", max_length=255, unique=True)
+    threads_count = models.PositiveIntegerField(
+        "threads count",
+        default=0,
+        help_text="Number of threads when the build started.",
+    )
+    cutover_started_at = models.DateTimeField(
+        "cutover started at",
+        null=True,
+        blank=True,
+        help_text="When a worker started swapping the alias to this index.",
+    )
+    completed_at = models.DateTimeField(
+        "completed at",
+        null=True,
+        blank=True,
+        help_text="When the alias was swapped to this index.",
+    )
+
+    class Meta:
+        db_table = "messages_searchindexbuild"
+        verbose_name = "search index build"
+        verbose_name_plural = "search index builds"
+
+    def __str__(self):
+        return self.index_name
+
+
+class SearchIndexBuildPartition(BaseModel):
+    """A range of thread ids loaded into the index of a ``SearchIndexBuild``.
+
+    ``completed_at`` checkpoints the partition: an interrupted build
+    resumes with the partitions that have none.
+    """
+
+    build = models.ForeignKey(
+        SearchIndexBuild, on_delete=models.CASCADE, related_name="partitions"
+    )
+    lower_id = models.UUIDField(
+        "lower id", null=True, blank=True, help_text="Inclusive; null if unbounded."
+    )
+    upper_id = models.UUIDField(
+        "upper id", null=True, blank=True, help_text="Exclusive; null if unbounded."
+    )
+    indexed_threads = models.PositiveIntegerField("indexed threads", default=0)
+    indexed_messages = models.PositiveIntegerField("indexed messages", default=0)
+    failure_count = models.PositiveIntegerField("failure count", default=0)
+    completed_at = models.DateTimeField("completed at", null=True, blank=True)
+
+    class Meta:
+        db_table = "messages_searchindexbuildpartition"
+        verbose_name = "search index build partition"
+        verbose_name_plural = "search index build partitions"
+
+    def __str__(self):
+        return f"{self.build_id} [{self.lower_id}, {self.upper_id})"
+
+    def threads(self):
+        """The threads of the partition's id range."""
+        queryset = Thread.objects.all()
+        if self.lower_id is not None:
+            queryset = queryset.filter(id__gte=self.lower_id)
+        if self.upper_id is not None:
+            queryset = queryset.filter(id__lt=self.upper_id)
+        return queryset
+
+
 class MailDomainAccess(BaseModel):
     """Mail domain access model to store mail domain access information for a user."""
 
@@ -4,7 +4,8 @@ sweep task.
 
 Blobs are not owned by a Mailbox/MailDomain via a foreign key — their
 lifetime is determined by whichever ``Message`` / ``Attachment`` /
-``MessageTemplate`` / ``MailboxBlob`` row references them. CASCADE
+``MessageTemplate`` / ``InboundMessage`` / ``MailboxBlob`` row references
+them. CASCADE
 delete can't clean blobs up; instead:
 
 - Reference sources push their blob_ids into a Redis set on
@@ -34,7 +35,7 @@ from time import monotonic
 from typing import Any, Dict, Iterable, Iterator
 from uuid import UUID
 
-from django.conf import settings
+from django.core.files import File
 from django.db import transaction
 from django.utils import timezone
 
@@ -42,9 +43,15 @@ from celery.utils.log import get_task_logger
 from redis.exceptions import RedisError
 
 from core.enums import BlobStorageLocationChoices
-from core.models import UPLOAD_RESERVATION_TTL, Blob, MailboxBlob
+from core.models import (
+    UPLOAD_RESERVATION_TTL,
+    Blob,
+    BlobPreview,
+    MailboxBlob,
+    ProxiedImage,
+)
 from core.services.tiered_storage import TieredStorageService, sha256_advisory_lock
-from core.utils import get_redis_client
+from core.utils import get_redis_client, is_redis_backend
 
 from messages.celery_app import app as celery_app
 
@@ -68,11 +75,6 @@ _GC_MAX_RUN_SECONDS = 55 * 60
 # ``--full`` sweep is the safety net for those environments.
 
 
-def _is_redis_backend() -> bool:
-    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
-    return "django_redis" in backend
-
-
 # --------------------------------------------------------------------
 # Candidate set
 # --------------------------------------------------------------------
@@ -81,11 +83,11 @@ def _is_redis_backend() -> bool:
 def schedule_for_gc(blob_id) -> None:
     """Push a blob id into the GC candidate set.
 
-    Called from ``post_delete`` on Message / Attachment / MessageTemplate
-    when they may have been the last reference to a Blob, and from a
-    handful of explicit "release this blob" sites in the MDA flows. The
-    GC task (later) re-checks the reference graph; producers don't need
-    to be accurate, just safe.
+    Called from ``post_delete`` on Message / Attachment / MessageTemplate /
+    InboundMessage when they may have been the last reference to a Blob,
+    and from a handful of explicit "release this blob" sites in the MDA
+    flows. The GC task (later) re-checks the reference graph; producers
+    don't need to be accurate, just safe.
 
     The Redis SADD is wrapped in ``transaction.on_commit`` so two
     things happen automatically:
@@ -108,7 +110,7 @@ def schedule_for_gc(blob_id) -> None:
     if blob_id is None:
         return
     value = str(blob_id)
-    if not _is_redis_backend():
+    if not is_redis_backend():
         logger.warning(
             "Blob GC candidate set requires Redis: id %s dropped. "
             "Configure django_redis or rely on `--full` periodic sweeps.",
@@ -135,7 +137,7 @@ def schedule_for_gc(blob_id) -> None:
 
 def _drain_candidates(batch_size: int) -> list[str]:
     """Pop up to ``batch_size`` ids from the candidate set."""
-    if not _is_redis_backend():
+    if not is_redis_backend():
         return []
     try:
         popped = get_redis_client().spop(_GC_CANDIDATES_KEY, count=batch_size)
@@ -162,7 +164,7 @@ def _peek_candidates(batch_size: int) -> list[str]:
     dry-run must leave the set intact so the operator can run a real
     pass afterwards on the same candidates.
     """
-    if not _is_redis_backend():
+    if not is_redis_backend():
         return []
     try:
         members = get_redis_client().srandmember(_GC_CANDIDATES_KEY, batch_size)
@@ -187,7 +189,9 @@ def _peek_candidates(batch_size: int) -> list[str]:
 # --------------------------------------------------------------------
 
 
-def upload_and_reserve_blob(mailbox, content: bytes, content_type: str, **kwargs):
+def upload_and_reserve_blob(
+    mailbox, content: bytes | File, content_type: str, **kwargs
+):
     """JMAP upload primitive: dedup-create a Blob and register a
     ``MailboxBlob`` reservation row under ``mailbox``.
 
@@ -207,6 +211,11 @@ def upload_and_reserve_blob(mailbox, content: bytes, content_type: str, **kwargs
     is ``PROTECT``, so once the row is in the DB the GC can't delete
     the blob until the row's ``expires_at`` lapses.
 
+    ``content`` may be a ``File`` (the uploaded file itself): it is then
+    hashed, compressed and encrypted chunk by chunk through
+    ``BlobManager.create_blob_from_file`` instead of being read into
+    memory first.
+
     A re-upload of the same content by the same mailbox refreshes
     ``expires_at`` (UPSERT semantics via ``update_or_create``) rather
     than creating a duplicate row.
@@ -215,11 +224,16 @@ def upload_and_reserve_blob(mailbox, content: bytes, content_type: str, **kwargs
     ``BlobFactory(mailbox=...)`` in tests that simulate uploads.
     """
     with transaction.atomic():
-        blob = Blob.objects.create_blob(
-            content=content,
-            content_type=content_type,
-            **kwargs,
-        )
+        if isinstance(content, File):
+            blob = Blob.objects.create_blob_from_file(
+                content, content_type=content_type, **kwargs
+            )
+        else:
+            blob = Blob.objects.create_blob(
+                content=content,
+                content_type=content_type,
+                **kwargs,
+            )
         MailboxBlob.objects.update_or_create(
             blob=blob,
             mailbox=mailbox,
@@ -349,6 +363,9 @@ def _gc_one_blob(blob_id_str: str, service, dry_run: bool = False) -> str:
             # ``MailboxBlob.blob`` is PROTECT — the subsequent
             # ``blob.delete()`` would otherwise raise ProtectedError.
             MailboxBlob.objects.filter(blob_id=blob_uuid).delete()
+            # Same for expired image proxy cache entries and previews.
+            ProxiedImage.objects.filter(blob_id=blob_uuid).delete()
+            BlobPreview.objects.filter(blob_id=blob_uuid).delete()
 
             blob.delete()
 
@@ -0,0 +1,206 @@
+"""Precomputed preview renderings of image attachments.
+
+The preview endpoint used to load, sniff and send the full original on
+every view — for ``msg_*`` attachments after re-parsing the whole parent
+message — so scrolling a thread full of photos transferred and decoded
+full-size originals again and again. Images of at least
+``BLOB_PREVIEW_MIN_SIZE`` bytes are now rendered once per content, in
+the background, as a WebP fitting in ``BLOB_PREVIEW_MAX_DIMENSION``
+pixels. The rendering is stored as a ``Blob`` (compressed, encrypted,
+offloaded and deduplicated like any other content) and indexed by a
+``BlobPreview`` row keyed on the sha256 of the original, which also
+records the MIME type sniffed from the original so the endpoint can run
+its checks without loading it.
+
+Entries live ``BLOB_PREVIEW_TTL`` seconds; ``prune_blob_previews_task``
+drops expired ones and hands their blobs to the blob GC.
+"""
+
+import hashlib
+import io
+import uuid
+from datetime import timedelta
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+import magic
+from celery.utils.log import get_task_logger
+from PIL import Image, ImageOps
+
+from core.models import Blob, BlobPreview, Message
+from core.services.blob_gc import schedule_for_gc
+
+from messages.celery_app import app as celery_app
+
+logger = get_task_logger(__name__)
+
+# Number of leading bytes inspected by python-magic. Every format the
+# preview endpoint allowlists is identified by a signature in its first
+# few hundred bytes, so 2 KiB is a comfortable margin — not a tight
+# bound. We cap the slice only to avoid handing magic the whole payload.
+MAGIC_SNIFF_BYTES = 2048
+
+# Sniffed types a rendering is made for, and the type of the rendering.
+RENDERABLE_MIME_TYPES = frozenset(
+    {"image/png", "image/jpeg", "image/gif", "image/webp"}
+)
+PREVIEW_MIME_TYPE = "image/webp"
+PREVIEW_QUALITY = 80
+# Larger images are served as-is rather than decoded: a 50 Mpx RGBA
+# image already takes 200 MB once decoded.
+MAX_SOURCE_PIXELS = 50_000_000
+
+# Marks a rendering as scheduled, so that views arriving before the
+# task has run don't enqueue it again.
+PENDING_KEY_PREFIX = "blob_preview:pending:"
+PENDING_TIMEOUT = 10 * 60
+
+PRUNE_BATCH_SIZE = 500
+
+
+def sniff(content: bytes) -> str:
+    """MIME type detected from the leading bytes of ``content``."""
+    return magic.from_buffer(content[:MAGIC_SNIFF_BYTES], mime=True).lower()
+
+
+def get_preview(source_sha256: str) -> BlobPreview | None:
+    """Return the live preview entry of the content hashed ``source_sha256``."""
+    return (
+        BlobPreview.objects.select_related("blob")
+        .filter(source_sha256=source_sha256, expires_at__gt=timezone.now())
+        .first()
+    )
+
+
+def render_preview(content: bytes) -> bytes | None:
+    """Downscaled WebP rendering of the image ``content``.
+
+    Returns ``None`` when the original should be served instead: the
+    image is animated (a still would lose the animation), unreadable or
+    too large to decode safely, or the rendering isn't smaller.
+    """
+    max_dimension = settings.BLOB_PREVIEW_MAX_DIMENSION
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            width, height = image.size
+            if width * height > MAX_SOURCE_PIXELS or getattr(
+                image, "is_animated", False
+            ):
+                return None
+            # Lets the JPEG decoder downscale while decoding; no-op for
+            # the other formats.
+            image.draft("RGB", (max_dimension, max_dimension))
+            rendering = ImageOps.exif_transpose(image)
+            rendering.thumbnail((max_dimension, max_dimension))
+            output = io.BytesIO()
+            rendering.save(output, format="WEBP", quality=PREVIEW_QUALITY)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.info("Could not render a preview", exc_info=True)
+        return None
+
+    rendered = output.getvalue()
+    if len(rendered) >= len(content):
+        return None
+    return rendered
+
+
+def store_preview(content: bytes) -> BlobPreview:
+    """Render ``content`` and record it as the preview of its sha256."""
+    source_sha256 = hashlib.sha256(content).hexdigest()
+    source_type = sniff(content)
+    rendered = render_preview(content) if source_type in RENDERABLE_MIME_TYPES else None
+    expires_at = timezone.now() + timedelta(seconds=settings.BLOB_PREVIEW_TTL)
+
+    with transaction.atomic():
+        blob = (
+            Blob.objects.create_blob(content=rendered, content_type=PREVIEW_MIME_TYPE)
+            if rendered
+            else None
+        )
+        entry, created = BlobPreview.objects.select_for_update().get_or_create(
+            source_sha256=source_sha256,
+            defaults={
+                "source_type": source_type,
+                "blob": blob,
+                "expires_at": expires_at,
+            },
+        )
+        if not created:
+            previous_blob_id = entry.blob_id
+            entry.source_type = source_type
+            entry.blob = blob
+            entry.expires_at = expires_at
+            entry.save(
+                update_fields=["source_type", "blob", "expires_at", "updated_at"]
+            )
+            if previous_blob_id is not None and previous_blob_id != entry.blob_id:
+                schedule_for_gc(previous_blob_id)
+    return entry
+
+
+def schedule_preview(
+    source_id: str, source_sha256: str, source_type: str, size: int
+) -> bool:
+    """Enqueue the rendering of ``source_id`` if it is worth one.
+
+    ``source_id`` is what the preview endpoint was called with: a Blob
+    id or a ``msg_<message_id>_<attachment_number>`` id. The caller has
+    already checked the user may read it.
+    """
+    if (
+        not settings.BLOB_PREVIEW_MAX_DIMENSION
+        or source_type not in RENDERABLE_MIME_TYPES
+        or size < settings.BLOB_PREVIEW_MIN_SIZE
+    ):
+        return False
+    if not cache.add(f"{PENDING_KEY_PREFIX}{source_sha256}", 1, PENDING_TIMEOUT):
+        return False
+    generate_blob_preview_task.delay(source_id)
+    return True
+
+
+def _source_content(source_id: str) -> bytes:
+    """Original content behind a preview endpoint id."""
+    if not source_id.startswith("msg_"):
+        return Blob.objects.get(id=source_id).get_content()
+
+    _, message_id, attachment_number = source_id.split("_")
+    message = Message.objects.get(id=uuid.UUID(message_id))
+    attachments = message.get_parsed_data().get("attachments", [])
+    return attachments[int(attachment_number)]["content"]
+
+
+@celery_app.task
+def generate_blob_preview_task(source_id: str) -> Dict[str, Any]:
+    """Render the preview of a Blob or ``msg_*`` attachment."""
+    try:
+        content = _source_content(source_id)
+    except (Blob.DoesNotExist, Message.DoesNotExist, IndexError, ValueError):
+        logger.warning("Preview source %s not found", source_id)
+        return {"success": False, "error": "Source not found"}
+
+    entry = store_preview(content)
+    return {"success": True, "rendered": entry.blob_id is not None}
+
+
+@celery_app.task
+def prune_blob_previews_task() -> Dict[str, Any]:
+    """Periodic: drop expired preview entries and hand their blobs to the GC."""
+    expired = list(
+        BlobPreview.objects.filter(expires_at__lte=timezone.now()).values_list(
+            "id", "blob_id"
+        )
+    )
+    for start in range(0, len(expired), PRUNE_BATCH_SIZE):
+        batch = expired[start : start + PRUNE_BATCH_SIZE]
+        with transaction.atomic():
+            BlobPreview.objects.filter(id__in=[row[0] for row in batch]).delete()
+            for blob_id in {row[1] for row in batch} - {None}:
+                schedule_for_gc(blob_id)
+
+    logger.info("prune_blob_previews_task: expired=%d", len(expired))
+    return {"success": True, "expired": len(expired)}
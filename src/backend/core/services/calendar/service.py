@@ -6,13 +6,16 @@ events, add event, RSVP) directly over HTTP using ``requests`` and
 library's dependency surface.
 """
 
+import hashlib
 import logging
 import re
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from urllib.parse import quote, unquote, urljoin, urlparse
 
 from django.conf import settings as django_settings
+from django.core.cache import cache
 
 import defusedxml.ElementTree as ET
 import requests
@@ -30,6 +33,8 @@ logger = logging.getLogger(__name__)
 
 CALDAV_TIMEOUT = 20
 
+DISCOVERY_CACHE_KEY_PREFIX = "caldav:discovery:"
+
 DAV_NS = "DAV:"
 CALDAV_NS = "urn:ietf:params:xml:ns:caldav"
 APPLE_ICAL_NS = "http://apple.com/ns/ical/"
@@ -178,6 +183,14 @@ class CalDAVService:  # pylint: disable=too-many-instance-attributes
             )
         return resp
 
+    def _discovery_cache_key(self, name):
+        """Cache key of a discovery result for this server and principal.
+
+        Hashed so that the user's email doesn't end up in the cache keys.
+        """
+        digest = hashlib.sha256(f"{self.url}\n{self.username}".encode()).hexdigest()
+        return f"{DISCOVERY_CACHE_KEY_PREFIX}{name}:{digest}"
+
     def _propfind(self, url, body, depth="0"):
         return self._request(
             "PROPFIND",
@@ -194,12 +207,24 @@ class CalDAVService:  # pylint: disable=too-many-instance-attributes
         """Calendar-home-set URL, resolved lazily via principal discovery.
 
         Falls back to the configured URL if discovery fails (for servers or
-        URLs that already point directly at the home set).
+        URLs that already point directly at the home set). A discovered
+        home set is cached for ``CALDAV_DISCOVERY_CACHE_TTL`` seconds: the
+        service is built per API request, and discovery is two PROPFIND
+        round trips.
         """
+        if self._home_set is not None:
+            return self._home_set
+        cache_key = self._discovery_cache_key("home-set")
+        self._home_set = cache.get(cache_key)
         if self._home_set is not None:
             return self._home_set
         try:
             self._home_set = self._discover_home_set() or self.url
+            cache.set(
+                cache_key,
+                self._home_set,
+                django_settings.CALDAV_DISCOVERY_CACHE_TTL,
+            )
         except (CalDAVError, DefusedParseError, AttributeError) as exc:
             # CalDAVError: protocol/HTTP/network. DefusedParseError: malformed
             # PROPFIND XML. AttributeError: a defusedxml node was None where
@@ -245,7 +270,7 @@ class CalDAVService:  # pylint: disable=too-many-instance-attributes
             return principal_url
         return urljoin(self.url, home_href.strip())
 
-    def list_calendars(self, writable_only=False):
+    def list_calendars(self, writable_only=False, cached=False):
         """List all calendars with a single PROPFIND depth=1 (no N+1).
 
         When ``writable_only`` is True, calendars the current user cannot
@@ -254,7 +279,24 @@ class CalDAVService:  # pylint: disable=too-many-instance-attributes
         not advertise the privilege set are trusted (the calendar is kept)
         to avoid hiding legitimate writable calendars on minimal CalDAV
         implementations.
+
+        ``cached=True`` reuses a list fetched in the last
+        ``CALDAV_DISCOVERY_CACHE_TTL`` seconds. Only for reads that can
+        live with a calendar created meanwhile being missing (conflict
+        checks): the calendar picker and writes always list afresh.
         """
+        if not cached:
+            return self._fetch_calendars(writable_only)
+        cache_key = self._discovery_cache_key(
+            "writable-calendars" if writable_only else "calendars"
+        )
+        calendars = cache.get(cache_key)
+        if calendars is None:
+            calendars = self._fetch_calendars(writable_only)
+            cache.set(cache_key, calendars, django_settings.CALDAV_DISCOVERY_CACHE_TTL)
+        return calendars
+
+    def _fetch_calendars(self, writable_only):
         body = (
             '<?xml version="1.0"?>'
             '<d:propfind xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav"'
@@ -420,30 +462,35 @@ class CalDAVService:  # pylint: disable=too-many-instance-attributes
         selected (and avoid re-prompting for a choice already made).
         ``attendee_email`` is the fallback identity for servers that don't
         expose ``owner_email``.
+
+        The calendar list comes from the discovery cache, and calendars are
+        queried concurrently (up to ``CALDAV_CONCURRENCY`` at a time).
+        Each event is parsed once.
         """
         conflicts = []
         existing_partstats = {}
-        for cal in self.list_calendars():
-            try:
-                events = self._calendar_query(cal["id"], start, end)
-            except CalDAVError:
-                logger.exception(
-                    "Error searching for conflicts on calendar %s", cal["name"]
-                )
+        calendars = self.list_calendars(cached=True)
+        for cal, events in zip(
+            calendars, self._query_calendars(calendars, start, end), strict=True
+        ):
+            if events is None:
                 continue
             # The identity a copy in this calendar speaks for: its owner
             # when the server exposes it, otherwise the acting mailbox
             # (servers without owner metadata behave as before).
             owner_lc = (cal.get("owner_email") or attendee_email or "").lower() or None
             for ics_text in events:
-                summary = self._summarize_event(ics_text, cal["name"])
+                event = self._parse_event(ics_text)
+                if event is None:
+                    continue
+                summary = self._summarize_event(event, cal["name"])
                 if summary is None:
                     continue
                 if exclude_uid and summary.get("uid") == exclude_uid:
                     # Per-identity PARTSTAT, keyed by the calendar owner.
                     # First match wins per identity.
                     if owner_lc and owner_lc not in existing_partstats:
-                        owner_partstat = self._extract_partstat(ics_text, owner_lc)
+                        owner_partstat = self._extract_partstat(event, owner_lc)
                         if owner_partstat is not None:
                             existing_partstats[owner_lc] = owner_partstat
                     continue
@@ -454,17 +501,50 @@ class CalDAVService:  # pylint: disable=too-many-instance-attributes
                 conflicts.append(summary)
         return {"conflicts": conflicts, "existing_partstats": existing_partstats}
 
-    @staticmethod
-    def _extract_partstat(ics_text, attendee_email_lc):
-        """Return PARTSTAT of ``attendee_email_lc`` (lowercased) in ``ics_text``.
+    def _query_calendars(self, calendars, start, end):
+        """Run ``_calendar_query`` on every calendar, concurrently.
 
-        Returns ``None`` if the event is unparseable or the attendee
-        is absent — callers should treat ``None`` as "no prior RSVP".
+        Returns the events of each calendar, in the order of ``calendars``;
+        ``None`` for a calendar whose query failed (logged, not raised, so
+        that one broken calendar doesn't hide the conflicts of the others).
         """
+        if not calendars:
+            return []
+        # Create the session up front: the workers share it (and its
+        # connection pool), and must not race to create their own.
+        _ = self.session
+
+        def _query(cal):
+            try:
+                return self._calendar_query(cal["id"], start, end)
+            except CalDAVError:
+                logger.exception(
+                    "Error searching for conflicts on calendar %s", cal["name"]
+                )
+                return None
+
+        with ThreadPoolExecutor(
+            max_workers=min(django_settings.CALDAV_CONCURRENCY, len(calendars)),
+            thread_name_prefix="caldav",
+        ) as executor:
+            return list(executor.map(_query, calendars))
+
+    @staticmethod
+    def _parse_event(ics_text):
+        """Parse an ICS object returned by a calendar query, or None if invalid."""
         try:
-            cal = ICalendar.from_ical(ics_text)
+            return ICalendar.from_ical(ics_text)
         except Exception:  # pylint: disable=broad-exception-caught
+            logger.warning("Could not parse conflicting event", exc_info=True)
             return None
+
+    @staticmethod
+    def _extract_partstat(cal, attendee_email_lc):
+        """Return PARTSTAT of ``attendee_email_lc`` (lowercased) in ``cal``.
+
+        Returns ``None`` if the attendee is absent — callers should treat
+        ``None`` as "no prior RSVP".
+        """
         for comp in cal.walk("VEVENT"):
             attendees = comp.get("ATTENDEE")
             if attendees is None:
@@ -512,12 +592,7 @@ class CalDAVService:  # pylint: disable=too-many-instance-attributes
         ]
 
     @staticmethod
-    def _summarize_event(ics_text, calendar_name):
-        try:
-            cal = ICalendar.from_ical(ics_text)
-        except Exception:  # pylint: disable=broad-exception-caught
-            logger.warning("Could not parse conflicting event", exc_info=True)
-            return None
+    def _summarize_event(cal, calendar_name):
         for comp in cal.walk("VEVENT"):
             dtstart = comp.get("DTSTART")
             dtend = comp.get("DTEND")
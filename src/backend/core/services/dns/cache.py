@@ -0,0 +1,141 @@
+"""Cached DNS TXT lookups for the mail path.
+
+DKIM verification resolves the ``<selector>._domainkey.<domain>`` key of
+every signature it checks. Mail arrives in bursts from a handful of
+signers, so lookups are cached in two tiers:
+
+* a bounded in-process LRU, so a hit costs a dict lookup;
+* the default cache when it is ``django_redis``, shared by every worker
+  process, so a key fetched once is reused cluster-wide.
+
+Entries follow the record TTL, clamped to ``[_MIN_TTL,
+DNS_CACHE_MAX_TTL]``. Negative answers (NXDOMAIN, no TXT record) are
+cached for ``DNS_CACHE_NEGATIVE_TTL``; resolver failures (timeout, no
+reachable nameserver, any other ``DNSException``) for ``_ERROR_TTL``, so a host without working DNS
+pays the resolver timeout once per name and minute, not once per
+message.
+
+Only the mail path goes through here: the admin DNS checks query live
+DNS, as they are run right after records were changed.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+import dns.exception
+import dns.resolver
+
+from core.utils import is_redis_backend
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "dns:txt:"
+
+# Per-query resolver budget (seconds).
+RESOLVE_LIFETIME = 10
+
+# Floor applied to record TTLs, so records published with a tiny TTL
+# still get reused within a burst.
+_MIN_TTL = 60
+
+# Resolver failures are retried sooner than genuine negative answers.
+_ERROR_TTL = 60
+
+# Entries kept in the in-process tier.
+LOCAL_CACHE_SIZE = 1024
+
+_local: OrderedDict[str, tuple[float, list[bytes]]] = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _normalize(name) -> str:
+    if isinstance(name, bytes):
+        name = name.decode("ascii")
+    return name.rstrip(".").lower()
+
+
+def _local_get(name: str) -> list[bytes] | None:
+    with _local_lock:
+        entry = _local.get(name)
+        if entry is None:
+            return None
+        expires_at, values = entry
+        if expires_at <= time.time():
+            del _local[name]
+            return None
+        _local.move_to_end(name)
+        return values
+
+
+def _local_set(name: str, expires_at: float, values: list[bytes]) -> None:
+    with _local_lock:
+        _local[name] = (expires_at, values)
+        _local.move_to_end(name)
+        while len(_local) > LOCAL_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+def clear_local_cache() -> None:
+    """Empty the in-process tier (the shared one expires on its own)."""
+    with _local_lock:
+        _local.clear()
+
+
+def _query(name: str) -> tuple[list[bytes], int]:
+    """Resolve ``name`` and return its TXT values and how long to keep them.
+
+    Multi-string records (long DKIM keys) are concatenated, one value per
+    record.
+    """
+    try:
+        answers = dns.resolver.resolve(name, "TXT", lifetime=RESOLVE_LIFETIME)
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        logger.warning("No TXT record for %s", name)
+        return [], settings.DNS_CACHE_NEGATIVE_TTL
+    except dns.exception.DNSException as exc:
+        # Timeouts, unreachable nameservers, missing resolver configuration...
+        logger.warning(
+            "DNS failure while looking up TXT record %s (%s)",
+            name,
+            type(exc).__name__,
+        )
+        return [], _ERROR_TTL
+
+    values = [b"".join(answer.strings) for answer in answers]
+    rrset = getattr(answers, "rrset", None)
+    ttl = getattr(rrset, "ttl", None)
+    if not isinstance(ttl, int):
+        ttl = settings.DNS_CACHE_MAX_TTL
+    return values, min(max(ttl, _MIN_TTL), settings.DNS_CACHE_MAX_TTL)
+
+
+def resolve_txt(name) -> list[bytes]:
+    """Return the TXT values of ``name``, from cache when possible.
+
+    An empty list means there is no usable record (or DNS failed).
+    """
+    name = _normalize(name)
+    values = _local_get(name)
+    if values is not None:
+        return values
+
+    shared = is_redis_backend()
+    key = f"{CACHE_KEY_PREFIX}{name}"
+    if shared:
+        entry = cache.get(key)
+        if entry is not None:
+            expires_at, values = entry
+            _local_set(name, expires_at, values)
+            return values
+
+    values, ttl = _query(name)
+    expires_at = time.time() + ttl
+    if shared:
+        cache.set(key, (expires_at, values), timeout=ttl)
+    _local_set(name, expires_at, values)
+    return values
@@ -1,13 +1,22 @@
 """
 DNS checking functionality for mail domains.
+
+Every check takes an optional ``resolver``: a ``resolve(name, rdtype)``
+callable with the semantics of ``dns.resolver.resolve`` (the default).
+``check_maildomains_dns`` checks many domains at once through a shared
+``CachingResolver``.
 """
 
 import collections
 import logging
 import re
-from typing import Dict, List, Optional, Tuple
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
+from django.conf import settings
 from django.core.cache import cache
+from django.utils import timezone
 
 import dns.resolver
 
@@ -18,6 +27,59 @@ logger = logging.getLogger(__name__)
 SPF_CHECK_CACHE_KEY_PREFIX = "dns:spf_check:"
 SPF_CHECK_CACHE_TIMEOUT = 600  # 10 minutes
 
+Resolver = Callable[[str, str], Any]
+
+
+def _resolve(resolver: Optional[Resolver], name: str, rdtype: str):
+    """Query ``name`` through ``resolver``, or dnspython's default resolver."""
+    return (resolver or dns.resolver.resolve)(name, rdtype)
+
+
+class CachingResolver:
+    """Resolver memoizing answers and errors for the duration of a check run.
+
+    Many domains share the same SPF includes, and a domain's MX records are
+    one single lookup: each ``(name, rdtype)`` is queried once per run, even
+    by concurrent threads. Once a name is known not to exist (NXDOMAIN),
+    names below it are answered NXDOMAIN without querying (RFC 8020).
+    """
+
+    def __init__(self, resolve: Optional[Resolver] = None):
+        self._resolve = resolve or dns.resolver.resolve
+        self._lock = threading.Lock()
+        self._answers: Dict[Tuple[str, str], Future] = {}
+        self._nxdomains = set()
+        self.queries = 0
+
+    def _is_below_nxdomain(self, name: str) -> bool:
+        labels = name.split(".")
+        return any(
+            ".".join(labels[index:]) in self._nxdomains for index in range(len(labels))
+        )
+
+    def __call__(self, name: str, rdtype: str):
+        name = str(name).rstrip(".").lower()
+        key = (name, rdtype.upper())
+        with self._lock:
+            if self._is_below_nxdomain(name):
+                raise dns.resolver.NXDOMAIN()
+            answer = self._answers.get(key)
+            query = answer is None
+            if query:
+                answer = self._answers[key] = Future()
+                self.queries += 1
+
+        if query:
+            try:
+                answer.set_result(self._resolve(name, rdtype))
+            except dns.resolver.NXDOMAIN as e:
+                with self._lock:
+                    self._nxdomains.add(name)
+                answer.set_exception(e)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                answer.set_exception(e)
+        return answer.result()
+
 
 def normalize_txt_value(value: str) -> str:
     """
@@ -91,7 +153,9 @@ def _check_dkim_semantic(
     return None
 
 
-def _check_spf(expected_value: str, found_values: List[str]) -> Dict[str, any]:
+def _check_spf(
+    expected_value: str, found_values: List[str], resolver: Optional[Resolver] = None
+) -> Dict[str, any]:
     """SPF check: verify expected includes resolve, fall back to terms comparison."""
     expected = parse_spf_terms(expected_value)
     if not expected:
@@ -108,7 +172,7 @@ def _check_spf(expected_value: str, found_values: List[str]) -> Dict[str, any]:
     # If there are expected includes, check they resolve via BFS.
     # This is the primary signal: includes being set up is what matters.
     if expected_includes:
-        resolved, error = _resolve_spf_includes(found_values)
+        resolved, error = _resolve_spf_includes(found_values, resolver=resolver)
         if error and error.startswith("duplicate:"):
             return {"status": "duplicate", "found": found_values}
         if error == "limit_reached":
@@ -158,7 +222,9 @@ def _extract_include_domains(spf_value: str) -> List[str]:
 
 
 def _resolve_spf_includes(
-    found_values: List[str], max_lookups: int = 10
+    found_values: List[str],
+    max_lookups: int = 10,
+    resolver: Optional[Resolver] = None,
 ) -> Tuple[set, Optional[str]]:
     """BFS through SPF include chains, return all domains with valid SPF records.
 
@@ -189,7 +255,7 @@ def _resolve_spf_includes(
         lookup_count += 1
 
         try:
-            answers = dns.resolver.resolve(include_domain, "TXT")
+            answers = _resolve(resolver, include_domain, "TXT")
             spf_records = []
             for rr in answers.rrset:
                 for s in rr.strings:
@@ -214,14 +280,14 @@ def _resolve_spf_includes(
     return resolved, None
 
 
-def _resolve_dns_values(record_type, target, query_name):
+def _resolve_dns_values(record_type, target, query_name, resolver=None):
     """Resolve DNS and return found values and normalized expected value flag."""
     if record_type.upper() == "MX":
-        answers = dns.resolver.resolve(query_name, "MX")
+        answers = _resolve(resolver, query_name, "MX")
         return [f"{answer.preference} {answer.exchange}" for answer in answers]
 
     if record_type.upper() == "TXT":
-        answers = dns.resolver.resolve(query_name, "TXT")
+        answers = _resolve(resolver, query_name, "TXT")
         # Some local resolvers (e.g. systemd-resolved) merge separate TXT
         # records into a single RR with multiple strings. DKIM keys can also
         # legitimately span multiple strings within one record. We handle
@@ -238,7 +304,7 @@ def _resolve_dns_values(record_type, target, query_name):
                     values.append(normalize_txt_value(s.decode()))
         return values
 
-    answers = dns.resolver.resolve(query_name, record_type)
+    answers = _resolve(resolver, query_name, record_type)
     return [answer.to_text() for answer in answers]
 
 
@@ -268,7 +334,9 @@ def _check_txt_security(expected_value, found_values):
 
 
 def check_single_record(
-    maildomain: MailDomain, expected_record: Dict[str, any]
+    maildomain: MailDomain,
+    expected_record: Dict[str, any],
+    resolver: Optional[Resolver] = None,
 ) -> Dict[str, any]:
     """
     Check a single DNS record for a mail domain.
@@ -276,6 +344,7 @@ def check_single_record(
     Args:
         maildomain: The MailDomain instance
         expected_record: The expected record to check
+        resolver: Resolver to query, dnspython's default one if None
 
     Returns:
         Check result dictionary with status and details
@@ -288,7 +357,7 @@ def check_single_record(
     query_name = f"{target}.{maildomain.name}" if target else maildomain.name
 
     try:
-        found_values = _resolve_dns_values(record_type, target, query_name)
+        found_values = _resolve_dns_values(record_type, target, query_name, resolver)
         if record_type.upper() == "TXT":
             expected_value = normalize_txt_value(expected_value)
 
@@ -301,7 +370,7 @@ def check_single_record(
         # SPF: always use semantic check (handles exact match, reordering,
         # ~all acceptance, and recursive include verification)
         if record_type.upper() == "TXT" and expected_value.startswith("v=spf1"):
-            return _check_spf(expected_value, found_values)
+            return _check_spf(expected_value, found_values, resolver)
 
         # Exact match (non-SPF)
         if expected_value in found_values:
@@ -381,27 +450,44 @@ def invalidate_spf_check_cache(maildomain: MailDomain) -> None:
     cache.delete(_spf_check_cache_key(maildomain))
 
 
-def check_dns_records(maildomain: MailDomain) -> List[Dict[str, any]]:
+def check_dns_records(
+    maildomain: MailDomain,
+    resolver: Optional[Resolver] = None,
+    expected_records: Optional[List[Dict[str, any]]] = None,
+) -> List[Dict[str, any]]:
     """
     Check DNS records for a mail domain against expected records.
 
+    Records at the domain apex are checked first: with a ``CachingResolver``,
+    a domain that doesn't exist is then known before its subdomains (DKIM,
+    DMARC) are queried.
+
     Args:
         maildomain: The MailDomain instance to check
+        resolver: Resolver to query, dnspython's default one if None
+        expected_records: The records to check, those expected for the
+            domain if None
 
     Returns:
         List of records with their check status
     """
-    expected_records = maildomain.get_expected_dns_records()
-    results = []
+    if expected_records is None:
+        expected_records = maildomain.get_expected_dns_records()
+    results = [None] * len(expected_records)
 
     # Collect expected MX values for conflicting detection
     expected_mx_values = {
         record["value"] for record in expected_records if record["type"].upper() == "MX"
     }
 
-    for expected_record in expected_records:
+    for index in sorted(
+        range(len(expected_records)), key=lambda i: bool(expected_records[i]["target"])
+    ):
+        expected_record = expected_records[index]
         result_record = expected_record.copy()
-        result_record["_check"] = check_single_record(maildomain, expected_record)
+        result_record["_check"] = check_single_record(
+            maildomain, expected_record, resolver
+        )
 
         # For MX records that are correct, check for extra (conflicting) MX entries
         if (
@@ -413,6 +499,61 @@ def check_dns_records(maildomain: MailDomain) -> List[Dict[str, any]]:
             if extra_mx:
                 result_record["_check"]["status"] = "conflicting"
 
-        results.append(result_record)
+        results[index] = result_record
 
     return results
+
+
+def save_dns_check(maildomain: MailDomain, results: List[Dict[str, any]]) -> None:
+    """Store the outcome of a DNS check on the mail domain."""
+    maildomain.dns_check_results = results
+    maildomain.dns_checked_at = timezone.now()
+    # Not save(): full_clean() and concurrent admin edits have no business here
+    MailDomain.objects.filter(pk=maildomain.pk).update(
+        dns_check_results=maildomain.dns_check_results,
+        dns_checked_at=maildomain.dns_checked_at,
+    )
+
+
+def check_maildomains_dns(
+    maildomains: Iterable[MailDomain],
+    concurrency: Optional[int] = None,
+    resolver: Optional[Resolver] = None,
+) -> Dict[Any, List[Dict[str, any]]]:
+    """Check the DNS records of many mail domains concurrently.
+
+    Domains are checked by a pool of ``concurrency`` threads (default
+    ``DNS_CHECK_CONCURRENCY``) sharing one ``CachingResolver`` around
+    ``resolver``; the expected records are fetched beforehand, so workers
+    don't touch the database. Each domain's results are saved with
+    ``save_dns_check`` as soon as they are known, so an interrupted run keeps
+    what it has done.
+
+    Returns the results by mail domain id.
+    """
+    caching_resolver = CachingResolver(resolver)
+    results = {}
+    with ThreadPoolExecutor(
+        max_workers=concurrency or settings.DNS_CHECK_CONCURRENCY,
+        thread_name_prefix="dns-check",
+    ) as executor:
+        futures = {
+            executor.submit(
+                check_dns_records,
+                maildomain,
+                caching_resolver,
+                maildomain.get_expected_dns_records(),
+            ): maildomain
+            for maildomain in maildomains
+        }
+        for future in as_completed(futures):
+            maildomain = futures[future]
+            results[maildomain.pk] = future.result()
+            save_dns_check(maildomain, results[maildomain.pk])
+
+    logger.info(
+        "Checked DNS records of %d mail domain(s) with %d queries",
+        len(results),
+        caching_resolver.queries,
+    )
+    return results
@@ -1,17 +1,27 @@
 """DNS tasks."""
 
-# pylint: disable=unused-argument, broad-exception-raised, broad-exception-caught, too-many-lines
+from typing import Any, Dict
 
-# @celery_app.task(bind=True)
-# def check_maildomain_dns(self, maildomain_id):
-#     """Check if the DNS records for a mail domain are correct."""
+from celery.utils.log import get_task_logger
 
-#     maildomain = models.MailDomain.objects.get(id=maildomain_id)
-#     expected_records = maildomain.get_expected_dns_records()
-#     for record in expected_records:
-#         res = dns.resolver.resolve(
-#             record["target"], record["type"], raise_on_no_answer=False, lifetime=10
-#         )
-#         print(res)
-#         print(record)
-#     return {"success": True}
+from core.models import MailDomain
+from core.services.dns.check import check_maildomains_dns
+
+from messages.celery_app import app as celery_app
+
+logger = get_task_logger(__name__)
+
+
+@celery_app.task
+def check_maildomains_dns_task() -> Dict[str, Any]:
+    """Periodic: check and store the DNS records of every mail domain."""
+    results = check_maildomains_dns(MailDomain.objects.all())
+    failing = sum(
+        1
+        for records in results.values()
+        if any(record["_check"]["status"] != "correct" for record in records)
+    )
+    logger.info(
+        "check_maildomains_dns_task: checked=%d failing=%d", len(results), failing
+    )
+    return {"success": True, "checked": len(results), "failing": failing}
@@ -1,15 +1,32 @@
-"""Celery tasks for exporting mailbox messages."""
+"""Celery tasks for exporting mailbox messages.
+
+The export is a pipeline: message and blob rows are loaded in batches,
+a thread pool fetches and decodes the blobs (S3 download, decryption,
+decompression) ahead of the writer, the task thread builds the MBOX
+entries and gzips them, and finished parts are uploaded by a background
+thread while the next one is compressed.
+
+Each uploaded part is checkpointed in the cache together with the
+position of the last message it contains, so an export interrupted by a
+worker crash or restart resumes where it stopped the next time it is
+started for the same mailbox, instead of starting over. A lock per
+mailbox keeps a second export from running alongside and sharing the
+same checkpoint and multipart upload.
+"""
 
 import gzip
 import html
 import io
 import re
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.storage import storages
-from django.db.models import OuterRef, Subquery
+from django.db.models import OuterRef, Q, Subquery
 
 from celery.utils.log import get_task_logger
 from jmap_email import JmapEmail, compose_email, parse_email
@@ -18,7 +35,7 @@ from sentry_sdk import capture_exception
 from core.api.utils import generate_presigned_url
 from core.mda.inbound import deliver_inbound_message
 from core.mda.utils import current_sent_at
-from core.models import Label, Mailbox, Message, ThreadAccess
+from core.models import Blob, Label, Mailbox, Message, ThreadAccess
 
 from messages.celery_app import app as celery_app
 
@@ -33,6 +50,25 @@ CHUNK_SIZE = 100 * 1024 * 1024
 # Minimum S3 multipart part size (5MB, required by S3)
 MIN_PART_SIZE = 5 * 1024 * 1024
 
+# Parts queued for upload while the next one is being compressed
+MAX_PENDING_UPLOADS = 2
+
+# Messages (and their blob rows) loaded per query
+EXPORT_BATCH_SIZE = 100
+
+# Resume checkpoints of interrupted exports, kept as long as the download
+# link of a finished one. Past that, the bucket lifecycle policy is
+# expected to abort the incomplete multipart upload.
+CHECKPOINT_KEY = "export:checkpoint:{mailbox_id}"
+CHECKPOINT_TTL = PRESIGNED_URL_EXPIRATION
+
+# Held while a mailbox is being exported, so that a second export of the
+# same mailbox doesn't pick up the checkpoint of the running one and
+# upload overlapping parts. Refreshed on progress; expires if the worker
+# dies, after which the next run resumes from the checkpoint.
+LOCK_KEY = "export:lock:{mailbox_id}"
+LOCK_TIMEOUT = 30 * 60
+
 
 class S3MultipartGzipUploader:  # pylint: disable=too-many-instance-attributes
     """
@@ -43,43 +79,70 @@ class S3MultipartGzipUploader:  # pylint: disable=too-many-instance-attributes
 
     Each uploaded part is a complete gzip stream. When concatenated, they form a valid
     multi-stream gzip file that standard gzip tools can decompress.
+
+    Parts are uploaded in order by a background thread, so compression of the
+    next part overlaps with the upload of the previous ones; at most
+    ``MAX_PENDING_UPLOADS`` parts are held in memory waiting for upload.
+
+    Pass ``upload_id`` and ``parts`` to continue an existing multipart upload.
+    ``on_part_uploaded(parts, marker)`` is called once a part is stored, with
+    the ``marker`` given to the last ``write`` that went into it.
     """
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         s3_client,
         bucket: str,
         key: str,
         chunk_size: int = CHUNK_SIZE,
         min_part_size: int = MIN_PART_SIZE,
+        *,
+        upload_id: str | None = None,
+        parts: list | None = None,
+        on_part_uploaded: Callable[[list, Any], None] | None = None,
     ):
         self.s3_client = s3_client
         self.bucket = bucket
         self.key = key
         self.chunk_size = chunk_size
         self.min_part_size = min_part_size
+        self.on_part_uploaded = on_part_uploaded
 
-        # Start multipart upload
-        response = self.s3_client.create_multipart_upload(
-            Bucket=self.bucket,
-            Key=self.key,
-            ContentType="application/gzip",
+        if upload_id is None:
+            # Start multipart upload
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                ContentType="application/gzip",
+            )
+            upload_id = response["UploadId"]
+        self.upload_id = upload_id
+        self.parts = list(parts or [])
+        self.part_number = len(self.parts) + 1
+
+        self._marker = None
+        self._uploads = deque()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="export-upload"
         )
-        self.upload_id = response["UploadId"]
-        self.parts = []
-        self.part_number = 1
 
         # Create gzip compressor writing to an in-memory buffer
         self._buffer = io.BytesIO()
         self._gzip = gzip.GzipFile(fileobj=self._buffer, mode="wb")
         self._closed = False
 
-    def write(self, data: bytes) -> int:
-        """Write data to the gzip stream, uploading chunks as needed."""
+    def write(self, data: bytes, marker: Any = None) -> int:
+        """Write data to the gzip stream, uploading chunks as needed.
+
+        ``marker`` is handed back to ``on_part_uploaded`` once the part
+        holding ``data`` is stored.
+        """
         if self._closed:
             raise ValueError("Cannot write to closed uploader")
 
         self._gzip.write(data)
+        if marker is not None:
+            self._marker = marker
 
         # Only upload if we have enough data to ensure the last part won't be tiny.
         # We keep min_part_size as reserve, so after uploading there's still enough
@@ -90,29 +153,22 @@ class S3MultipartGzipUploader:  # pylint: disable=too-many-instance-attributes
         return len(data)
 
     def _upload_chunk(self):
-        """Upload the current buffer as a multipart part."""
+        """Queue the current buffer for upload as a multipart part."""
         # Close gzip to finalize this stream (writes CRC and size trailer).
         # This creates a complete gzip stream that can be concatenated with others.
         self._gzip.close()
 
         # Get buffer contents (always non-empty: gzip close writes header + footer)
-        self._buffer.seek(0)
-        chunk_data = self._buffer.read()
+        chunk_data = self._buffer.getvalue()
 
-        # Upload part
-        response = self.s3_client.upload_part(
-            Bucket=self.bucket,
-            Key=self.key,
-            UploadId=self.upload_id,
-            PartNumber=self.part_number,
-            Body=chunk_data,
-        )
+        # Bound memory: wait for the oldest upload (and surface its error)
+        while len(self._uploads) >= MAX_PENDING_UPLOADS:
+            self._uploads.popleft().result()
 
-        self.parts.append(
-            {
-                "PartNumber": self.part_number,
-                "ETag": response["ETag"],
-            }
+        self._uploads.append(
+            self._executor.submit(
+                self._upload_part, self.part_number, chunk_data, self._marker
+            )
         )
         self.part_number += 1
 
@@ -120,6 +176,24 @@ class S3MultipartGzipUploader:  # pylint: disable=too-many-instance-attributes
         self._buffer = io.BytesIO()
         self._gzip = gzip.GzipFile(fileobj=self._buffer, mode="wb")
 
+    def _upload_part(self, part_number: int, data: bytes, marker: Any = None):
+        """Upload one part (runs in the upload thread, one part at a time)."""
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=data,
+        )
+        self.parts.append({"PartNumber": part_number, "ETag": response["ETag"]})
+        if self.on_part_uploaded is not None and marker is not None:
+            self.on_part_uploaded(list(self.parts), marker)
+
+    def _wait_for_uploads(self):
+        """Wait until every queued part is uploaded, raising the first error."""
+        while self._uploads:
+            self._uploads.popleft().result()
+
     def close(self):
         """Finalize the gzip stream and complete the multipart upload."""
         if self._closed:
@@ -129,27 +203,15 @@ class S3MultipartGzipUploader:  # pylint: disable=too-many-instance-attributes
         self._gzip.close()
 
         # Get any remaining data in buffer
-        self._buffer.seek(0)
-        remaining_data = self._buffer.read()
-
-        if remaining_data:
-            # Upload final part
-            response = self.s3_client.upload_part(
-                Bucket=self.bucket,
-                Key=self.key,
-                UploadId=self.upload_id,
-                PartNumber=self.part_number,
-                Body=remaining_data,
-            )
-            self.parts.append(
-                {
-                    "PartNumber": self.part_number,
-                    "ETag": response["ETag"],
-                }
-            )
+        remaining_data = self._buffer.getvalue()
 
         # Complete or abort the multipart upload
         try:
+            self._wait_for_uploads()
+            if remaining_data:
+                # Upload final part
+                self._upload_part(self.part_number, remaining_data)
+
             if self.parts:
                 self.s3_client.complete_multipart_upload(
                     Bucket=self.bucket,
@@ -188,11 +250,15 @@ class S3MultipartGzipUploader:  # pylint: disable=too-many-instance-attributes
             raise
         finally:
             self._closed = True
+            self._executor.shutdown()
 
     def abort(self):
         """Abort the multipart upload in case of error."""
         if not self._closed:
             self._closed = True
+            # Let in-flight parts finish: aborting first would leave them
+            # behind on S3.
+            self._executor.shutdown(cancel_futures=True)
             self.s3_client.abort_multipart_upload(
                 Bucket=self.bucket,
                 Key=self.key,
@@ -401,12 +467,96 @@ def _create_mbox_entry(
     return mbox_entry
 
 
+def _messages_queryset(mailbox_id: str):
+    """Messages of the mailbox in export order, with their read/starred state."""
+    thread_access = ThreadAccess.objects.filter(
+        thread_id=OuterRef("thread_id"), mailbox_id=mailbox_id
+    )
+    return (
+        Message.objects.filter(thread__accesses__mailbox_id=mailbox_id)
+        .order_by("created_at", "id")
+        .distinct()
+        .values(
+            "id",
+            "created_at",
+            "blob_id",
+            "thread_id",
+            "is_draft",
+            "is_sender",
+            _read_at=Subquery(thread_access.values("read_at")[:1]),
+            _starred_at=Subquery(thread_access.values("starred_at")[:1]),
+        )
+    )
+
+
+def _message_batches(mailbox_id: str, after=None) -> Iterator[list[dict]]:
+    """Yield the messages of the mailbox, ``EXPORT_BATCH_SIZE`` at a time.
+
+    Keyset pagination on ``(created_at, id)``: each batch is a bounded
+    query, and an export can restart right ``after`` a given message.
+    """
+    queryset = _messages_queryset(mailbox_id)
+    while True:
+        batch = queryset
+        if after is not None:
+            created_at, message_id = after
+            batch = batch.filter(
+                Q(created_at__gt=created_at)
+                | Q(created_at=created_at, id__gt=message_id)
+            )
+        rows = list(batch[:EXPORT_BATCH_SIZE])
+        if not rows:
+            return
+        yield rows
+        after = (rows[-1]["created_at"], rows[-1]["id"])
+
+
+def _thread_labels(mailbox_id: str, thread_ids) -> dict:
+    """Names of the mailbox's labels on each of ``thread_ids``."""
+    labels = defaultdict(list)
+    for thread_id, name in (
+        Label.threads.through.objects.filter(
+            thread_id__in=thread_ids, label__mailbox_id=mailbox_id
+        )
+        .order_by("label__slug")
+        .values_list("thread_id", "label__name")
+    ):
+        labels[thread_id].append(name)
+    return labels
+
+
+def _fetch_messages(
+    mailbox_id: str, after, executor: ThreadPoolExecutor, window: int
+) -> Iterator[tuple[dict, Any]]:
+    """Yield ``(message, content_future)`` pairs in export order.
+
+    Blob rows are loaded once per batch; their content is fetched and
+    decoded by ``executor``, up to ``window`` messages ahead of the
+    consumer. ``content_future`` is None for messages without a blob.
+    """
+    pending = deque()
+    for batch in _message_batches(mailbox_id, after):
+        labels = _thread_labels(mailbox_id, {row["thread_id"] for row in batch})
+        blobs = Blob.objects.in_bulk(
+            {row["blob_id"] for row in batch if row["blob_id"]}
+        )
+        for row in batch:
+            row["labels"] = labels.get(row["thread_id"], [])
+            blob = blobs.get(row["blob_id"])
+            pending.append((row, executor.submit(blob.get_content) if blob else None))
+            if len(pending) > window:
+                yield pending.popleft()
+    yield from pending
+
+
 @celery_app.task(bind=True)  # pylint: disable=too-many-locals
 def export_mailbox_task(self, mailbox_id: str, user_id: str) -> Dict[str, Any]:  # pylint: disable=unused-argument
     """
     Export all messages from a mailbox to an MBOX file and upload to S3.
 
     Uses streaming multipart upload to avoid storing large files locally.
+    If a previous run for this mailbox was interrupted, continues its
+    upload after the last checkpointed message.
 
     Args:
         mailbox_id: The UUID of the mailbox to export
@@ -439,6 +589,24 @@ def export_mailbox_task(self, mailbox_id: str, user_id: str) -> Dict[str, Any]:
         return {"status": "FAILURE", "result": result, "error": error_msg}
 
     mailbox_email = str(mailbox_obj)
+    checkpoint_key = CHECKPOINT_KEY.format(mailbox_id=mailbox_id)
+    lock_key = LOCK_KEY.format(mailbox_id=mailbox_id)
+
+    if not cache.add(lock_key, "locked", LOCK_TIMEOUT):
+        error_msg = f"Mailbox {mailbox_id} is already being exported"
+        logger.warning(error_msg)
+        result = {
+            "message_status": "Failed to export messages",
+            "total_messages": 0,
+            "exported_count": 0,
+            "skipped_count": 0,
+            "error": error_msg,
+        }
+        self.update_state(
+            state="FAILURE",
+            meta={"result": result, "error": error_msg},
+        )
+        return {"status": "FAILURE", "result": result, "error": error_msg}
 
     try:
         # Update state to show we're starting
@@ -455,55 +623,66 @@ def export_mailbox_task(self, mailbox_id: str, user_id: str) -> Dict[str, Any]:
             },
         )
 
-        # Query all messages in this mailbox with their threads and labels
-        # Annotate with read_at to compute per-message unread status
-        messages_qs = (
-            Message.objects.filter(thread__accesses__mailbox_id=mailbox_id)
-            .annotate(
-                _read_at=Subquery(
-                    ThreadAccess.objects.filter(
-                        thread_id=OuterRef("thread_id"),
-                        mailbox_id=mailbox_id,
-                    ).values("read_at")[:1]
-                ),
-                _starred_at=Subquery(
-                    ThreadAccess.objects.filter(
-                        thread_id=OuterRef("thread_id"),
-                        mailbox_id=mailbox_id,
-                    ).values("starred_at")[:1]
-                ),
-            )
-            .select_related("blob", "thread")
-            .prefetch_related("thread__labels")
-            .order_by("created_at")
-            .distinct()
-        )
-
-        # Get labels for this mailbox (to filter thread labels)
-        mailbox_label_ids = set(
-            Label.objects.filter(mailbox_id=mailbox_id).values_list("id", flat=True)
-        )
-
-        total_messages = messages_qs.count()
+        total_messages = _messages_queryset(mailbox_id).count()
 
         if total_messages == 0:
             logger.info("Mailbox %s has no messages to export", mailbox_id)
 
-        # Setup S3 multipart upload
+        # Setup S3 multipart upload, or pick up an interrupted one
         storage = storages["message-imports"]
         s3_client = storage.connection.meta.client
-        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-        s3_key = f"exports/{mailbox_id}/{timestamp}.mbox.gz"
+        checkpoint = cache.get(checkpoint_key) or {}
+        if checkpoint:
+            s3_key = checkpoint["s3_key"]
+            current_message = checkpoint["current_message"]
+            exported_count = checkpoint["exported_count"]
+            skipped_count = checkpoint["skipped_count"]
+            logger.info(
+                "Resuming export of mailbox %s after %d messages",
+                mailbox_id,
+                current_message,
+            )
+        else:
+            timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+            s3_key = f"exports/{mailbox_id}/{timestamp}.mbox.gz"
+
+        def save_checkpoint(parts, marker):
+            cache.set(
+                checkpoint_key,
+                {
+                    "s3_key": s3_key,
+                    "upload_id": uploader.upload_id,
+                    "parts": parts,
+                    **marker,
+                },
+                CHECKPOINT_TTL,
+            )
+            cache.touch(lock_key, LOCK_TIMEOUT)
+
+        concurrency = settings.EXPORT_FETCH_CONCURRENCY
 
         # Stream messages directly to S3 with gzip compression
-        with S3MultipartGzipUploader(
-            s3_client, storage.bucket_name, s3_key
-        ) as uploader:
-            for msg in messages_qs.iterator(chunk_size=1000):
+        with (
+            ThreadPoolExecutor(
+                max_workers=concurrency, thread_name_prefix="export-fetch"
+            ) as executor,
+            S3MultipartGzipUploader(
+                s3_client,
+                storage.bucket_name,
+                s3_key,
+                upload_id=checkpoint.get("upload_id"),
+                parts=checkpoint.get("parts"),
+                on_part_uploaded=save_checkpoint,
+            ) as uploader,
+        ):
+            for msg, content in _fetch_messages(
+                mailbox_id, checkpoint.get("after"), executor, window=2 * concurrency
+            ):
                 current_message += 1
 
                 # Update progress every 100 messages to reduce overhead
                 if current_message % 100 == 0 or current_message == total_messages:
+                    cache.touch(lock_key, LOCK_TIMEOUT)
                     self.update_state(
                         state="PROGRESS",
                         meta={
@@ -522,46 +701,48 @@ def export_mailbox_task(self, mailbox_id: str, user_id: str) -> Dict[str, Any]:
                     )
 
                 # Skip messages without blobs
-                if not msg.blob:
-                    logger.warning("Message %s has no blob, skipping", msg.id)
+                if content is None:
+                    logger.warning("Message %s has no blob, skipping", msg["id"])
                     skipped_count += 1
                     continue
 
                 try:
-                    # Get raw email content from blob
-                    raw_content = msg.blob.get_content()
-
-                    # Get labels for this message's thread (only from this mailbox)
-                    thread_labels = [
-                        label.name
-                        for label in msg.thread.labels.all()
-                        if label.id in mailbox_label_ids
-                    ]
+                    # Raw email content, fetched and decoded by the pool
+                    raw_content = content.result()
 
                     # Compute unread from ThreadAccess.read_at
-                    read_at = getattr(msg, "_read_at", None)
-                    is_unread = read_at is None or msg.created_at > read_at
-
-                    # Compute starred from ThreadAccess.starred_at
-                    starred_at = getattr(msg, "_starred_at", None)
-                    is_starred = starred_at is not None
+                    read_at = msg["_read_at"]
+                    is_unread = read_at is None or msg["created_at"] > read_at
 
-                    # Create MBOX entry with metadata and write to stream
+                    # Create MBOX entry with metadata
                     mbox_entry = _create_mbox_entry(
                         raw_content,
-                        msg.created_at or datetime.now(timezone.utc),
+                        msg["created_at"] or datetime.now(timezone.utc),
                         is_unread=is_unread,
-                        is_starred=is_starred,
-                        is_draft=msg.is_draft,
-                        is_sender=msg.is_sender,
-                        labels=thread_labels,
+                        is_starred=msg["_starred_at"] is not None,
+                        is_draft=msg["is_draft"],
+                        is_sender=msg["is_sender"],
+                        labels=msg["labels"],
                     )
-                    uploader.write(mbox_entry)
-                    exported_count += 1
-
                 except Exception as e:  # pylint: disable=broad-exception-caught
-                    logger.warning("Failed to export message %s: %s", msg.id, e)
+                    logger.warning("Failed to export message %s: %s", msg["id"], e)
                     skipped_count += 1
+                    continue
+
+                exported_count += 1
+                # Upload errors are not specific to this message: they
+                # propagate and fail the export.
+                uploader.write(
+                    mbox_entry,
+                    marker={
+                        "after": (msg["created_at"], msg["id"]),
+                        "current_message": current_message,
+                        "exported_count": exported_count,
+                        "skipped_count": skipped_count,
+                    },
+                )
+
+        cache.delete(checkpoint_key)
 
         # Generate presigned URL (7 days)
         # Use the project helper that respects AWS_S3_DOMAIN_REPLACE
@@ -626,6 +807,8 @@ def export_mailbox_task(self, mailbox_id: str, user_id: str) -> Dict[str, Any]:
             mailbox_id,
             e,
         )
+        # The multipart upload was aborted: nothing left to resume
+        cache.delete(checkpoint_key)
 
         result = {
             "message_status": "Failed to export messages",
@@ -642,6 +825,9 @@ def export_mailbox_task(self, mailbox_id: str, user_id: str) -> Dict[str, Any]:
 
         return {"status": "FAILURE", "result": result, "error": error_msg}
 
+    finally:
+        cache.delete(lock_key)
+
 
 def _create_notification_message(
     mailbox_email: str,
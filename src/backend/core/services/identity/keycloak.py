@@ -4,13 +4,15 @@ import json
 import logging
 import secrets
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from django.conf import settings
+from django.db.models import JSONField, OuterRef, Subquery
 
 from keycloak import KeycloakAdmin, KeycloakOpenID
 from keycloak.exceptions import KeycloakError
 
-from core.models import Mailbox, MailDomain
+from core.models import Mailbox, MailboxAccess, MailDomain
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,15 @@ _TOKEN_EXPIRY_SAFETY_MARGIN = 30  # seconds shaved off advertised expires_in
 _TOKEN_MIN_TTL = 10  # floor so a near-zero expires_in still caches briefly
 _admin_client_cache: dict = {"client": None, "expires_at": 0.0}
 
+# Full mailbox resync: remote users and group members are listed in pages
+# of RESYNC_PAGE_SIZE, changes are pushed by RESYNC_CONCURRENCY threads.
+RESYNC_PAGE_SIZE = 500
+RESYNC_CONCURRENCY = 8
+# Attempts per call on transient failures (no response, 429, 5xx), with
+# exponential backoff starting at RESYNC_RETRY_DELAY seconds.
+RESYNC_MAX_ATTEMPTS = 4
+RESYNC_RETRY_DELAY = 0.5
+
 
 def get_keycloak_admin_client():
     """Return a KeycloakAdmin client backed by the rest-api service account.
@@ -86,20 +97,9 @@ def sync_maildomain_to_keycloak_group(maildomain):
         group_attributes = {
             "maildomain_id": [str(maildomain.id)],
             "maildomain_name": [maildomain.name],
+            **_keycloak_attributes(maildomain.custom_attributes),
         }
 
-        # Add custom attributes
-        if maildomain.custom_attributes:
-            for key, value in maildomain.custom_attributes.items():
-                # Do not send keys starting with _ to Keycloak
-                if key.startswith("_"):
-                    continue
-                # Ensure values are lists (Keycloak requirement)
-                if isinstance(value, list):
-                    group_attributes[key] = value
-                else:
-                    group_attributes[key] = [str(value)]
-
         if existing_group:
             # Update existing group
             group_id = existing_group["id"]
@@ -143,6 +143,53 @@ def sync_maildomain_to_keycloak_group(maildomain):
         raise
 
 
+def _keycloak_attributes(custom_attributes):
+    """Custom attributes in Keycloak's format (every value is a list).
+
+    Keys starting with ``_`` are local-only and not sent.
+    """
+    attributes = {}
+    for key, value in (custom_attributes or {}).items():
+        if key.startswith("_"):
+            continue
+        attributes[key] = value if isinstance(value, list) else [str(value)]
+    return attributes
+
+
+def _mailbox_user_payload(mailbox, user_custom_attributes):
+    """Keycloak user representation of an identity mailbox.
+
+    ``user_custom_attributes`` are those of the mailbox's first user.
+    """
+    email = str(mailbox)  # e.g., "user@domain.com"
+
+    user_attributes = {
+        "mailbox_id": [str(mailbox.id)],
+        "maildomain_id": [str(mailbox.domain.id)],
+        "local_part": [mailbox.local_part],
+        "domain_name": [mailbox.domain.name],
+        **_keycloak_attributes(user_custom_attributes),
+    }
+
+    # Get contact name if available
+    first_name = ""
+    last_name = ""
+    if mailbox.contact and mailbox.contact.name:
+        name_parts = mailbox.contact.name.split(" ", 1)
+        first_name = name_parts[0]
+        if len(name_parts) > 1:
+            last_name = name_parts[1]
+
+    return {
+        "username": email,  # Use email as username
+        "email": email,
+        "firstName": first_name,
+        "lastName": last_name,
+        "enabled": True,
+        "attributes": user_attributes,
+    }
+
+
 def sync_mailbox_to_keycloak_user(mailbox):
     """
     Sync a Mailbox to Keycloak as a user in its maildomain group.
@@ -154,8 +201,6 @@ def sync_mailbox_to_keycloak_user(mailbox):
 
     try:
         keycloak_admin = get_keycloak_admin_client()
-        email = str(mailbox)  # e.g., "user@domain.com"
-        username = email  # Use email as username
 
         # Retrieve the mailbox initial user and get its custom attributes
         owner_mailbox_access = mailbox.accesses.order_by("created_at").first()
@@ -164,6 +209,9 @@ def sync_mailbox_to_keycloak_user(mailbox):
             local_user = owner_mailbox_access.user
             user_custom_attributes = local_user.custom_attributes
 
+        payload = _mailbox_user_payload(mailbox, user_custom_attributes)
+        username = payload["username"]
+
         # Check if user exists
         existing_users = keycloak_admin.get_users({"username": username})
         user_id = None
@@ -171,58 +219,15 @@ def sync_mailbox_to_keycloak_user(mailbox):
         if existing_users:
             user_id = existing_users[0]["id"]
 
-        # Prepare user attributes
-        user_attributes = {
-            "mailbox_id": [str(mailbox.id)],
-            "maildomain_id": [str(mailbox.domain.id)],
-            "local_part": [mailbox.local_part],
-            "domain_name": [mailbox.domain.name],
-        }
-
-        for key, value in user_custom_attributes.items():
-            # Do not send keys starting with _ to Keycloak
-            if key.startswith("_"):
-                continue
-            if isinstance(value, list):
-                user_attributes[key] = value
-            else:
-                user_attributes[key] = [str(value)]
-
-        # Get contact name if available
-        first_name = ""
-        last_name = ""
-        if mailbox.contact and mailbox.contact.name:
-            name_parts = mailbox.contact.name.split(" ", 1)
-            first_name = name_parts[0]
-            if len(name_parts) > 1:
-                last_name = name_parts[1]
-
         if user_id:
             # Update existing user
-            keycloak_admin.update_user(
-                user_id=user_id,
-                payload={
-                    "username": username,
-                    "email": email,
-                    "firstName": first_name,
-                    "lastName": last_name,
-                    "enabled": True,
-                    "attributes": user_attributes,
-                },
-            )
+            keycloak_admin.update_user(user_id=user_id, payload=payload)
             logger.info("Updated Keycloak user %s for Mailbox %s", username, mailbox)
         else:
             # Create new user
-            user_payload = {
-                "username": username,
-                "email": email,
-                "firstName": first_name,
-                "lastName": last_name,
-                "enabled": True,
-                "emailVerified": True,
-                "attributes": user_attributes,
-            }
-            user_id = keycloak_admin.create_user(payload=user_payload)
+            user_id = keycloak_admin.create_user(
+                payload={**payload, "emailVerified": True}
+            )
             logger.info("Created Keycloak user %s for Mailbox %s", username, mailbox)
 
         # Add user to maildomain group
@@ -333,30 +338,200 @@ def reset_keycloak_user_password(username, new_password=None):
         raise
 
 
-def resync_all_mailboxes_to_keycloak():
+def _list_all(fetch_page):
+    """Walk a paginated admin API listing, ``RESYNC_PAGE_SIZE`` at a time."""
+    first = 0
+    while True:
+        page = _with_retry(
+            lambda first=first: fetch_page({"first": first, "max": RESYNC_PAGE_SIZE})
+        )
+        yield from page
+        if len(page) < RESYNC_PAGE_SIZE:
+            return
+        first += RESYNC_PAGE_SIZE
+
+
+def _with_retry(call):
+    """Run ``call()``, retrying transient Keycloak failures with backoff.
+
+    Connection errors, 429 and 5xx responses are retried; other errors
+    (validation, conflict, permissions) are raised at once.
     """
-    Resync all mailboxes with identity_sync enabled to Keycloak.
+    attempt = 1
+    while True:
+        try:
+            return call()
+        except KeycloakError as e:
+            response_code = getattr(e, "response_code", None)
+            transient = (
+                response_code is None or response_code == 429 or response_code >= 500
+            )
+            if not transient or attempt >= RESYNC_MAX_ATTEMPTS:
+                raise
+            delay = RESYNC_RETRY_DELAY * 2 ** (attempt - 1)
+            logger.warning(
+                "Keycloak call failed (status=%s), retrying in %.1fs",
+                response_code,
+                delay,
+            )
+            time.sleep(delay)
+            attempt += 1
+
+
+def _user_is_up_to_date(remote_user, payload):
+    """Whether the Keycloak user already matches ``payload``.
+
+    Only the attributes we manage are compared: Keycloak may add its own.
     """
-    synced_domains = 0
-    synced_mailboxes = 0
+    if (remote_user.get("email") or "").lower() != payload["email"].lower():
+        return False
+    if not remote_user.get("enabled", False):
+        return False
+    for field in ("firstName", "lastName"):
+        if (remote_user.get(field) or "") != payload[field]:
+            return False
+    remote_attributes = remote_user.get("attributes") or {}
+    return all(
+        remote_attributes.get(key) == [str(item) for item in value]
+        for key, value in payload["attributes"].items()
+    )
 
-    # Get all domains with identity_sync enabled
-    domains_with_sync = MailDomain.objects.filter(identity_sync=True)
 
-    for domain in domains_with_sync:
-        sync_maildomain_to_keycloak_group(domain)
-        synced_domains += 1
+def _push_mailbox_user(payload, remote_user, group_id, in_group):
+    """Create or update one Keycloak user and add it to its domain group.
+
+    Returns ``"created"`` or ``"updated"``.
+    """
+    keycloak_admin = get_keycloak_admin_client()
+    if remote_user is None:
+        try:
+            user_id = _with_retry(
+                lambda: keycloak_admin.create_user(
+                    payload={**payload, "emailVerified": True}
+                )
+            )
+        except KeycloakError as e:
+            if getattr(e, "response_code", None) != 409:
+                raise
+            # A retried attempt had gone through before failing.
+            user_id = _with_retry(
+                lambda: keycloak_admin.get_user_id(payload["username"])
+            )
+            if user_id is None:
+                raise
+        outcome = "created"
+    else:
+        user_id = remote_user["id"]
+        if not _user_is_up_to_date(remote_user, payload):
+            _with_retry(
+                lambda: keycloak_admin.update_user(user_id=user_id, payload=payload)
+            )
+        outcome = "updated"
+
+    if group_id and not in_group:
+        _with_retry(lambda: keycloak_admin.group_user_add(user_id, group_id))
+    return outcome
+
+
+def resync_all_mailboxes_to_keycloak(concurrency=RESYNC_CONCURRENCY):
+    """
+    Resync all mailboxes with identity_sync enabled to Keycloak.
+
+    Domain groups are synced first. Then the realm users and the members of
+    each domain group are listed once, in pages, and compared locally with
+    the identity mailboxes; only missing or outdated users are pushed, by a
+    pool of ``concurrency`` threads. A user that can't be synced is counted
+    as failed and doesn't stop the others.
+
+    The admin client is fetched again for every page and every pushed
+    user: its token can't be refreshed and expires during long resyncs,
+    while ``get_keycloak_admin_client`` keeps a valid one cached.
+
+    Returns the number of synced domains and of created, updated, unchanged
+    and failed users.
+    """
+    # Get all domains with identity_sync enabled
+    group_ids = {}
+    for domain in MailDomain.objects.filter(identity_sync=True):
+        group_ids[domain.id] = sync_maildomain_to_keycloak_group(domain)
         logger.info("Synced domain: %s", domain.name)
 
-    # Get all mailboxes in domains with identity_sync enabled
-    mailboxes_to_sync = Mailbox.objects.filter(domain__identity_sync=True)
+    remote_users = {
+        user["username"].lower(): user
+        for user in _list_all(
+            lambda page: get_keycloak_admin_client().get_users(
+                {**page, "briefRepresentation": False}
+            )
+        )
+    }
+    group_members = {
+        group_id: {
+            member["id"]
+            for member in _list_all(
+                lambda page, group_id=group_id: (
+                    get_keycloak_admin_client().get_group_members(
+                        group_id, {**page, "briefRepresentation": True}
+                    )
+                )
+            )
+        }
+        for group_id in set(group_ids.values())
+        if group_id
+    }
+
+    # Custom attributes of each mailbox's first user, in the same query
+    owner_custom_attributes = Subquery(
+        MailboxAccess.objects.filter(mailbox=OuterRef("pk"))
+        .order_by("created_at")
+        .values("user__custom_attributes")[:1],
+        output_field=JSONField(),
+    )
+    mailboxes = (
+        Mailbox.objects.filter(domain__identity_sync=True, is_identity=True)
+        .select_related("domain", "contact")
+        .annotate(owner_custom_attributes=owner_custom_attributes)
+    )
+
+    counts = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0}
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="keycloak-resync"
+    ) as executor:
+        futures = {}
+        for mailbox in mailboxes.iterator(chunk_size=1000):
+            payload = _mailbox_user_payload(mailbox, mailbox.owner_custom_attributes)
+            remote_user = remote_users.get(payload["username"].lower())
+            group_id = group_ids.get(mailbox.domain_id)
+            in_group = remote_user is not None and remote_user["id"] in (
+                group_members.get(group_id, ())
+            )
+            if (
+                remote_user is not None
+                and (in_group or not group_id)
+                and _user_is_up_to_date(remote_user, payload)
+            ):
+                counts["unchanged"] += 1
+                continue
 
-    for mailbox in mailboxes_to_sync:
-        sync_mailbox_to_keycloak_user(mailbox)
-        synced_mailboxes += 1
-        logger.info("Synced mailbox: %s", mailbox)
+            future = executor.submit(
+                _push_mailbox_user,
+                payload,
+                remote_user,
+                group_id,
+                in_group,
+            )
+            futures[future] = payload["username"]
+
+        for future in as_completed(futures):
+            try:
+                outcome = future.result()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.error("Failed to sync Keycloak user %s: %s", futures[future], e)
+                counts["failed"] += 1
+            else:
+                logger.info("Synced mailbox: %s (%s)", futures[future], outcome)
+                counts[outcome] += 1
 
-    return {"synced_domains": synced_domains, "synced_mailboxes": synced_mailboxes}
+    return {"synced_domains": len(group_ids), **counts}
 
 
 def generate_password(length=12):
@@ -0,0 +1,204 @@
+"""Server-side cache of the image proxy.
+
+The same external image (a newsletter banner, a signature logo) is
+typically embedded in messages delivered to many mailboxes, and every
+open goes through the proxy. Successful fetches are kept as ``Blob``
+rows (compressed, encrypted and offloaded like any other content, with
+sha256 dedup), indexed by a ``ProxiedImage`` row keyed on the hash of
+the normalized URL, so later requests are served from local storage
+without contacting the remote host.
+
+Entries honor the upstream cache headers (``no-store``, ``no-cache``
+and ``private`` responses are never stored; ``max-age``/``Expires``
+shorten the lifetime) and are kept at most ``IMAGE_PROXY_STORAGE_TTL``
+seconds. ``prune_image_proxy_cache_task`` drops expired entries and, if
+the cached images add up to more than ``IMAGE_PROXY_STORAGE_MAX_SIZE``
+bytes, the ones closest to expiry; their blobs are handed to the blob
+GC. ``IMAGE_PROXY_STORAGE_MAX_SIZE=0`` disables the cache.
+"""
+
+import hashlib
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict
+from urllib.parse import urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.http import parse_http_date_safe
+
+from celery.utils.log import get_task_logger
+
+from core.models import Blob, ProxiedImage
+from core.services.blob_gc import schedule_for_gc
+
+from messages.celery_app import app as celery_app
+
+logger = logging.getLogger(__name__)
+task_logger = get_task_logger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Cache entries deleted per transaction by the prune task.
+PRUNE_BATCH_SIZE = 500
+
+
+def normalize_url(url: str) -> str:
+    """Return the canonical form of ``url`` used as cache key.
+
+    Scheme and host are lowercased, the default port and the fragment
+    (never sent to the server) are dropped. Path and query are kept
+    as-is: they are case-sensitive and may be signed.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return url
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    userinfo, at, _ = parts.netloc.rpartition("@")
+    netloc = f"{userinfo}{at}{host}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def url_hash(url: str) -> str:
+    """SHA-256 (hex) of the normalized ``url``."""
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+
+def cache_ttl(headers) -> int:
+    """Seconds an upstream response may be kept, 0 if it must not be.
+
+    Follows the shared-cache rules of RFC 9111 for the directives that
+    matter here, capped at ``IMAGE_PROXY_STORAGE_TTL``.
+    """
+    max_ttl = settings.IMAGE_PROXY_STORAGE_TTL
+
+    directives = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name.lower()] = value.strip().strip('"')
+    if directives.keys() & {"no-store", "no-cache", "private"}:
+        return 0
+    if headers.get("Vary", "").strip() == "*":
+        return 0
+
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return max(0, min(int(directives[name]), max_ttl))
+            except ValueError:
+                return 0
+
+    expires = headers.get("Expires")
+    if expires:
+        # An invalid Expires value means "already expired".
+        expires_at = parse_http_date_safe(expires)
+        if expires_at is None:
+            return 0
+        return max(0, min(int(expires_at - time.time()), max_ttl))
+
+    return max_ttl
+
+
+def get_cached_image(url: str) -> tuple[bytes, str] | None:
+    """Return ``(content, mime_type)`` of a live cache entry for ``url``."""
+    if not settings.IMAGE_PROXY_STORAGE_MAX_SIZE:
+        return None
+
+    try:
+        entry = ProxiedImage.objects.select_related("blob").get(
+            url_hash=url_hash(url), expires_at__gt=timezone.now()
+        )
+    except ProxiedImage.DoesNotExist:
+        return None
+
+    try:
+        return entry.blob.get_content(), entry.blob.content_type
+    except ValueError:
+        logger.exception("Unreadable image proxy cache entry %s", entry.id)
+        return None
+
+
+def store_image(url: str, content: bytes, mime_type: str, ttl: int) -> None:
+    """Keep ``content`` as the cached copy of ``url`` for ``ttl`` seconds.
+
+    Failures are logged and swallowed: the image has been fetched
+    already, the request must not fail because it couldn't be cached.
+    """
+    max_size = settings.IMAGE_PROXY_STORAGE_MAX_SIZE
+    if ttl <= 0 or not max_size or len(content) > max_size:
+        return
+
+    expires_at = timezone.now() + timedelta(seconds=ttl)
+    try:
+        with transaction.atomic():
+            blob = Blob.objects.create_blob(content=content, content_type=mime_type)
+            entry, created = ProxiedImage.objects.select_for_update().get_or_create(
+                url_hash=url_hash(url),
+                defaults={"blob": blob, "expires_at": expires_at},
+            )
+            if not created:
+                previous_blob_id = entry.blob_id
+                entry.blob = blob
+                entry.expires_at = expires_at
+                entry.save(update_fields=["blob", "expires_at", "updated_at"])
+                if previous_blob_id != blob.id:
+                    schedule_for_gc(previous_blob_id)
+    except (DatabaseError, ValidationError):
+        # Typically a concurrent request storing the same URL.
+        logger.warning("Could not cache proxied image %s", url, exc_info=True)
+
+
+def _drop_entries(rows: list[tuple[Any, Any]]) -> None:
+    """Delete ``(id, blob_id)`` cache entries and hand their blobs to the GC."""
+    for start in range(0, len(rows), PRUNE_BATCH_SIZE):
+        batch = rows[start : start + PRUNE_BATCH_SIZE]
+        with transaction.atomic():
+            ProxiedImage.objects.filter(id__in=[row[0] for row in batch]).delete()
+            for blob_id in {row[1] for row in batch}:
+                schedule_for_gc(blob_id)
+
+
+@celery_app.task
+def prune_image_proxy_cache_task() -> Dict[str, Any]:
+    """Periodic: drop expired cache entries and enforce the size cap."""
+    expired = list(
+        ProxiedImage.objects.filter(expires_at__lte=timezone.now()).values_list(
+            "id", "blob_id"
+        )
+    )
+    _drop_entries(expired)
+
+    # Blobs shared by several entries are counted once per entry: the
+    # cap errs on the side of evicting a bit early.
+    total_size = ProxiedImage.objects.aggregate(total=Sum("blob__size"))["total"] or 0
+    excess = total_size - settings.IMAGE_PROXY_STORAGE_MAX_SIZE
+    evicted = []
+    if excess > 0:
+        for entry_id, blob_id, size in (
+            ProxiedImage.objects.order_by("expires_at")
+            .values_list("id", "blob_id", "blob__size")
+            .iterator()
+        ):
+            evicted.append((entry_id, blob_id))
+            excess -= size
+            if excess <= 0:
+                break
+        _drop_entries(evicted)
+
+    task_logger.info(
+        "prune_image_proxy_cache_task: expired=%d evicted=%d",
+        len(expired),
+        len(evicted),
+    )
+    return {"success": True, "expired": len(expired), "evicted": len(evicted)}
@@ -4,6 +4,7 @@
 import io
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from itertools import batched
 from typing import Any, Dict, List, Optional
 
 from django.conf import settings
@@ -15,6 +16,7 @@ from jmap_email.parser import parse_date
 from sentry_sdk import capture_exception
 
 from core.mda.inbound import deliver_inbound_message
+from core.mda.inbound_create import THREAD_PREFETCH_BATCH_SIZE, ImportThreadResolver
 from core.models import Mailbox
 from core.utils import ThreadReindexDeferrer, ThreadStatsUpdateDeferrer
 
@@ -171,6 +173,42 @@ def _extract_and_store_index(
     indices.append(MboxMessageIndex(start_byte=msg_start, end_byte=msg_end, date=date))
 
 
+def _read_mbox_message(
+    reader, msg_index: MboxMessageIndex, recipient_id: str
+) -> tuple[Optional[bytes], Optional[dict]]:
+    """Read and parse one indexed message of an mbox file.
+
+    Returns the raw content and the parsed email, the latter ``None``
+    when the message is skipped (logged here).
+    """
+    try:
+        reader.seek(msg_index.start_byte)
+        message_content = reader.read(msg_index.end_byte - msg_index.start_byte + 1)
+
+        if len(message_content) > settings.MAX_INCOMING_EMAIL_SIZE:
+            logger.warning(
+                "Skipping oversized message: %d bytes",
+                len(message_content),
+            )
+            return message_content, None
+
+        parsed_email = parse_email(message_content)
+        if parsed_email is None:
+            logger.warning(
+                "mbox: skipping unparseable message (%d bytes)",
+                len(message_content),
+            )
+        return message_content, parsed_email
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        capture_exception(e)
+        logger.exception(
+            "Error processing message from mbox file for recipient %s: %s",
+            recipient_id,
+            e,
+        )
+        return None, None
+
+
 @celery_app.task(bind=True)
 def process_mbox_file_task(self, file_key: str, recipient_id: str) -> Dict[str, Any]:
     """
@@ -267,84 +305,88 @@ def process_mbox_file_task(self, file_key: str, recipient_id: str) -> Dict[str,
                 )
             )
 
-            # Pass 2: Process messages in chronological order. The deferrers
+            # Pass 2: Process messages in chronological order, parsed by
+            # batches whose threads are looked up at once. The deferrers
             # batch all OpenSearch indexing and thread-stats updates into a
-            # single bulk task at context exit.
+            # single bulk task at context exit; the resolver caches the
+            # thread lookups across messages.
+            thread_resolver = ImportThreadResolver(recipient)
+            recipient_email = str(recipient)
             with (
                 ThreadReindexDeferrer.defer(),
                 ThreadStatsUpdateDeferrer.defer(),
             ):
-                for i, msg_index in enumerate(message_indices, 1):
-                    current_message = i
-                    try:
-                        result = {
-                            "message_status": f"Processing message {i} of {total_messages}",
-                            "total_messages": total_messages,
-                            "success_count": success_count,
-                            "failure_count": failure_count,
-                            "type": "mbox",
-                            "current_message": i,
-                        }
-                        self.update_state(
-                            state="PROGRESS",
-                            meta={
-                                "result": result,
-                                "error": None,
-                            },
-                        )
-
-                        reader.seek(msg_index.start_byte)
-                        message_content = reader.read(
-                            msg_index.end_byte - msg_index.start_byte + 1
-                        )
-
-                        if len(message_content) > settings.MAX_INCOMING_EMAIL_SIZE:
-                            logger.warning(
-                                "Skipping oversized message: %d bytes",
-                                len(message_content),
+                for batch in batched(
+                    enumerate(message_indices, 1),
+                    THREAD_PREFETCH_BATCH_SIZE,
+                    strict=False,
+                ):
+                    parsed_batch = [
+                        (i, *_read_mbox_message(reader, msg_index, recipient_id))
+                        for i, msg_index in batch
+                    ]
+                    thread_resolver.prefetch(
+                        [
+                            parsed_email
+                            for _, _, parsed_email in parsed_batch
+                            if parsed_email is not None
+                        ]
+                    )
+
+                    for i, message_content, parsed_email in parsed_batch:
+                        current_message = i
+                        try:
+                            result = {
+                                "message_status": f"Processing message {i} of {total_messages}",
+                                "total_messages": total_messages,
+                                "success_count": success_count,
+                                "failure_count": failure_count,
+                                "type": "mbox",
+                                "current_message": i,
+                            }
+                            self.update_state(
+                                state="PROGRESS",
+                                meta={
+                                    "result": result,
+                                    "error": None,
+                                },
                             )
-                            failure_count += 1
-                            continue
 
-                        parsed_email = parse_email(message_content)
-                        if parsed_email is None:
-                            logger.warning(
-                                "mbox: skipping unparseable message (%d bytes)",
-                                len(message_content),
+                            # Skipped when read (already logged)
+                            if parsed_email is None:
+                                failure_count += 1
+                                continue
+
+                            # Treat the message as a sent one when From
+                            # matches the destination mailbox — same
+                            # heuristic as IMAP and the EML import. Without
+                            # this flag, importing one's own sent mails
+                            # would land them in the inbox view.
+                            sender_email = first_address_email(parsed_email.get("from"))
+                            # TODO: better heuristic to determine if the message is from the sender
+                            is_import_sender = (
+                                sender_email.lower() == recipient_email.lower()
+                            )
+
+                            if deliver_inbound_message(
+                                recipient_email,
+                                parsed_email,
+                                message_content,
+                                is_import=True,
+                                is_import_sender=is_import_sender,
+                                thread_resolver=thread_resolver,
+                            ):
+                                success_count += 1
+                            else:
+                                failure_count += 1
+                        except Exception as e:
+                            capture_exception(e)
+                            logger.exception(
+                                "Error processing message from mbox file for recipient %s: %s",
+                                recipient_id,
+                                e,
                             )
                             failure_count += 1
-                            continue
-
-                        # Treat the message as a sent one when From matches
-                        # the destination mailbox — same heuristic as IMAP
-                        # and the EML import. Without this flag, importing
-                        # one's own sent mails would land them in the inbox
-                        # view.
-                        recipient_email = str(recipient)
-                        sender_email = first_address_email(parsed_email.get("from"))
-                        # TODO: better heuristic to determine if the message is from the sender
-                        is_import_sender = (
-                            sender_email.lower() == recipient_email.lower()
-                        )
-
-                        if deliver_inbound_message(
-                            recipient_email,
-                            parsed_email,
-                            message_content,
-                            is_import=True,
-                            is_import_sender=is_import_sender,
-                        ):
-                            success_count += 1
-                        else:
-                            failure_count += 1
-                    except Exception as e:
-                        capture_exception(e)
-                        logger.exception(
-                            "Error processing message from mbox file for recipient %s: %s",
-                            recipient_id,
-                            e,
-                        )
-                        failure_count += 1
 
         result = {
             "message_status": "Completed processing messages",
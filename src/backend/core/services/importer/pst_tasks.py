@@ -1,6 +1,7 @@
 """PST file import task."""
 
 # pylint: disable=broad-exception-caught
+from itertools import batched
 from typing import Any, Dict
 
 from django.conf import settings
@@ -11,6 +12,7 @@ from celery.utils.log import get_task_logger
 from jmap_email import parse_email
 
 from core.mda.inbound import deliver_inbound_message
+from core.mda.inbound_create import THREAD_PREFETCH_BATCH_SIZE, ImportThreadResolver
 from core.models import Mailbox
 from core.utils import ThreadReindexDeferrer, ThreadStatsUpdateDeferrer
 
@@ -39,6 +41,34 @@ from .s3_seekable import BUFFER_NONE, S3SeekableReader
 logger = get_task_logger(__name__)
 
 
+def _parse_pst_message(eml_bytes: bytes | None) -> dict | None:
+    """Parse a message reconstructed from a PST file.
+
+    Returns ``None`` when the message is skipped (logged here, or by
+    ``walk_pst_messages`` when its reconstruction failed).
+    """
+    if eml_bytes is None:
+        return None
+    # Check message size limit
+    if len(eml_bytes) > settings.MAX_INCOMING_EMAIL_SIZE:
+        logger.warning(
+            "Skipping oversized message: %d bytes",
+            len(eml_bytes),
+        )
+        return None
+    try:
+        parsed_email = parse_email(eml_bytes)
+    except Exception as e:
+        logger.exception("PST: error parsing message: %s", e)
+        return None
+    if parsed_email is None:
+        logger.warning(
+            "PST: skipping unparseable message (%d bytes)",
+            len(eml_bytes),
+        )
+    return parsed_email
+
+
 @celery_app.task(bind=True)
 def process_pst_file_task(self, file_key: str, recipient_id: str) -> Dict[str, Any]:
     """
@@ -120,133 +150,142 @@ def process_pst_file_task(self, file_key: str, recipient_id: str) -> Dict[str, A
                 # Count messages
                 total_messages = count_pst_messages(pst, special_folder_map)
 
-                # Iterate messages chronologically. The deferrers batch all
+                # Iterate messages chronologically, parsed by batches whose
+                # threads are looked up at once. The deferrers batch all
                 # OpenSearch indexing and thread-stats updates into a single
                 # bulk task at context exit, instead of enqueuing hundreds of
                 # thousands of per-row tasks that saturate Celery during
-                # large imports.
+                # large imports. The resolver caches the thread lookups.
+                thread_resolver = ImportThreadResolver(recipient)
                 with (
                     ThreadReindexDeferrer.defer(),
                     ThreadStatsUpdateDeferrer.defer(),
                 ):
-                    for (
-                        folder_type,
-                        folder_path,
-                        message_flags,
-                        flag_status,
-                        eml_bytes,
-                    ) in walk_pst_messages(
-                        pst,
-                        special_folder_map,
-                        store_email=store_email,
-                        recipient_email=str(recipient),
+                    for batch in batched(
+                        walk_pst_messages(
+                            pst,
+                            special_folder_map,
+                            store_email=store_email,
+                            recipient_email=str(recipient),
+                        ),
+                        THREAD_PREFETCH_BATCH_SIZE,
+                        strict=False,
                     ):
-                        current_message += 1
-                        result = {
-                            "message_status": (
-                                f"Processing message {current_message}"
-                                f" of {total_messages}"
-                            ),
-                            "total_messages": total_messages,
-                            "success_count": success_count,
-                            "failure_count": failure_count,
-                            "type": "pst",
-                            "current_message": current_message,
-                        }
-                        self.update_state(
-                            state="PROGRESS",
-                            meta={
-                                "result": result,
-                                "error": None,
-                            },
+                        parsed_batch = [
+                            (*pst_message, _parse_pst_message(pst_message[-1]))
+                            for pst_message in batch
+                        ]
+                        thread_resolver.prefetch(
+                            [
+                                pst_message[-1]
+                                for pst_message in parsed_batch
+                                if pst_message[-1] is not None
+                            ]
                         )
-                        try:
-                            # Reconstruction failed upstream — already logged
-                            # by walk_pst_messages; count it as a failure here
-                            # so the task reports it instead of swallowing it.
-                            if eml_bytes is None:
-                                failure_count += 1
-                                continue
-                            # Check message size limit
-                            if len(eml_bytes) > settings.MAX_INCOMING_EMAIL_SIZE:
-                                logger.warning(
-                                    "Skipping oversized message: %d bytes",
-                                    len(eml_bytes),
-                                )
-                                failure_count += 1
-                                continue
 
-                            parsed_email = parse_email(eml_bytes)
-                            if parsed_email is None:
-                                logger.warning(
-                                    "PST: skipping unparseable message (%d bytes)",
-                                    len(eml_bytes),
-                                )
-                                failure_count += 1
-                                continue
-
-                            # Compute IMAP-compatible flags from PST message flags
-                            imap_flags = []
-                            if message_flags & MSGFLAG_READ:
-                                imap_flags.append("\\Seen")
-                            if (
-                                message_flags & MSGFLAG_UNSENT
-                                or folder_type == FOLDER_TYPE_DRAFTS
-                            ):
-                                imap_flags.append("\\Draft")
-                            if (
-                                flag_status is not None
-                                and flag_status >= FLAG_STATUS_FOLLOWUP
-                            ):
-                                imap_flags.append("\\Flagged")
-
-                            # Compute IMAP-compatible labels from folder type
-                            imap_labels = []
-                            if folder_type == FOLDER_TYPE_SENT:
-                                imap_labels.append("Sent")
-                            elif folder_type == FOLDER_TYPE_DELETED:
-                                imap_labels.append("Trash")
-                            elif folder_type == FOLDER_TYPE_OUTBOX:
-                                imap_labels.append("OUTBOX")
-                            elif folder_type in (
-                                FOLDER_TYPE_INBOX,
-                                FOLDER_TYPE_DRAFTS,
-                            ):
-                                pass  # No label for inbox/drafts
-                            elif folder_path:
-                                imap_labels.append(sanitize_folder_name(folder_path))
-
-                            # Subfolders of special folders also get their
-                            # subfolder name as an additional label.
-                            if folder_path and folder_type != FOLDER_TYPE_NORMAL:
-                                imap_labels.append(sanitize_folder_name(folder_path))
-
-                            is_sender = folder_type in (
-                                FOLDER_TYPE_SENT,
-                                FOLDER_TYPE_OUTBOX,
+                        for (
+                            folder_type,
+                            folder_path,
+                            message_flags,
+                            flag_status,
+                            eml_bytes,
+                            parsed_email,
+                        ) in parsed_batch:
+                            current_message += 1
+                            result = {
+                                "message_status": (
+                                    f"Processing message {current_message}"
+                                    f" of {total_messages}"
+                                ),
+                                "total_messages": total_messages,
+                                "success_count": success_count,
+                                "failure_count": failure_count,
+                                "type": "pst",
+                                "current_message": current_message,
+                            }
+                            self.update_state(
+                                state="PROGRESS",
+                                meta={
+                                    "result": result,
+                                    "error": None,
+                                },
                             )
+                            try:
+                                # Reconstruction failed upstream, or the
+                                # message was skipped when parsed — already
+                                # logged; count it as a failure here so the
+                                # task reports it instead of swallowing it.
+                                if parsed_email is None:
+                                    failure_count += 1
+                                    continue
+
+                                # Compute IMAP-compatible flags from PST message flags
+                                imap_flags = []
+                                if message_flags & MSGFLAG_READ:
+                                    imap_flags.append("\\Seen")
+                                if (
+                                    message_flags & MSGFLAG_UNSENT
+                                    or folder_type == FOLDER_TYPE_DRAFTS
+                                ):
+                                    imap_flags.append("\\Draft")
+                                if (
+                                    flag_status is not None
+                                    and flag_status >= FLAG_STATUS_FOLLOWUP
+                                ):
+                                    imap_flags.append("\\Flagged")
+
+                                # Compute IMAP-compatible labels from folder type
+                                imap_labels = []
+                                if folder_type == FOLDER_TYPE_SENT:
+                                    imap_labels.append("Sent")
+                                elif folder_type == FOLDER_TYPE_DELETED:
+                                    imap_labels.append("Trash")
+                                elif folder_type == FOLDER_TYPE_OUTBOX:
+                                    imap_labels.append("OUTBOX")
+                                elif folder_type in (
+                                    FOLDER_TYPE_INBOX,
+                                    FOLDER_TYPE_DRAFTS,
+                                ):
+                                    pass  # No label for inbox/drafts
+                                elif folder_path:
+                                    imap_labels.append(
+                                        sanitize_folder_name(folder_path)
+                                    )
 
-                            if deliver_inbound_message(
-                                str(recipient),
-                                parsed_email,
-                                eml_bytes,
-                                is_import=True,
-                                is_import_sender=is_sender,
-                                imap_labels=imap_labels,
-                                imap_flags=imap_flags,
-                            ):
-                                success_count += 1
-                            else:
+                                # Subfolders of special folders also get their
+                                # subfolder name as an additional label.
+                                if folder_path and folder_type != FOLDER_TYPE_NORMAL:
+                                    imap_labels.append(
+                                        sanitize_folder_name(folder_path)
+                                    )
+
+                                is_sender = folder_type in (
+                                    FOLDER_TYPE_SENT,
+                                    FOLDER_TYPE_OUTBOX,
+                                )
+
+                                if deliver_inbound_message(
+                                    str(recipient),
+                                    parsed_email,
+                                    eml_bytes,
+                                    is_import=True,
+                                    is_import_sender=is_sender,
+                                    imap_labels=imap_labels,
+                                    imap_flags=imap_flags,
+                                    thread_resolver=thread_resolver,
+                                ):
+                                    success_count += 1
+                                else:
+                                    failure_count += 1
+                            except Exception as e:
+                                # logger.exception routes to Sentry via the
+                                # LoggingIntegration; no separate capture needed.
+                                logger.exception(
+                                    "Error processing message from PST file for recipient %s: %s",
+                                    recipient_id,
+                                    e,
+                                )
                                 failure_count += 1
-                        except Exception as e:
-                            # logger.exception routes to Sentry via the
-                            # LoggingIntegration; no separate capture needed.
-                            logger.exception(
-                                "Error processing message from PST file for recipient %s: %s",
-                                recipient_id,
-                                e,
-                            )
-                            failure_count += 1
             finally:
                 pst.close()
 
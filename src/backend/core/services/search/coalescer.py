@@ -42,7 +42,7 @@ from django.conf import settings
 
 from redis.exceptions import RedisError
 
-from core.utils import get_redis_client
+from core.utils import get_redis_client, is_redis_backend
 
 logger = logging.getLogger(__name__)
 
@@ -55,17 +55,11 @@ PENDING_DELETE_MESSAGES_KEY = "search:pending_delete_messages"
 MESSAGE_PAIR_SEPARATOR = ":"
 
 
-def _is_redis_backend() -> bool:
-    """Return True when the default cache is backed by django_redis."""
-    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
-    return "django_redis" in backend
-
-
 def _enqueue(key: str, value) -> None:
     """Add ``value`` to the pending set at ``key``."""
     if value is None:
         return
-    if not _is_redis_backend():
+    if not is_redis_backend():
         logger.warning(
             "OpenSearch reindex coalescer requires Redis: %s for %s "
             "dropped. Configure django_redis or disable "
@@ -262,7 +256,7 @@ def process_pending_reindex(
     if max_batches is None:
         max_batches = settings.SEARCH_FLUSH_MAX_BATCHES
 
-    if not _is_redis_backend():
+    if not is_redis_backend():
         logger.warning(
             "OpenSearch reindex coalescer requires Redis; nothing to drain. "
             "Configure django_redis or disable OPENSEARCH_INDEX_THREADS."
@@ -27,3 +27,7 @@ RETRYABLE_TRANSPORT_STATUS = frozenset({429, 502, 503, 504})
 # Socket-level drops surface as ``OpenSearchConnectionError``; retryable HTTP
 # statuses surface as ``TransientTransportError``.
 RETRYABLE_EXCEPTIONS = (OpenSearchConnectionError, TransientTransportError)
+
+
+class IndexBuildInProgressError(Exception):
+    """A search index rebuild is already running; finish or cancel it first."""
@@ -13,6 +13,7 @@ from opensearchpy.exceptions import NotFoundError, TransportError
 from opensearchpy.helpers import bulk
 
 from core import enums, models
+from core.instrumentation import InstrumentedTransport
 from core.services.search.exceptions import (
     RETRYABLE_EXCEPTIONS,
     RETRYABLE_TRANSPORT_STATUS,
@@ -100,18 +101,33 @@ def _run_bulk(es, actions, *, swallow_4xx_as_failure, ignored_statuses=()):
     return 0
 
 
-def _flush_bulk_actions(es, actions):
+def _flush_bulk_actions(es, actions, ignored_statuses=()):
     """Send reindex bulk actions to OpenSearch and return the failure count.
 
     Per-document errors (4xx) are logged and counted so the outer reindex
     loop can keep draining the coalescer buffer rather than aborting on the
     first malformed doc.
     """
-    return _run_bulk(es, actions, swallow_4xx_as_failure=True)
+    return _run_bulk(
+        es, actions, swallow_4xx_as_failure=True, ignored_statuses=ignored_statuses
+    )
+
+
+def write_indices():
+    """Names of the indices that document writes and deletes go to.
+
+    The live index (``MESSAGE_INDEX``, an index or an alias), plus the
+    index of any rebuild in progress (see ``core.services.search.rebuild``)
+    so that the changes made while it loads are in it at the cutover.
+    """
+    building = models.SearchIndexBuild.objects.filter(
+        completed_at__isnull=True
+    ).values_list("index_name", flat=True)
+    return [MESSAGE_INDEX, *building]
 
 
 def bulk_delete_documents(actions):
-    """Send bulk delete actions to OpenSearch.
+    """Send bulk delete actions to OpenSearch, on every ``write_indices``.
 
     ``ignored_statuses=(404,)`` drops per-doc "already gone" errors that
     routinely happen for cascaded message deletes whose parent thread doc
@@ -120,7 +136,11 @@ def bulk_delete_documents(actions):
     """
     _run_bulk(
         get_opensearch_client(),
-        actions,
+        [
+            {**action, "_index": index}
+            for index in write_indices()
+            for action in actions
+        ],
         swallow_4xx_as_failure=False,
         ignored_statuses=(404,),
     )
@@ -142,6 +162,7 @@ def get_opensearch_client():
             "timeout": settings.OPENSEARCH_TIMEOUT,
             "retry_on_timeout": True,
             "max_retries": settings.OPENSEARCH_MAX_RETRIES,
+            "transport_class": InstrumentedTransport,
         }
         if settings.OPENSEARCH_CA_CERTS:
             kwargs["ca_certs"] = settings.OPENSEARCH_CA_CERTS
@@ -185,10 +206,14 @@ def ensure_index_exists():
 
 
 def delete_index():
-    """Delete the messages index."""
+    """Delete the messages index, or the indices behind the alias of that name."""
     es = get_opensearch_client()
     try:
-        _run_request(es.indices.delete, index=MESSAGE_INDEX)
+        aliased = sorted(_run_request(es.indices.get_alias, name=MESSAGE_INDEX))
+    except NotFoundError:
+        aliased = []
+    try:
+        _run_request(es.indices.delete, index=",".join(aliased or [MESSAGE_INDEX]))
         logger.info("Deleted OpenSearch index: %s", MESSAGE_INDEX)
         return True
     except NotFoundError:
@@ -196,7 +221,13 @@ def delete_index():
         return False
 
 
-def _build_message_doc(message, mailbox_ids, recipients=None):
+def _build_message_doc(
+    message,
+    mailbox_ids,
+    recipients=None,
+    unread_mailbox_ids=(),
+    starred_mailbox_ids=(),
+):
     """Build an OpenSearch document dict for a message.
 
     Args:
@@ -204,6 +235,10 @@ def _build_message_doc(message, mailbox_ids, recipients=None):
         mailbox_ids: list of string mailbox IDs.
         recipients: pre-fetched recipients with contact loaded.
             If None, they will be fetched from the database.
+        unread_mailbox_ids, starred_mailbox_ids: the mailbox-scoped flags
+            of the thread, copied from its parent document so that
+            ``SEARCH_JOIN_FREE_MAILBOX_FILTERS`` can filter on them
+            without a ``has_parent`` join.
 
     Returns:
         dict or None if the message blob cannot be parsed.
@@ -234,6 +269,8 @@ def _build_message_doc(message, mailbox_ids, recipients=None):
         "message_id": str(message.id),
         "thread_id": str(message.thread_id),
         "mailbox_ids": mailbox_ids,
+        "unread_mailboxes": list(unread_mailbox_ids),
+        "starred_mailboxes": list(starred_mailbox_ids),
         "mime_id": message.mime_id,
         "created_at": message.created_at.isoformat() if message.created_at else None,
         "sent_at": message.sent_at.isoformat() if message.sent_at else None,
@@ -318,28 +355,51 @@ def _compute_unread_starred_from_accesses(thread):
     return unread_ids, starred_ids
 
 
-def index_message(message: models.Message, mailbox_ids=None) -> bool:
-    """Index a single message."""
+def _index_document(es, doc_id, body, indices=None, **kwargs):
+    """Write one document to each of ``indices`` (default: ``write_indices``)."""
+    for index in indices or write_indices():
+        # pylint: disable=no-value-for-parameter
+        _run_request(es.index, index=index, id=doc_id, body=body, **kwargs)
+
+
+def index_message(
+    message: models.Message,
+    mailbox_ids=None,
+    unread_mailbox_ids=None,
+    starred_mailbox_ids=None,
+    indices=None,
+) -> bool:
+    """Index a single message.
+
+    The mailbox IDs and flags default to those of the message's thread,
+    and ``indices`` to ``write_indices()``.
+    """
     es = get_opensearch_client()
 
-    if mailbox_ids is None:
-        mailbox_ids = [
-            str(mid)
-            for mid in message.thread.accesses.values_list("mailbox__id", flat=True)
-        ]
+    if mailbox_ids is None or unread_mailbox_ids is None or starred_mailbox_ids is None:
+        thread = message.thread
+        prefetch_related_objects([thread], "accesses")
+        mailbox_ids = [str(access.mailbox_id) for access in thread.accesses.all()]
+        unread_mailbox_ids, starred_mailbox_ids = _compute_unread_starred_from_accesses(
+            thread
+        )
 
-    doc = _build_message_doc(message, mailbox_ids)
+    doc = _build_message_doc(
+        message,
+        mailbox_ids,
+        unread_mailbox_ids=unread_mailbox_ids,
+        starred_mailbox_ids=starred_mailbox_ids,
+    )
     if doc is None:
         return False
 
     try:
-        # pylint: disable=no-value-for-parameter
-        _run_request(
-            es.index,
-            index=MESSAGE_INDEX,
-            id=str(message.id),
+        _index_document(
+            es,
+            str(message.id),
+            doc,
+            indices=indices,
             routing=str(message.thread_id),  # Ensure parent-child routing
-            body=doc,
         )
         logger.debug("Indexed message %s", message.id)
         return True
@@ -360,16 +420,41 @@ def update_thread_mailbox_flags(thread: models.Thread) -> bool:
     Uses full document replacement (es.index) instead of partial update
     (es.update) because partial updates don't work reliably with join field
     documents in OpenSearch.
+
+    The copies of the flags on the message documents (read by
+    ``SEARCH_JOIN_FREE_MAILBOX_FILTERS``) get a partial update each, by ID
+    from the database rather than through a search, so a message indexed
+    less than a refresh interval ago is updated too. A read or star change
+    never re-fetches nor re-parses the message blobs.
     """
     es = get_opensearch_client()
     prefetch_related_objects([thread], "accesses")
     mailbox_ids = [str(access.mailbox_id) for access in thread.accesses.all()]
     unread_ids, starred_ids = _compute_unread_starred_from_accesses(thread)
     thread_doc = _build_thread_doc(thread, mailbox_ids, unread_ids, starred_ids)
+    flags = {"unread_mailboxes": unread_ids, "starred_mailboxes": starred_ids}
     try:
-        # pylint: disable=no-value-for-parameter
-        _run_request(es.index, index=MESSAGE_INDEX, id=str(thread.id), body=thread_doc)
-        return True
+        indices = write_indices()
+        _index_document(es, str(thread.id), thread_doc, indices=indices)
+        actions = [
+            {
+                "_op_type": "update",
+                "_index": index,
+                "_id": str(message_id),
+                "_routing": str(thread.id),
+                "retry_on_conflict": 3,
+                "doc": flags,
+            }
+            for message_id in thread.messages.values_list("id", flat=True)
+            for index in indices
+        ]
+        if not actions:
+            return True
+        # A message not indexed yet (404) gets the flags when it is.
+        failures = _run_bulk(
+            es, actions, swallow_4xx_as_failure=False, ignored_statuses=(404,)
+        )
+        return failures == 0
     except RETRYABLE_EXCEPTIONS:
         raise
     # pylint: disable=broad-exception-caught
@@ -392,13 +477,19 @@ def index_thread(thread: models.Thread) -> bool:
 
     try:
         # Index thread as parent document
-        # pylint: disable=no-value-for-parameter
-        _run_request(es.index, index=MESSAGE_INDEX, id=str(thread.id), body=thread_doc)
+        indices = write_indices()
+        _index_document(es, str(thread.id), thread_doc, indices=indices)
 
         # Index all messages in the thread
         success = True
         for message in thread.messages.all():
-            if not index_message(message, mailbox_ids=mailbox_ids):
+            if not index_message(
+                message,
+                mailbox_ids=mailbox_ids,
+                unread_mailbox_ids=unread_ids,
+                starred_mailbox_ids=starred_ids,
+                indices=indices,
+            ):
                 success = False
 
         return success
@@ -410,7 +501,7 @@ def index_thread(thread: models.Thread) -> bool:
         return False
 
 
-def reindex_bulk_threads(threads_qs, progress_callback=None):
+def reindex_bulk_threads(threads_qs, progress_callback=None, index=None):
     """Reindex a queryset of threads using the bulk API for performance.
 
     Pure upsert: every document still in the DB is rewritten in place via
@@ -432,12 +523,20 @@ def reindex_bulk_threads(threads_qs, progress_callback=None):
         threads_qs: A ``Thread`` queryset (unordered is fine).
         progress_callback: optional callable(current, total, success_count,
             failure_count) called after each chunk.
+        index: load this index only, instead of every ``write_indices``.
+            Documents are then created, never replaced: one already there
+            was written by a live update since the threads were read, and
+            is newer (see ``core.services.search.rebuild``).
 
     Returns:
         dict with ``total``, ``indexed_threads``, ``indexed_messages`` and
         ``failure_count``.
     """
     es = get_opensearch_client()
+    if index is None:
+        targets, op_fields, ignored_statuses = write_indices(), {}, ()
+    else:
+        targets, op_fields, ignored_statuses = [index], {"_op_type": "create"}, (409,)
 
     indexed_threads = 0
     indexed_messages = 0
@@ -471,33 +570,43 @@ def reindex_bulk_threads(threads_qs, progress_callback=None):
         # Thread action
         thread_id_str = str(thread.id)
         thread_doc = _build_thread_doc(thread, mailbox_ids, unread_ids, starred_ids)
-        actions.append(
+        actions.extend(
             {
-                "_index": MESSAGE_INDEX,
+                **op_fields,
+                "_index": target,
                 "_id": thread_id_str,
                 "_source": thread_doc,
             }
+            for target in targets
         )
 
         # Message actions
         for message in thread.messages.all():
             recipients = list(message.recipients.all())
-            doc = _build_message_doc(message, mailbox_ids, recipients=recipients)
+            doc = _build_message_doc(
+                message,
+                mailbox_ids,
+                recipients=recipients,
+                unread_mailbox_ids=unread_ids,
+                starred_mailbox_ids=starred_ids,
+            )
             if doc is not None:
-                actions.append(
+                actions.extend(
                     {
-                        "_index": MESSAGE_INDEX,
+                        **op_fields,
+                        "_index": target,
                         "_id": str(message.id),
                         "_routing": thread_id_str,
                         "_source": doc,
                     }
+                    for target in targets
                 )
                 indexed_messages += 1
 
         indexed_threads += 1
 
         if len(actions) >= chunk_size:
-            failure_count += _flush_bulk_actions(es, actions)
+            failure_count += _flush_bulk_actions(es, actions, ignored_statuses)
             actions = []
 
         if progress_callback and indexed_threads % chunk_size == 0:
@@ -505,7 +614,7 @@ def reindex_bulk_threads(threads_qs, progress_callback=None):
 
     # Flush remaining actions
     if actions:
-        failure_count += _flush_bulk_actions(es, actions)
+        failure_count += _flush_bulk_actions(es, actions, ignored_statuses)
 
     return {
         "status": "success",
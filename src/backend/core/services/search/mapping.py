@@ -10,6 +10,11 @@ import os
 _XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER", "")
 MESSAGE_INDEX = f"messages_{_XDIST_WORKER}" if _XDIST_WORKER else "messages"
 
+# Subfield for substring matches on contact names and addresses.
+SUBSTRING_FIELD = {"type": "text", "analyzer": "substring_analyzer"}
+# Shortest query the trigram subfields can answer with a phrase match.
+SUBSTRING_MIN_LENGTH = 3
+
 # Schema definitions
 MESSAGE_MAPPING = {
     "settings": {
@@ -28,7 +33,19 @@ MESSAGE_MAPPING = {
                     "type": "custom",
                     "tokenizer": "standard",
                     "filter": ["lowercase", "asciifolding", "email_ngram"],
-                }
+                },
+                # Trigrams of the whole value, for the substring matches of
+                # the from:/to:/cc:/bcc: modifiers. The tokenizer gives each
+                # gram the next position, so a ``match_phrase`` with the same
+                # analyzer matches exactly the values containing the query.
+                "substring_analyzer": {
+                    "type": "custom",
+                    "tokenizer": "substring_trigram",
+                    "filter": ["lowercase", "asciifolding"],
+                },
+            },
+            "tokenizer": {
+                "substring_trigram": {"type": "ngram", "min_gram": 3, "max_gram": 3}
             },
             "filter": {
                 "email_ngram": {"type": "edge_ngram", "min_gram": 2, "max_gram": 20}
@@ -64,6 +81,7 @@ MESSAGE_MAPPING = {
                 "type": "text",
                 "analyzer": "email_analyzer",
                 "search_analyzer": "standard",
+                "fields": {"ngram": SUBSTRING_FIELD},
             },
             "sender_email": {
                 "type": "keyword",
@@ -72,13 +90,15 @@ MESSAGE_MAPPING = {
                         "type": "text",
                         "analyzer": "email_analyzer",
                         "search_analyzer": "standard",
-                    }
+                    },
+                    "ngram": SUBSTRING_FIELD,
                 },
             },
             "to_name": {
                 "type": "text",
                 "analyzer": "email_analyzer",
                 "search_analyzer": "standard",
+                "fields": {"ngram": SUBSTRING_FIELD},
             },
             "to_email": {
                 "type": "keyword",
@@ -94,6 +114,7 @@ MESSAGE_MAPPING = {
                 "type": "text",
                 "analyzer": "email_analyzer",
                 "search_analyzer": "standard",
+                "fields": {"ngram": SUBSTRING_FIELD},
             },
             "cc_email": {
                 "type": "keyword",
@@ -109,6 +130,7 @@ MESSAGE_MAPPING = {
                 "type": "text",
                 "analyzer": "email_analyzer",
                 "search_analyzer": "standard",
+                "fields": {"ngram": SUBSTRING_FIELD},
             },
             "bcc_email": {
                 "type": "keyword",
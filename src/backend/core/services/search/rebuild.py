@@ -0,0 +1,249 @@
+"""Partitioned, resumable rebuild of the search index, with an alias cutover.
+
+``reindex_all`` rewrites every thread into the live index from a single
+task: a rebuild after a mapping change takes as long as one worker needs
+to go through the whole database, and starts over if it dies. A rebuild
+instead:
+
+* creates a new index, ``<MESSAGE_INDEX>_<timestamp>``, with the current
+  mapping, and with refreshes and replicas disabled while it loads;
+* splits the thread id space into ``SearchIndexBuildPartition`` ranges of
+  about ``SEARCH_REBUILD_PARTITION_SIZE`` threads (thread ids are random
+  UUIDs, so equal ranges hold about as many threads), loaded concurrently
+  by the ``reindex`` queue workers;
+* checkpoints every partition loaded without failures, so that an
+  interrupted build, or one whose documents failed to load, resumes with
+  the partitions left;
+* once the last partition is loaded, restores the index settings and
+  points the ``MESSAGE_INDEX`` alias to the new index in a single
+  ``_aliases`` call. The indices it pointed to before are then deleted;
+  a concrete index of that name, from before aliases, is replaced in the
+  same call.
+
+Live writes go to the new index as well as the current one while it
+loads (``index.write_indices``). The load only creates documents, so it
+never overwrites a document a live write put there after the load read
+its thread.
+"""
+
+import copy
+import logging
+import math
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from opensearchpy.exceptions import NotFoundError
+
+from core import models
+from core.services.search.exceptions import IndexBuildInProgressError
+from core.services.search.index import (
+    _run_request,
+    get_opensearch_client,
+    reindex_bulk_threads,
+)
+from core.services.search.mapping import MESSAGE_INDEX, MESSAGE_MAPPING
+
+logger = logging.getLogger(__name__)
+
+# Index settings while the build loads, restored from MESSAGE_MAPPING at
+# the cutover.
+_LOAD_SETTINGS = {"refresh_interval": "-1", "number_of_replicas": 0}
+
+# A cutover claimed longer ago than this has lost its worker, and can be
+# claimed again.
+CUTOVER_TIMEOUT = timedelta(minutes=10)
+
+
+def _partition_bounds(count: int) -> list[tuple]:
+    """Split the UUID space into ``count`` ``(lower, upper)`` ranges.
+
+    The first lower and the last upper bounds are ``None`` (unbounded).
+    """
+    step = (1 << 128) // count
+    bounds = [uuid.UUID(int=step * index) for index in range(1, count)]
+    return list(zip([None, *bounds], [*bounds, None], strict=True))
+
+
+def start_build(partition_size: int | None = None) -> models.SearchIndexBuild:
+    """Create the index and the partitions of a new build.
+
+    Raises ``IndexBuildInProgressError`` if another build isn't finished.
+    """
+    if models.SearchIndexBuild.objects.filter(completed_at__isnull=True).exists():
+        raise IndexBuildInProgressError("A search index build is in progress.")
+    partition_size = partition_size or settings.SEARCH_REBUILD_PARTITION_SIZE
+
+    index_name = f"{MESSAGE_INDEX}_{timezone.now():%Y%m%d%H%M%S}"
+    body = copy.deepcopy(MESSAGE_MAPPING)
+    body["settings"].update(_LOAD_SETTINGS)
+    _run_request(get_opensearch_client().indices.create, index=index_name, body=body)
+
+    threads_count = models.Thread.objects.count()
+    with transaction.atomic():
+        build = models.SearchIndexBuild.objects.create(
+            index_name=index_name, threads_count=threads_count
+        )
+        models.SearchIndexBuildPartition.objects.bulk_create(
+            models.SearchIndexBuildPartition(
+                build=build, lower_id=lower, upper_id=upper
+            )
+            for lower, upper in _partition_bounds(
+                max(math.ceil(threads_count / partition_size), 1)
+            )
+        )
+    logger.info("Started search index build %s: %d threads", index_name, threads_count)
+    return build
+
+
+def load_partition(partition_id) -> models.SearchIndexBuildPartition:
+    """Load the threads of a partition into its build's index, and checkpoint it.
+
+    Already loaded partitions, and those of finished builds, are skipped.
+    A partition with documents that failed to load is left unchecked, so
+    that resuming the build loads it again: the documents already created
+    are kept as they are.
+    """
+    partition = models.SearchIndexBuildPartition.objects.select_related("build").get(
+        id=partition_id
+    )
+    if partition.completed_at is not None or partition.build.completed_at is not None:
+        return partition
+
+    result = reindex_bulk_threads(partition.threads(), index=partition.build.index_name)
+    partition.indexed_threads = result["indexed_threads"]
+    partition.indexed_messages = result["indexed_messages"]
+    partition.failure_count = result["failure_count"]
+    if partition.failure_count:
+        logger.warning(
+            "Search index build %s: %d documents failed to load in partition %s",
+            partition.build.index_name,
+            partition.failure_count,
+            partition.id,
+        )
+    else:
+        partition.completed_at = timezone.now()
+    partition.save(
+        update_fields=[
+            "indexed_threads",
+            "indexed_messages",
+            "failure_count",
+            "completed_at",
+            "updated_at",
+        ]
+    )
+    return partition
+
+
+def _swap_alias(es, index_name: str) -> list[str]:
+    """Point the ``MESSAGE_INDEX`` alias to ``index_name``, atomically.
+
+    Returns the indices the alias pointed to before.
+    """
+    try:
+        previous = sorted(_run_request(es.indices.get_alias, name=MESSAGE_INDEX))
+    except NotFoundError:
+        previous = []
+    actions = [
+        {"remove": {"index": index, "alias": MESSAGE_INDEX}} for index in previous
+    ]
+    if not previous and _run_request(es.indices.exists, index=MESSAGE_INDEX):
+        actions.append({"remove_index": {"index": MESSAGE_INDEX}})
+    actions.append({"add": {"index": index_name, "alias": MESSAGE_INDEX}})
+    _run_request(es.indices.update_aliases, body={"actions": actions})
+    return [index for index in previous if index != index_name]
+
+
+def finish_build(build_id) -> bool:
+    """Cut over to the build's index if all its partitions are loaded.
+
+    The cutover is claimed in a short transaction first, so that the row
+    lock isn't held across the OpenSearch calls. A failed cutover gives
+    its claim back; one whose worker died can be claimed again after
+    ``CUTOVER_TIMEOUT``.
+
+    Returns whether this call did the cutover.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        build = models.SearchIndexBuild.objects.select_for_update().get(id=build_id)
+        if build.completed_at is not None:
+            return False
+        if (
+            build.cutover_started_at is not None
+            and build.cutover_started_at > now - CUTOVER_TIMEOUT
+        ):
+            return False
+        if build.partitions.filter(completed_at__isnull=True).exists():
+            return False
+        build.cutover_started_at = now
+        build.save(update_fields=["cutover_started_at", "updated_at"])
+
+    es = get_opensearch_client()
+    try:
+        live_settings = {
+            key: MESSAGE_MAPPING["settings"][key] for key in _LOAD_SETTINGS
+        }
+        _run_request(
+            es.indices.put_settings,
+            index=build.index_name,
+            body={"index": live_settings},
+        )
+        _run_request(es.indices.refresh, index=build.index_name)
+        previous = _swap_alias(es, build.index_name)
+    except Exception:
+        build.cutover_started_at = None
+        build.save(update_fields=["cutover_started_at", "updated_at"])
+        raise
+    build.completed_at = timezone.now()
+    build.save(update_fields=["completed_at", "updated_at"])
+
+    for index in previous:
+        try:
+            _run_request(es.indices.delete, index=index)
+        except NotFoundError:
+            pass
+    logger.info("Search index build %s is now live", build.index_name)
+    return True
+
+
+def cancel_build(build_id) -> None:
+    """Drop an unfinished build and its index."""
+    build = models.SearchIndexBuild.objects.get(id=build_id, completed_at__isnull=True)
+    try:
+        _run_request(get_opensearch_client().indices.delete, index=build.index_name)
+    except NotFoundError:
+        pass
+    build.delete()
+
+
+def get_build_progress(build: models.SearchIndexBuild) -> dict:
+    """Progress and throughput of a build.
+
+    ``threads_per_second`` is measured from the start of the build to its
+    cutover, or to now while it loads.
+    """
+    totals = build.partitions.aggregate(
+        indexed_threads=Sum("indexed_threads", default=0),
+        indexed_messages=Sum("indexed_messages", default=0),
+        failure_count=Sum("failure_count", default=0),
+    )
+    partitions = build.partitions.count()
+    loaded = build.partitions.filter(completed_at__isnull=False).count()
+    elapsed = (
+        (build.completed_at or timezone.now()) - build.created_at
+    ).total_seconds()
+    return {
+        "index": build.index_name,
+        "completed": build.completed_at is not None,
+        "partitions": partitions,
+        "loaded_partitions": loaded,
+        "threads_count": build.threads_count,
+        **totals,
+        "elapsed": elapsed,
+        "threads_per_second": totals["indexed_threads"] / elapsed if elapsed else 0.0,
+    }
@@ -8,12 +8,53 @@ from typing import Any, Dict, Optional
 from django.conf import settings
 
 from core.services.search.index import get_opensearch_client
-from core.services.search.mapping import MESSAGE_INDEX
+from core.services.search.mapping import MESSAGE_INDEX, SUBSTRING_MIN_LENGTH
 from core.services.search.parse import parse_search_query
 
 logger = logging.getLogger(__name__)
 
 
+def _substring_clauses(value: str, email_fields=(), name_fields=()) -> list:
+    """Queries matching documents whose fields contain ``value``.
+
+    They run on the trigram ``.ngram`` subfields: a phrase of the query's
+    trigrams is a lookup of a few terms, where a ``*value*`` wildcard on
+    the field itself has to scan its whole term dictionary. Values too
+    short to make a trigram scan the dictionary of trigrams instead,
+    which stays small however large the index grows.
+
+    Addresses match whatever the case. Names only match a lowercase
+    ``value``, as they did when the wildcard compared the query as typed
+    with the lowercased name terms: ``from:John`` finds John's address,
+    not every "Johnson".
+    """
+    fields = [*email_fields]
+    if value == value.lower():
+        fields.extend(name_fields)
+    if len(value) >= SUBSTRING_MIN_LENGTH:
+        return [{"match_phrase": {f"{field}.ngram": value}} for field in fields]
+    return [{"wildcard": {f"{field}.ngram": f"*{value.lower()}*"}} for field in fields]
+
+
+def _mailbox_flag_filter(field: str, mailbox_ids: list, present: bool = True):
+    """Filter on a mailbox-scoped flag (``unread_mailboxes``/``starred_mailboxes``).
+
+    The flags live on the thread documents, and are copied onto their
+    messages. By default the filter joins each message to its thread with
+    ``has_parent``, which pays for the join's global ordinals on every
+    search. With ``SEARCH_JOIN_FREE_MAILBOX_FILTERS`` it reads the copies:
+    a plain, cacheable filter on the message documents.
+    """
+    query = {"terms": {field: mailbox_ids}}
+    if not present:
+        query = {"bool": {"must_not": query}}
+    if not settings.SEARCH_JOIN_FREE_MAILBOX_FILTERS:
+        return {"has_parent": {"parent_type": "thread", "query": query}}
+    # Thread documents carry the flags too: only match messages, as
+    # has_parent does.
+    return {"bool": {"filter": [{"term": {"relation": "message"}}, query]}}
+
+
 def search_threads(  # pylint: disable=too-many-branches
     query: str,
     mailbox_ids: Optional[list] = None,
@@ -114,11 +155,12 @@ def search_threads(  # pylint: disable=too-many-branches
                     )
                 else:
                     # Substring match
-                    search_body["query"]["bool"]["should"].append(
-                        {"wildcard": {"sender_email": f"*{sender.lower()}*"}}
-                    )
-                    search_body["query"]["bool"]["should"].append(
-                        {"wildcard": {"sender_name": f"*{sender}*"}}
+                    search_body["query"]["bool"]["should"].extend(
+                        _substring_clauses(
+                            sender,
+                            email_fields=("sender_email",),
+                            name_fields=("sender_name",),
+                        )
                     )
 
                 # At least one of the should clauses must match
@@ -154,10 +196,9 @@ def search_threads(  # pylint: disable=too-many-branches
                             should_clauses.append(
                                 {"match": {field + ".text": recipient.lower()}}
                             )
-                        for field in name_fields:
-                            should_clauses.append(
-                                {"wildcard": {field: f"*{recipient}*"}}
-                            )
+                        should_clauses.extend(
+                            _substring_clauses(recipient, name_fields=name_fields)
+                        )
                         search_body["query"]["bool"]["should"].extend(should_clauses)
                         search_body["query"]["bool"]["minimum_should_match"] = 1
 
@@ -196,39 +237,18 @@ def search_threads(  # pylint: disable=too-many-branches
         # Add is: filters (starred, read, unread)
         if parsed_query.get("is_starred", False) and mailbox_ids:
             search_body["query"]["bool"]["filter"].append(
-                {
-                    "has_parent": {
-                        "parent_type": "thread",
-                        "query": {"terms": {"starred_mailboxes": mailbox_ids}},
-                    }
-                }
+                _mailbox_flag_filter("starred_mailboxes", mailbox_ids)
             )
 
         if parsed_query.get("is_read") is not None and mailbox_ids:
-            if parsed_query["is_read"] is False:  # is:unread
-                search_body["query"]["bool"]["filter"].append(
-                    {
-                        "has_parent": {
-                            "parent_type": "thread",
-                            "query": {"terms": {"unread_mailboxes": mailbox_ids}},
-                        }
-                    }
-                )
-            else:  # is:read
-                search_body["query"]["bool"]["filter"].append(
-                    {
-                        "has_parent": {
-                            "parent_type": "thread",
-                            "query": {
-                                "bool": {
-                                    "must_not": {
-                                        "terms": {"unread_mailboxes": mailbox_ids}
-                                    }
-                                }
-                            },
-                        }
-                    }
+            # is:unread, or is:read
+            search_body["query"]["bool"]["filter"].append(
+                _mailbox_flag_filter(
+                    "unread_mailboxes",
+                    mailbox_ids,
+                    present=parsed_query["is_read"] is False,
                 )
+            )
 
         # Add mailbox filter if provided
         if mailbox_ids:
@@ -242,20 +262,18 @@ def search_threads(  # pylint: disable=too-many-branches
             # instead of legacy term fields that no longer exist in the index
             filter_starred = filters.pop("is_starred", None)
             if filter_starred is not None and mailbox_ids:
-                starred_query = {"terms": {"starred_mailboxes": mailbox_ids}}
-                if not filter_starred:
-                    starred_query = {"bool": {"must_not": starred_query}}
                 search_body["query"]["bool"]["filter"].append(
-                    {"has_parent": {"parent_type": "thread", "query": starred_query}}
+                    _mailbox_flag_filter(
+                        "starred_mailboxes", mailbox_ids, present=bool(filter_starred)
+                    )
                 )
 
             filter_unread = filters.pop("is_unread", None)
             if filter_unread is not None and mailbox_ids:
-                unread_query = {"terms": {"unread_mailboxes": mailbox_ids}}
-                if not filter_unread:
-                    unread_query = {"bool": {"must_not": unread_query}}
                 search_body["query"]["bool"]["filter"].append(
-                    {"has_parent": {"parent_type": "thread", "query": unread_query}}
+                    _mailbox_flag_filter(
+                        "unread_mailboxes", mailbox_ids, present=bool(filter_unread)
+                    )
                 )
 
             for field, value in filters.items():
@@ -33,6 +33,11 @@ from core.services.search.index import (
     reindex_bulk_threads,
 )
 from core.services.search.mapping import MESSAGE_INDEX
+from core.services.search.rebuild import (
+    finish_build,
+    get_build_progress,
+    load_partition,
+)
 
 from messages.celery_app import app as celery_app
 
@@ -379,6 +384,63 @@ def reset_search_index(self):
     return {"success": True}
 
 
+def enqueue_index_build(build):
+    """Enqueue a ``rebuild_index_partition_task`` per partition left to load.
+
+    Starts a build from ``rebuild.start_build``, or resumes one whose
+    tasks were lost. Cuts over directly if every partition is loaded.
+    Returns the number of tasks enqueued.
+    """
+    partition_ids = list(
+        build.partitions.filter(completed_at__isnull=True).values_list("id", flat=True)
+    )
+    if not partition_ids:
+        finish_build(build.id)
+    for partition_id in partition_ids:
+        rebuild_index_partition_task.delay(str(partition_id))
+    return len(partition_ids)
+
+
+@celery_app.task(
+    bind=True,
+    autoretry_for=RETRYABLE_EXCEPTIONS,
+    retry_backoff=True,
+    retry_backoff_max=600,
+    max_retries=5,
+)
+def rebuild_index_partition_task(self, partition_id):
+    """Load one partition of a search index build, and cut over after the last.
+
+    Runs concurrently on the ``reindex`` queue workers. A partition whose
+    load fails is left unchecked, for ``search_index_rebuild resume``.
+    """
+    if not settings.OPENSEARCH_INDEX_THREADS:
+        logger.info("OpenSearch thread indexing is disabled.")
+        return {"success": False, "reason": "disabled"}
+
+    partition = load_partition(partition_id)
+    swapped = finish_build(partition.build_id)
+
+    progress = get_build_progress(partition.build)
+    logger.info(
+        "Search index build %s: %d/%d partitions, %d/%d threads, %.1f threads/s",
+        progress["index"],
+        progress["loaded_partitions"],
+        progress["partitions"],
+        progress["indexed_threads"],
+        progress["threads_count"],
+        progress["threads_per_second"],
+    )
+
+    return {
+        "success": True,
+        "partition_id": str(partition_id),
+        "indexed_threads": partition.indexed_threads,
+        "failure_count": partition.failure_count,
+        "swapped": swapped,
+    }
+
+
 @celery_app.task(bind=True)
 def process_pending_reindex_task(self):
     """Drain the coalescing buffers and enqueue bulk delete/reindex tasks.
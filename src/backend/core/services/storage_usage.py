@@ -0,0 +1,482 @@
+"""Precomputed storage usage of mailboxes and mail domains.
+
+The metrics API reports, for each mailbox and mail domain, the number of
+messages in the threads it has access to and the compressed size of the
+blobs of those messages (raw MIME and draft bodies) plus its attachments
+and templates. Aggregating that over messages and blobs on every request
+doesn't scale, so it is kept in ``StorageUsage`` rows:
+
+* signal handlers (``core/signals.py``) compute deltas inside the
+  transaction that creates or deletes a message, a thread access, a
+  thread, an attachment or a template, or that replaces the blob of a
+  message or template (draft saves, sending), and apply them with one
+  ``UPDATE`` per affected level once it commits, so the hot domain row
+  is never locked for the duration of a delivery;
+* ``reconcile_storage_usage_task`` periodically recomputes the exact
+  values and rewrites the rows that drifted.
+
+Deltas are not exact, which is why the reconciliation exists: blobs and
+threads shared between several messages or mailboxes are only counted
+once by the exact aggregates; ``bulk_create``/``QuerySet.update`` writes
+go unnoticed; deleting a mailbox doesn't update its domain.
+
+Blob offload and GC need no hook: offload doesn't change a blob's
+``size_compressed``, and the GC only deletes blobs nothing references.
+"""
+
+from typing import Any, Dict, Iterable
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import (
+    BigIntegerField,
+    Count,
+    F,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Greatest
+
+from celery.utils.log import get_task_logger
+
+from core.models import (
+    Attachment,
+    Blob,
+    Mailbox,
+    MailDomain,
+    Message,
+    MessageTemplate,
+    StorageUsage,
+    ThreadAccess,
+)
+
+from messages.celery_app import app as celery_app
+
+logger = get_task_logger(__name__)
+
+# Mailboxes or domains recomputed per query by the reconciliation.
+RECONCILE_BATCH_SIZE = 500
+
+
+def storage_used_expression(prefix: str = "storage_usage__"):
+    """Storage used, in bytes, from the ``StorageUsage`` row at ``prefix``.
+
+    Owners without a row yet count as empty.
+    """
+    overhead = settings.METRICS_STORAGE_USED_OVERHEAD_BY_MESSAGE
+    return Coalesce(F(f"{prefix}messages_count"), Value(0)) * overhead + Coalesce(
+        F(f"{prefix}blobs_size"), Value(0)
+    )
+
+
+# --------------------------------------------------------------------
+# Exact values
+# --------------------------------------------------------------------
+
+
+def _mailbox_usage_annotations() -> Dict[str, Any]:
+    """Exact ``messages_count``/``blobs_size`` annotations for ``Mailbox``.
+
+    All blob sizes are counted through their message/attachment
+    relationships (via ThreadAccess), NOT through blob.mailbox.
+    """
+    messages_count = Subquery(
+        Message.objects.filter(thread__accesses__mailbox=OuterRef("pk"))
+        .order_by()
+        .values("thread__accesses__mailbox")
+        .annotate(cnt=Count("id", distinct=True))
+        .values("cnt")[:1]
+    )
+
+    # Raw MIME blobs linked via Message.blob
+    mime_size = Subquery(
+        Blob.objects.filter(messages__thread__accesses__mailbox=OuterRef("pk"))
+        .order_by()
+        .values("messages__thread__accesses__mailbox")
+        .annotate(total=Sum("size_compressed"))
+        .values("total")[:1]
+    )
+
+    # Draft body blobs linked via Message.draft_blob
+    draft_size = Subquery(
+        Blob.objects.filter(drafts__thread__accesses__mailbox=OuterRef("pk"))
+        .order_by()
+        .values("drafts__thread__accesses__mailbox")
+        .annotate(total=Sum("size_compressed"))
+        .values("total")[:1]
+    )
+
+    # Attachment blobs linked via Attachment.mailbox
+    attachment_size = Subquery(
+        Attachment.objects.filter(mailbox=OuterRef("pk"))
+        .order_by()
+        .values("mailbox")
+        .annotate(total=Sum("blob__size_compressed"))
+        .values("total")[:1]
+    )
+
+    # Template/signature blobs linked via MessageTemplate.mailbox
+    template_size = Subquery(
+        MessageTemplate.objects.filter(mailbox=OuterRef("pk"), blob__isnull=False)
+        .order_by()
+        .values("mailbox")
+        .annotate(total=Sum("blob__size_compressed"))
+        .values("total")[:1]
+    )
+
+    return {
+        "exact_messages_count": Coalesce(messages_count, Value(0)),
+        "exact_blobs_size": (
+            Coalesce(mime_size, Value(0))
+            + Coalesce(draft_size, Value(0))
+            + Coalesce(attachment_size, Value(0))
+            + Coalesce(template_size, Value(0))
+        ),
+    }
+
+
+def _maildomain_usage_annotations() -> Dict[str, Any]:
+    """Exact ``messages_count``/``blobs_size`` annotations for ``MailDomain``.
+
+    When multiple mailboxes in the same domain share a thread, messages
+    and blobs are counted once per domain.
+    """
+    # Count(distinct=True) deduplicates by PK — correct for message counts.
+    messages_count = Subquery(
+        Message.objects.filter(thread__accesses__mailbox__domain=OuterRef("pk"))
+        .order_by()
+        .values("thread__accesses__mailbox__domain")
+        .annotate(cnt=Count("id", distinct=True))
+        .values("cnt")[:1]
+    )
+
+    # For blob sizes, Sum(distinct=True) deduplicates by *value* (wrong),
+    # and .distinct() before .values().annotate() puts DISTINCT on the
+    # aggregated output (also wrong).  Use a raw subselect that first
+    # deduplicates blob rows by PK, then sums.
+    mime_size = RawSQL(
+        """
+        SELECT COALESCE(SUM(sub.size_compressed), 0)
+        FROM (
+            SELECT DISTINCT b.id, b.size_compressed
+            FROM messages_blob b
+            JOIN messages_message m ON m.blob_id = b.id
+            JOIN messages_thread t ON m.thread_id = t.id
+            JOIN messages_threadaccess ta ON ta.thread_id = t.id
+            JOIN messages_mailbox mb ON ta.mailbox_id = mb.id
+            WHERE mb.domain_id = messages_maildomain.id
+        ) sub
+        """,
+        (),
+        output_field=BigIntegerField(),
+    )
+
+    draft_size = RawSQL(
+        """
+        SELECT COALESCE(SUM(sub.size_compressed), 0)
+        FROM (
+            SELECT DISTINCT b.id, b.size_compressed
+            FROM messages_blob b
+            JOIN messages_message m ON m.draft_blob_id = b.id
+            JOIN messages_thread t ON m.thread_id = t.id
+            JOIN messages_threadaccess ta ON ta.thread_id = t.id
+            JOIN messages_mailbox mb ON ta.mailbox_id = mb.id
+            WHERE mb.domain_id = messages_maildomain.id
+        ) sub
+        """,
+        (),
+        output_field=BigIntegerField(),
+    )
+
+    attachment_size = Subquery(
+        Attachment.objects.filter(mailbox__domain=OuterRef("pk"))
+        .order_by()
+        .values("mailbox__domain")
+        .annotate(total=Sum("blob__size_compressed"))
+        .values("total")[:1]
+    )
+
+    template_size = Subquery(
+        MessageTemplate.objects.filter(maildomain=OuterRef("pk"), blob__isnull=False)
+        .order_by()
+        .values("maildomain")
+        .annotate(total=Sum("blob__size_compressed"))
+        .values("total")[:1]
+    )
+
+    return {
+        "exact_messages_count": Coalesce(messages_count, Value(0)),
+        "exact_blobs_size": (
+            mime_size
+            + draft_size
+            + Coalesce(attachment_size, Value(0))
+            + Coalesce(template_size, Value(0))
+        ),
+    }
+
+
+def _reconcile(model, owner_field: str, annotations: Dict[str, Any]) -> int:
+    """Rewrite the ``StorageUsage`` rows of ``model`` that drifted.
+
+    Returns the number of rows created or corrected.
+    """
+    queryset = (
+        model.objects.order_by("pk")
+        .annotate(
+            **annotations,
+            current_messages_count=F("storage_usage__messages_count"),
+            current_blobs_size=F("storage_usage__blobs_size"),
+        )
+        .values(
+            "pk",
+            "exact_messages_count",
+            "exact_blobs_size",
+            "current_messages_count",
+            "current_blobs_size",
+        )
+    )
+
+    corrected = 0
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(page[:RECONCILE_BATCH_SIZE])
+        if not rows:
+            return corrected
+        last_pk = rows[-1]["pk"]
+
+        stale = [
+            StorageUsage(
+                **{f"{owner_field}_id": row["pk"]},
+                messages_count=row["exact_messages_count"],
+                blobs_size=row["exact_blobs_size"],
+            )
+            for row in rows
+            if (row["current_messages_count"], row["current_blobs_size"])
+            != (row["exact_messages_count"], row["exact_blobs_size"])
+        ]
+        if stale:
+            StorageUsage.objects.bulk_create(
+                stale,
+                update_conflicts=True,
+                unique_fields=[owner_field],
+                update_fields=["messages_count", "blobs_size", "updated_at"],
+            )
+            corrected += len(stale)
+
+
+def reconcile_storage_usage() -> Dict[str, int]:
+    """Recompute every mailbox and domain usage, fixing the rows that drifted."""
+    return {
+        "mailboxes": _reconcile(Mailbox, "mailbox", _mailbox_usage_annotations()),
+        "maildomains": _reconcile(
+            MailDomain, "maildomain", _maildomain_usage_annotations()
+        ),
+    }
+
+
+@celery_app.task
+def reconcile_storage_usage_task() -> Dict[str, Any]:
+    """Periodic: correct the drift of the incrementally maintained usage."""
+    corrected = reconcile_storage_usage()
+    logger.info(
+        "reconcile_storage_usage_task: corrected mailboxes=%d maildomains=%d",
+        corrected["mailboxes"],
+        corrected["maildomains"],
+    )
+    return {"success": True, "corrected": corrected}
+
+
+# --------------------------------------------------------------------
+# Deltas
+# --------------------------------------------------------------------
+
+
+def create_storage_usage(mailbox=None, maildomain=None) -> None:
+    """Create the (empty) usage row of a new mailbox or domain."""
+    StorageUsage.objects.bulk_create(
+        [StorageUsage(mailbox=mailbox, maildomain=maildomain)],
+        ignore_conflicts=True,
+    )
+
+
+def is_deletion_origin(origin, model) -> bool:
+    """Whether a delete signal's ``origin`` is ``model`` itself, not a cascade."""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+def _add_on_commit(
+    mailbox_ids: Iterable,
+    maildomain_ids: Iterable,
+    messages_count: int,
+    blobs_size: int,
+) -> None:
+    """Add the deltas to the usage rows once the transaction commits."""
+    mailbox_ids = [pk for pk in set(mailbox_ids) if pk is not None]
+    maildomain_ids = [pk for pk in set(maildomain_ids) if pk is not None]
+    if not (messages_count or blobs_size) or not (mailbox_ids or maildomain_ids):
+        return
+
+    def _apply():
+        values = {
+            "messages_count": Greatest(F("messages_count") + messages_count, Value(0)),
+            "blobs_size": Greatest(F("blobs_size") + blobs_size, Value(0)),
+        }
+        try:
+            if mailbox_ids:
+                StorageUsage.objects.filter(mailbox_id__in=mailbox_ids).update(**values)
+            if maildomain_ids:
+                StorageUsage.objects.filter(maildomain_id__in=maildomain_ids).update(
+                    **values
+                )
+        except DatabaseError:
+            # Left for the reconciliation to fix.
+            logger.exception("Failed to update storage usage")
+
+    transaction.on_commit(_apply)
+
+
+def _blobs_size(*blob_ids) -> int:
+    blob_ids = [blob_id for blob_id in blob_ids if blob_id is not None]
+    if not blob_ids:
+        return 0
+    return (
+        Blob.objects.filter(id__in=blob_ids).aggregate(total=Sum("size_compressed"))[
+            "total"
+        ]
+        or 0
+    )
+
+
+def _thread_usage(thread_id) -> tuple[int, int]:
+    """Number of messages of a thread and size of their blobs."""
+    totals = Message.objects.filter(thread_id=thread_id).aggregate(
+        count=Count("id"),
+        mime_size=Sum("blob__size_compressed"),
+        draft_size=Sum("draft_blob__size_compressed"),
+    )
+    return totals["count"], (totals["mime_size"] or 0) + (totals["draft_size"] or 0)
+
+
+def _thread_owners(thread_id) -> tuple[list, list]:
+    """Mailboxes having access to a thread, and their domains."""
+    accesses = list(
+        ThreadAccess.objects.filter(thread_id=thread_id).values_list(
+            "mailbox_id", "mailbox__domain_id"
+        )
+    )
+    return (
+        [mailbox_id for mailbox_id, _ in accesses],
+        [domain_id for _, domain_id in accesses],
+    )
+
+
+def count_message(message, sign: int) -> None:
+    """Add (``sign=1``) or remove (``-1``) a message from the usage of the
+    mailboxes having access to its thread, and of their domains."""
+    mailbox_ids, maildomain_ids = _thread_owners(message.thread_id)
+    if not mailbox_ids:
+        return
+    size = _blobs_size(message.blob_id, message.draft_blob_id)
+    _add_on_commit(mailbox_ids, maildomain_ids, sign, sign * size)
+
+
+def count_blob_change(instance, update_fields=None) -> None:
+    """Account for the blobs replaced on an existing message or template.
+
+    Called before the save; costs one query unless ``update_fields`` shows
+    no blob is being written.
+    """
+    fields = ["blob"] + (["draft_blob"] if isinstance(instance, Message) else [])
+    if instance._state.adding:  # noqa: SLF001  # pylint: disable=protected-access
+        return
+    if update_fields is not None and not {
+        name for field in fields for name in (field, f"{field}_id")
+    } & set(update_fields):
+        return
+
+    attnames = [f"{field}_id" for field in fields]
+    previous = (
+        type(instance).objects.filter(pk=instance.pk).values_list(*attnames).first()
+    )
+    current = tuple(getattr(instance, attname) for attname in attnames)
+    if previous is None or previous == current:
+        return
+
+    if isinstance(instance, Message):
+        mailbox_ids, maildomain_ids = _thread_owners(instance.thread_id)
+    else:
+        mailbox_ids, maildomain_ids = [instance.mailbox_id], [instance.maildomain_id]
+    if not (mailbox_ids or maildomain_ids):
+        return
+    _add_on_commit(
+        mailbox_ids,
+        maildomain_ids,
+        0,
+        _blobs_size(*current) - _blobs_size(*previous),
+    )
+
+
+def count_thread_access(access, sign: int) -> None:
+    """Add or remove a thread's messages from the usage of a mailbox, and
+    of its domain unless another mailbox of the domain has access too."""
+    domain_id = (
+        Mailbox.objects.filter(pk=access.mailbox_id)
+        .values_list("domain_id", flat=True)
+        .first()
+    )
+    count, size = _thread_usage(access.thread_id)
+    shared_in_domain = (
+        ThreadAccess.objects.filter(
+            thread_id=access.thread_id, mailbox__domain_id=domain_id
+        )
+        .exclude(pk=access.pk)
+        .exists()
+    )
+    _add_on_commit(
+        [access.mailbox_id],
+        [] if shared_in_domain else [domain_id],
+        sign * count,
+        sign * size,
+    )
+
+
+def count_thread(thread, sign: int) -> None:
+    """Add or remove a whole thread from the usage of every mailbox having
+    access to it, and of their domains."""
+    mailbox_ids, maildomain_ids = _thread_owners(thread.pk)
+    if not mailbox_ids:
+        return
+    count, size = _thread_usage(thread.pk)
+    _add_on_commit(mailbox_ids, maildomain_ids, sign * count, sign * size)
+
+
+def count_attachment(attachment, sign: int) -> None:
+    """Add or remove an attachment's blob from its mailbox and domain."""
+    domain_id = (
+        Mailbox.objects.filter(pk=attachment.mailbox_id)
+        .values_list("domain_id", flat=True)
+        .first()
+    )
+    _add_on_commit(
+        [attachment.mailbox_id],
+        [domain_id],
+        0,
+        sign * _blobs_size(attachment.blob_id),
+    )
+
+
+def count_template(template, sign: int) -> None:
+    """Add or remove a template's blob from its mailbox or domain."""
+    _add_on_commit(
+        [template.mailbox_id],
+        [template.maildomain_id],
+        0,
+        sign * _blobs_size(template.blob_id),
+    )
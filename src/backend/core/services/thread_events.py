@@ -10,6 +10,8 @@ import uuid
 from datetime import timedelta
 
 from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 from core import enums, models
@@ -308,6 +310,76 @@ def _absorb_unassign_in_undo_window(*, thread, author, assignee_ids, assignees_d
     return absorbed
 
 
+# ---------------------------------------------------------------------------
+# Denormalized state
+# ---------------------------------------------------------------------------
+
+
+def refresh_thread_state(thread, user_ids=None):
+    """Recompute the event state that thread listings read.
+
+    Updates ``Thread.events_count`` / ``Thread.has_assignees`` and the
+    ``ThreadUserState`` rows of ``user_ids`` (every user holding a
+    ``UserEvent`` or a state on the thread when ``None``) from the
+    ``ThreadEvent`` / ``UserEvent`` rows. Must be called by every write
+    path touching those rows, in the same transaction.
+    """
+    events_count = (
+        models.ThreadEvent.objects.filter(thread=OuterRef("pk"))
+        .order_by()
+        .values("thread")
+        .annotate(count=Count("id"))
+        .values("count")[:1]
+    )
+    models.Thread.objects.filter(pk=thread.pk).update(
+        events_count=Coalesce(Subquery(events_count), Value(0)),
+        has_assignees=Exists(
+            models.UserEvent.objects.filter(
+                thread=OuterRef("pk"), type=enums.UserEventTypeChoices.ASSIGN
+            )
+        ),
+    )
+
+    user_events = models.UserEvent.objects.filter(thread=thread)
+    states = models.ThreadUserState.objects.filter(thread=thread)
+    if user_ids is not None:
+        user_events = user_events.filter(user_id__in=user_ids)
+        states = states.filter(user_id__in=user_ids)
+
+    fresh_states = [
+        models.ThreadUserState(
+            thread=thread,
+            user_id=row["user_id"],
+            is_assigned=row["assigns"] > 0,
+            has_mention=row["mentions"] > 0,
+            has_unread_mention=row["unread_mentions"] > 0,
+        )
+        for row in user_events.order_by()
+        .values("user_id")
+        .annotate(
+            assigns=Count("id", filter=Q(type=enums.UserEventTypeChoices.ASSIGN)),
+            mentions=Count("id", filter=Q(type=enums.UserEventTypeChoices.MENTION)),
+            unread_mentions=Count(
+                "id",
+                filter=Q(type=enums.UserEventTypeChoices.MENTION, read_at__isnull=True),
+            ),
+        )
+    ]
+    states.exclude(user_id__in=[state.user_id for state in fresh_states]).delete()
+    if fresh_states:
+        models.ThreadUserState.objects.bulk_create(
+            fresh_states,
+            update_conflicts=True,
+            unique_fields=["user", "thread"],
+            update_fields=[
+                "is_assigned",
+                "has_mention",
+                "has_unread_mention",
+                "updated_at",
+            ],
+        )
+
+
 # ---------------------------------------------------------------------------
 # Public service API — ASSIGN / UNASSIGN
 # ---------------------------------------------------------------------------
@@ -362,6 +434,7 @@ def assign_users(*, thread, author, assignees_data):
         data={"assignees": new_assignees},
     )
     _create_user_event_assigns(thread_event, thread, new_assignees)
+    refresh_thread_state(thread, user_ids=new_assignee_ids)
     return thread_event
 
 
@@ -411,6 +484,7 @@ def unassign_users(*, thread, author, assignees_data):
             a for a in assignees_data if uuid.UUID(a["id"]) not in absorbed
         ]
         if not assignees_data:
+            refresh_thread_state(thread, user_ids=absorbed)
             return None
 
     thread_event = models.ThreadEvent.objects.create(
@@ -420,6 +494,7 @@ def unassign_users(*, thread, author, assignees_data):
         data={"assignees": assignees_data},
     )
     _delete_user_event_assigns(thread, assignees_data, context=str(thread_event.id))
+    refresh_thread_state(thread, user_ids=assignee_ids)
     return thread_event
 
 
@@ -428,6 +503,26 @@ def unassign_users(*, thread, author, assignees_data):
 # ---------------------------------------------------------------------------
 
 
+@transaction.atomic
+def delete_thread_event(*, thread_event):
+    """Delete ``thread_event`` along with its ``UserEvent`` rows."""
+    thread = thread_event.thread
+    thread_event.delete()
+    refresh_thread_state(thread)
+
+
+@transaction.atomic
+def read_mentions(*, thread_event, user):
+    """Mark ``user``'s unread MENTION on ``thread_event`` as read."""
+    models.UserEvent.objects.filter(
+        user=user,
+        thread_event=thread_event,
+        type=enums.UserEventTypeChoices.MENTION,
+        read_at__isnull=True,
+    ).update(read_at=timezone.now())
+    refresh_thread_state(thread_event.thread, user_ids=[user.id])
+
+
 @transaction.atomic
 def sync_im_mentions(*, thread_event):
     """Reconcile ``UserEvent MENTION`` rows for an IM ThreadEvent.
@@ -440,6 +535,7 @@ def sync_im_mentions(*, thread_event):
         return
     mentions_data = (thread_event.data or {}).get("mentions", []) or []
     _sync_user_event_mentions(thread_event, thread_event.thread, mentions_data)
+    refresh_thread_state(thread_event.thread)
 
 
 # ---------------------------------------------------------------------------
@@ -496,6 +592,7 @@ def _cleanup_invalid_assignments(thread, user_ids):
         data={"assignees": assignees_data},
     )
     _delete_user_event_assigns(thread, assignees_data, context=str(thread_event.id))
+    refresh_thread_state(thread, user_ids=to_unassign)
     logger.info(
         "Auto-unassigned %d user(s) on thread %s after access change",
         len(assignees_data),
@@ -543,6 +640,7 @@ def _cleanup_invalid_mentions(thread, user_ids):
         user_id__in=to_clean,
         type=enums.UserEventTypeChoices.MENTION,
     ).delete()
+    refresh_thread_state(thread, user_ids=to_clean)
     if deleted:
         logger.info(
             "Auto-cleaned %d UserEvent MENTION(s) on thread %s after access change",
@@ -12,13 +12,14 @@ import hashlib
 import os
 from contextlib import contextmanager
 from logging import getLogger
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, Iterator
 
 from django.conf import settings
 from django.core.files.base import ContentFile
 from django.core.files.storage import storages
 from django.db import connection, transaction
 
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 from core.enums import BlobStorageLocationChoices
@@ -127,6 +128,18 @@ def _build_aead(algo: str, key_bytes: bytes):
     raise ValueError(f"unknown encryption algo {algo!r}")
 
 
+def _build_stream_encryptor(algo: str, key_bytes: bytes, nonce: bytes):
+    """Construct an incremental encryptor for an algo identifier.
+
+    Streaming counterpart of ``_build_aead``: ``update()`` chunks, then
+    ``finalize()`` and append ``tag``. The output is byte-for-byte what
+    the AEAD primitive's ``encrypt`` returns, so ``decrypt`` reads it.
+    """
+    if algo == ALGO_AES_GCM:
+        return Cipher(algorithms.AES(key_bytes), modes.GCM(nonce)).encryptor()
+    raise ValueError(f"unknown encryption algo {algo!r}")
+
+
 if TYPE_CHECKING:
     from core.models import Blob
 
@@ -230,14 +243,18 @@ class TieredStorageService:
         """Convenience wrapper around ``compute_storage_key`` for a Blob row."""
         return cls.compute_storage_key(bytes(blob.sha256), blob.encryption_key_id)
 
-    def _aead(self, key_id: int):
-        """Build the AEAD primitive for ``key_id`` (raises if missing/unknown)."""
+    def _key_entry(self, key_id: int) -> dict:
+        """Normalized key entry for ``key_id`` (raises if missing/unknown)."""
         key_id_str = str(key_id)
         if key_id_str not in self.encryption_keys:
             raise ValueError(
                 f"Encryption key_id {key_id} not found in MESSAGES_BLOBS_ENCRYPT_KEYS"
             )
-        entry = normalize_key_entry(self.encryption_keys[key_id_str])
+        return normalize_key_entry(self.encryption_keys[key_id_str])
+
+    def _aead(self, key_id: int):
+        """Build the AEAD primitive for ``key_id`` (raises if missing/unknown)."""
+        entry = self._key_entry(key_id)
         return _build_aead(entry["algo"], decode_key(entry["secret"]))
 
     def encrypt(self, data: bytes, sha256: bytes) -> tuple[bytes, int]:
@@ -257,6 +274,33 @@ class TieredStorageService:
         ciphertext = self._aead(self.active_key_id).encrypt(nonce, data, sha256)
         return nonce + ciphertext, self.active_key_id
 
+    def encrypt_stream(
+        self, chunks: Iterable[bytes], sha256: bytes
+    ) -> tuple[Iterator[bytes], int]:
+        """Incremental ``encrypt``: ``(encrypted chunks, key_id)``.
+
+        The chunks joined are ``nonce(12) || ciphertext+tag(16)``, same
+        layout as ``encrypt``, so ``decrypt`` reads them unchanged. The
+        key is resolved eagerly so a bad key fails before any input is
+        consumed; ``key_id=0`` passes the chunks through.
+        """
+        if not self.encryption_keys or self.active_key_id == 0:
+            return iter(chunks), 0
+        entry = self._key_entry(self.active_key_id)
+        nonce = os.urandom(_NONCE_SIZE)
+        encryptor = _build_stream_encryptor(
+            entry["algo"], decode_key(entry["secret"]), nonce
+        )
+        encryptor.authenticate_additional_data(sha256)
+
+        def _encrypted():
+            yield nonce
+            for chunk in chunks:
+                yield encryptor.update(chunk)
+            yield encryptor.finalize() + encryptor.tag
+
+        return _encrypted(), self.active_key_id
+
     def decrypt(self, data: bytes, key_id: int, sha256: bytes) -> bytes:
         """Decrypt a token produced by ``encrypt``, verifying ``sha256`` as AAD.
 
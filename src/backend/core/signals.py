@@ -5,10 +5,11 @@ import logging
 
 from django.conf import settings
 from django.db import transaction
-from django.db.models.signals import post_delete, post_save, pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
 from core import enums, models
+from core.services import storage_usage
 from core.services.blob_gc import schedule_for_gc
 from core.services.identity.keycloak import (
     sync_mailbox_to_keycloak_user,
@@ -165,6 +166,12 @@ def schedule_template_blob_for_gc(sender, instance, **kwargs):
     schedule_for_gc(instance.blob_id)
 
 
+@receiver(post_delete, sender=models.InboundMessage)
+def schedule_inbound_message_blob_for_gc(sender, instance, **kwargs):
+    """Push ``InboundMessage.blob`` id into the GC set."""
+    schedule_for_gc(instance.blob_id)
+
+
 @receiver(post_delete, sender=models.Message)
 def delete_message_from_index(sender, instance, **kwargs):
     """Enqueue a targeted OpenSearch delete for the message child document.
@@ -227,6 +234,93 @@ def update_unread_mailboxes_on_access_delete(sender, instance, **kwargs):
     _schedule_thread_reindex(instance.thread_id)
 
 
+# Storage usage deltas (see ``core.services.storage_usage``). Deletions
+# are counted in ``pre_delete``, while the rows they depend on still exist,
+# and only at the level where they originate: deleting a thread removes
+# its messages and accesses once, not once per cascaded row.
+
+
+@receiver(post_save, sender=models.MailDomain)
+def create_maildomain_storage_usage(sender, instance, created, **kwargs):
+    """Create the usage row of a new mail domain."""
+    if created:
+        storage_usage.create_storage_usage(maildomain=instance)
+
+
+@receiver(post_save, sender=models.Mailbox)
+def create_mailbox_storage_usage(sender, instance, created, **kwargs):
+    """Create the usage row of a new mailbox."""
+    if created:
+        storage_usage.create_storage_usage(mailbox=instance)
+
+
+@receiver(post_save, sender=models.Message)
+def add_message_storage_usage(sender, instance, created, **kwargs):
+    """Count a new message for the mailboxes having access to its thread."""
+    if created:
+        storage_usage.count_message(instance, 1)
+
+
+@receiver(pre_save, sender=models.Message)
+@receiver(pre_save, sender=models.MessageTemplate)
+def update_blob_storage_usage(sender, instance, update_fields=None, **kwargs):
+    """Account for the blob of a message or template being replaced."""
+    storage_usage.count_blob_change(instance, update_fields)
+
+
+@receiver(pre_delete, sender=models.Message)
+def remove_message_storage_usage(sender, instance, origin=None, **kwargs):
+    """Uncount a deleted message."""
+    if storage_usage.is_deletion_origin(origin, models.Message):
+        storage_usage.count_message(instance, -1)
+
+
+@receiver(post_save, sender=models.ThreadAccess)
+def add_thread_access_storage_usage(sender, instance, created, **kwargs):
+    """Count a thread for the mailbox that was given access to it."""
+    if created:
+        storage_usage.count_thread_access(instance, 1)
+
+
+@receiver(pre_delete, sender=models.ThreadAccess)
+def remove_thread_access_storage_usage(sender, instance, origin=None, **kwargs):
+    """Uncount a thread for the mailbox that lost access to it."""
+    if storage_usage.is_deletion_origin(origin, models.ThreadAccess):
+        storage_usage.count_thread_access(instance, -1)
+
+
+@receiver(pre_delete, sender=models.Thread)
+def remove_thread_storage_usage(sender, instance, **kwargs):
+    """Uncount a deleted thread for every mailbox having access to it."""
+    storage_usage.count_thread(instance, -1)
+
+
+@receiver(post_save, sender=models.Attachment)
+def add_attachment_storage_usage(sender, instance, created, **kwargs):
+    """Count a new attachment for its mailbox."""
+    if created:
+        storage_usage.count_attachment(instance, 1)
+
+
+@receiver(pre_delete, sender=models.Attachment)
+def remove_attachment_storage_usage(sender, instance, **kwargs):
+    """Uncount a deleted attachment."""
+    storage_usage.count_attachment(instance, -1)
+
+
+@receiver(post_save, sender=models.MessageTemplate)
+def add_template_storage_usage(sender, instance, created, **kwargs):
+    """Count a new template for its mailbox or domain."""
+    if created:
+        storage_usage.count_template(instance, 1)
+
+
+@receiver(pre_delete, sender=models.MessageTemplate)
+def remove_template_storage_usage(sender, instance, **kwargs):
+    """Uncount a deleted template."""
+    storage_usage.count_template(instance, -1)
+
+
 @receiver(pre_delete, sender=models.User)
 def delete_user_scope_channels_on_user_delete(sender, instance, **kwargs):
     """Delete the user's personal (scope_level=user) Channels before the
@@ -0,0 +1,241 @@
+"""Celery task instrumentation: queue wait, run time, outcome and payload size.
+
+Celery signal handlers measure every task:
+
+* ``before_task_publish`` stamps the message with its enqueue time and
+  the size of its serialized arguments (``enqueued_at`` and
+  ``payload_size`` headers, which the worker exposes on
+  ``task.request``).
+* ``task_prerun`` computes the queue wait: start time minus the enqueue
+  time, or minus the ETA for delayed tasks and retries, so a deliberate
+  countdown isn't reported as backlog.
+* ``task_postrun`` adds the run time, the payload size and the outcome
+  (``RETRY``/``FAILURE``) to the task's counters in one pipelined write.
+
+Workers are separate processes nobody scrapes, so the histograms are
+kept as cumulative counters in a Redis hash (``STATS_KEY``) and read by
+``CustomDBPrometheusMetricsCollector`` at scrape time, like the outbound
+retry stats. Queue depths are read from the broker at scrape time.
+
+Everything here is observability only: without a ``django_redis`` cache,
+or if Redis fails, samples are dropped.
+"""
+
+import logging
+import time
+from datetime import datetime
+
+from django.conf import settings
+
+import redis
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from kombu.transport.redis import PRIORITY_STEPS
+from kombu.transport.redis import Channel as RedisChannel
+from kombu.utils.json import dumps
+from redis.exceptions import RedisError
+
+from core.utils import get_redis_client, is_redis_backend
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "celery_task_metrics"
+
+# Upper bounds of the histogram buckets (the implicit last one is +Inf).
+WAIT_BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 3600)
+RUN_BUCKETS = (0.05, 0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
+PAYLOAD_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+HISTOGRAMS = {
+    "wait": WAIT_BUCKETS,
+    "run": RUN_BUCKETS,
+    "payload": PAYLOAD_BUCKETS,
+}
+COUNTERS = ("retries", "failures")
+
+# Broker reads happen during a scrape: fail fast when it is unreachable.
+_BROKER_TIMEOUT = 2
+
+# task_id -> (perf_counter at start, queue wait in seconds or None).
+# Prefork workers run one task at a time per process, so this stays tiny.
+_running: dict[str, tuple[float, float | None]] = {}
+
+_broker_client = None  # pylint: disable=invalid-name
+
+
+def _bucket_index(buckets, value) -> int:
+    for index, bound in enumerate(buckets):
+        if value <= bound:
+            return index
+    return len(buckets)
+
+
+def _field(task_name: str, *parts) -> str:
+    return "|".join((task_name, *map(str, parts)))
+
+
+@before_task_publish.connect
+def stamp_task_message(body=None, headers=None, **kwargs):
+    """Record the enqueue time and payload size in the message headers."""
+    if headers is None:
+        return
+    headers["enqueued_at"] = time.time()
+    try:
+        headers["payload_size"] = len(dumps(body))
+    except (TypeError, ValueError):
+        pass
+
+
+def _queue_wait(request, started_at: float) -> float | None:
+    """Seconds the task spent waiting for a worker, if it was stamped."""
+    enqueued_at = getattr(request, "enqueued_at", None)
+    if enqueued_at is None:
+        return None
+    available_at = float(enqueued_at)
+    eta = getattr(request, "eta", None)
+    if eta:
+        try:
+            available_at = max(available_at, datetime.fromisoformat(eta).timestamp())
+        except (TypeError, ValueError):
+            pass
+    return max(started_at - available_at, 0.0)
+
+
+@task_prerun.connect
+def start_task_timer(task_id=None, task=None, **kwargs):
+    """Remember when the task started and how long it waited."""
+    if task_id is None or task is None:
+        return
+    _running[task_id] = (time.perf_counter(), _queue_wait(task.request, time.time()))
+
+
+@task_postrun.connect
+def record_task_run(task_id=None, task=None, state=None, **kwargs):
+    """Add the finished task's samples to its counters."""
+    started = _running.pop(task_id, None)
+    if started is None or task is None or not is_redis_backend():
+        return
+    start, wait = started
+    samples = {"run": time.perf_counter() - start, "wait": wait}
+    payload_size = getattr(task.request, "payload_size", None)
+    if payload_size is not None:
+        samples["payload"] = int(payload_size)
+
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for metric, value in samples.items():
+            if value is None:
+                continue
+            bucket = _bucket_index(HISTOGRAMS[metric], value)
+            pipe.hincrby(STATS_KEY, _field(task.name, metric, bucket), 1)
+            pipe.hincrbyfloat(STATS_KEY, _field(task.name, metric, "sum"), value)
+        if state == "RETRY":
+            pipe.hincrby(STATS_KEY, _field(task.name, "retries"), 1)
+        elif state == "FAILURE":
+            pipe.hincrby(STATS_KEY, _field(task.name, "failures"), 1)
+        pipe.execute()
+    except RedisError as exc:
+        logger.warning(
+            "Redis unavailable while recording task metrics (%s: %s)",
+            type(exc).__name__,
+            exc,
+        )
+
+
+def get_stats() -> dict:
+    """Return the per-task counters.
+
+    Maps task name to ``{"wait": ..., "run": ..., "payload": ...,
+    "retries": int, "failures": int}`` where each histogram is a dict
+    with ``buckets`` (per-bucket counts, the last one being +Inf) and
+    ``sum``.
+    """
+    if not is_redis_backend():
+        return {}
+    try:
+        raw = get_redis_client().hgetall(STATS_KEY)
+    except RedisError as exc:
+        logger.warning(
+            "Redis unavailable while reading task metrics (%s: %s)",
+            type(exc).__name__,
+            exc,
+        )
+        return {}
+
+    stats = {}
+    for raw_field, raw_value in raw.items():
+        name = raw_field.decode() if isinstance(raw_field, bytes) else raw_field
+        task_name, metric, *rest = name.split("|")
+        task_stats = stats.setdefault(
+            task_name,
+            {
+                **{
+                    histogram: {"buckets": [0] * (len(buckets) + 1), "sum": 0.0}
+                    for histogram, buckets in HISTOGRAMS.items()
+                },
+                **dict.fromkeys(COUNTERS, 0),
+            },
+        )
+        if metric in COUNTERS:
+            task_stats[metric] = int(raw_value)
+        elif metric in HISTOGRAMS and rest == ["sum"]:
+            task_stats[metric]["sum"] = float(raw_value)
+        elif metric in HISTOGRAMS and rest and rest[0].isdigit():
+            index = int(rest[0])
+            if index < len(task_stats[metric]["buckets"]):
+                task_stats[metric]["buckets"][index] = int(raw_value)
+    return stats
+
+
+def get_queues() -> list[str]:
+    """Names of the queues tasks are routed to."""
+    queues = {settings.CELERY_TASK_DEFAULT_QUEUE}
+    queues.update(route["queue"] for route in settings.CELERY_TASK_ROUTES.values())
+    return sorted(queues)
+
+
+def _get_broker_client():
+    global _broker_client  # noqa: PLW0603  # pylint: disable=global-statement
+    if _broker_client is None:
+        _broker_client = redis.Redis.from_url(
+            settings.CELERY_BROKER_URL,
+            socket_timeout=_BROKER_TIMEOUT,
+            socket_connect_timeout=_BROKER_TIMEOUT,
+        )
+    return _broker_client
+
+
+def get_queue_lengths() -> dict[str, int]:
+    """Number of messages waiting in each queue of the Redis broker.
+
+    Kombu stores each priority level of a queue in its own list, named
+    like ``kombu.transport.redis.Channel._q_for_pri``; they are summed.
+    Returns an empty dict for non-Redis brokers, eager mode, or when the
+    broker is unreachable.
+    """
+    if settings.CELERY_TASK_ALWAYS_EAGER or not str(
+        settings.CELERY_BROKER_URL
+    ).startswith(("redis://", "rediss://", "unix://")):
+        return {}
+
+    options = settings.CELERY_BROKER_TRANSPORT_OPTIONS or {}
+    prefix = options.get("global_keyprefix", "")
+    steps = options.get("priority_steps", PRIORITY_STEPS)
+    queues = get_queues()
+    try:
+        pipe = _get_broker_client().pipeline(transaction=False)
+        for queue in queues:
+            for step in steps:
+                key = f"{queue}{RedisChannel.sep}{step}" if step else queue
+                pipe.llen(f"{prefix}{key}")
+        sizes = pipe.execute()
+    except RedisError as exc:
+        logger.warning(
+            "Broker unavailable while reading queue lengths (%s: %s)",
+            type(exc).__name__,
+            exc,
+        )
+        return {}
+
+    return {
+        queue: sum(sizes[index * len(steps) : (index + 1) * len(steps)])
+        for index, queue in enumerate(queues)
+    }
@@ -1,14 +1,20 @@
 # pylint: disable=wildcard-import, unused-wildcard-import
 """Register all tasks here so that Celery autodiscovery can find them."""
 
+from core.ai.tasks import *  # noqa: F403
+from core.mda.draft_tasks import *  # noqa: F403
 from core.mda.inbound_tasks import *  # noqa: F403
 from core.mda.outbound_tasks import *  # noqa: F403
+from core.metrics_tasks import *  # noqa: F403
 from core.services.blob_gc import *  # noqa: F403
+from core.services.blob_preview import *  # noqa: F403
 from core.services.calendar.tasks import *  # noqa: F403
 from core.services.dns.tasks import *  # noqa: F403
+from core.services.image_proxy import *  # noqa: F403
 from core.services.importer.eml_tasks import *  # noqa: F403
 from core.services.importer.imap_tasks import *  # noqa: F403
 from core.services.importer.mbox_tasks import *  # noqa: F403
 from core.services.importer.pst_tasks import *  # noqa: F403
 from core.services.search.tasks import *  # noqa: F403
+from core.services.storage_usage import *  # noqa: F403
 from core.services.tiered_storage_tasks import *  # noqa: F403
@@ -0,0 +1 @@
+# Tests for AI features (summaries, auto-labels)
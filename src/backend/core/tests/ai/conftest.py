@@ -0,0 +1,67 @@
+"""Shared fixtures for AI tests."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _StubAIHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible ``/chat/completions`` endpoint."""
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Record the prompt and answer with the configured content."""
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        self.server.prompts.append(payload["messages"][0]["content"])
+
+        body = json.dumps(
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": payload.get("model", "stub"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {
+                            "role": "assistant",
+                            "content": self.server.answer,
+                        },
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep test output quiet."""
+
+
+@pytest.fixture
+def ai_stub_server(settings):
+    """Run a local OpenAI-compatible stub and point the AI settings at it.
+
+    The yielded server exposes ``prompts`` (every prompt received, in
+    order) and a mutable ``answer`` returned for every completion.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubAIHandler)
+    server.prompts = []
+    server.answer = "Stub summary"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    settings.AI_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    settings.AI_API_KEY = "stub-key"
+    settings.AI_MODEL = "stub-model"
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,241 @@
+"""Tests for the debounced AI work queue and its tasks."""
+# pylint: disable=no-value-for-parameter,protected-access
+
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.utils import timezone
+
+import pytest
+
+from core import factories, models
+from core.ai import queue as ai_queue
+from core.ai.tasks import autolabel_thread_task, summarize_thread_task
+from core.ai.utils import get_messages_text, load_prompts
+from core.mda.inbound_create import _create_message_from_inbound
+
+
+def _raw_message(index, body="Hello, this is a test message."):
+    return (
+        f"From: sender{index}@example.com\r\n"
+        "To: recipient@example.com\r\n"
+        f"Subject: Test thread\r\n"
+        f"Message-ID: <ai-test-{index}@example.com>\r\n"
+        "Content-Type: text/plain; charset=utf-8\r\n\r\n"
+        f"{body}\r\n"
+    ).encode()
+
+
+def _thread_with_messages(count, mailbox=None):
+    thread = factories.ThreadFactory(subject="Test thread")
+    factories.ThreadAccessFactory(
+        mailbox=mailbox or factories.MailboxFactory(), thread=thread
+    )
+    for index in range(count):
+        factories.MessageFactory(thread=thread, raw_mime=_raw_message(index))
+    return thread
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(name="ai_enabled")
+def fixture_ai_enabled(settings, ai_stub_server):
+    """Enable both AI features against the local stub endpoint."""
+    settings.FEATURE_AI_SUMMARY = True
+    settings.FEATURE_AI_AUTOLABELS = True
+    return ai_stub_server
+
+
+@pytest.mark.django_db
+class TestSummarizeThreadTask:
+    """Summary generation through the local stub endpoint."""
+
+    def test_summarizes_thread_with_enough_messages(self, ai_enabled):
+        """A thread with 3 messages is summarized with a single AI call."""
+        thread = _thread_with_messages(3)
+
+        result = summarize_thread_task(str(thread.id))
+
+        assert result == {"success": True, "summarized": True}
+        thread.refresh_from_db()
+        assert thread.summary == "Stub summary"
+        assert len(ai_enabled.prompts) == 1
+        assert "Hello, this is a test message." in ai_enabled.prompts[0]
+
+    def test_skips_short_threads(self, ai_enabled):
+        """Below the token and message thresholds, no AI call is made."""
+        thread = _thread_with_messages(1)
+
+        result = summarize_thread_task(str(thread.id))
+
+        assert result == {"success": True, "summarized": False}
+        assert not ai_enabled.prompts
+        thread.refresh_from_db()
+        assert thread.summary is None
+
+    def test_disabled(self, settings):
+        """Without AI configuration the task is a no-op."""
+        settings.FEATURE_AI_SUMMARY = False
+        thread = _thread_with_messages(3)
+
+        assert summarize_thread_task(str(thread.id)) == {
+            "success": False,
+            "reason": "disabled",
+        }
+
+    def test_retries_when_all_slots_are_busy(self, ai_enabled, settings):
+        """With every concurrency slot taken, the task retries instead of calling AI."""
+        settings.AI_MAX_CONCURRENCY = 1
+        thread = _thread_with_messages(3)
+
+        with ai_queue.ai_concurrency_slot() as acquired:
+            assert acquired is True
+            with patch.object(
+                summarize_thread_task, "retry", side_effect=RuntimeError("retry")
+            ) as mock_retry:
+                with pytest.raises(RuntimeError):
+                    summarize_thread_task(str(thread.id))
+            mock_retry.assert_called_once()
+
+        assert not ai_enabled.prompts
+
+
+@pytest.mark.django_db
+def test_autolabel_thread_task_assigns_labels(ai_enabled):
+    """Labels returned by the stub are attached to the thread."""
+    mailbox = factories.MailboxFactory()
+    label = factories.LabelFactory(mailbox=mailbox, name="Invoices", is_auto=True)
+    thread = _thread_with_messages(1, mailbox=mailbox)
+    ai_enabled.answer = '["Invoices"]'
+
+    result = autolabel_thread_task(str(thread.id), str(mailbox.id))
+
+    assert result == {"success": True}
+    assert list(thread.labels.all()) == [label]
+
+
+@pytest.mark.django_db
+def test_message_text_is_extracted_once():
+    """Extracted text is served from the cache on subsequent reads."""
+    thread = _thread_with_messages(2)
+    messages = list(thread.messages.all())
+
+    first = get_messages_text(messages)
+    with patch.object(models.Message, "get_parsed_data") as mock_parse:
+        second = get_messages_text(list(thread.messages.all()))
+
+    mock_parse.assert_not_called()
+    assert first == second
+    assert all(tokens > 0 for _, tokens in first)
+
+
+def test_prompts_are_loaded_once():
+    """The prompt file is read from disk once per process."""
+    load_prompts.cache_clear()
+    load_prompts()
+    load_prompts()
+    assert load_prompts.cache_info().misses == 1
+
+
+@pytest.mark.django_db
+def test_inbound_delivery_does_not_call_ai(ai_enabled):
+    """Delivery only schedules AI work; it never waits on the AI endpoint."""
+    mailbox = factories.MailboxFactory()
+    parsed = {
+        "subject": "Scheduling test",
+        "from": [{"name": "Sender", "email": "sender@test.com"}],
+        "to": [{"name": "Rcpt", "email": "recipient@deliver.test"}],
+        "textBody": [{"content": "Body."}],
+        "messageId": ["ai.schedule.1@example.com"],
+        "sentAt": timezone.now().isoformat(),
+    }
+
+    with patch("core.mda.inbound_create.schedule_thread_ai") as mock_schedule:
+        message = _create_message_from_inbound(
+            recipient_email=str(mailbox),
+            parsed_email=parsed,
+            raw_data=b"raw mime bytes",
+            mailbox=mailbox,
+        )
+
+    assert message is not None
+    mock_schedule.assert_called_once_with(
+        message.thread_id, mailbox.id, summary=True, autolabels=True
+    )
+    assert not ai_enabled.prompts
+
+
+@pytest.mark.redis
+@pytest.mark.django_db
+class TestDebounce:
+    """Redis-backed debounce of AI work per thread."""
+
+    @pytest.fixture(autouse=True)
+    def _redis_cache(self, redis_cache):
+        pass
+
+    def test_burst_is_scheduled_once(
+        self, redis_cache, django_capture_on_commit_callbacks
+    ):
+        """Repeated schedules for one thread keep a single pending entry."""
+        thread = factories.ThreadFactory()
+        mailbox = factories.MailboxFactory()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for _ in range(5):
+                ai_queue.schedule_thread_ai(
+                    thread.id, mailbox.id, summary=True, autolabels=True
+                )
+
+        assert redis_cache.zcard(ai_queue.PENDING_SUMMARY_KEY) == 1
+        assert redis_cache.zcard(ai_queue.PENDING_AUTOLABELS_KEY) == 1
+
+        # Nothing is due yet: the thread has not been quiet long enough.
+        with (
+            patch("core.ai.tasks.summarize_thread_task.delay") as mock_summary,
+            patch("core.ai.tasks.autolabel_thread_task.delay") as mock_labels,
+        ):
+            assert ai_queue.process_pending_ai() == {"summaries": 0, "autolabels": 0}
+        mock_summary.assert_not_called()
+        mock_labels.assert_not_called()
+
+    def test_due_entries_are_dispatched_once(self, redis_cache):
+        """Due entries are claimed, dispatched, and removed from the queue."""
+        thread_id = str(factories.ThreadFactory().id)
+        mailbox_id = str(factories.MailboxFactory().id)
+        past = time.time() - 1
+        redis_cache.zadd(ai_queue.PENDING_SUMMARY_KEY, {thread_id: past})
+        redis_cache.zadd(
+            ai_queue.PENDING_AUTOLABELS_KEY, {f"{thread_id}:{mailbox_id}": past}
+        )
+
+        with (
+            patch("core.ai.tasks.summarize_thread_task.delay") as mock_summary,
+            patch("core.ai.tasks.autolabel_thread_task.delay") as mock_labels,
+        ):
+            assert ai_queue.process_pending_ai() == {"summaries": 1, "autolabels": 1}
+            assert ai_queue.process_pending_ai() == {"summaries": 0, "autolabels": 0}
+
+        mock_summary.assert_called_once_with(thread_id)
+        mock_labels.assert_called_once_with(thread_id, mailbox_id)
+
+    def test_max_wait_caps_the_delay(self, redis_cache, settings):
+        """A thread that keeps receiving mail is due by the max-wait deadline."""
+        settings.AI_DEBOUNCE_SECONDS = 60
+        settings.AI_DEBOUNCE_MAX_WAIT_SECONDS = 120
+        thread_id = str(factories.ThreadFactory().id)
+        first_seen = time.time() - 100
+        redis_cache.zadd(
+            f"{ai_queue.PENDING_SUMMARY_KEY}:first_seen", {thread_id: first_seen}
+        )
+
+        ai_queue._schedule(ai_queue.PENDING_SUMMARY_KEY, thread_id)
+
+        due_at = redis_cache.zscore(ai_queue.PENDING_SUMMARY_KEY, thread_id)
+        assert due_at == pytest.approx(first_seen + 120)
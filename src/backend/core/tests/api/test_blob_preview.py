@@ -1,15 +1,25 @@
 """Tests for the blob preview endpoint."""
 
+import io
+import secrets
 import uuid
+from email.message import EmailMessage
+from unittest import mock
 
 from django.urls import reverse
 
 import pytest
+from PIL import Image
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core import factories
-from core.enums import MailboxRoleChoices, PreviewRefusalCode
+from core import factories, models
+from core.api.viewsets.blob import BlobViewSet
+from core.enums import (
+    MailboxRoleChoices,
+    PreviewRefusalCode,
+    ThreadAccessRoleChoices,
+)
 from core.services.blob_gc import upload_and_reserve_blob
 
 # Minimal but real magic byte sequences for the formats the preview endpoint
@@ -186,3 +196,188 @@ class TestBlobPreview:
             status.HTTP_401_UNAUTHORIZED,
             status.HTTP_403_FORBIDDEN,
         )
+
+
+def _noise_png(size=256):
+    """A PNG of random pixels, which no format can shrink much losslessly."""
+    image = Image.frombytes("RGB", (size, size), secrets.token_bytes(size * size * 3))
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+@pytest.mark.django_db
+class TestBlobPreviewRendering:
+    """Large images are previewed from a rendering made once per content."""
+
+    @pytest.fixture(autouse=True)
+    def _preview_settings(self, settings):
+        """Render anything above 1 KiB, down to 64 pixels."""
+        settings.BLOB_PREVIEW_MIN_SIZE = 1024
+        settings.BLOB_PREVIEW_MAX_DIMENSION = 64
+
+    @pytest.fixture
+    def authed_client(self):
+        """Authenticated APIClient and its user."""
+        user = factories.UserFactory()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client, user
+
+    @pytest.fixture
+    def mailbox(self, authed_client):
+        """Mailbox the authed user can edit."""
+        _, user = authed_client
+        mb = factories.MailboxFactory()
+        factories.MailboxAccessFactory(
+            mailbox=mb, user=user, role=MailboxRoleChoices.EDITOR
+        )
+        return mb
+
+    @staticmethod
+    def _preview_url(blob_id):
+        """Build the /api/v1.0/blob/{id}/preview/ URL."""
+        return reverse("blob-preview", kwargs={"pk": blob_id})
+
+    def test_rendering_replaces_the_original_once_made(self, authed_client, mailbox):
+        """The first view serves the original and schedules the rendering."""
+        client, _ = authed_client
+        content = _noise_png()
+        blob = upload_and_reserve_blob(mailbox, content, "image/png")
+
+        first = client.get(self._preview_url(blob.id))
+        second = client.get(self._preview_url(blob.id))
+
+        assert first["Content-Type"] == "image/png"
+        assert first.content == content
+        assert first["Cache-Control"] == "private, max-age=2592000"
+
+        assert second.status_code == status.HTTP_200_OK
+        assert second["Content-Type"] == "image/webp"
+        assert second["Cache-Control"] == "private, max-age=31536000, immutable"
+        assert second["Content-Security-Policy"].endswith("sandbox")
+        assert len(second.content) < len(content)
+        assert max(Image.open(io.BytesIO(second.content)).size) == 64
+
+        preview = models.BlobPreview.objects.get()
+        assert preview.source_sha256 == bytes(blob.sha256).hex()
+        assert preview.source_type == "image/png"
+        assert models.Blob.objects.is_referenced(preview.blob_id)
+
+    def test_rendering_is_revalidated_without_content(self, authed_client, mailbox):
+        """A matching If-None-Match is answered 304 without loading the rendering."""
+        client, _ = authed_client
+        blob = upload_and_reserve_blob(mailbox, _noise_png(), "image/png")
+        client.get(self._preview_url(blob.id))
+        etag = client.get(self._preview_url(blob.id))["ETag"]
+
+        with mock.patch.object(models.Blob, "get_content") as get_content:
+            response = client.get(self._preview_url(blob.id), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+        get_content.assert_not_called()
+
+    def test_mime_checks_still_apply_to_rendered_content(self, authed_client, mailbox):
+        """The same bytes declared as another type are refused despite a rendering."""
+        client, _ = authed_client
+        content = _noise_png()
+        blob = upload_and_reserve_blob(mailbox, content, "image/png")
+        client.get(self._preview_url(blob.id))
+        assert models.BlobPreview.objects.filter(blob__isnull=False).exists()
+
+        # The declared type is checked against the type sniffed when the
+        # rendering was made, not against the rendering.
+        models.Blob.objects.filter(id=blob.id).update(content_type="image/jpeg")
+        response = client.get(self._preview_url(blob.id))
+
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        assert response.json()["code"] == PreviewRefusalCode.SUSPICIOUS
+
+    def test_small_images_are_served_as_is(self, authed_client, mailbox):
+        """Below BLOB_PREVIEW_MIN_SIZE no rendering is scheduled."""
+        client, _ = authed_client
+        blob = upload_and_reserve_blob(mailbox, PNG_BYTES, "image/png")
+
+        with mock.patch(
+            "core.services.blob_preview.generate_blob_preview_task.delay"
+        ) as delay:
+            response = client.get(self._preview_url(blob.id))
+
+        assert response.content == PNG_BYTES
+        delay.assert_not_called()
+
+    @staticmethod
+    def _message_with_attachment(mailbox, content):
+        """A message of ``mailbox`` with ``content`` as its only attachment."""
+        mime = EmailMessage()
+        mime["From"] = "sender@example.com"
+        mime["To"] = "recipient@example.com"
+        mime["Subject"] = "Photo"
+        mime.set_content("See attached.")
+        mime.add_attachment(
+            content, maintype="image", subtype="png", filename="photo.png"
+        )
+        thread = factories.ThreadFactory()
+        factories.ThreadAccessFactory(
+            thread=thread, mailbox=mailbox, role=ThreadAccessRoleChoices.EDITOR
+        )
+        return factories.MessageFactory(
+            thread=thread, raw_mime=mime.as_bytes(), has_attachments=True
+        )
+
+    @pytest.mark.parametrize("large", [False, True])
+    def test_original_is_resolved_once(self, authed_client, mailbox, large):
+        """Without a rendering, the original is loaded from the resolved row."""
+        client, _ = authed_client
+        content = _noise_png() if large else PNG_BYTES
+        blob = upload_and_reserve_blob(mailbox, content, "image/png")
+
+        with (
+            mock.patch.object(
+                BlobViewSet,
+                "_resolve_blob_source",
+                autospec=True,
+                side_effect=BlobViewSet._resolve_blob_source,  # pylint: disable=protected-access
+            ) as resolve,
+            mock.patch("core.services.blob_preview.generate_blob_preview_task.delay"),
+        ):
+            response = client.get(self._preview_url(blob.id))
+
+        assert response.content == content
+        resolve.assert_called_once()
+
+    def test_msg_attachment_without_rendering_parsed_once(self, authed_client, mailbox):
+        """A known attachment without rendering parses its message once."""
+        client, _ = authed_client
+        message = self._message_with_attachment(mailbox, PNG_BYTES)
+        url = self._preview_url(f"msg_{message.id}_0")
+        client.get(url)
+
+        with mock.patch.object(
+            models.Message,
+            "get_parsed_data",
+            autospec=True,
+            side_effect=models.Message.get_parsed_data,
+        ) as get_parsed_data:
+            response = client.get(url)
+
+        assert response.content == PNG_BYTES
+        get_parsed_data.assert_called_once()
+
+    def test_msg_attachment_rendering_skips_parsing(self, authed_client, mailbox):
+        """Once rendered, a message attachment is previewed without re-parsing."""
+        client, _ = authed_client
+        content = _noise_png()
+        message = self._message_with_attachment(mailbox, content)
+        url = self._preview_url(f"msg_{message.id}_0")
+
+        first = client.get(url)
+        with mock.patch.object(
+            models.Message, "get_parsed_data", side_effect=AssertionError
+        ):
+            second = client.get(url)
+
+        assert first.content == content
+        assert second["Content-Type"] == "image/webp"
+        assert second["Content-Disposition"] == 'inline; filename="photo.png"'
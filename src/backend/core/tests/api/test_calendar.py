@@ -2347,6 +2347,107 @@ class TestCheckConflictsPerIdentity:
         )
         assert result["existing_partstats"] == {"user@example.com": "TENTATIVE"}
 
+    def test_each_event_is_parsed_once(self):
+        """The summary and the PARTSTAT of an event come from a single parse."""
+        uid = "shared@example.com"
+        start, end = "20260601T100000Z", "20260601T110000Z"
+        copy = self._ics(uid, start, end, ("user@example.com", "ACCEPTED"))
+        other = self._ics("other@example.com", start, end)
+        calendars = [{"id": "cal", "name": "Plain", "owner_email": None}]
+        service = self._service(calendars, {"cal": [copy, other]})
+
+        with mock.patch(
+            "core.services.calendar.service.ICalendar.from_ical",
+            wraps=ICalendar.from_ical,
+        ) as from_ical:
+            result = service.check_conflicts(
+                start=datetime(2026, 6, 1, 10, tzinfo=timezone.utc),
+                end=datetime(2026, 6, 1, 11, tzinfo=timezone.utc),
+                exclude_uid=uid,
+                attendee_email="user@example.com",
+            )
+
+        assert from_ical.call_count == 2
+        assert result["existing_partstats"] == {"user@example.com": "ACCEPTED"}
+        assert len(result["conflicts"]) == 1
+
+    def test_failing_calendar_does_not_hide_the_others(self):
+        """Calendars are queried concurrently; a failed query is skipped and
+        the conflicts keep the order of the calendar list."""
+        start, end = "20260601T100000Z", "20260601T110000Z"
+        calendars = [
+            {"id": f"cal-{index}", "name": f"Cal {index}", "owner_email": None}
+            for index in range(6)
+        ]
+        service = self._service(calendars, {})
+
+        def _calendar_query(cal_id, *_args):
+            if cal_id == "cal-2":
+                raise CalDAVError("REPORT failed", status_code=500)
+            return [self._ics(f"{cal_id}@example.com", start, end)]
+
+        service._calendar_query = _calendar_query  # type: ignore[method-assign]
+        result = service.check_conflicts(
+            start=datetime(2026, 6, 1, 10, tzinfo=timezone.utc),
+            end=datetime(2026, 6, 1, 11, tzinfo=timezone.utc),
+        )
+
+        assert [c["calendar_name"] for c in result["conflicts"]] == [
+            "Cal 0",
+            "Cal 1",
+            "Cal 3",
+            "Cal 4",
+            "Cal 5",
+        ]
+
+
+@pytest.mark.django_db()
+class TestCheckConflictsDiscoveryCache:
+    """Conflict checks reuse the home set and calendar list across requests."""
+
+    def test_second_check_only_queries_the_calendars(self, radicale_server):
+        auth = (RADICALE_USER, RADICALE_PASSWORD)
+        now = datetime.now(tz=timezone.utc).replace(microsecond=0)
+        event_start = now + timedelta(hours=1)
+        event_end = event_start + timedelta(hours=1)
+        for name in ("work", "home"):
+            calendar_url = f"{radicale_server}/{RADICALE_USER}/{name}/"
+            _mkcalendar(calendar_url, name.title(), auth=auth)
+            _put_event(
+                calendar_url,
+                name,
+                SAMPLE_ICS.format(
+                    dtstart=event_start.strftime("%Y%m%dT%H%M%SZ"),
+                    dtend=event_end.strftime("%Y%m%dT%H%M%SZ"),
+                    attendee="user@example.com",
+                ).replace("test-event-001", name),
+                auth=auth,
+            )
+
+        def _check():
+            service = CalDAVService(
+                url=f"{radicale_server}/{RADICALE_USER}/",
+                username=RADICALE_USER,
+                password=RADICALE_PASSWORD,
+            )
+            with mock.patch.object(
+                CalDAVService,
+                "_request",
+                autospec=True,
+                side_effect=CalDAVService._request,
+            ) as request:
+                result = service.check_conflicts(start=event_start, end=event_end)
+            methods = sorted(call.args[1] for call in request.call_args_list)
+            return sorted(c["calendar_name"] for c in result["conflicts"]), methods
+
+        conflicts, methods = _check()
+        assert conflicts == ["Home", "Work"]
+        assert methods.count("REPORT") == 2
+        assert "PROPFIND" in methods
+
+        # A new service (a new API request) for the same principal.
+        assert _check() == (["Home", "Work"], ["REPORT", "REPORT"])
+
 
 # ---------------------------------------------------------------------------
 # respond_to_event: per-calendar owner_email targeting
@@ -1,6 +1,9 @@
 """Test the ContactViewSet."""
 
+from datetime import timedelta
+
 from django.urls import reverse
+from django.utils import timezone
 
 import pytest
 from rest_framework import status
@@ -420,6 +423,87 @@ class TestContactViewSet:
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data) == 0
 
+    def _search(self, mailbox, query, **params):
+        user = factories.UserFactory()
+        factories.MailboxAccessFactory(
+            mailbox=mailbox, user=user, role=models.MailboxRoleChoices.EDITOR
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get(reverse("contacts-list"), {"q": query, **params})
+        assert response.status_code == status.HTTP_200_OK
+        return [contact["email"] for contact in response.data]
+
+    def test_list_contacts_search_accent_insensitive(self):
+        """Accents are ignored on both sides of the search."""
+        mailbox = factories.MailboxFactory()
+        factories.ContactFactory(
+            mailbox=mailbox, name="Cécile Dupré", email="cecile@example.com"
+        )
+
+        assert self._search(mailbox, "cecile dupre") == ["cecile@example.com"]
+        assert self._search(mailbox, "DUPRÉ") == ["cecile@example.com"]
+
+    def test_list_contacts_search_short_word_matches_word_start(self):
+        """Words shorter than three characters only match the start of words."""
+        mailbox = factories.MailboxFactory()
+        factories.ContactFactory(
+            mailbox=mailbox, name="John Doe", email="john@example.com"
+        )
+        factories.ContactFactory(
+            mailbox=mailbox, name="Ada Lovelace", email="ada@example.com"
+        )
+
+        assert self._search(mailbox, "do") == ["john@example.com"]
+        assert self._search(mailbox, "ad") == ["ada@example.com"]
+        # "oe" is inside "Doe", not at the start of a word
+        assert not self._search(mailbox, "oe")
+
+    def test_list_contacts_search_ranking(self):
+        """Prefix matches come first, then recently used contacts, then by name."""
+        mailbox = factories.MailboxFactory()
+        now = timezone.now()
+        factories.ContactFactory(
+            mailbox=mailbox, name="Alice Martin", email="alice@example.com"
+        )
+        factories.ContactFactory(
+            mailbox=mailbox,
+            name="Bob Martin",
+            email="bob@example.com",
+            last_used_at=now - timedelta(days=30),
+        )
+        factories.ContactFactory(
+            mailbox=mailbox,
+            name="Carol Martin",
+            email="carol@example.com",
+            last_used_at=now,
+        )
+        factories.ContactFactory(
+            mailbox=mailbox, name="Martine Roux", email="martine@example.com"
+        )
+
+        assert self._search(mailbox, "martin", mailbox_id=str(mailbox.id)) == [
+            "martine@example.com",
+            "carol@example.com",
+            "bob@example.com",
+            "alice@example.com",
+        ]
+
+    def test_list_contacts_limit(self, settings):
+        """At most CONTACTS_AUTOCOMPLETE_LIMIT contacts are returned."""
+        settings.CONTACTS_AUTOCOMPLETE_LIMIT = 3
+        mailbox = factories.MailboxFactory()
+        for index in range(5):
+            factories.ContactFactory(
+                mailbox=mailbox, name=f"User {index}", email=f"user{index}@example.com"
+            )
+
+        assert self._search(mailbox, "user") == [
+            "user0@example.com",
+            "user1@example.com",
+            "user2@example.com",
+        ]
+
     def test_retrieve_contact(self):
         """Test retrieving a specific contact."""
         # Create authenticated user with access to a mailbox
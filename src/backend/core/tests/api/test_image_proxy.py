@@ -1,20 +1,25 @@
 """Tests for the image proxy API."""
 # pylint: disable=too-many-public-methods
 
+import base64
 import io
 import socket
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import MagicMock, patch
 from urllib.parse import quote
 
 from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 import pytest
 import requests
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core import enums, factories
+from core import enums, factories, models
 from core.enums import MailboxRoleChoices
 
 
@@ -718,3 +723,143 @@ class TestImageProxyViewSet:
         response = client.get(url)
 
         assert response.status_code == status.HTTP_200_OK
+
+
+# 1x1 transparent PNG.
+PNG_IMAGE = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+
+class _StubImageHandler(BaseHTTPRequestHandler):
+    """Serve ``server.body`` with ``server.headers`` and count the hits."""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer every path with the configured image."""
+        self.server.hits += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(self.server.body)))
+        for name, value in self.server.headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep test output quiet."""
+
+
+@pytest.fixture(name="image_stub_server")
+def fixture_image_stub_server():
+    """Run a local image server, reachable as ``images.example.com``.
+
+    The hostname passes the SSRF validation by resolving to the stub.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubImageHandler)
+    server.hits = 0
+    server.body = PNG_IMAGE
+    server.headers = {}
+    server.base_url = f"http://images.example.com:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with patch("core.services.ssrf.validate_hostname", return_value=["127.0.0.1"]):
+        yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.django_db
+@override_settings(IMAGE_PROXY_ENABLED=True)
+class TestImageProxyCache:
+    """Fetched images are kept in blob storage and served from there."""
+
+    @pytest.fixture
+    def proxy_get(self):
+        """Fetch ``url`` through the proxy as a new user and mailbox."""
+
+        def _get(url):
+            access = factories.MailboxAccessFactory(role=MailboxRoleChoices.VIEWER)
+            client = APIClient()
+            client.force_authenticate(user=access.user)
+            return client.get(
+                reverse("image-proxy-list", kwargs={"mailbox_id": access.mailbox_id})
+                + f"?url={quote(url)}"
+            )
+
+        return _get
+
+    def test_second_request_is_served_from_cache(self, image_stub_server, proxy_get):
+        """The image is fetched once, whoever opens it next."""
+        url = f"{image_stub_server.base_url}/logo.png"
+
+        first = proxy_get(url)
+        second = proxy_get(url.replace("images.example.com", "IMAGES.example.com"))
+
+        assert first.status_code == second.status_code == status.HTTP_200_OK
+        assert first.content == second.content == PNG_IMAGE
+        assert second["Content-Type"] == "image/png"
+        assert second["Content-Security-Policy"] == "default-src 'none'"
+        assert image_stub_server.hits == 1
+
+        entry = models.ProxiedImage.objects.get()
+        assert entry.blob.get_content() == PNG_IMAGE
+        assert models.Blob.objects.is_referenced(entry.blob_id)
+
+    def test_identical_images_share_a_blob(self, image_stub_server, proxy_get):
+        """Two URLs serving the same bytes are stored once."""
+        proxy_get(f"{image_stub_server.base_url}/a.png")
+        proxy_get(f"{image_stub_server.base_url}/b.png")
+
+        assert image_stub_server.hits == 2
+        assert models.ProxiedImage.objects.count() == 2
+        assert models.ProxiedImage.objects.values("blob").distinct().count() == 1
+
+    @pytest.mark.parametrize(
+        "cache_control", ["no-store", "no-cache", "private, max-age=600", "max-age=0"]
+    )
+    def test_upstream_cache_headers_are_honored(
+        self, image_stub_server, proxy_get, cache_control
+    ):
+        """Responses the origin doesn't want cached are fetched every time."""
+        image_stub_server.headers = {"Cache-Control": cache_control}
+        url = f"{image_stub_server.base_url}/tracker.png"
+
+        proxy_get(url)
+        response = proxy_get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert image_stub_server.hits == 2
+        assert not models.ProxiedImage.objects.exists()
+
+    def test_upstream_max_age_shortens_ttl(self, image_stub_server, proxy_get):
+        """max-age is kept when below IMAGE_PROXY_STORAGE_TTL."""
+        image_stub_server.headers = {"Cache-Control": "public, max-age=600"}
+
+        proxy_get(f"{image_stub_server.base_url}/logo.png")
+
+        expires_at = models.ProxiedImage.objects.get().expires_at
+        assert expires_at <= timezone.now() + timedelta(seconds=600)
+
+    def test_expired_entry_is_refreshed(self, image_stub_server, proxy_get):
+        """An expired entry is fetched again and its row refreshed."""
+        url = f"{image_stub_server.base_url}/logo.png"
+        proxy_get(url)
+        models.ProxiedImage.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        proxy_get(url)
+
+        assert image_stub_server.hits == 2
+        assert models.ProxiedImage.objects.get().expires_at > timezone.now()
+
+    @override_settings(IMAGE_PROXY_STORAGE_MAX_SIZE=0)
+    def test_cache_disabled(self, image_stub_server, proxy_get):
+        """IMAGE_PROXY_STORAGE_MAX_SIZE=0 turns the cache off."""
+        url = f"{image_stub_server.base_url}/logo.png"
+
+        proxy_get(url)
+        proxy_get(url)
+
+        assert image_stub_server.hits == 2
+        assert not models.ProxiedImage.objects.exists()
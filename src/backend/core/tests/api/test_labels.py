@@ -1,7 +1,10 @@
 """Tests for the label API endpoints."""
 
 # pylint: disable=redefined-outer-name, unused-argument, too-many-public-methods, too-many-lines
+from datetime import timedelta
+
 from django.urls import reverse
+from django.utils import timezone
 
 import pytest
 from rest_framework import status
@@ -11,6 +14,7 @@ from core import enums, models
 from core.factories import (
     LabelFactory,
     MailboxFactory,
+    ThreadAccessFactory,
     ThreadFactory,
     UserFactory,
 )
@@ -1297,3 +1301,76 @@ class TestLabelViewSet:
         assert data[1]["slug"] == "beta"
         assert data[2]["slug"] == "charlie"
         assert data[3]["slug"] == "zebra"
+
+    def test_list_labels_thread_counts(self, api_client, mailbox, user):
+        """Each label carries its thread and unread thread counts."""
+        now = timezone.now()
+        parent = LabelFactory(mailbox=mailbox, name="Work")
+        child = LabelFactory(mailbox=mailbox, name="Work/Projects")
+        LabelFactory(mailbox=mailbox, name="Empty")
+
+        def labelled_thread(label, read_at=None, **thread_fields):
+            thread = ThreadFactory(messaged_at=now, **thread_fields)
+            ThreadAccessFactory(
+                thread=thread,
+                mailbox=mailbox,
+                role=enums.ThreadAccessRoleChoices.EDITOR,
+                read_at=read_at,
+            )
+            label.threads.add(thread)
+            return thread
+
+        labelled_thread(parent)
+        labelled_thread(parent, read_at=now - timedelta(hours=1))
+        labelled_thread(parent, read_at=now + timedelta(seconds=1))
+        labelled_thread(parent, is_trashed=True)
+        labelled_thread(parent, is_spam=True)
+        shared = labelled_thread(child)
+        # Another mailbox having read the thread doesn't make it read here
+        ThreadAccessFactory(
+            thread=shared,
+            role=enums.ThreadAccessRoleChoices.EDITOR,
+            read_at=now + timedelta(seconds=1),
+        )
+
+        response = api_client.get(
+            reverse("labels-list"), {"mailbox_id": str(mailbox.id)}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        empty, work = response.json()
+
+        assert (work["threads_count"], work["unread_threads_count"]) == (3, 2)
+        projects = work["children"][0]
+        assert (projects["threads_count"], projects["unread_threads_count"]) == (
+            1,
+            1,
+        )
+        assert (empty["threads_count"], empty["unread_threads_count"]) == (0, 0)
+
+    def test_list_labels_query_count(
+        self, api_client, mailbox, django_assert_num_queries
+    ):
+        """The query count doesn't grow with the number of labels."""
+        for index in range(20):
+            label = LabelFactory(mailbox=mailbox, name=f"Root{index}")
+            LabelFactory(mailbox=mailbox, name=f"Root{index}/Child")
+            label.threads.add(ThreadFactory())
+
+        # Labels, then the grouped thread counts
+        with django_assert_num_queries(2):
+            response = api_client.get(
+                reverse("labels-list"), {"mailbox_id": str(mailbox.id)}
+            )
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 20
+        assert all(len(label["children"]) == 1 for label in response.json())
+
+    def test_list_labels_orphaned_child_is_root(self, api_client, mailbox):
+        """A child whose parent is missing is listed at the root."""
+        LabelFactory(mailbox=mailbox, name="Parent/Child")
+        models.Label.objects.filter(mailbox=mailbox, name="Parent").delete()
+
+        response = api_client.get(
+            reverse("labels-list"), {"mailbox_id": str(mailbox.id)}
+        )
+        assert [label["name"] for label in response.json()] == ["Parent/Child"]
@@ -21,6 +21,25 @@ from core.factories import (
     ThreadFactory,
     make_api_key_channel,
 )
+from core.services.storage_usage import reconcile_storage_usage
+
+
+@pytest.fixture
+def api_client(api_client, monkeypatch):
+    """API client reconciling the storage usage before each GET.
+
+    The signal handlers only apply their deltas on commit, which never
+    happens inside a test transaction; the reconciliation computes the
+    exact values the endpoint must report.
+    """
+    get = api_client.get
+
+    def reconciled_get(*args, **kwargs):
+        reconcile_storage_usage()
+        return get(*args, **kwargs)
+
+    monkeypatch.setattr(api_client, "get", reconciled_get)
+    return api_client
 
 
 @pytest.fixture
@@ -27,6 +27,7 @@ from core.factories import (
     make_api_key_channel,
 )
 from core.models import MailboxAccess, MailDomain
+from core.services.storage_usage import reconcile_storage_usage
 
 
 def _make_metrics_api_key():
@@ -66,6 +67,24 @@ def check_results_for_key(
     raise KeyError(f"No result found with key: {group_key} {group_value}")
 
 
+@pytest.fixture
+def api_client(api_client, monkeypatch):
+    """API client reconciling the storage usage before each GET.
+
+    The signal handlers only apply their deltas on commit, which never
+    happens inside a test transaction; the reconciliation computes the
+    exact values the endpoint must report.
+    """
+    get = api_client.get
+
+    def reconciled_get(*args, **kwargs):
+        reconcile_storage_usage()
+        return get(*args, **kwargs)
+
+    monkeypatch.setattr(api_client, "get", reconciled_get)
+    return api_client
+
+
 @pytest.fixture
 def url():
     """
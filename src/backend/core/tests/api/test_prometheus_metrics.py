@@ -4,6 +4,7 @@
 import sys
 from importlib import import_module, reload
 
+from django.core.cache import cache
 from django.test import override_settings
 from django.urls import clear_url_caches, reverse
 
@@ -12,6 +13,7 @@ from prometheus_client.parser import text_string_to_metric_families
 
 from core.enums import MessageDeliveryStatusChoices
 from core.factories import AttachmentFactory, MessageRecipientFactory
+from core.metrics_tasks import refresh_db_metrics_task
 
 
 @pytest.fixture
@@ -49,6 +51,7 @@ class TestPrometheusMetrics:
     @pytest.fixture(autouse=True)
     def configure_settings(self):
         """Run before each test"""
+        cache.clear()
         self.reload_urls()
 
     def reload_urls(self):
@@ -260,3 +263,57 @@ class TestPrometheusMetrics:
         metrics = response_to_metrics_dict(response)
 
         assert metrics[("draft_attachments_total_size_bytes")] == sum(blob_sizes)
+
+    @pytest.mark.django_db
+    def test_db_gauges_are_served_from_cache(self, api_client, settings, url):
+        """
+        Test that scrapes serve the cached database gauges until the
+        periodic refresh task recomputes them.
+        """
+        auth = f"Bearer {settings.PROMETHEUS_API_KEY}"
+        response = api_client.get(url, HTTP_AUTHORIZATION=auth)
+        assert response_to_metrics_dict(response)["draft_attachment_count"] == 0
+
+        AttachmentFactory.create_batch(size=2)
+
+        response = api_client.get(url, HTTP_AUTHORIZATION=auth)
+        assert response_to_metrics_dict(response)["draft_attachment_count"] == 0
+
+        result = refresh_db_metrics_task.apply().get()
+        assert result == {"success": True, "skipped": False}
+
+        response = api_client.get(url, HTTP_AUTHORIZATION=auth)
+        assert response_to_metrics_dict(response)["draft_attachment_count"] == 2
+
+    @override_settings(ENABLE_PROMETHEUS=False)
+    def test_refresh_db_metrics_task_skipped_when_disabled(self):
+        """Test that the refresh task does nothing without Prometheus."""
+        result = refresh_db_metrics_task.apply().get()
+        assert result == {"success": True, "skipped": True}
+
+    @pytest.mark.django_db
+    def test_request_histograms(self, api_client, settings, url):
+        """
+        Test that requests are recorded in the per-endpoint histograms,
+        including the SQL queries they ran.
+        """
+        auth = f"Bearer {settings.PROMETHEUS_API_KEY}"
+        view = "prometheus-django-metrics"
+
+        # Cold gauge cache: this scrape runs the aggregate queries.
+        api_client.get(url, HTTP_AUTHORIZATION=auth)
+        response = api_client.get(url, HTTP_AUTHORIZATION=auth)
+        before = response_to_metrics_dict(response, with_label="view")
+
+        assert before[("messages_request_latency_seconds_count", view)] >= 1
+        assert before[("messages_request_db_queries_sum", view)] >= 3
+        assert ("messages_request_redis_calls_count", view) in before
+        assert ("messages_request_opensearch_calls_count", view) in before
+        assert ("messages_request_blob_bytes_read_count", view) in before
+
+        response = api_client.get(url, HTTP_AUTHORIZATION=auth)
+        after = response_to_metrics_dict(response, with_label="view")
+        assert (
+            after[("messages_request_latency_seconds_count", view)]
+            == before[("messages_request_latency_seconds_count", view)] + 1
+        )
@@ -2015,3 +2015,27 @@ class TestThreadListQueryCount:
             f"(N+1 regression on prefetch chain?), "
             f"got 1→{queries_1} vs 5→{queries_5}"
         )
+
+    def test_list_query_plan(self, api_client, url):
+        """The page query reads denormalized state: no GROUP BY and no
+        UserEvent subquery, and a bounded number of queries per page."""
+        user, mailbox = self._setup(5, with_labels=True, with_assignees=True)
+        api_client.force_authenticate(user=user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(
+                url, {"mailbox_id": str(mailbox.id), "has_unassigned": "0"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 5
+        assert len(ctx.captured_queries) <= 12
+        for query in ctx.captured_queries:
+            assert "GROUP BY" not in query["sql"]
+        page_query = next(
+            query["sql"]
+            for query in ctx.captured_queries
+            if 'FROM "messages_thread"' in query["sql"] and "LIMIT" in query["sql"]
+        )
+        assert "messages_userevent" not in page_query
+        assert "messages_threaduserstate" in page_query
@@ -0,0 +1,194 @@
+"""Benchmark harness: timing fixture, regression gate and shared stubs.
+
+Benchmarks are excluded from the default run, like fuzz tests. Run them
+against the test Postgres/Redis with ``make bench-back`` (or
+``pytest -m benchmark core/tests/benchmarks``).
+
+Each benchmark times a callable over ``BENCHMARK_ROUNDS`` rounds (after
+one warm-up round) and records min/median/mean. Results of the session
+are written to ``<BENCHMARK_DIR>/latest.json``.
+
+Regression gate: when ``<BENCHMARK_DIR>/baseline.json`` holds an entry
+for a benchmark, the benchmark fails if its median is more than
+``BENCHMARK_TOLERANCE`` (a fraction, default 0.25) slower than the
+baseline median. Run with ``BENCHMARK_SAVE_BASELINE=1`` (``make
+bench-back-baseline``) on the reference commit to record the baseline
+instead of comparing against it. Baselines are machine-specific and are
+not committed.
+
+Dataset sizes for the thread list/stats benchmarks come from
+``BENCHMARK_SCALES`` (comma-separated thread counts, default ``10000``;
+e.g. ``10000,100000,1000000`` for the full matrix).
+"""
+
+# pylint: disable=import-outside-toplevel
+
+import json
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from core.tests.benchmarks.harness import (
+    RESULTS,
+    SAVE_BASELINE,
+    BenchmarkRunner,
+    benchmark_dir,
+    load_json,
+)
+
+
+@pytest.fixture(name="benchmark_baseline", scope="session")
+def fixture_benchmark_baseline(pytestconfig):
+    """Baseline results recorded by a previous ``BENCHMARK_SAVE_BASELINE`` run."""
+    return load_json(benchmark_dir(pytestconfig) / "baseline.json")
+
+
+@pytest.fixture
+def benchmark(request, benchmark_baseline):
+    """Return a ``BenchmarkRunner`` named after the current test."""
+    name = f"{Path(request.node.path).stem}::{request.node.name}"
+    return BenchmarkRunner(name, benchmark_baseline)
+
+
+@pytest.fixture(scope="session")
+def mailbox_dataset(django_db_blocker):
+    """Return a context manager building a bulk-inserted mailbox dataset.
+
+    ``mailbox_dataset(insert, *args)`` creates a user reading a new
+    mailbox, calls ``insert(mailbox, *args)`` outside the per-test
+    transaction and yields ``(user, mailbox)``. On exit, the threads,
+    labels and contacts of the mailbox are dropped with raw deletes,
+    which skip the per-row cascade collector, then the mailbox and user.
+    """
+    from django.db import connection, transaction
+
+    from core import factories, models
+
+    @contextmanager
+    def build(insert, *args):
+        with django_db_blocker.unblock():
+            user = factories.UserFactory()
+            mailbox = factories.MailboxFactory(users_read=[user])
+            insert(mailbox, *args)
+
+        yield user, mailbox
+
+        # The raw deletes run in one transaction so the deferred foreign
+        # key checks pass at commit.
+        # pylint: disable=protected-access
+        with django_db_blocker.unblock():
+            with transaction.atomic():
+                labels = models.Label.objects.filter(mailbox=mailbox)
+                accesses = models.ThreadAccess.objects.filter(mailbox=mailbox)
+                models.Label.threads.through.objects.filter(
+                    label__in=labels
+                )._raw_delete(connection.alias)
+                models.Thread.objects.filter(
+                    id__in=accesses.values("thread_id")
+                )._raw_delete(connection.alias)
+                accesses._raw_delete(connection.alias)
+                labels._raw_delete(connection.alias)
+                models.Contact.objects.filter(mailbox=mailbox)._raw_delete(
+                    connection.alias
+                )
+            mailbox.delete()
+            user.delete()
+
+    return build
+
+
+def pytest_sessionfinish(session):
+    """Write the session results, and the baseline if requested."""
+    if not RESULTS:
+        return
+    directory = benchmark_dir(session.config)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "latest.json").write_text(json.dumps(RESULTS, indent=2))
+    if SAVE_BASELINE:
+        baseline_path = directory / "baseline.json"
+        baseline = load_json(baseline_path)
+        baseline.update(RESULTS)
+        baseline_path.write_text(json.dumps(baseline, indent=2))
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Print a compact table of the session results."""
+    if not RESULTS:
+        return
+    terminalreporter.section("benchmarks")
+    for name, stats in sorted(RESULTS.items()):
+        terminalreporter.write_line(
+            f"{name:<70} median {stats['median'] * 1000:10.2f} ms  "
+            f"min {stats['min'] * 1000:10.2f} ms"
+        )
+
+
+class _StubOpenSearchHandler(BaseHTTPRequestHandler):
+    """Accept index management calls and acknowledge every bulk action."""
+
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Answer ``_bulk`` with one successful item per action line."""
+        length = int(self.headers.get("Content-Length", 0))
+        lines = self.rfile.read(length).splitlines()
+        items = []
+        for line in lines:
+            action = json.loads(line) if line.strip() else {}
+            if len(action) == 1 and next(iter(action)) in {"index", "delete"}:
+                op = next(iter(action))
+                items.append({op: {"_id": action[op].get("_id"), "status": 200}})
+        self.server.bulk_actions += len(items)
+        self._reply({"took": 1, "errors": False, "items": items})
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        """Acknowledge index creation."""
+        self._reply({"acknowledged": True})
+
+    def do_HEAD(self):  # pylint: disable=invalid-name
+        """Report every index as existing."""
+        self.send_response(200)
+        self.end_headers()
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Minimal cluster info."""
+        self._reply({"version": {"number": "2.19.0", "distribution": "opensearch"}})
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep benchmark output quiet."""
+
+
+@pytest.fixture
+def opensearch_stub(settings):
+    """Run a local OpenSearch stub and point the search client at it.
+
+    The stub does no indexing work, so reindex benchmarks measure the
+    document building and HTTP serialization on our side only. The
+    yielded server counts acknowledged actions in ``bulk_actions``.
+    """
+    from core.services.search.index import get_opensearch_client
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOpenSearchHandler)
+    server.bulk_actions = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    settings.OPENSEARCH_HOSTS = [f"http://127.0.0.1:{server.server_address[1]}"]
+    if hasattr(get_opensearch_client, "cached_client"):
+        del get_opensearch_client.cached_client
+
+    yield server
+
+    if hasattr(get_opensearch_client, "cached_client"):
+        del get_opensearch_client.cached_client
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,147 @@
+"""Real-world-shaped MIME corpus for the benchmarks.
+
+The shapes mirror what a mailbox actually receives: short plain-text
+replies, HTML newsletters, deep reply chains with long ``References``,
+messages with attachments and inline images, legacy 8-bit charsets and
+large recipient lists. Everything is generated deterministically so runs
+are comparable; the real captured message from ``core/tests/resources``
+is added as-is.
+"""
+
+import base64
+import random
+from pathlib import Path
+
+from jmap_email import compose_email
+
+RESOURCES_DIR = Path(__file__).resolve().parent.parent / "resources"
+
+_WORDS = (
+    "réunion projet budget livraison contrat facture équipe planning "
+    "semaine retour validation document version client serveur accès "
+    "merci bonjour cordialement urgent demain rapport annexe"
+).split()
+
+
+def _text(rng, paragraphs, words=60):
+    return "\n\n".join(
+        " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+        for _ in range(paragraphs)
+    )
+
+
+def _jmap(rng, index, **overrides):
+    base = {
+        "from": [{"name": f"Expéditeur {index}", "email": f"sender{index}@ext.test"}],
+        "to": [{"name": "Destinataire", "email": "user@bench.test"}],
+        "subject": f"Benchmark message {index}",
+        "sentAt": "2026-01-01T09:00:00+00:00",
+        "messageId": [f"bench-{index}@ext.test"],
+        "textBody": [{"content": _text(rng, 2)}],
+    }
+    base.update(overrides)
+    return base
+
+
+def jmap_corpus():
+    """Return ``(name, jmap_dict)`` pairs covering the common shapes."""
+    rng = random.Random(42)
+    html = "".join(
+        f'<p style="font-family:Arial">{_text(rng, 1, 40)} '
+        f'<a href="https://news.ext.test/track/{i}?utm=bench">lien {i}</a></p>'
+        for i in range(150)
+    )
+    references = [f"ref-{i}@ext.test" for i in range(30)]
+    quoted = _text(rng, 3)
+    for depth in range(12):
+        quoted = (
+            f"{_text(rng, 1, 20)}\n\nLe lundi, quelqu'un {depth} a écrit :\n"
+            + "\n".join(f"> {line}" for line in quoted.splitlines())
+        )
+    attachment = rng.randbytes(400_000)
+    image = rng.randbytes(30_000)
+
+    return [
+        ("plain", _jmap(rng, 1)),
+        (
+            "newsletter",
+            _jmap(
+                rng,
+                2,
+                textBody=[{"content": _text(rng, 20)}],
+                htmlBody=[{"content": f"<html><body>{html}</body></html>"}],
+            ),
+        ),
+        (
+            "reply_chain",
+            _jmap(
+                rng,
+                3,
+                subject="Re: Re: Re: Planning de la semaine",
+                inReplyTo=[references[-1]],
+                references=references,
+                textBody=[{"content": quoted}],
+            ),
+        ),
+        (
+            "attachments",
+            _jmap(
+                rng,
+                4,
+                htmlBody=[
+                    {"content": '<p>Voir le schéma <img src="cid:schema@bench"></p>'}
+                ],
+                attachments=[
+                    {
+                        "name": "rapport annuel.pdf",
+                        "type": "application/pdf",
+                        "content": base64.b64encode(attachment).decode("ascii"),
+                    },
+                    {
+                        "name": "schema.png",
+                        "type": "image/png",
+                        "content": base64.b64encode(image).decode("ascii"),
+                        "disposition": "inline",
+                        "cid": "schema@bench",
+                    },
+                ],
+            ),
+        ),
+        (
+            "many_recipients",
+            _jmap(
+                rng,
+                5,
+                to=[
+                    {"name": f"Agent {i}", "email": f"agent{i}@bench.test"}
+                    for i in range(150)
+                ],
+                cc=[
+                    {"name": f"Copie {i}", "email": f"cc{i}@ext.test"}
+                    for i in range(50)
+                ],
+            ),
+        ),
+    ]
+
+
+def _latin1_message():
+    body = "Bonjour,\n\nLa facture de décembre est jointe. Merci à l'équipe.\n"
+    return (
+        b"From: =?iso-8859-1?q?Fran=E7ois?= <francois@legacy.test>\r\n"
+        b"To: user@bench.test\r\n"
+        b"Subject: =?iso-8859-1?q?Facture_d=E9cembre?=\r\n"
+        b"Date: Mon, 05 Jan 2026 10:00:00 +0100\r\n"
+        b"Message-ID: <latin1@legacy.test>\r\n"
+        b"MIME-Version: 1.0\r\n"
+        b"Content-Type: text/plain; charset=iso-8859-1\r\n"
+        b"Content-Transfer-Encoding: 8bit\r\n\r\n" + body.encode("iso-8859-1") * 20
+    )
+
+
+def raw_corpus():
+    """Return ``(name, raw_bytes)`` pairs of the whole corpus."""
+    corpus = [(name, compose_email(jmap)) for name, jmap in jmap_corpus()]
+    corpus.append(("latin1", _latin1_message()))
+    corpus.append(("captured", (RESOURCES_DIR / "message.eml").read_bytes()))
+    return corpus
@@ -0,0 +1,96 @@
+"""Timing and regression-gate primitives of the benchmark suite.
+
+Configuration comes from the environment so the same suite serves quick
+local runs and the full matrix; see ``conftest.py`` for the workflow.
+"""
+
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+
+ROUNDS = int(os.environ.get("BENCHMARK_ROUNDS", "5"))
+TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", "0.25"))
+SAVE_BASELINE = os.environ.get("BENCHMARK_SAVE_BASELINE", "") not in ("", "0")
+SCALES = [
+    int(value)
+    for value in os.environ.get("BENCHMARK_SCALES", "10000").split(",")
+    if value.strip()
+]
+
+# Slowdowns below this many seconds are timer noise, whatever the ratio.
+MIN_REGRESSION_SECONDS = 0.002
+
+RESULTS: dict[str, dict] = {}
+
+
+def benchmark_dir(config) -> Path:
+    """Directory holding ``latest.json`` and ``baseline.json``."""
+    return Path(os.environ.get("BENCHMARK_DIR", config.rootpath / ".benchmarks"))
+
+
+def load_json(path: Path) -> dict:
+    """Load a results file, or an empty dict when there is none yet."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+class BenchmarkRunner:
+    """Time a callable and check it against the stored baseline."""
+
+    def __init__(self, name: str, baseline: dict):
+        self.name = name
+        self.baseline = baseline
+
+    # pylint: disable-next=too-many-arguments
+    def __call__(self, func, *args, setup=None, rounds=None, warmup=1, items=1):
+        """Run ``func(*args)`` ``rounds`` times and return its last result.
+
+        ``setup`` is called (untimed) before every round and its return
+        value replaces ``args`` — use it for per-round inputs such as
+        unique Message-IDs. ``items`` is the number of operations one call
+        performs, used to report throughput.
+        """
+        rounds = rounds or ROUNDS
+        result = None
+        for _ in range(warmup):
+            result = func(*(setup() if setup else args))
+
+        timings = []
+        for _ in range(rounds):
+            call_args = setup() if setup else args
+            start = time.perf_counter()
+            result = func(*call_args)
+            timings.append(time.perf_counter() - start)
+
+        median = statistics.median(timings)
+        stats = {
+            "rounds": rounds,
+            "min": min(timings),
+            "median": median,
+            "mean": statistics.fmean(timings),
+            "ops_per_second": items / median if median else None,
+        }
+        RESULTS[self.name] = stats
+        self._check(stats)
+        return result
+
+    def _check(self, stats):
+        reference = self.baseline.get(self.name)
+        if SAVE_BASELINE or not reference:
+            return
+        slower_by = stats["median"] - reference["median"]
+        if (
+            stats["median"] > reference["median"] * (1 + TOLERANCE)
+            and slower_by > MIN_REGRESSION_SECONDS
+        ):
+            pytest.fail(
+                f"{self.name} regressed: median {stats['median']:.4f}s vs "
+                f"baseline {reference['median']:.4f}s "
+                f"(+{slower_by / reference['median']:.0%}, "
+                f"tolerance {TOLERANCE:.0%})"
+            )
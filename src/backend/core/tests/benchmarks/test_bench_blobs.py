@@ -0,0 +1,47 @@
+"""Benchmarks for blob storage (hashing, compression, encryption)."""
+
+import random
+
+import pytest
+
+from core import models
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+_CONTENT_SIZE = 256 * 1024
+
+
+def _content(rng):
+    # Half random, half repetitive: compresses like a typical message.
+    half = _CONTENT_SIZE // 2
+    return rng.randbytes(half) + (b"Lorem ipsum dolor. " * half)[:half]
+
+
+def test_create_blob_new_content(benchmark):
+    """Store content that is not deduplicated."""
+    rng = random.Random(1)
+
+    blob = benchmark(
+        models.Blob.objects.create_blob,
+        setup=lambda: (_content(rng), "message/rfc822"),
+    )
+
+    assert blob.size == _CONTENT_SIZE
+
+
+def test_create_blob_deduplicated(benchmark):
+    """Store content that already exists (hash lookup only)."""
+    content = _content(random.Random(2))
+    existing = models.Blob.objects.create_blob(content, "message/rfc822")
+
+    blob = benchmark(models.Blob.objects.create_blob, content, "message/rfc822")
+
+    assert blob.id == existing.id
+
+
+def test_blob_get_content(benchmark):
+    """Read back, decrypt and decompress a stored blob."""
+    content = _content(random.Random(3))
+    blob = models.Blob.objects.create_blob(content, "message/rfc822")
+
+    assert benchmark(blob.get_content) == content
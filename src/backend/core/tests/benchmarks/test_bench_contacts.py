@@ -0,0 +1,78 @@
+"""Benchmarks for the contact autocomplete at scale.
+
+``BENCHMARK_SCALES`` contacts are bulk-inserted in one mailbox, once per
+scale. With the trigram indexes and the result limit, a search should
+take about the same time at every scale; compare the medians across
+``BENCHMARK_SCALES`` to check it.
+"""
+
+import random
+
+from django.db import connection
+from django.urls import reverse
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import models
+from core.tests.benchmarks.harness import SCALES
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+_INSERT_BATCH_SIZE = 10_000
+
+_FIRST_NAMES = ["Jean", "Marie", "Élodie", "Pierre", "Sophie", "Nicolas", "Zoé"]
+_LAST_NAMES = ["Martin", "Bernard", "Dubois", "Lefèvre", "Moreau", "Girard"]
+
+
+def _insert_contacts(mailbox, count):
+    rng = random.Random(count)
+    for start in range(0, count, _INSERT_BATCH_SIZE):
+        models.Contact.objects.bulk_create(
+            models.Contact(
+                mailbox=mailbox,
+                name=f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)} {index}",
+                email=f"contact{index}@domain{index % 200}.example.com",
+            )
+            for index in range(start, min(start + _INSERT_BATCH_SIZE, count))
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {models.Contact._meta.db_table}")
+
+
+@pytest.fixture(name="contact_dataset", scope="module", params=SCALES)
+def fixture_contact_dataset(request, mailbox_dataset):
+    """A mailbox holding ``scale`` contacts, and a user reading it."""
+    scale = request.param
+    with mailbox_dataset(_insert_contacts, scale) as (user, mailbox):
+        yield scale, user, mailbox
+
+
+@pytest.fixture(name="client")
+def fixture_client(contact_dataset):
+    """An API client authenticated as the dataset user."""
+    _, user, _ = contact_dataset
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "ma",  # short: word-start lookups
+        "lefevre",  # common last name: many matches, ranked and cut
+        "contact4242",  # selective email search
+        "zoe girard",  # two words
+    ],
+)
+def test_contact_autocomplete(benchmark, contact_dataset, client, query, settings):
+    """Autocomplete search in one mailbox and its domain."""
+    _, _, mailbox = contact_dataset
+    url = reverse("contacts-list")
+
+    response = benchmark(client.get, url, {"mailbox_id": str(mailbox.id), "q": query})
+
+    assert response.status_code == 200
+    assert len(response.data) <= settings.CONTACTS_AUTOCOMPLETE_LIMIT
@@ -0,0 +1,160 @@
+"""Benchmarks for inbound delivery and thread stats maintenance."""
+
+import itertools
+import random
+
+from django.db import connection
+
+import pytest
+from jmap_email import parse_email
+
+from core import enums, factories, models
+from core.mda.inbound import deliver_inbound_message
+from core.mda.inbound_create import ImportThreadResolver
+from core.tests.benchmarks.corpus import raw_corpus
+from core.tests.benchmarks.harness import MIN_REGRESSION_SECONDS, RESULTS
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+
+@pytest.fixture(name="mailbox")
+def fixture_mailbox():
+    """The local mailbox receiving the benchmark traffic."""
+    domain = factories.MailDomainFactory(name="bench.test")
+    return factories.MailboxFactory(local_part="user", domain=domain)
+
+
+def test_inbound_delivery_end_to_end(benchmark, mailbox):
+    """Parse and deliver each corpus message as a new message."""
+    # Drop the corpus' own Message-ID headers: each round sets its own.
+    corpus = []
+    for _, raw in raw_corpus():
+        head, separator, body = raw.partition(b"\r\n\r\n")
+        lines = head.split(b"\r\n")
+        head = b"\r\n".join(
+            line for line in lines if not line.lower().startswith(b"message-id:")
+        )
+        corpus.append(head + separator + body)
+    counter = itertools.count()
+
+    def next_batch():
+        # A unique Message-ID per round, or the duplicate check would
+        # short-circuit delivery after the first round.
+        round_index = next(counter)
+        return (
+            [
+                b"Message-ID: <bench-%d-%d@bench.test>\r\n" % (round_index, index) + raw
+                for index, raw in enumerate(corpus)
+            ],
+        )
+
+    def deliver_all(raw_messages):
+        return [
+            deliver_inbound_message(
+                str(mailbox), parse_email(raw), raw, skip_inbound_queue=True
+            )
+            for raw in raw_messages
+        ]
+
+    results = benchmark(deliver_all, setup=next_batch, items=len(corpus))
+
+    assert all(results)
+
+
+def test_thread_update_stats(benchmark, mailbox):
+    """Recompute the denormalized flags of a 50-message thread."""
+    thread = factories.ThreadFactory()
+    factories.ThreadAccessFactory(mailbox=mailbox, thread=thread)
+    for index in range(50):
+        factories.MessageFactory(
+            thread=thread,
+            is_sender=index % 3 == 0,
+            is_archived=index % 7 == 0,
+            is_trashed=index % 11 == 0,
+        )
+
+    benchmark(thread.update_stats)
+
+    thread.refresh_from_db()
+    assert thread.has_messages
+
+
+# Mailbox sizes the import thread lookup is timed at. Its cost per
+# message should not grow with the mailbox: the lookups are indexed.
+_LOOKUP_SCALES = (1_000, 10_000, 100_000)
+_LOOKUP_BATCH_SIZE = 200
+_INSERT_BATCH_SIZE = 10_000
+# Median of each scale, filled in as the scales run
+_lookup_medians: dict[int, float] = {}
+
+
+def _insert_import_threads(mailbox, count):
+    sender = factories.ContactFactory(mailbox=mailbox)
+    for start in range(0, count, _INSERT_BATCH_SIZE):
+        indices = range(start, min(start + _INSERT_BATCH_SIZE, count))
+        # bulk_create skips Thread.save(): set the subject key here.
+        threads = models.Thread.objects.bulk_create(
+            models.Thread(
+                subject=f"Re: Import thread {index}",
+                subject_key=f"import thread {index}",
+            )
+            for index in indices
+        )
+        models.ThreadAccess.objects.bulk_create(
+            models.ThreadAccess(
+                thread=thread,
+                mailbox=mailbox,
+                role=enums.ThreadAccessRoleChoices.EDITOR,
+            )
+            for thread in threads
+        )
+        models.Message.objects.bulk_create(
+            models.Message(
+                thread=thread,
+                sender=sender,
+                subject=thread.subject,
+                mime_id=f"import-{index}@bench.test",
+            )
+            for index, thread in zip(indices, threads, strict=True)
+        )
+
+    with connection.cursor() as cursor:
+        for model in (models.Thread, models.ThreadAccess, models.Message):
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+
+@pytest.mark.parametrize("scale", _LOOKUP_SCALES)
+def test_import_thread_lookup(benchmark, mailbox, scale):
+    """Resolve the threads of a batch of imported messages.
+
+    Half of the batch is found by In-Reply-To, the other half only by
+    subject. The median at each scale must stay within twice the one of
+    the smallest scale.
+    """
+    _insert_import_threads(mailbox, scale)
+    rng = random.Random(scale)
+    batch = [
+        {
+            "subject": f"Re: Import thread {rng.randrange(scale)}",
+            "inReplyTo": [f"import-{rng.randrange(2 * scale)}@bench.test"],
+        }
+        for _ in range(_LOOKUP_BATCH_SIZE)
+    ]
+
+    def resolve_all():
+        resolver = ImportThreadResolver(mailbox)
+        resolver.prefetch(batch)
+        return [resolver.resolve(parsed_email) for parsed_email in batch]
+
+    results = benchmark(resolve_all, items=len(batch))
+
+    assert all(results)
+    median = RESULTS[benchmark.name]["median"]
+    _lookup_medians[scale] = median
+    reference = _lookup_medians.get(_LOOKUP_SCALES[0])
+    if reference is not None and scale != _LOOKUP_SCALES[0]:
+        assert median <= max(2 * reference, reference + MIN_REGRESSION_SECONDS), (
+            f"{median / _LOOKUP_BATCH_SIZE * 1e6:.0f}µs per message at {scale} "
+            f"threads vs {reference / _LOOKUP_BATCH_SIZE * 1e6:.0f}µs at "
+            f"{_LOOKUP_SCALES[0]}"
+        )
@@ -0,0 +1,84 @@
+"""Benchmark for the label tree of a mailbox with 10k labels.
+
+The labels (100 folders of 99 sub-folders) and a few thousand labelled
+threads are bulk-inserted once for the module and deleted on teardown.
+"""
+
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import enums, models
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+ROOTS = 100
+CHILDREN = 99
+THREADS = 5_000
+
+
+def _insert_labels(mailbox):
+    labels = []
+    for root in range(ROOTS):
+        labels.append(
+            models.Label(mailbox=mailbox, name=f"Folder {root}", slug=f"folder-{root}")
+        )
+        labels.extend(
+            models.Label(
+                mailbox=mailbox,
+                name=f"Folder {root}/Sub {child}",
+                slug=f"folder-{root}-sub-{child}",
+            )
+            for child in range(CHILDREN)
+        )
+    labels = models.Label.objects.bulk_create(labels)
+
+    now = timezone.now()
+    threads = models.Thread.objects.bulk_create(
+        models.Thread(subject=f"Thread {index}", messaged_at=now)
+        for index in range(THREADS)
+    )
+    models.ThreadAccess.objects.bulk_create(
+        models.ThreadAccess(
+            thread=thread,
+            mailbox=mailbox,
+            role=enums.ThreadAccessRoleChoices.EDITOR,
+            read_at=now if index % 2 else None,
+        )
+        for index, thread in enumerate(threads)
+    )
+    models.Label.threads.through.objects.bulk_create(
+        models.Label.threads.through(
+            label_id=labels[index % len(labels)].id, thread_id=thread.id
+        )
+        for index, thread in enumerate(threads)
+    )
+
+    with connection.cursor() as cursor:
+        for model in (models.Label, models.Thread, models.ThreadAccess):
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+
+@pytest.fixture(name="label_dataset", scope="module")
+def fixture_label_dataset(mailbox_dataset):
+    """A mailbox holding 10k labels, and a user reading it."""
+    with mailbox_dataset(_insert_labels) as dataset:
+        yield dataset
+
+
+def test_label_tree(benchmark, label_dataset):
+    """Sidebar label tree with per-label counts."""
+    user, mailbox = label_dataset
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = benchmark(
+        client.get, reverse("labels-list"), {"mailbox_id": str(mailbox.id)}
+    )
+
+    assert response.status_code == 200
+    assert len(response.data) == ROOTS
+    assert sum(label["unread_threads_count"] for label in response.data) > 0
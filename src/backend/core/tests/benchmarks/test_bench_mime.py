@@ -0,0 +1,37 @@
+"""Benchmarks for MIME parsing and composition throughput."""
+
+import pytest
+from jmap_email import compose_email, parse_email
+
+from core.tests.benchmarks.corpus import jmap_corpus, raw_corpus
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture(name="raw_messages", scope="module")
+def fixture_raw_messages():
+    """Raw bytes of the whole corpus."""
+    return [raw for _, raw in raw_corpus()]
+
+
+def test_parse_email_corpus(benchmark, raw_messages):
+    """Parse every corpus message, as the inbound pipeline does."""
+
+    def parse_all():
+        return [parse_email(raw) for raw in raw_messages]
+
+    parsed = benchmark(parse_all, items=len(raw_messages))
+
+    assert all(parsed)
+
+
+def test_compose_email_corpus(benchmark):
+    """Compose every corpus message, as the outbound pipeline does."""
+    messages = [jmap for _, jmap in jmap_corpus()]
+
+    def compose_all():
+        return [compose_email(jmap) for jmap in messages]
+
+    composed = benchmark(compose_all, items=len(messages))
+
+    assert all(composed)
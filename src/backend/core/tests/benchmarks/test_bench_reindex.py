@@ -0,0 +1,32 @@
+"""Benchmark for bulk reindexing against a stub OpenSearch."""
+
+import pytest
+
+from core import factories, models
+from core.services.search.index import reindex_bulk_threads
+from core.tests.benchmarks.corpus import raw_corpus
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+_THREADS = 200
+_MESSAGES_PER_THREAD = 3
+
+
+def test_reindex_bulk_threads(benchmark, opensearch_stub):
+    """Build and send the documents of 200 threads of 3 messages."""
+    mailbox = factories.MailboxFactory()
+    corpus = [raw for name, raw in raw_corpus() if name != "attachments"]
+    for thread_index in range(_THREADS):
+        thread = factories.ThreadFactory()
+        factories.ThreadAccessFactory(mailbox=mailbox, thread=thread)
+        for message_index in range(_MESSAGES_PER_THREAD):
+            raw = corpus[(thread_index + message_index) % len(corpus)]
+            factories.MessageFactory(thread=thread, raw_mime=raw)
+
+    result = benchmark(
+        reindex_bulk_threads, models.Thread.objects.all(), items=_THREADS
+    )
+
+    assert result["indexed_threads"] == _THREADS
+    assert result["failure_count"] == 0
+    assert opensearch_stub.bulk_actions > 0
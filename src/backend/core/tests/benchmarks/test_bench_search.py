@@ -0,0 +1,107 @@
+"""Benchmark of the from:/to: substring queries against a real OpenSearch.
+
+Compares the trigram phrase queries of ``search_threads`` with the
+leading-wildcard queries they replaced, on a generated corpus, and
+checks that both find the same messages.
+"""
+# pylint: disable=redefined-outer-name
+
+import random
+
+from django.conf import settings
+
+import pytest
+from opensearchpy.helpers import bulk
+
+from core.services.search import (
+    create_index_if_not_exists,
+    delete_index,
+    get_opensearch_client,
+)
+from core.services.search.mapping import MESSAGE_INDEX
+from core.services.search.search import _substring_clauses
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(
+        len(settings.OPENSEARCH_HOSTS) == 0, reason="OpenSearch is not configured"
+    ),
+]
+
+_MESSAGES = 50_000
+_QUERIES = ("ohn", "smith", "@ext3", "ext7.test", "rtin", "ma")
+_FIRST_NAMES = ("john", "sarah", "robert", "maria", "martin", "lucie", "amine")
+_LAST_NAMES = ("smith", "johnson", "brown", "garcia", "dupont", "martinez", "nguyen")
+
+
+def _message_docs():
+    rng = random.Random(42)
+    for index in range(_MESSAGES):
+        first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+        recipient = rng.choice(_FIRST_NAMES)
+        yield {
+            "_index": MESSAGE_INDEX,
+            "_id": f"message-{index}",
+            "_routing": f"thread-{index // 3}",
+            "relation": {"name": "message", "parent": f"thread-{index // 3}"},
+            "thread_id": f"thread-{index // 3}",
+            "sender_name": f"{first.title()} {last.title()}",
+            "sender_email": f"{first}.{last}{index}@ext{index % 10}.test",
+            "to_name": [f"{recipient.title()} Bench"],
+            "to_email": [f"{recipient}@bench.test"],
+        }
+
+
+@pytest.fixture(scope="module")
+def search_corpus():
+    """Index ``_MESSAGES`` generated message documents."""
+    delete_index()
+    create_index_if_not_exists()
+    es = get_opensearch_client()
+    bulk(es, _message_docs(), chunk_size=5000, request_timeout=120)
+    es.indices.refresh(index=MESSAGE_INDEX)
+    yield es
+    delete_index()
+
+
+def _wildcard_query(value):
+    """The query ``from:<value>`` used to build."""
+    return [
+        {"wildcard": {"sender_email": f"*{value.lower()}*"}},
+        {"wildcard": {"sender_name": f"*{value}*"}},
+    ]
+
+
+def _ngram_query(value):
+    return _substring_clauses(
+        value, email_fields=("sender_email",), name_fields=("sender_name",)
+    )
+
+
+def _count_all(es, build_query):
+    """Count the matches of every benchmark query, bypassing the request cache."""
+    return [
+        es.search(  # pylint: disable=unexpected-keyword-arg
+            index=MESSAGE_INDEX,
+            body={
+                "query": {
+                    "bool": {"should": build_query(value), "minimum_should_match": 1}
+                },
+                "size": 0,
+                "track_total_hits": True,
+            },
+            request_cache=False,
+        )["hits"]["total"]["value"]
+        for value in _QUERIES
+    ]
+
+
+@pytest.mark.parametrize(
+    "build_query", [_wildcard_query, _ngram_query], ids=["wildcard", "ngram"]
+)
+def test_sender_substring_search(benchmark, search_corpus, build_query):
+    """Run every ``from:`` substring query once per round."""
+    counts = benchmark(_count_all, search_corpus, build_query, items=len(_QUERIES))
+
+    assert counts == _count_all(search_corpus, _wildcard_query)
+    assert all(counts)
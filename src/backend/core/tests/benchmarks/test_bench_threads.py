@@ -0,0 +1,108 @@
+"""Benchmarks for the thread list and stats endpoints at scale.
+
+The dataset (``BENCHMARK_SCALES`` threads in one mailbox) is bulk-inserted
+once per scale and committed outside the per-test transaction, so every
+benchmark of that scale reads the same data. It is deleted on teardown.
+"""
+
+import random
+from datetime import timedelta
+
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+from rest_framework.test import APIClient
+
+from core import enums, models
+from core.tests.benchmarks.harness import SCALES
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db]
+
+_INSERT_BATCH_SIZE = 10_000
+
+
+def _insert_threads(mailbox, count):
+    rng = random.Random(count)
+    now = timezone.now()
+    for start in range(0, count, _INSERT_BATCH_SIZE):
+        threads = []
+        for index in range(start, min(start + _INSERT_BATCH_SIZE, count)):
+            messaged_at = now - timedelta(minutes=index)
+            trashed = rng.random() < 0.05
+            threads.append(
+                models.Thread(
+                    subject=f"Benchmark thread {index}",
+                    snippet="Lorem ipsum dolor sit amet",
+                    messaged_at=messaged_at,
+                    active_messaged_at=None if trashed else messaged_at,
+                    trashed_messaged_at=messaged_at if trashed else None,
+                    has_trashed=trashed,
+                    is_trashed=trashed,
+                    has_active=not trashed,
+                    has_archived=rng.random() < 0.3,
+                    has_sender=rng.random() < 0.4,
+                    has_attachments=rng.random() < 0.2,
+                    is_spam=rng.random() < 0.02,
+                    sender_names=[f"Sender {index % 500}"],
+                )
+            )
+        models.Thread.objects.bulk_create(threads)
+        models.ThreadAccess.objects.bulk_create(
+            models.ThreadAccess(
+                thread=thread,
+                mailbox=mailbox,
+                role=enums.ThreadAccessRoleChoices.EDITOR,
+                read_at=now if rng.random() < 0.7 else None,
+                starred_at=now if rng.random() < 0.05 else None,
+            )
+            for thread in threads
+        )
+
+    with connection.cursor() as cursor:
+        for model in (models.Thread, models.ThreadAccess):
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+
+@pytest.fixture(name="thread_dataset", scope="module", params=SCALES)
+def fixture_thread_dataset(request, mailbox_dataset):
+    """A mailbox holding ``scale`` threads, and a user reading it."""
+    scale = request.param
+    with mailbox_dataset(_insert_threads, scale) as (user, mailbox):
+        yield scale, user, mailbox
+
+
+@pytest.fixture(name="client")
+def fixture_client(thread_dataset):
+    """An API client authenticated as the dataset user."""
+    _, user, _ = thread_dataset
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def test_thread_list_first_page(benchmark, thread_dataset, client):
+    """First page of the inbox, default ordering."""
+    _, _, mailbox = thread_dataset
+    url = reverse("threads-list")
+
+    response = benchmark(client.get, url, {"mailbox_id": str(mailbox.id)})
+
+    assert response.status_code == 200
+    assert response.data["results"]
+
+
+def test_thread_stats(benchmark, thread_dataset, client):
+    """Counters shown in the sidebar for one mailbox."""
+    _, _, mailbox = thread_dataset
+    url = reverse("threads-stats")
+    params = {
+        "mailbox_id": str(mailbox.id),
+        "stats_fields": "all,all_unread,has_starred,has_active,has_trashed",
+    }
+
+    response = benchmark(client.get, url, params)
+
+    assert response.status_code == 200
+    assert response.data["all"] > 0
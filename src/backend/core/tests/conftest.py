@@ -63,6 +63,14 @@ def redis_cache(settings):
         pass
 
 
+@pytest.fixture(autouse=True)
+def _clear_dns_cache():
+    """Forget DNS answers cached in-process by earlier tests."""
+    from core.services.dns.cache import clear_local_cache
+
+    clear_local_cache()
+
+
 @pytest.fixture(scope="session", autouse=True)
 def ensure_storage_buckets():
     """Create any missing S3 buckets needed by tests (session-scoped, autouse).
@@ -0,0 +1,92 @@
+"""Tests for the cached DNS TXT lookups."""
+# pylint: disable=unused-argument
+
+import time
+from unittest.mock import MagicMock, Mock, patch
+
+import dns.exception
+import dns.resolver
+import pytest
+
+from core.services.dns import cache as dns_cache
+
+RESOLVE = "core.services.dns.cache.dns.resolver.resolve"
+NAME = "sel._domainkey.example.com"
+
+
+def _answers(*records, ttl=600):
+    answers = []
+    for strings in records:
+        answer = Mock()
+        answer.strings = strings
+        answers.append(answer)
+    result = MagicMock()
+    result.__iter__.side_effect = lambda: iter(answers)
+    result.rrset = Mock(ttl=ttl)
+    return result
+
+
+def test_resolve_txt_joins_strings_and_caches():
+    """Split records are joined, and a second lookup hits the cache."""
+    with patch(RESOLVE, return_value=_answers([b"v=DKIM1; ", b"p=abc"])) as resolve:
+        assert dns_cache.resolve_txt(f"{NAME}.") == [b"v=DKIM1; p=abc"]
+        assert dns_cache.resolve_txt(NAME.upper().encode()) == [b"v=DKIM1; p=abc"]
+
+    resolve.assert_called_once_with(NAME, "TXT", lifetime=dns_cache.RESOLVE_LIFETIME)
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        dns.resolver.NXDOMAIN,
+        dns.resolver.NoAnswer,
+        dns.resolver.Timeout,
+        dns.resolver.LifetimeTimeout,
+        dns.resolver.NoResolverConfiguration,
+        dns.exception.DNSException,
+    ],
+)
+def test_resolve_txt_negative_caching(error):
+    """Missing records and DNS failures are cached too."""
+    with patch(RESOLVE, side_effect=error) as resolve:
+        assert not dns_cache.resolve_txt(NAME)
+        assert not dns_cache.resolve_txt(NAME)
+
+    resolve.assert_called_once()
+
+
+def test_resolve_txt_respects_ttl(settings):
+    """Entries expire with the record TTL, capped by DNS_CACHE_MAX_TTL."""
+    settings.DNS_CACHE_MAX_TTL = 120
+    with patch(RESOLVE, return_value=_answers([b"v=DKIM1"], ttl=86400)) as resolve:
+        dns_cache.resolve_txt(NAME)
+        with patch.object(dns_cache.time, "time", return_value=time.time() + 119):
+            dns_cache.resolve_txt(NAME)
+        assert resolve.call_count == 1
+
+        with patch.object(dns_cache.time, "time", return_value=time.time() + 121):
+            dns_cache.resolve_txt(NAME)
+        assert resolve.call_count == 2
+
+
+def test_local_cache_is_bounded(monkeypatch):
+    """The in-process tier evicts the least recently used entries."""
+    monkeypatch.setattr(dns_cache, "LOCAL_CACHE_SIZE", 2)
+    with patch(RESOLVE, return_value=_answers([b"v=DKIM1"])) as resolve:
+        for name in ("a.example.com", "b.example.com", "c.example.com"):
+            dns_cache.resolve_txt(name)
+        dns_cache.resolve_txt("a.example.com")
+
+    assert resolve.call_count == 4
+
+
+@pytest.mark.redis
+def test_resolve_txt_shared_between_processes(redis_cache):
+    """With Redis, an answer fetched by one process is reused by others."""
+    with patch(RESOLVE, return_value=_answers([b"v=DKIM1; p=abc"])) as resolve:
+        dns_cache.resolve_txt(NAME)
+        # Another worker process starts with an empty in-process tier.
+        dns_cache.clear_local_cache()
+        assert dns_cache.resolve_txt(NAME) == [b"v=DKIM1; p=abc"]
+
+    resolve.assert_called_once()
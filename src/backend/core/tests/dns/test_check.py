@@ -4,9 +4,14 @@ Tests for DNS checking functionality.
 # pylint: disable=too-many-lines
 
 import json
+import threading
+import time
+from collections import Counter
+from io import StringIO
 from unittest.mock import MagicMock, patch
 
 from django.core.cache import cache
+from django.core.management import call_command
 from django.test import override_settings
 
 import pytest
@@ -14,7 +19,9 @@ from dns.resolver import NXDOMAIN, YXDOMAIN, NoAnswer, NoNameservers, Timeout
 
 from core.models import MailDomain
 from core.services.dns.check import (
+    CachingResolver,
     check_dns_records,
+    check_maildomains_dns,
     check_single_record,
     check_spf_status,
     invalidate_spf_check_cache,
@@ -1588,3 +1595,135 @@ class TestCheckSPFStatus:
             result = check_single_record(maildomain, expected_record)
 
             assert result["status"] == "incorrect"
+
+
+def _mx_answer(*values):
+    """Create a mock dns.resolver answer for MX records."""
+    answers = []
+    for value in values:
+        preference, exchange = value.split()
+        answer = MagicMock()
+        answer.preference = int(preference)
+        answer.exchange = exchange
+        answers.append(answer)
+    return answers
+
+
+class FakeResolver:
+    """Offline resolver answering from a ``{(name, rdtype): answer}`` zone."""
+
+    def __init__(self, zone, delay=0.0):
+        self.zone = zone
+        self.delay = delay
+        self.queries = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, name, rdtype):
+        with self._lock:
+            self.queries[(name, rdtype)] += 1
+        time.sleep(self.delay)
+        answer = self.zone.get((name, rdtype))
+        if answer is None:
+            raise NXDOMAIN()
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.mark.django_db
+class TestCheckMaildomainsDns:
+    """Test the concurrent DNS check of many mail domains."""
+
+    @staticmethod
+    def _zone(maildomain):
+        dkim_key = maildomain.get_active_dkim_key()
+        name = maildomain.name
+        return {
+            (name, "MX"): _mx_answer("10 mx1.messages.org.", "20 mx2.messages.org."),
+            (name, "TXT"): _txt_answer("v=spf1 include:_spf.messages.org -all"),
+            (f"_dmarc.{name}", "TXT"): _txt_answer(
+                "v=DMARC1; p=reject; adkim=s; aspf=s;"
+            ),
+            (f"{dkim_key.selector}._domainkey.{name}", "TXT"): _txt_answer(
+                dkim_key.get_dns_record_value()
+            ),
+        }
+
+    def test_checks_and_stores_results(self, maildomain_factory, settings):
+        """Each domain is checked and its results saved on the MailDomain."""
+        settings.MESSAGES_TECHNICAL_DOMAIN = "messages.org"
+        domains = [maildomain_factory(name=f"domain{i}.com") for i in range(5)]
+        missing = maildomain_factory(name="missing.com")
+        zone = {("_spf.messages.org", "TXT"): _txt_answer("v=spf1 ip4:1.2.3.4 -all")}
+        for maildomain in domains:
+            zone.update(self._zone(maildomain))
+        zone[("domain0.com", "MX")] = _mx_answer("10 mx.other.org.")
+        resolver = FakeResolver(zone, delay=0.01)
+
+        results = check_maildomains_dns([*domains, missing], 3, resolver)
+
+        assert len(results) == 6
+        statuses = {
+            maildomain.name: [r["_check"]["status"] for r in results[maildomain.pk]]
+            for maildomain in [*domains, missing]
+        }
+        # Results keep the order of the expected records (MX, MX, SPF, DMARC, DKIM)
+        assert statuses["domain0.com"] == ["incorrect"] * 2 + ["correct"] * 3
+        for name in ("domain1.com", "domain2.com", "domain3.com", "domain4.com"):
+            assert statuses[name] == ["correct"] * 5
+        assert statuses["missing.com"] == ["missing"] * 5
+        assert all(
+            r["_check"]["error"] == "Domain not found" for r in results[missing.pk]
+        )
+
+        for maildomain in [*domains, missing]:
+            maildomain.refresh_from_db()
+            assert maildomain.dns_check_results == results[maildomain.pk]
+            assert maildomain.dns_checked_at is not None
+
+        # One query per name and type: MX records share a lookup, the SPF
+        # include of the technical domain is resolved once for all domains,
+        # and nothing is queried under a domain that doesn't exist.
+        assert set(resolver.queries.values()) == {1}
+        assert resolver.queries[("_spf.messages.org", "TXT")] == 1
+        assert [name for name, _ in resolver.queries if "missing" in name] == [
+            "missing.com"
+        ]
+
+    def test_caching_resolver_errors_are_cached(self):
+        """Failures are shared like answers, and only below an NXDOMAIN."""
+        resolver = FakeResolver({("example.com", "TXT"): Timeout()})
+        caching = CachingResolver(resolver)
+
+        for _ in range(2):
+            with pytest.raises(Timeout):
+                caching("example.com", "TXT")
+            with pytest.raises(NXDOMAIN):
+                caching("nothing.example.com", "TXT")
+        with pytest.raises(NXDOMAIN):
+            caching("deep.nothing.example.com", "MX")
+        with pytest.raises(NXDOMAIN):
+            caching("other.example.com", "TXT")
+
+        assert resolver.queries == {
+            ("example.com", "TXT"): 1,
+            ("nothing.example.com", "TXT"): 1,
+            ("other.example.com", "TXT"): 1,
+        }
+        assert caching.queries == 3
+
+    def test_dns_check_command(self, maildomain_factory):
+        """The dns_check command goes through the batch checker."""
+        maildomain = maildomain_factory(name="example.com")
+        records = [{"type": "MX", "target": "", "value": "10 mx1.example.com."}]
+        results = {maildomain.pk: [{**records[0], "_check": {"status": "correct"}}]}
+        out = StringIO()
+
+        with patch(
+            "core.management.commands.dns_check.check_maildomains_dns",
+            return_value=results,
+        ) as mock_check:
+            call_command("dns_check", "--concurrency", "4", stdout=out)
+
+        mock_check.assert_called_once_with([maildomain], concurrency=4)
+        assert "🟢 MX record for @ — Value: 10 mx1.example.com." in out.getvalue()
@@ -2,9 +2,11 @@
 # pylint: disable=redefined-outer-name, unused-argument, no-value-for-parameter
 
 import gzip
+import os
 from io import BytesIO
 from unittest.mock import MagicMock, Mock, patch
 
+from django.core.cache import cache
 from django.core.files.storage import storages
 from django.urls import reverse
 from django.utils import timezone
@@ -13,7 +15,13 @@ import pytest
 
 from core import factories
 from core.models import Blob, Label, Mailbox, MailDomain, Message, Thread, ThreadAccess
-from core.services.exporter.tasks import export_mailbox_task
+from core.services.exporter.tasks import (
+    CHECKPOINT_KEY,
+    LOCK_KEY,
+    MIN_PART_SIZE,
+    S3MultipartGzipUploader,
+    export_mailbox_task,
+)
 from core.services.importer.mbox_tasks import process_mbox_file_task
 
 
@@ -714,3 +722,177 @@ def test_export_unread_message_status(mailbox_fixture, admin_user, cleanup_expor
         assert b"Status: O\n" in mbox_content
         # Should NOT have RO which indicates read
         assert b"Status: RO" not in mbox_content
+
+
+def _read_export(s3_key):
+    """Download and decompress an export."""
+    storage = storages["message-imports"]
+    s3_client = storage.connection.meta.client
+    response = s3_client.get_object(Bucket=storage.bucket_name, Key=s3_key)
+    with gzip.open(BytesIO(response["Body"].read()), "rb") as f:
+        return f.read()
+
+
+@pytest.mark.django_db
+def test_export_keeps_order_with_concurrent_fetch(
+    mailbox_fixture, admin_user, cleanup_exports, settings
+):
+    """Blobs fetched in parallel, across batches, are written in order."""
+    settings.EXPORT_FETCH_CONCURRENCY = 4
+    for index in range(25):
+        create_test_message(mailbox_fixture, f"Message {index:02d}", "Body")
+    mock_task = MagicMock()
+
+    with (
+        patch.object(export_mailbox_task, "update_state", mock_task.update_state),
+        patch(
+            "core.services.exporter.tasks.deliver_inbound_message", return_value=True
+        ),
+        patch("core.services.exporter.tasks.EXPORT_BATCH_SIZE", 7),
+    ):
+        result = export_mailbox_task(str(mailbox_fixture.id), str(admin_user.id))
+
+    assert result["status"] == "SUCCESS"
+    assert result["result"]["exported_count"] == 25
+    cleanup_exports.append(result["result"]["s3_key"])
+
+    mbox_content = _read_export(result["result"]["s3_key"])
+    positions = [
+        mbox_content.index(f"Subject: Message {index:02d}".encode())
+        for index in range(25)
+    ]
+    assert positions == sorted(positions)
+
+
+def test_uploader_resumes_multipart_upload(cleanup_exports):
+    """An upload can be continued from the parts reported by a checkpoint."""
+    storage = storages["message-imports"]
+    s3_client = storage.connection.meta.client
+    s3_key = "exports/test/resume.mbox.gz"
+    cleanup_exports.append(s3_key)
+    checkpoints = []
+    head = os.urandom(MIN_PART_SIZE + 1024)
+
+    uploader = S3MultipartGzipUploader(
+        s3_client,
+        storage.bucket_name,
+        s3_key,
+        chunk_size=MIN_PART_SIZE,
+        min_part_size=0,
+        on_part_uploaded=lambda parts, marker: checkpoints.append((parts, marker)),
+    )
+    uploader.write(head, marker="after-head")
+    uploader.write(b"lost on interruption")
+    # pylint: disable=protected-access
+    uploader._wait_for_uploads()
+    uploader._executor.shutdown()
+
+    parts, marker = checkpoints[-1]
+    assert marker == "after-head"
+    assert [part["PartNumber"] for part in parts] == [1]
+
+    with S3MultipartGzipUploader(
+        s3_client,
+        storage.bucket_name,
+        s3_key,
+        upload_id=uploader.upload_id,
+        parts=parts,
+    ) as resumed:
+        resumed.write(b"tail")
+
+    assert _read_export(s3_key) == head + b"tail"
+
+
+@pytest.mark.django_db
+def test_export_resumes_from_checkpoint(mailbox_fixture, admin_user, cleanup_exports):
+    """An interrupted export continues after its last checkpointed message."""
+    messages = [
+        create_test_message(mailbox_fixture, f"Message {index}", "Body")
+        for index in range(4)
+    ]
+    storage = storages["message-imports"]
+    s3_client = storage.connection.meta.client
+    s3_key = f"exports/{mailbox_fixture.id}/interrupted.mbox.gz"
+    cleanup_exports.append(s3_key)
+
+    # What an interrupted run leaves behind: one uploaded part holding the
+    # first two messages (stood in for by random bytes), and its checkpoint.
+    head = os.urandom(MIN_PART_SIZE + 1024)
+    uploader = S3MultipartGzipUploader(
+        s3_client,
+        storage.bucket_name,
+        s3_key,
+        chunk_size=MIN_PART_SIZE,
+        min_part_size=0,
+    )
+    uploader.write(head)
+    # pylint: disable=protected-access
+    uploader._wait_for_uploads()
+    uploader._executor.shutdown()
+    assert uploader.parts
+    checkpoint_key = CHECKPOINT_KEY.format(mailbox_id=mailbox_fixture.id)
+    cache.set(
+        checkpoint_key,
+        {
+            "s3_key": s3_key,
+            "upload_id": uploader.upload_id,
+            "parts": uploader.parts,
+            "after": (messages[1].created_at, messages[1].id),
+            "current_message": 2,
+            "exported_count": 2,
+            "skipped_count": 0,
+        },
+    )
+
+    mock_task = MagicMock()
+    with (
+        patch.object(export_mailbox_task, "update_state", mock_task.update_state),
+        patch(
+            "core.services.exporter.tasks.deliver_inbound_message", return_value=True
+        ),
+    ):
+        result = export_mailbox_task(str(mailbox_fixture.id), str(admin_user.id))
+
+    assert result["status"] == "SUCCESS"
+    assert result["result"]["s3_key"] == s3_key
+    assert result["result"]["exported_count"] == 4
+    assert cache.get(checkpoint_key) is None
+
+    mbox_content = _read_export(s3_key)
+    assert mbox_content.startswith(head)
+    assert b"Subject: Message 1" not in mbox_content[len(head) :]
+    assert b"Subject: Message 2" in mbox_content
+    assert b"Subject: Message 3" in mbox_content
+
+
+@pytest.mark.django_db
+def test_export_refused_while_running(mailbox_fixture, admin_user, cleanup_exports):
+    """A second export of a mailbox doesn't touch the running one's upload."""
+    create_test_message(mailbox_fixture, "Message", "Body")
+    lock_key = LOCK_KEY.format(mailbox_id=mailbox_fixture.id)
+    cache.set(lock_key, "locked")
+
+    mock_task = MagicMock()
+    with (
+        patch.object(export_mailbox_task, "update_state", mock_task.update_state),
+        patch("core.services.exporter.tasks.S3MultipartGzipUploader") as uploader_class,
+    ):
+        result = export_mailbox_task(str(mailbox_fixture.id), str(admin_user.id))
+
+    assert result["status"] == "FAILURE"
+    assert "already being exported" in result["error"]
+    uploader_class.assert_not_called()
+    assert cache.get(lock_key) == "locked"
+
+    cache.delete(lock_key)
+    with (
+        patch.object(export_mailbox_task, "update_state", mock_task.update_state),
+        patch(
+            "core.services.exporter.tasks.deliver_inbound_message", return_value=True
+        ),
+    ):
+        result = export_mailbox_task(str(mailbox_fixture.id), str(admin_user.id))
+
+    assert result["status"] == "SUCCESS"
+    cleanup_exports.append(result["result"]["s3_key"])
+    assert cache.get(lock_key) is None
@@ -800,11 +800,9 @@ Test message body 2"""
 
 @patch("core.mda.inbound_create.is_ai_summary_enabled", return_value=True)
 @patch("core.mda.inbound_create.is_auto_labels_enabled", return_value=True)
-@patch("core.mda.inbound_create.summarize_thread")
-@patch("core.mda.inbound_create.assign_label_to_thread")
+@patch("core.mda.inbound_create.schedule_thread_ai")
 def test_import_messages_do_not_trigger_ai_features(
-    mock_assign_label_to_thread,
-    mock_summarize_thread,
+    mock_schedule_thread_ai,
     mock_is_auto_labels_enabled,
     mock_is_ai_summary_enabled,
     user,
@@ -862,8 +860,7 @@ Test message body 1"""
 
         assert mock_is_ai_summary_enabled.call_count == 0
         assert mock_is_auto_labels_enabled.call_count == 0
-        assert mock_assign_label_to_thread.call_count == 0
-        assert mock_summarize_thread.call_count == 0
+        assert mock_schedule_thread_ai.call_count == 0
 
 
 # --- Filename disambiguation tests ---
@@ -0,0 +1,207 @@
+"""Tests for draft updates and autosave in core.mda.draft."""
+# pylint: disable=unused-argument, redefined-outer-name
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+
+import pytest
+
+from core import factories, models
+from core.api.serializers import MessageSerializer
+from core.mda.draft import (
+    checkpoint_draft,
+    create_draft,
+    get_buffered_draft_bodies,
+    get_draft_body,
+    update_draft,
+)
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def mailbox():
+    """A sender mailbox."""
+    return factories.MailboxFactory()
+
+
+@pytest.fixture
+def draft(mailbox):
+    """A draft with a body and one recipient."""
+    return create_draft(
+        mailbox,
+        subject="Hello",
+        draft_body='{"v": 1}',
+        to_emails=["alice@example.com"],
+    )
+
+
+def _reload(message):
+    return models.Message.objects.select_related("thread", "draft_blob").get(
+        id=message.id
+    )
+
+
+@pytest.mark.django_db
+class TestUpdateDraft:
+    """Unchanged fields are not written again."""
+
+    def test_unchanged_body_keeps_blob(self, mailbox, draft):
+        """Saving the same body again doesn't go through the blob pipeline."""
+        blob_id = draft.draft_blob_id
+        with (
+            patch.object(models.Blob.objects, "create_blob") as create_blob,
+            patch("core.mda.draft.schedule_for_gc") as schedule_for_gc,
+        ):
+            update_draft(mailbox, _reload(draft), {"draftBody": '{"v": 1}'})
+
+        create_blob.assert_not_called()
+        schedule_for_gc.assert_not_called()
+        assert _reload(draft).draft_blob_id == blob_id
+
+    def test_changed_body_replaces_blob(self, mailbox, draft):
+        """A new body is stored and the previous blob handed to the GC."""
+        old_blob_id = draft.draft_blob_id
+        with patch("core.mda.draft.schedule_for_gc") as schedule_for_gc:
+            update_draft(mailbox, _reload(draft), {"draftBody": '{"v": 2}'})
+
+        draft = _reload(draft)
+        assert draft.draft_blob_id != old_blob_id
+        assert get_draft_body(draft) == '{"v": 2}'
+        schedule_for_gc.assert_called_once_with(old_blob_id)
+
+    def test_unchanged_recipients_are_kept(self, mailbox, draft):
+        """Resending the same recipient list doesn't recreate the rows."""
+        recipient_ids = set(draft.recipients.values_list("id", flat=True))
+
+        update_draft(mailbox, _reload(draft), {"to": ["alice@example.com"], "cc": []})
+
+        assert set(draft.recipients.values_list("id", flat=True)) == recipient_ids
+
+    def test_thread_stats_only_on_relevant_change(self, mailbox, draft):
+        """Thread stats are recomputed only when has_attachments changes."""
+        with patch.object(models.Thread, "update_stats") as update_stats:
+            update_draft(mailbox, _reload(draft), {"subject": "New subject"})
+        update_stats.assert_not_called()
+
+        blob = factories.BlobFactory(mailbox=mailbox)
+        with patch.object(models.Thread, "update_stats") as update_stats:
+            update_draft(
+                mailbox,
+                _reload(draft),
+                {"attachments": [{"blobId": str(blob.id), "name": "a.txt"}]},
+            )
+        update_stats.assert_called_once()
+        assert _reload(draft).has_attachments is True
+
+
+@pytest.mark.django_db
+def test_autosave_without_redis_writes_through(mailbox, draft):
+    """Without a Redis cache, autosaves are stored immediately."""
+    update_draft(mailbox, _reload(draft), {"draftBody": '{"v": 2}'}, autosave=True)
+
+    assert _reload(draft).draft_blob.get_content() == b'{"v": 2}'
+
+
+@pytest.mark.redis
+@pytest.mark.django_db
+class TestDraftAutosave:
+    """Autosaved bodies are buffered in Redis until a checkpoint."""
+
+    def test_autosave_is_buffered_then_checkpointed(self, mailbox, draft, redis_cache):
+        """The body is readable at once and stored by the checkpoint."""
+        blob_id = draft.draft_blob_id
+
+        update_draft(mailbox, _reload(draft), {"draftBody": '{"v": 2}'}, autosave=True)
+        update_draft(mailbox, _reload(draft), {"draftBody": '{"v": 3}'}, autosave=True)
+
+        draft = _reload(draft)
+        assert draft.draft_blob_id == blob_id
+        assert get_draft_body(draft) == '{"v": 3}'
+
+        assert checkpoint_draft(draft.id) is True
+        draft = _reload(draft)
+        assert draft.draft_blob.get_content() == b'{"v": 3}'
+        assert get_draft_body(draft) == '{"v": 3}'
+
+        # Nothing changed since: the next checkpoint is a no-op.
+        assert checkpoint_draft(draft.id) is False
+
+    def test_one_checkpoint_scheduled_per_burst(
+        self, mailbox, draft, redis_cache, django_capture_on_commit_callbacks
+    ):
+        """A burst of autosaves schedules a single checkpoint task."""
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            for version in range(3):
+                update_draft(
+                    mailbox,
+                    _reload(draft),
+                    {"draftBody": f'{{"v": {version + 10}}}'},
+                    autosave=True,
+                )
+
+        assert len(callbacks) == 1
+        # Eager mode: the checkpoint ran on commit with the latest body.
+        assert _reload(draft).draft_blob.get_content() == b'{"v": 12}'
+
+    def test_cleared_body_is_buffered(self, mailbox, draft, redis_cache):
+        """Emptying the body is buffered like any other change."""
+        update_draft(mailbox, _reload(draft), {"draftBody": ""}, autosave=True)
+
+        assert get_draft_body(_reload(draft)) is None
+        assert checkpoint_draft(draft.id) is True
+        assert _reload(draft).draft_blob is None
+
+    def test_regular_update_discards_buffer(self, mailbox, draft, redis_cache):
+        """A regular update stores the body and drops the stale buffer."""
+        update_draft(mailbox, _reload(draft), {"draftBody": '{"v": 2}'}, autosave=True)
+        update_draft(mailbox, _reload(draft), {"draftBody": '{"v": 4}'})
+
+        draft = _reload(draft)
+        assert get_draft_body(draft) == '{"v": 4}'
+        assert checkpoint_draft(draft.id) is False
+
+    def test_checkpoint_disabled(self, mailbox, draft, redis_cache, settings):
+        """With DRAFT_AUTOSAVE_CHECKPOINT_SECONDS=0 autosaves write through."""
+        settings.DRAFT_AUTOSAVE_CHECKPOINT_SECONDS = 0
+
+        update_draft(mailbox, _reload(draft), {"draftBody": '{"v": 2}'}, autosave=True)
+
+        assert _reload(draft).draft_blob.get_content() == b'{"v": 2}'
+
+    def test_non_draft_skips_cache(self, redis_cache):
+        """Sent messages have no draft body: the cache isn't read."""
+        message = factories.MessageFactory(is_draft=False)
+
+        with patch.object(cache, "get", side_effect=AssertionError) as cache_get:
+            assert get_draft_body(message) is None
+            assert get_buffered_draft_bodies([message]) == {}
+        cache_get.assert_not_called()
+
+    def test_list_reads_buffered_bodies_in_one_batch(self, mailbox, draft, redis_cache):
+        """Serializing a page reads all buffered bodies with one ``get_many``."""
+        other = create_draft(
+            mailbox, subject="Other", draft_body='{"w": 1}', to_emails=[]
+        )
+        sent = factories.MessageFactory(thread=draft.thread, is_draft=False)
+        update_draft(mailbox, _reload(draft), {"draftBody": '{"v": 2}'}, autosave=True)
+
+        messages = [_reload(draft), _reload(other), sent]
+        with (
+            patch.object(cache, "get", side_effect=AssertionError),
+            patch.object(cache, "get_many", wraps=cache.get_many) as get_many,
+        ):
+            bodies = [
+                message["draftBody"]
+                for message in MessageSerializer(messages, many=True).data
+            ]
+
+        assert bodies == ['{"v": 2}', '{"w": 1}', None]
+        get_many.assert_called_once()
+        assert len(get_many.call_args.args[0]) == 2
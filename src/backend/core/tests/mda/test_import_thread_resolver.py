@@ -0,0 +1,127 @@
+"""Tests for the thread lookups of imported messages."""
+# pylint: disable=redefined-outer-name
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from core import factories
+from core.mda.inbound_create import ImportThreadResolver, find_thread_for_import
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def mailbox():
+    """The mailbox messages are imported into."""
+    return factories.MailboxFactory()
+
+
+def _thread(mailbox, subject, mime_id=None):
+    thread = factories.ThreadFactory(subject=subject)
+    factories.ThreadAccessFactory(mailbox=mailbox, thread=thread)
+    if mime_id:
+        factories.MessageFactory(thread=thread, mime_id=mime_id, subject=subject)
+    return thread
+
+
+class TestImportThreadResolver:
+    """Thread matching by referenced Message-IDs and subject key."""
+
+    def test_subject_key_maintained(self, mailbox):
+        """Saving a thread keeps its subject key in sync."""
+        thread = _thread(mailbox, "RE:  Quarterly Report")
+        assert thread.subject_key == "quarterly report"
+
+        thread.subject = "Fwd: Budget"
+        thread.save(update_fields=["subject"])
+        thread.refresh_from_db()
+        assert thread.subject_key == "budget"
+
+        thread.subject = "Budget"
+        thread.save(update_fields=["subject"])
+        thread.refresh_from_db()
+        assert thread.subject_key == ""
+
+    def test_subject_matches_one_reply_prefix(self, mailbox):
+        """A reply thread matches when one prefix precedes the subject.
+
+        The prefix may be followed by no space at all, and a second prefix
+        is part of the subject, as with the former ``subject__iregex``
+        lookup.
+        """
+        no_space = _thread(mailbox, "Re:Hello")
+        _thread(mailbox, "Re: Re: Goodbye")
+
+        assert find_thread_for_import({"subject": "Hello"}, mailbox) == no_space
+        assert find_thread_for_import({"subject": "Re: Hello"}, mailbox) == no_space
+        assert find_thread_for_import({"subject": "Goodbye"}, mailbox) is None
+        assert find_thread_for_import({"subject": "Re: Re: Goodbye"}, mailbox) is None
+
+    def test_in_reply_to_preferred_over_references(self, mailbox):
+        """In-Reply-To wins over References, whatever their subjects."""
+        referenced = _thread(mailbox, "First", mime_id="first@example.com")
+        replied = _thread(mailbox, "Second", mime_id="second@example.com")
+
+        parsed_email = {
+            "subject": "Unrelated",
+            "inReplyTo": ["second@example.com"],
+            "references": ["first@example.com", "second@example.com"],
+        }
+
+        assert find_thread_for_import(parsed_email, mailbox) == replied
+        del parsed_email["inReplyTo"]
+        assert find_thread_for_import(parsed_email, mailbox) == referenced
+
+    def test_subject_matches_reply_threads_only(self, mailbox):
+        """Only threads whose subject has a reply prefix match by subject."""
+        _thread(mailbox, "Weekly sync")
+        assert find_thread_for_import({"subject": "Re: Weekly sync"}, mailbox) is None
+
+        reply = _thread(mailbox, "RE: Weekly sync")
+        assert find_thread_for_import({"subject": "Weekly sync"}, mailbox) == reply
+        assert find_thread_for_import({"subject": "Fwd: weekly SYNC"}, mailbox) == reply
+
+    def test_other_mailbox_ignored(self, mailbox):
+        """Threads of other mailboxes never match."""
+        other = factories.MailboxFactory()
+        _thread(other, "Re: Hello", mime_id="hello@example.com")
+
+        parsed_email = {"subject": "Re: Hello", "inReplyTo": ["hello@example.com"]}
+
+        assert find_thread_for_import(parsed_email, mailbox) is None
+
+    def test_prefetch_resolves_batch_without_queries(self, mailbox):
+        """After a prefetch, resolving the batch's messages runs no query."""
+        by_id = _thread(mailbox, "Plans", mime_id="plans@example.com")
+        by_subject = _thread(mailbox, "Re: Lunch")
+        batch = [
+            {"subject": "Re: Plans", "inReplyTo": ["plans@example.com"]},
+            {"subject": "Lunch"},
+            {"subject": "Nothing", "references": ["unknown@example.com"]},
+        ]
+        resolver = ImportThreadResolver(mailbox)
+
+        with CaptureQueriesContext(connection) as queries:
+            resolver.prefetch(batch)
+        assert len(queries) == 2
+
+        with CaptureQueriesContext(connection) as queries:
+            resolved = [resolver.resolve(parsed_email) for parsed_email in batch]
+        assert len(queries) == 0
+        assert resolved == [by_id, by_subject, None]
+
+    def test_record_links_later_messages(self, mailbox):
+        """Messages imported earlier are found without querying again."""
+        resolver = ImportThreadResolver(mailbox)
+        first = {"subject": "Re: Offsite", "messageId": ["offsite@example.com"]}
+        assert resolver.resolve(first) is None
+
+        thread = _thread(mailbox, "Re: Offsite")
+        resolver.record(first, thread)
+
+        with CaptureQueriesContext(connection) as queries:
+            assert resolver.resolve({"inReplyTo": ["offsite@example.com"]}) == thread
+            assert resolver.resolve({"subject": "Offsite"}) == thread
+        assert len(queries) == 0
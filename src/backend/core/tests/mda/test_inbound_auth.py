@@ -609,7 +609,7 @@ class TestProcessInboundMessageAuthIntegration:
         self, mock_create_message, mock_auth_check
     ):
         mailbox = factories.MailboxFactory()
-        inbound_message = models.InboundMessage.objects.create(
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
             mailbox=mailbox,
             raw_data=RAW_EMAIL,
         )
@@ -636,7 +636,7 @@ class TestProcessInboundMessageAuthIntegration:
         self, mock_create_message, mock_auth_check
     ):
         mailbox = factories.MailboxFactory()
-        inbound_message = models.InboundMessage.objects.create(
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
             mailbox=mailbox,
             raw_data=RAW_EMAIL,
         )
@@ -662,7 +662,7 @@ class TestProcessInboundMessageAuthIntegration:
         self, mock_create_message, mock_auth_check
     ):
         mailbox = factories.MailboxFactory()
-        inbound_message = models.InboundMessage.objects.create(
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
             mailbox=mailbox,
             raw_data=RAW_EMAIL,
         )
@@ -681,12 +681,12 @@ class TestProcessInboundMessageAuthIntegration:
             "inbound_auth": "rspamd",
         }
     )
-    @patch("core.mda.inbound_tasks.requests.post")
+    @patch("core.mda.rspamd.requests.Session.post")
     @patch("core.mda.inbound_tasks._create_message_from_inbound")
     def test_rspamd_response_reused_by_auth_check(self, mock_create_message, mock_post):
         """Single rspamd call feeds both spam and auth."""
         mailbox = factories.MailboxFactory()
-        inbound_message = models.InboundMessage.objects.create(
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
             mailbox=mailbox,
             raw_data=RAW_EMAIL,
         )
@@ -714,13 +714,13 @@ class TestProcessInboundMessageAuthIntegration:
             "inbound_auth": "rspamd",
         }
     )
-    @patch("core.mda.inbound_tasks.requests.post")
+    @patch("core.mda.rspamd.requests.Session.post")
     @patch("core.mda.inbound_tasks._create_message_from_inbound")
     def test_dmarc_fail_injects_fail_header_end_to_end(
         self, mock_create_message, mock_post
     ):
         mailbox = factories.MailboxFactory()
-        inbound_message = models.InboundMessage.objects.create(
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
             mailbox=mailbox,
             raw_data=RAW_EMAIL,
         )
@@ -751,7 +751,7 @@ class TestProcessInboundMessageAuthIntegration:
             "rules": [{"header_match": "X-Spam:yes", "action": "ham"}],
         }
     )
-    @patch("core.mda.inbound_tasks.requests.post")
+    @patch("core.mda.rspamd.requests.Session.post")
     @patch("core.mda.inbound_tasks._create_message_from_inbound")
     def test_rspamd_fetched_on_demand_when_spam_skipped_rspamd(
         self, mock_create_message, mock_post
@@ -759,7 +759,7 @@ class TestProcessInboundMessageAuthIntegration:
         """Hardcoded spam rule short-circuits spam; rspamd still fetched for auth."""
         mailbox = factories.MailboxFactory()
         raw = b"X-Spam: yes\r\n" + RAW_EMAIL
-        inbound_message = models.InboundMessage.objects.create(
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
             mailbox=mailbox,
             raw_data=raw,
         )
@@ -826,7 +826,7 @@ class TestProcessInboundMessageAuthIntegration:
         mock_create_message.return_value = True
 
         mailbox = factories.MailboxFactory()
-        inbound_message = models.InboundMessage.objects.create(
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
             mailbox=mailbox,
             raw_data=RAW_EMAIL,
         )
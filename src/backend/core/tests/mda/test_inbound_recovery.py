@@ -0,0 +1,102 @@
+"""Tests for the recovery of stalled inbound messages."""
+# pylint: disable=redefined-outer-name
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+import pytest
+
+from core import factories, models
+from core.mda import inbound_recovery
+
+
+def _queue(mailbox, count=1, *, age=timedelta(minutes=10), attempts=0):
+    """Queue ``count`` messages for ``mailbox``, visible for ``age``."""
+    now = timezone.now()
+    ids = []
+    for index in range(count):
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
+            b"Subject: %d\r\n\r\n%s" % (index, str(mailbox).encode()),
+            mailbox=mailbox,
+            attempts=attempts,
+            available_at=now - age + timedelta(seconds=index),
+        )
+        ids.append(str(inbound_message.id))
+    return ids
+
+
+@pytest.mark.django_db
+class TestClaimMessages:
+    """Leased, fair claiming of the visible messages."""
+
+    def test_round_robin_across_mailboxes(self):
+        """A flooded mailbox gets its share, not the whole batch."""
+        flooded, quiet, other = factories.MailboxFactory.create_batch(3)
+        flooded_ids = _queue(flooded, 20, age=timedelta(hours=1))
+        quiet_ids = _queue(quiet)
+        other_ids = _queue(other, 3)
+
+        claimed = inbound_recovery.claim_messages(6)
+
+        # Two messages per mailbox at most, oldest message of each first.
+        assert claimed == [
+            flooded_ids[0],
+            quiet_ids[0],
+            other_ids[0],
+            flooded_ids[1],
+            other_ids[1],
+        ]
+
+    def test_claim_leases_with_backoff(self, settings):
+        """Claimed messages become invisible for a lease doubling per attempt."""
+        settings.INBOUND_RECOVERY_LEASE = 60
+        settings.INBOUND_RECOVERY_MAX_BACKOFF = 200
+        mailbox = factories.MailboxFactory()
+        first = _queue(mailbox)[0]
+        second = _queue(mailbox, attempts=2)[0]
+        now = timezone.now()
+
+        assert set(inbound_recovery.claim_messages(10, now=now)) == {first, second}
+        assert inbound_recovery.claim_messages(10, now=now) == []
+
+        first_message = models.InboundMessage.objects.get(id=first)
+        assert first_message.attempts == 1
+        assert first_message.available_at == now + timedelta(seconds=60)
+        # Third attempt: 60 * 2 ** 2 = 240, capped at 200.
+        second_message = models.InboundMessage.objects.get(id=second)
+        assert second_message.attempts == 3
+        assert second_message.available_at == now + timedelta(seconds=200)
+
+    def test_fresh_messages_left_to_their_worker(self):
+        """Messages just queued are not re-dispatched before their lease ends."""
+        mailbox = factories.MailboxFactory()
+        models.InboundMessage.objects.create_inbound_message(
+            b"Subject: fresh\r\n\r\n", mailbox=mailbox
+        )
+
+        assert inbound_recovery.claim_messages(10) == []
+
+    def test_batch_size_deducts_broker_backlog(self, settings, monkeypatch):
+        """Messages already waiting in the broker count against the batch."""
+        settings.INBOUND_RECOVERY_MAX_BATCH = 100
+        monkeypatch.setattr(
+            inbound_recovery, "get_queue_lengths", lambda: {"inbound": 70}
+        )
+
+        assert inbound_recovery.batch_size() == 30
+        assert inbound_recovery.batch_size(50) == 0
+
+    def test_queue_stats(self):
+        """Depth by state and the oldest message are reported."""
+        mailbox = factories.MailboxFactory()
+        _queue(mailbox, 2)
+        models.InboundMessage.objects.create_inbound_message(
+            b"Subject: fresh\r\n\r\n", mailbox=mailbox
+        )
+
+        stats = inbound_recovery.get_queue_stats()
+
+        assert stats["visible"] == 2
+        assert stats["leased"] == 1
+        assert stats["oldest_created_at"] is not None
@@ -914,6 +914,35 @@ class TestPrepareOutboundMessageReadAt:
         assert access.read_at >= message.created_at
 
 
+@pytest.mark.django_db
+class TestPrepareOutboundMessageContactUse:
+    """Test that sending records when the recipients were last written to."""
+
+    def test_prepare_outbound_message_updates_contact_last_used_at(
+        self, mailbox_sender
+    ):
+        """Recipient contacts get the send time; other contacts are untouched."""
+        message = factories.MessageFactory(
+            thread=factories.ThreadFactory(),
+            sender=factories.ContactFactory(mailbox=mailbox_sender),
+            is_draft=True,
+            subject="Test last_used_at",
+        )
+        recipient = factories.ContactFactory(mailbox=mailbox_sender)
+        factories.MessageRecipientFactory(message=message, contact=recipient)
+        other = factories.ContactFactory(mailbox=mailbox_sender)
+
+        outbound.prepare_outbound_message(
+            mailbox_sender, message, "Hello", "<p>Hello</p>"
+        )
+
+        message.refresh_from_db()
+        recipient.refresh_from_db()
+        other.refresh_from_db()
+        assert recipient.last_used_at == message.created_at
+        assert other.last_used_at is None
+
+
 @pytest.mark.django_db
 class TestUndisclosedRecipientsHeader:
     """A message with no To recipient (e.g. Bcc-only) must get an empty-group
@@ -3,12 +3,41 @@
 
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.utils import timezone
 
 import pytest
 
 from core import enums, factories, models
-from core.mda.outbound_tasks import retry_messages_task
+from core.mda import retry_scheduler
+from core.mda.outbound_tasks import retry_messages_batch_task, retry_messages_task
+from core.utils import acquire_cache_slot
+
+
+def _ready_message(mailbox, thread, email, retry_at=None):
+    """Create an outbound message with one recipient ready for retry."""
+    message = factories.MessageFactory(
+        thread=thread,
+        sender=factories.ContactFactory(mailbox=mailbox),
+        is_draft=False,
+        is_sender=True,
+    )
+    factories.MessageRecipientFactory(
+        message=message,
+        contact=factories.ContactFactory(mailbox=mailbox, email=email),
+        type=models.MessageRecipientTypeChoices.TO,
+        delivery_status=enums.MessageDeliveryStatusChoices.RETRY,
+        retry_at=retry_at or timezone.now() - timezone.timedelta(minutes=1),
+        retry_count=1,
+    )
+    return message
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
 
 
 @pytest.mark.django_db
@@ -160,12 +189,11 @@ class TestRetryMessagesTask:
 
         result = retry_messages_task.apply().get()
 
-        # Verify the result
+        # Verify the result: one batch was dispatched (and ran eagerly)
         assert result["success"] is True
         assert result["total_messages"] == 1
-        assert result["success_count"] == 1
-        assert result["error_count"] == 0
-        assert result["processed_messages"] == 1
+        assert result["dispatched_batches"] == 1
+        assert result["dispatched_messages"] == 1
 
         # Verify send_message was called
         mock_send_message.assert_called_once_with(message, force_mta_out=False)
@@ -312,8 +340,11 @@ class TestRetryMessagesTask:
         mock_send_message.assert_called_once_with(message, force_mta_out=False)
 
     @patch("core.mda.outbound_tasks.send_message")
-    def test_retry_batch_processing(self, mock_send_message, mailbox_sender, thread):
+    def test_retry_batch_processing(
+        self, mock_send_message, mailbox_sender, thread, settings
+    ):
         """Test retry batch processing functionality."""
+        settings.OUTBOUND_RETRY_DOMAIN_CONCURRENCY = 3
         # Create multiple messages
         messages = []
         for i in range(5):
@@ -347,12 +378,11 @@ class TestRetryMessagesTask:
             kwargs={"batch_size": 2}
         ).get()  # Process in batches of 2
 
-        # Verify the result
+        # Verify the result: 5 messages of one domain in batches of 2
         assert result["success"] is True
         assert result["total_messages"] == 5
-        assert result["success_count"] == 5
-        assert result["error_count"] == 0
-        assert result["processed_messages"] == 5
+        assert result["dispatched_batches"] == 3
+        assert result["dispatched_messages"] == 5
 
         # Verify send_message was called for each message
         assert mock_send_message.call_count == 5
@@ -531,118 +561,6 @@ class TestRetryMessagesTask:
         # Verify send_message was NOT called because no recipients were retryable
         mock_send_message.assert_not_called()
 
-    @patch("core.mda.outbound_tasks.send_message")
-    def test_retry_update_state_called_once_per_batch(
-        self, mock_send_message, mailbox_sender, thread
-    ):
-        """Test that update_state is called once per batch, not per message."""
-        # Create 5 messages with retryable recipients
-        messages = []
-        for i in range(5):
-            sender_contact = factories.ContactFactory(mailbox=mailbox_sender)
-            message = factories.MessageFactory(
-                thread=thread,
-                sender=sender_contact,
-                is_draft=False,
-                is_sender=True,
-                subject=f"Batch State Test Message {i}",
-            )
-
-            # Add recipients ready for retry
-            to_contact = factories.ContactFactory(
-                mailbox=mailbox_sender, email=f"to_state{i}@example.com"
-            )
-            factories.MessageRecipientFactory(
-                message=message,
-                contact=to_contact,
-                type=models.MessageRecipientTypeChoices.TO,
-                delivery_status=enums.MessageDeliveryStatusChoices.RETRY,
-                retry_at=timezone.now() - timezone.timedelta(minutes=1),
-                retry_count=1,
-            )
-            messages.append(message)
-
-        # Mock successful send
-        mock_send_message.return_value = None
-
-        # Patch update_state to track calls
-        with patch.object(retry_messages_task, "update_state") as mock_update_state:
-            result = retry_messages_task.apply(kwargs={"batch_size": 2}).get()
-
-        # Verify the result
-        assert result["success"] is True
-        assert result["total_messages"] == 5
-        assert result["success_count"] == 5
-
-        # With 5 messages and batch_size=2, we should have 3 update_state calls:
-        # - At index 0 (start of batch 1)
-        # - At index 2 (start of batch 2)
-        # - At index 4 (start of batch 3)
-        assert mock_update_state.call_count == 3
-
-        # Verify the calls have correct batch information
-        calls = mock_update_state.call_args_list
-
-        # First call at index 0 (batch 1)
-        assert calls[0].kwargs["state"] == "PROGRESS"
-        assert calls[0].kwargs["meta"]["current_batch"] == 1
-        assert calls[0].kwargs["meta"]["total_batches"] == 3
-
-        # Second call at index 2 (batch 2)
-        assert calls[1].kwargs["state"] == "PROGRESS"
-        assert calls[1].kwargs["meta"]["current_batch"] == 2
-        assert calls[1].kwargs["meta"]["total_batches"] == 3
-
-        # Third call at index 4 (batch 3)
-        assert calls[2].kwargs["state"] == "PROGRESS"
-        assert calls[2].kwargs["meta"]["current_batch"] == 3
-        assert calls[2].kwargs["meta"]["total_batches"] == 3
-
-    @patch("core.mda.outbound_tasks.send_message")
-    def test_retry_update_state_not_called_every_message(
-        self, mock_send_message, mailbox_sender, thread
-    ):
-        """Test that update_state is NOT called for every message when batch_size > 1."""
-        # Create 10 messages with retryable recipients
-        messages = []
-        for i in range(10):
-            sender_contact = factories.ContactFactory(mailbox=mailbox_sender)
-            message = factories.MessageFactory(
-                thread=thread,
-                sender=sender_contact,
-                is_draft=False,
-                is_sender=True,
-                subject=f"No Per-Message Update Test {i}",
-            )
-
-            to_contact = factories.ContactFactory(
-                mailbox=mailbox_sender, email=f"to_noupdate{i}@example.com"
-            )
-            factories.MessageRecipientFactory(
-                message=message,
-                contact=to_contact,
-                type=models.MessageRecipientTypeChoices.TO,
-                delivery_status=enums.MessageDeliveryStatusChoices.RETRY,
-                retry_at=timezone.now() - timezone.timedelta(minutes=1),
-                retry_count=1,
-            )
-            messages.append(message)
-
-        mock_send_message.return_value = None
-
-        with patch.object(retry_messages_task, "update_state") as mock_update_state:
-            result = retry_messages_task.apply(kwargs={"batch_size": 3}).get()
-
-        assert result["success"] is True
-        assert result["total_messages"] == 10
-        assert result["success_count"] == 10
-
-        # With 10 messages and batch_size=3, update_state should be called 4 times:
-        # At indices 0, 3, 6, 9 (not 10 times for each message)
-        assert mock_update_state.call_count == 4
-        # Verify it's significantly less than total messages
-        assert mock_update_state.call_count < result["total_messages"]
-
     @patch("core.mda.outbound_tasks.send_message")
     def test_retry_excludes_spam_flagged_messages(
         self, mock_send_message, mailbox_sender, thread
@@ -671,3 +589,179 @@ class TestRetryMessagesTask:
 
         assert result["total_messages"] == 0
         mock_send_message.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestRetryScheduler:
+    """Fan-out of the periodic retry into per-domain batches."""
+
+    @pytest.fixture
+    def mailbox(self):
+        """Create a test mailbox sender."""
+        return factories.MailboxFactory()
+
+    @pytest.fixture
+    def thread(self, mailbox):
+        """Create a test thread."""
+        thread = factories.ThreadFactory()
+        factories.ThreadAccessFactory(mailbox=mailbox, thread=thread)
+        return thread
+
+    def test_batches_are_grouped_by_domain_in_retry_order(self, mailbox, thread):
+        """Each batch targets one domain; the most overdue batch comes first."""
+        now = timezone.now()
+        late = _ready_message(
+            mailbox, thread, "a@one.test", now - timezone.timedelta(hours=2)
+        )
+        recent = _ready_message(
+            mailbox, thread, "b@two.test", now - timezone.timedelta(minutes=1)
+        )
+        later = _ready_message(
+            mailbox, thread, "c@one.test", now - timezone.timedelta(hours=1)
+        )
+
+        batches = retry_scheduler.plan_batches(
+            retry_scheduler.ready_messages(), batch_size=10, max_batches=10
+        )
+
+        assert [(batch.domain, batch.message_ids) for batch in batches] == [
+            ("one.test", [str(late.id), str(later.id)]),
+            ("two.test", [str(recent.id)]),
+        ]
+
+    def test_domain_batches_are_capped_per_run(self, mailbox, thread, settings):
+        """A single domain can't take more than its concurrency per run."""
+        settings.OUTBOUND_RETRY_DOMAIN_CONCURRENCY = 1
+        for index in range(3):
+            _ready_message(mailbox, thread, f"user{index}@busy.test")
+        other = _ready_message(mailbox, thread, "user@other.test")
+
+        batches = retry_scheduler.plan_batches(
+            retry_scheduler.ready_messages(), batch_size=2, max_batches=10
+        )
+
+        assert [batch.domain for batch in batches] == ["busy.test", "other.test"]
+        assert len(batches[0].message_ids) == 2
+        assert batches[1].message_ids == [str(other.id)]
+
+    @patch("core.mda.outbound_tasks.send_message")
+    def test_backpressure_when_all_batch_slots_are_busy(
+        self, mock_send_message, mailbox, thread, settings
+    ):
+        """With every batch slot held, nothing is dispatched this run."""
+        settings.OUTBOUND_RETRY_MAX_BATCHES = 1
+        _ready_message(mailbox, thread, "to@example.com")
+        assert acquire_cache_slot(retry_scheduler.BATCH_SLOT_PREFIX, 1, 60)
+
+        result = retry_messages_task.apply().get()
+
+        assert result["total_messages"] == 1
+        assert result["dispatched_batches"] == 0
+        mock_send_message.assert_not_called()
+
+    @patch("core.mda.outbound_tasks.send_message")
+    def test_completed_batches_dispatch_the_rest_of_the_backlog(
+        self, mock_send_message, mailbox, thread, settings
+    ):
+        """A backlog larger than one tick keeps draining as batches complete."""
+        settings.OUTBOUND_RETRY_MAX_BATCHES = 1
+        messages = [
+            _ready_message(mailbox, thread, f"user@domain{index}.test")
+            for index in range(4)
+        ]
+
+        result = retry_messages_task.apply(kwargs={"batch_size": 1}).get()
+
+        # The tick itself only had room for one batch...
+        assert result["dispatched_batches"] == 1
+        # ...and each completed batch dispatched the next one.
+        assert sorted(call.args[0].id for call in mock_send_message.call_args_list) == (
+            sorted(message.id for message in messages)
+        )
+        assert retry_scheduler.count_batches_in_flight() == 0
+
+        # Retried messages that are still ready wait for the next tick.
+        result = retry_messages_task.apply(kwargs={"batch_size": 1}).get()
+        assert result["dispatched_batches"] == 0
+        assert mock_send_message.call_count == 4
+
+    @patch("core.mda.outbound_tasks.send_message")
+    def test_queued_messages_are_not_dispatched_twice(
+        self, mock_send_message, mailbox, thread
+    ):
+        """Messages held by an in-flight batch are skipped by later runs."""
+        message = _ready_message(mailbox, thread, "to@example.com")
+        retry_scheduler.mark_queued([str(message.id)])
+
+        result = retry_messages_task.apply().get()
+
+        assert result["dispatched_batches"] == 0
+        mock_send_message.assert_not_called()
+
+    @patch("core.mda.outbound_tasks.send_message")
+    def test_saturated_domain_defers_batch(
+        self, mock_send_message, mailbox, thread, settings
+    ):
+        """A batch whose domain is saturated leaves its messages for later."""
+        settings.OUTBOUND_RETRY_DOMAIN_CONCURRENCY = 1
+        message = _ready_message(mailbox, thread, "to@example.com")
+        retry_scheduler.mark_queued([str(message.id)])
+        batch_slot = acquire_cache_slot(retry_scheduler.BATCH_SLOT_PREFIX, 1, 60)
+        assert acquire_cache_slot(
+            retry_scheduler.domain_slot_prefix("example.com"), 1, 60
+        )
+
+        result = retry_messages_batch_task.apply(
+            args=[[str(message.id)], "example.com"],
+            kwargs={"batch_slot": list(batch_slot)},
+        ).get()
+
+        assert result == {"success": True, "deferred": True, "domain": "example.com"}
+        mock_send_message.assert_not_called()
+        # The batch slot and the queued markers are released either way.
+        assert retry_scheduler.count_batches_in_flight() == 0
+        batches = retry_scheduler.plan_batches(retry_scheduler.ready_messages(), 10, 10)
+        assert len(batches) == 1
+
+    @patch("core.mda.outbound_tasks.send_message")
+    def test_batch_sends_and_releases_slots(self, mock_send_message, mailbox, thread):
+        """A batch sends its messages and frees its slots when done."""
+        message = _ready_message(mailbox, thread, "to@example.com")
+
+        result = retry_messages_batch_task.apply(
+            args=[[str(message.id)], "example.com"]
+        ).get()
+
+        assert result == {
+            "success": True,
+            "deferred": False,
+            "domain": "example.com",
+            "processed_messages": 1,
+            "success_count": 1,
+            "error_count": 0,
+        }
+        mock_send_message.assert_called_once_with(message, force_mta_out=False)
+        assert acquire_cache_slot(
+            retry_scheduler.domain_slot_prefix("example.com"), 1, 60
+        )
+
+
+@pytest.mark.redis
+@pytest.mark.django_db
+@patch("core.mda.outbound_tasks.send_message")
+def test_retry_outcomes_are_counted(mock_send_message, redis_cache):
+    """Batch outcomes accumulate in the counters exposed to Prometheus."""
+    mailbox = factories.MailboxFactory()
+    thread = factories.ThreadFactory()
+    _ready_message(mailbox, thread, "ok@example.com")
+    _ready_message(mailbox, thread, "ko@example.org")
+    mock_send_message.side_effect = [None, Exception("MTA down")]
+
+    retry_messages_task.apply().get()
+
+    assert retry_scheduler.get_stats() == {
+        "sent": 1,
+        "failed": 1,
+        "deferred": 0,
+        "batches": 2,
+    }
@@ -0,0 +1,154 @@
+"""Tests for the pooled rspamd client, against a local fake rspamd."""
+# pylint: disable=redefined-outer-name
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.cache import cache
+
+import pytest
+import requests
+
+from core.mda import rspamd
+from core.mda.inbound_auth import check_inbound_authentication
+from core.mda.inbound_tasks import _check_spam_with_rspamd
+from core.utils import acquire_cache_slot, release_cache_slot
+
+
+class _FakeRspamdHandler(BaseHTTPRequestHandler):
+    """Answer ``/checkv2`` like rspamd, with the server's injected faults."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Scan the body: sleep ``delay``, fail with ``status`` if set."""
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        server.scanned_sizes.append(len(body))
+        server.connections.add(self.client_address)
+        time.sleep(server.delay)
+        if server.status != 200:
+            self.send_response(server.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        payload = json.dumps(
+            {
+                "action": "reject" if b"VIAGRA" in body else "no action",
+                "score": 1.0,
+                "required_score": 15.0,
+                "symbols": {"R_DKIM_REJECT": {"score": 1.0}},
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep test output quiet."""
+
+
+@pytest.fixture
+def fake_rspamd(settings):
+    """Run a fake rspamd; tune ``delay`` and ``status`` to inject faults."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeRspamdHandler)
+    server.daemon_threads = True
+    server.delay = 0
+    server.status = 200
+    server.scanned_sizes = []
+    server.connections = set()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    settings.RSPAMD_TIMEOUT = 1
+    settings.RSPAMD_CIRCUIT_FAILURE_THRESHOLD = 3
+    settings.RSPAMD_CIRCUIT_COOLDOWN = 30
+    cache.clear()
+    yield server
+    cache.clear()
+    server.shutdown()
+    server.server_close()
+
+
+def test_scan_verdict_and_keep_alive(fake_rspamd):
+    """Consecutive scans reuse one pooled connection."""
+    spam_config = {"rspamd_url": fake_rspamd.url}
+
+    for _ in range(3):
+        assert (
+            _check_spam_with_rspamd(b"Subject: hi\r\n\r\nhello", spam_config)[0]
+            is False
+        )
+    is_spam, error, _result = _check_spam_with_rspamd(
+        b"Subject: buy\r\n\r\nVIAGRA", spam_config
+    )
+
+    assert (is_spam, error) == (True, None)
+    assert len(fake_rspamd.connections) == 1
+
+
+def test_oversized_message_truncated(fake_rspamd, settings):
+    """Only RSPAMD_MAX_SCAN_SIZE bytes are scanned, and auth ignores it."""
+    settings.RSPAMD_MAX_SCAN_SIZE = 1000
+
+    result = rspamd.scan(b"x" * 5000, fake_rspamd.url)
+
+    assert fake_rspamd.scanned_sizes == [1000]
+    assert result["truncated"] is True
+    # R_DKIM_REJECT on a truncated copy doesn't mean a forged message.
+    verdict = check_inbound_authentication(
+        b"", {}, {"inbound_auth": "rspamd"}, rspamd_result=result
+    )
+    assert verdict == "none"
+
+
+def test_slow_rspamd_bounded_by_budget(fake_rspamd):
+    """A scan slower than RSPAMD_TIMEOUT is abandoned and fails open."""
+    fake_rspamd.delay = 2
+
+    start = time.monotonic()
+    is_spam, error, result = _check_spam_with_rspamd(
+        b"VIAGRA", {"rspamd_url": fake_rspamd.url}
+    )
+
+    assert time.monotonic() - start < 1.5
+    assert (is_spam, result) == (False, None)
+    assert error is not None
+
+
+def test_circuit_opens_and_fails_fast(fake_rspamd):
+    """After the failure threshold, scans are skipped without a request."""
+    fake_rspamd.status = 503
+
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.HTTPError):
+            rspamd.scan(b"hello", fake_rspamd.url)
+    assert rspamd.is_circuit_open(fake_rspamd.url)
+
+    fake_rspamd.status = 200
+    with pytest.raises(rspamd.RspamdScanSkipped):
+        rspamd.scan(b"hello", fake_rspamd.url)
+    assert len(fake_rspamd.scanned_sizes) == 3
+
+    cache.clear()  # cooldown elapsed
+    assert rspamd.scan(b"hello", fake_rspamd.url)["action"] == "no action"
+
+
+def test_saturated_scan_skipped(fake_rspamd, settings):
+    """A scan waiting longer than its budget for a slot is skipped."""
+    settings.RSPAMD_MAX_CONCURRENCY = 1
+    slot = acquire_cache_slot("rspamd:slot", 1, timeout=60)
+
+    try:
+        with pytest.raises(rspamd.RspamdScanSkipped):
+            rspamd.scan(b"hello", fake_rspamd.url)
+    finally:
+        release_cache_slot(*slot)
+
+    assert fake_rspamd.scanned_sizes == []
+    assert rspamd.scan(b"hello", fake_rspamd.url)["action"] == "no action"
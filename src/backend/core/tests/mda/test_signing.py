@@ -108,7 +108,7 @@ def test_verify_message_dkim_returns_signing_domain():
 
     answer = Mock()
     answer.strings = [f"v=DKIM1; k=rsa; p={public_key_str}".encode()]
-    with patch("core.mda.signing.dns.resolver.resolve", return_value=[answer]):
+    with patch("core.services.dns.cache.dns.resolver.resolve", return_value=[answer]):
         assert verify_message_dkim(full_message_signed) == "example.com"
 
 
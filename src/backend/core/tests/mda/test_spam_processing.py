@@ -47,7 +47,8 @@ class TestDeliverInboundMessageQueueing:
 
         # Check that an InboundMessage was created
         inbound_message = models.InboundMessage.objects.get(mailbox=mailbox)
-        assert inbound_message.raw_data == raw_data
+        assert inbound_message.get_raw_data() == raw_data
+        assert inbound_message.raw_data is None
         assert inbound_message.mailbox == mailbox
 
         # Check that the task was queued
@@ -82,13 +83,38 @@ class TestDeliverInboundMessageQueueing:
         # Check that no InboundMessage was created for duplicate
         assert models.InboundMessage.objects.count() == 0
 
+    @patch("core.mda.inbound_tasks.process_inbound_message_task.delay", Mock())
+    def test_deliver_inbound_message_stores_payload_once(self):
+        """A message queued for several recipients shares one blob."""
+        domain = factories.MailDomainFactory()
+        mailboxes = factories.MailboxFactory.create_batch(3, domain=domain)
+        raw_data = b"From: sender@example.com\r\nSubject: Hi\r\n\r\n" + b"x" * 5000
+        parsed_email = {"subject": "Hi", "from": [{"email": "sender@example.com"}]}
+
+        for mailbox in mailboxes:
+            assert deliver_inbound_message(str(mailbox), parsed_email, raw_data)
+
+        inbound_messages = models.InboundMessage.objects.all()
+        assert len(inbound_messages) == 3
+        assert len({inbound.blob_id for inbound in inbound_messages}) == 1
+        assert models.Blob.objects.filter(inbound_messages__isnull=False).count() == 1
+        assert models.Blob.objects.is_referenced(inbound_messages[0].blob_id)
+
+    def test_legacy_raw_data_still_readable(self):
+        """Rows queued before blob storage are read from their own column."""
+        inbound_message = models.InboundMessage.objects.create(
+            mailbox=factories.MailboxFactory(), raw_data=b"Legacy content"
+        )
+
+        assert inbound_message.get_raw_data() == b"Legacy content"
+
 
 @pytest.mark.django_db
 class TestRspamdSpamCheck:
     """Test rspamd spam checking functionality."""
 
     @override_settings(SPAM_CONFIG={"rspamd_url": "http://rspamd:8010/_api"})
-    @patch("core.mda.inbound_tasks.requests.post")
+    @patch("core.mda.rspamd.requests.Session.post")
     def test_check_spam_with_rspamd_spam(self, mock_post):
         """Test that spam messages are correctly identified."""
         spam_config = {"rspamd_url": "http://rspamd:8010/_api"}
@@ -113,7 +139,7 @@ class TestRspamdSpamCheck:
         assert call_args[1]["data"] == raw_data
 
     @override_settings(SPAM_CONFIG={"rspamd_url": "http://rspamd:8010/_api"})
-    @patch("core.mda.inbound_tasks.requests.post")
+    @patch("core.mda.rspamd.requests.Session.post")
     def test_check_spam_with_rspamd_not_spam(self, mock_post):
         """Test that non-spam messages are correctly identified."""
         spam_config = {"rspamd_url": "http://rspamd:8010/_api"}
@@ -138,7 +164,7 @@ class TestRspamdSpamCheck:
             "rspamd_auth": "Bearer token123",
         }
     )
-    @patch("core.mda.inbound_tasks.requests.post")
+    @patch("core.mda.rspamd.requests.Session.post")
     def test_check_spam_with_rspamd_auth_header(self, mock_post):
         """Test that Authorization header is included when configured."""
         spam_config = {
@@ -172,7 +198,7 @@ class TestRspamdSpamCheck:
         assert rspamd_result is None
 
     @override_settings(SPAM_CONFIG={"rspamd_url": "http://rspamd:8010/_api"})
-    @patch("core.mda.inbound_tasks.requests.post")
+    @patch("core.mda.rspamd.requests.Session.post")
     def test_check_spam_with_rspamd_error(self, mock_post):
         """Test that errors in rspamd check are handled gracefully."""
         spam_config = {"rspamd_url": "http://rspamd:8010/_api"}
@@ -192,7 +218,7 @@ class TestRspamdSpamCheck:
             "rspamd_auth": "Bearer global",
         }
     )
-    @patch("core.mda.inbound_tasks.requests.post")
+    @patch("core.mda.rspamd.requests.Session.post")
     def test_check_spam_with_maildomain_override(self, mock_post):
         """Test that maildomain custom_settings can override SPAM_CONFIG."""
         # Create a maildomain with custom spam config
@@ -741,7 +767,7 @@ class TestProcessInboundMessageTask:
         mailbox = factories.MailboxFactory()
         raw_data = b"Spam content"
 
-        inbound_message = models.InboundMessage.objects.create(
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
             mailbox=mailbox,
             raw_data=raw_data,
         )
@@ -774,7 +800,7 @@ class TestProcessInboundMessageTask:
         mailbox = factories.MailboxFactory()
         raw_data = b"Legitimate content"
 
-        inbound_message = models.InboundMessage.objects.create(
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
             mailbox=mailbox,
             raw_data=raw_data,
         )
@@ -803,7 +829,7 @@ class TestProcessInboundMessageTask:
         mailbox = factories.MailboxFactory()
         raw_data = b"Test content"
 
-        inbound_message = models.InboundMessage.objects.create(
+        inbound_message = models.InboundMessage.objects.create_inbound_message(
             mailbox=mailbox,
             raw_data=raw_data,
         )
@@ -835,13 +861,13 @@ class TestProcessInboundMessagesQueueTask:
         # Create multiple pending messages older than 5 minutes (for retry processing)
         old_time = timezone.now() - timezone.timedelta(minutes=6)
         for _ in range(3):
-            inbound_message = models.InboundMessage.objects.create(
+            inbound_message = models.InboundMessage.objects.create_inbound_message(
                 mailbox=mailbox,
                 raw_data=b"Content",
             )
-            # Update created_at to make it old enough for retry
+            # Make it old enough for retry
             models.InboundMessage.objects.filter(id=inbound_message.id).update(
-                created_at=old_time
+                created_at=old_time, available_at=old_time
             )
 
         # Call the bound task directly using .run() method
@@ -852,3 +878,10 @@ class TestProcessInboundMessagesQueueTask:
         assert result["processed"] == 3
         assert result["total"] == 3
         assert mock_task_delay.call_count == 3
+
+        # The messages are leased: the next run doesn't dispatch them again.
+        with patch.object(process_inbound_messages_queue_task, "update_state", Mock()):
+            result = process_inbound_messages_queue_task.run(10)
+
+        assert result["total"] == 0
+        assert mock_task_delay.call_count == 3
@@ -0,0 +1,119 @@
+"""End-to-end tests for search modifiers served by derived index fields.
+
+Sender and recipient substrings are matched on the trigram subfields, and
+``is:read``/``is:starred`` can be answered from the mailbox flags copied
+on the message documents instead of the parent join.
+"""
+# pylint: disable=unused-argument, too-many-locals
+
+from django.conf import settings
+from django.test import override_settings
+from django.utils import timezone
+
+import pytest
+
+from core.models import ThreadAccess
+from core.services.search import (
+    get_opensearch_client,
+    index_message,
+    update_thread_mailbox_flags,
+)
+from core.services.search.mapping import MESSAGE_INDEX
+
+
+@pytest.mark.skipif(
+    len(settings.OPENSEARCH_HOSTS) == 0,
+    reason="OpenSearch is not configured",
+)
+@pytest.mark.redis
+@pytest.mark.django_db(transaction=True)
+class TestSearchDerivedFieldsE2E:
+    """End-to-end tests for the modifiers served by derived index fields.
+
+    Marked ``@pytest.mark.redis`` for the same reason as ``TestSearchE2E``:
+    ``wait_for_indexing`` drains the Redis-backed coalescer.
+    """
+
+    @pytest.fixture(autouse=True)
+    def _redis_cache(self, redis_cache):
+        pass
+
+    def test_search_e2e_modifiers_name_and_address_substring(
+        self, setup_search, api_client, test_url, test_threads
+    ):
+        """Substrings anywhere in sender and recipient names and addresses."""
+
+        def found(search):
+            response = api_client.get(f"{test_url}?search={search}")
+            assert response.status_code == 200
+            return {t["id"] for t in response.data["results"]}
+
+        john = {str(test_threads[f"thread{i}"].id) for i in (1, 3, 9, 10)}
+        sarah = {str(test_threads[f"thread{i}"].id) for i in (2, 8)}
+
+        # "john@" and "Sarah Johnson", in the middle of the value.
+        assert found("from:ohn") == john | sarah
+        assert found("from:ohnson") == sarah
+        assert found("from:rah") == sarah
+        # Too short for a trigram.
+        assert found("from:jo") == john | sarah
+        # Recipient names: Maria Garcia is only in Bcc of thread 2.
+        assert found("to:arci") == {str(test_threads["thread2"].id)}
+        assert found("bcc:garcia") == {str(test_threads["thread2"].id)}
+        assert found("cc:garcia") == set()
+
+    @pytest.mark.usefixtures("setup_search")
+    def test_search_e2e_modifiers_join_free_mailbox_filters(
+        self, api_client, test_url, test_threads, test_mailboxes
+    ):
+        """The flags copied on the messages find the same threads as the join."""
+        mailbox1, _ = test_mailboxes
+        searches = (
+            "is:starred",
+            "is:read",
+            "is:unread",
+            "is:unread example",
+            "is:read in:trash",
+        )
+
+        def found(search):
+            response = api_client.get(
+                f"{test_url}?search={search}&mailbox_id={mailbox1.id}"
+            )
+            assert response.status_code == 200
+            return {t["id"] for t in response.data["results"]}
+
+        with override_settings(SEARCH_JOIN_FREE_MAILBOX_FILTERS=False):
+            with_join = {search: found(search) for search in searches}
+        with override_settings(SEARCH_JOIN_FREE_MAILBOX_FILTERS=True):
+            without_join = {search: found(search) for search in searches}
+
+        assert without_join == with_join
+        assert without_join["is:starred"] == {str(test_threads["thread6"].id)}
+        assert len(without_join["is:unread"]) == 6
+
+        # A star change rewrites the copies held by the message documents
+        thread1 = test_threads["thread1"]
+        ThreadAccess.objects.filter(thread=thread1, mailbox=mailbox1).update(
+            starred_at=timezone.now()
+        )
+        assert update_thread_mailbox_flags(thread1)
+        get_opensearch_client().indices.refresh(index=MESSAGE_INDEX)
+        with override_settings(SEARCH_JOIN_FREE_MAILBOX_FILTERS=True):
+            assert found("is:starred") == {
+                str(test_threads["thread1"].id),
+                str(test_threads["thread6"].id),
+            }
+
+        # A message indexed just before the change, before any refresh made
+        # it searchable, is updated too.
+        message = thread1.messages.first()
+        assert index_message(message)
+        ThreadAccess.objects.filter(thread=thread1, mailbox=mailbox1).update(
+            starred_at=None
+        )
+        assert update_thread_mailbox_flags(thread1)
+        document = get_opensearch_client().get(
+            index=MESSAGE_INDEX, id=str(message.id), routing=str(thread1.id)
+        )
+        assert str(mailbox1.id) not in document["_source"]["starred_mailboxes"]
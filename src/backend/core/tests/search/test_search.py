@@ -377,7 +377,7 @@ def test_update_thread_mailbox_flags(mock_es_client_index):
     """Test that update_thread_mailbox_flags re-indexes the thread document."""
     thread = ThreadFactory()
     mailbox = MailboxFactory()
-    MessageFactory(thread=thread)
+    message = MessageFactory(thread=thread)
     thread.update_stats()
     thread.refresh_from_db()
     ThreadAccessFactory(thread=thread, mailbox=mailbox, read_at=None)
@@ -385,7 +385,10 @@ def test_update_thread_mailbox_flags(mock_es_client_index):
     # Reset mock after setup (signals may have triggered calls)
     mock_es_client_index.reset_mock()
 
-    success = update_thread_mailbox_flags(thread)
+    with mock.patch(
+        "core.services.search.index.bulk", return_value=(1, [])
+    ) as mock_bulk:
+        success = update_thread_mailbox_flags(thread)
 
     assert success
     mock_es_client_index.index.assert_called_once()
@@ -394,6 +397,67 @@ def test_update_thread_mailbox_flags(mock_es_client_index):
     assert str(mailbox.id) in call_args["body"]["unread_mailboxes"]
     assert "starred_mailboxes" in call_args["body"]
 
+    # The copies on the message documents get a partial update by ID
+    mock_bulk.assert_called_once()
+    assert mock_bulk.call_args.args[1] == [
+        {
+            "_op_type": "update",
+            "_index": MESSAGE_INDEX,
+            "_id": str(message.id),
+            "_routing": str(thread.id),
+            "retry_on_conflict": 3,
+            "doc": {
+                "unread_mailboxes": [str(mailbox.id)],
+                "starred_mailboxes": [],
+            },
+        }
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("mock_es_client_index")
+def test_update_thread_mailbox_flags_ignores_unindexed_messages():
+    """A message not indexed yet is not an error: indexing writes its flags."""
+    thread = ThreadFactory()
+    message = MessageFactory(thread=thread)
+    ThreadAccessFactory(thread=thread, mailbox=MailboxFactory())
+    missing = {
+        "update": {
+            "_id": str(message.id),
+            "status": 404,
+            "error": {"type": "document_missing_exception"},
+        }
+    }
+
+    with mock.patch("core.services.search.index.bulk", return_value=(0, [missing])):
+        assert update_thread_mailbox_flags(thread)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("join_free", [False, True])
+def test_update_thread_mailbox_flags_does_not_load_blobs(
+    mock_es_client_index, join_free
+):
+    """A read or star change never re-fetches nor re-parses message blobs."""
+    thread = ThreadFactory()
+    MessageFactory.create_batch(3, thread=thread, blob=BlobFactory())
+    ThreadAccessFactory(thread=thread, mailbox=MailboxFactory())
+    mock_es_client_index.reset_mock()
+
+    with (
+        override_settings(SEARCH_JOIN_FREE_MAILBOX_FILTERS=join_free),
+        mock.patch(
+            "core.models.Blob.get_content", side_effect=AssertionError("blob loaded")
+        ),
+        mock.patch(
+            "core.services.search.index.bulk", return_value=(3, [])
+        ) as mock_bulk,
+    ):
+        assert update_thread_mailbox_flags(thread)
+
+    mock_es_client_index.index.assert_called_once()
+    assert len(mock_bulk.call_args.args[1]) == 3
+
 
 @pytest.mark.django_db
 class TestSearchIndexBuildMessageDoc:
@@ -444,6 +508,35 @@ class TestSearchIndexBuildMessageDoc:
 
         assert doc is None
 
+    def test_search_index_build_message_doc_with_mailbox_flags(self):
+        """The thread's mailbox flags are copied on the message document."""
+        message = MessageFactory()
+
+        doc = _build_message_doc(
+            message,
+            ["mb-1", "mb-2"],
+            unread_mailbox_ids=["mb-1"],
+            starred_mailbox_ids=["mb-2"],
+        )
+
+        assert doc["unread_mailboxes"] == ["mb-1"]
+        assert doc["starred_mailboxes"] == ["mb-2"]
+
+    def test_search_index_index_message_computes_mailbox_flags(
+        self, mock_es_client_index
+    ):
+        """Without explicit flags, index_message reads the thread accesses."""
+        thread = ThreadFactory(messaged_at=timezone.now())
+        mailbox = MailboxFactory()
+        ThreadAccessFactory(mailbox=mailbox, thread=thread, starred_at=timezone.now())
+        message = MessageFactory(thread=thread)
+
+        assert index_message(message) is True
+
+        doc = mock_es_client_index.index.call_args[1]["body"]
+        assert doc["unread_mailboxes"] == [str(mailbox.id)]
+        assert doc["starred_mailboxes"] == [str(mailbox.id)]
+
 
 @pytest.mark.django_db
 class TestBuildThreadDoc:
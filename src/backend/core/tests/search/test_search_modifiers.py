@@ -346,3 +346,51 @@ def test_search_threads_with_folder_filter(mock_es_client):
             assert query["term"]["is_trashed"] is True
             break
     assert trash_filter_found, "Trash filter was not found in the OpenSearch query"
+
+
+def test_search_threads_substring_modifiers_use_ngram_subfields(mock_es_client):
+    """Substring from:/to: values are phrase queries on the trigram subfields."""
+    search_threads("from:ohn to:garcia", mailbox_ids=[1])
+
+    should = mock_es_client.search.call_args[1]["body"]["query"]["bool"]["should"]
+    assert {"match_phrase": {"sender_email.ngram": "ohn"}} in should
+    assert {"match_phrase": {"sender_name.ngram": "ohn"}} in should
+    for field in ("to_name", "cc_name", "bcc_name"):
+        assert {"match_phrase": {f"{field}.ngram": "garcia"}} in should
+    assert not any("wildcard" in clause for clause in should)
+
+
+def test_search_threads_substring_modifiers_case_and_length(mock_es_client):
+    """Capitals skip the names; values under three characters use the trigrams."""
+    search_threads("from:John", mailbox_ids=[1])
+    should = mock_es_client.search.call_args[1]["body"]["query"]["bool"]["should"]
+    assert should == [{"match_phrase": {"sender_email.ngram": "John"}}]
+
+    search_threads("from:jo", mailbox_ids=[1])
+    should = mock_es_client.search.call_args[1]["body"]["query"]["bool"]["should"]
+    assert should == [
+        {"wildcard": {"sender_email.ngram": "*jo*"}},
+        {"wildcard": {"sender_name.ngram": "*jo*"}},
+    ]
+
+
+def test_search_threads_join_free_mailbox_filters(mock_es_client, settings):
+    """With SEARCH_JOIN_FREE_MAILBOX_FILTERS, flags filter the messages directly."""
+    settings.SEARCH_JOIN_FREE_MAILBOX_FILTERS = True
+
+    search_threads("is:starred is:read", mailbox_ids=["mb-1"])
+
+    filters = mock_es_client.search.call_args[1]["body"]["query"]["bool"]["filter"]
+    assert not any("has_parent" in item for item in filters)
+    is_message = {"term": {"relation": "message"}}
+    assert {
+        "bool": {"filter": [is_message, {"terms": {"starred_mailboxes": ["mb-1"]}}]}
+    } in filters
+    assert {
+        "bool": {
+            "filter": [
+                is_message,
+                {"bool": {"must_not": {"terms": {"unread_mailboxes": ["mb-1"]}}}},
+            ]
+        }
+    } in filters
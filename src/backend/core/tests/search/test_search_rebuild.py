@@ -0,0 +1,286 @@
+"""Tests for the partitioned search index rebuild and its alias cutover."""
+
+import uuid
+from unittest import mock
+
+from django.utils import timezone
+
+import pytest
+from opensearchpy.exceptions import NotFoundError
+
+from core import models
+from core.factories import MailboxFactory, ThreadAccessFactory, ThreadFactory
+from core.services.search.exceptions import IndexBuildInProgressError
+from core.services.search.index import bulk_delete_documents, write_indices
+from core.services.search.mapping import MESSAGE_INDEX
+from core.services.search.rebuild import (
+    CUTOVER_TIMEOUT,
+    _partition_bounds,
+    cancel_build,
+    finish_build,
+    get_build_progress,
+    load_partition,
+    start_build,
+)
+from core.services.search.tasks import enqueue_index_build
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(name="mock_es")
+def fixture_mock_es():
+    """Mock the OpenSearch client of the index and rebuild modules."""
+    mock_es = mock.MagicMock()
+    mock_es.indices.get_alias.side_effect = NotFoundError(404, "alias missing", {})
+    mock_es.indices.exists.return_value = True
+    with (
+        mock.patch(
+            "core.services.search.index.get_opensearch_client", return_value=mock_es
+        ),
+        mock.patch(
+            "core.services.search.rebuild.get_opensearch_client", return_value=mock_es
+        ),
+    ):
+        yield mock_es
+
+
+@pytest.fixture(name="threads")
+def fixture_threads():
+    """Create threads visible to a mailbox."""
+    mailbox = MailboxFactory()
+    threads = ThreadFactory.create_batch(5)
+    for thread in threads:
+        ThreadAccessFactory(mailbox=mailbox, thread=thread)
+    return threads
+
+
+def test_partition_bounds_cover_the_uuid_space():
+    """Ranges are contiguous, unbounded at both ends, and split the space evenly."""
+    assert _partition_bounds(1) == [(None, None)]
+
+    bounds = _partition_bounds(4)
+    assert [lower for lower, _ in bounds][0] is None
+    assert [upper for _, upper in bounds][-1] is None
+    assert [upper for _, upper in bounds[:-1]] == [lower for lower, _ in bounds[1:]]
+    assert bounds[2][0] == uuid.UUID("80000000-0000-0000-0000-000000000000")
+
+
+def test_partitions_split_the_threads(threads):
+    """Every thread falls in exactly one partition."""
+    build = models.SearchIndexBuild.objects.create(index_name="messages_test")
+    partitions = [
+        models.SearchIndexBuildPartition.objects.create(
+            build=build, lower_id=lower, upper_id=upper
+        )
+        for lower, upper in _partition_bounds(3)
+    ]
+
+    ids = [thread.id for partition in partitions for thread in partition.threads()]
+    assert sorted(ids) == sorted(thread.id for thread in threads)
+
+
+def test_start_build_creates_the_index_and_partitions(mock_es, threads, settings):
+    """The index loads without refreshes nor replicas, and partitions are sized."""
+    settings.SEARCH_REBUILD_PARTITION_SIZE = 2
+
+    build = start_build()
+
+    assert build.index_name.startswith(f"{MESSAGE_INDEX}_")
+    assert build.threads_count == len(threads)
+    assert build.partitions.count() == 3
+    _, kwargs = mock_es.indices.create.call_args
+    assert kwargs["index"] == build.index_name
+    assert kwargs["body"]["settings"]["refresh_interval"] == "-1"
+    assert kwargs["body"]["settings"]["number_of_replicas"] == 0
+    assert kwargs["body"]["mappings"]
+
+    with pytest.raises(IndexBuildInProgressError):
+        start_build()
+
+
+@pytest.mark.usefixtures("mock_es")
+def test_writes_go_to_the_index_being_built():
+    """Live deletes are applied to the live index and the index being built."""
+    assert write_indices() == [MESSAGE_INDEX]
+    models.SearchIndexBuild.objects.create(index_name="messages_test")
+    assert write_indices() == [MESSAGE_INDEX, "messages_test"]
+
+    with mock.patch("core.services.search.index.bulk", return_value=(1, [])) as bulk:
+        bulk_delete_documents(
+            [{"_op_type": "delete", "_index": MESSAGE_INDEX, "_id": "thread-1"}]
+        )
+
+    assert [action["_index"] for action in bulk.call_args[0][1]] == [
+        MESSAGE_INDEX,
+        "messages_test",
+    ]
+
+
+@pytest.mark.usefixtures("mock_es")
+def test_load_partition_creates_documents_and_checkpoints(threads):
+    """The load never overwrites documents, and conflicts are not failures."""
+    build = start_build(partition_size=len(threads))
+    partition = build.partitions.get()
+    conflict = {"create": {"_id": str(threads[0].id), "status": 409}}
+
+    with mock.patch(
+        "core.services.search.index.bulk", return_value=(1, [conflict])
+    ) as bulk:
+        partition = load_partition(partition.id)
+        actions = bulk.call_args[0][1]
+
+    assert {action["_op_type"] for action in actions} == {"create"}
+    assert {action["_index"] for action in actions} == {build.index_name}
+    assert partition.completed_at is not None
+    assert partition.indexed_threads == len(threads)
+    assert partition.failure_count == 0
+
+    with mock.patch("core.services.search.index.bulk") as bulk:
+        load_partition(partition.id)
+    bulk.assert_not_called()
+
+
+def test_load_partition_with_failures_is_left_to_resume(mock_es, threads):
+    """Documents that failed to load keep the partition unchecked."""
+    build = start_build(partition_size=len(threads))
+    partition = build.partitions.get()
+    failed = {"create": {"_id": str(threads[0].id), "status": 400}}
+
+    with mock.patch("core.services.search.index.bulk", return_value=(1, [failed])):
+        partition = load_partition(partition.id)
+
+    assert partition.failure_count == 1
+    assert partition.completed_at is None
+    assert finish_build(build.id) is False
+    mock_es.indices.update_aliases.assert_not_called()
+
+    # Resuming loads the partition again.
+    with mock.patch("core.services.search.index.bulk", return_value=(0, [])):
+        partition = load_partition(partition.id)
+    assert partition.failure_count == 0
+    assert partition.completed_at is not None
+    assert finish_build(build.id) is True
+
+
+def test_finish_build_waits_for_every_partition(mock_es, threads):
+    """The alias is only swapped once the last partition is loaded."""
+    build = start_build(partition_size=2)
+    first, *others = build.partitions.all()
+
+    with mock.patch("core.services.search.index.bulk", return_value=(0, [])):
+        load_partition(first.id)
+        assert finish_build(build.id) is False
+        mock_es.indices.update_aliases.assert_not_called()
+
+        for partition in others:
+            load_partition(partition.id)
+    assert finish_build(build.id) is True
+    assert finish_build(build.id) is False
+
+    build.refresh_from_db()
+    assert build.completed_at is not None
+    mock_es.indices.put_settings.assert_called_once_with(
+        index=build.index_name,
+        body={"index": {"refresh_interval": "5s", "number_of_replicas": 0}},
+    )
+    assert get_build_progress(build)["indexed_threads"] == len(threads)
+    assert write_indices() == [MESSAGE_INDEX]
+
+
+def test_finish_build_claims_the_cutover_outside_the_lock(mock_es):
+    """OpenSearch is called once the claim is committed, and a failure releases it."""
+    build = models.SearchIndexBuild.objects.create(index_name="messages_new")
+
+    def claimed(**kwargs):
+        # Another worker doesn't wait on a row lock: it sees the claim.
+        assert finish_build(build.id) is False
+        raise NotFoundError(404, "index missing", {})
+
+    mock_es.indices.put_settings.side_effect = claimed
+    with pytest.raises(NotFoundError):
+        finish_build(build.id)
+
+    build.refresh_from_db()
+    assert build.cutover_started_at is None
+    assert build.completed_at is None
+
+    mock_es.indices.put_settings.side_effect = None
+    assert finish_build(build.id) is True
+
+
+@pytest.mark.usefixtures("mock_es")
+def test_finish_build_takes_over_a_stale_cutover():
+    """A cutover claimed by a worker that died is claimed again."""
+    build = models.SearchIndexBuild.objects.create(
+        index_name="messages_new", cutover_started_at=timezone.now()
+    )
+    assert finish_build(build.id) is False
+
+    models.SearchIndexBuild.objects.filter(id=build.id).update(
+        cutover_started_at=timezone.now() - CUTOVER_TIMEOUT
+    )
+    assert finish_build(build.id) is True
+
+
+def test_finish_build_replaces_a_concrete_index(mock_es):
+    """An index named like the alias is removed in the same call that adds it."""
+    build = models.SearchIndexBuild.objects.create(index_name="messages_new")
+
+    finish_build(build.id)
+
+    mock_es.indices.update_aliases.assert_called_once_with(
+        body={
+            "actions": [
+                {"remove_index": {"index": MESSAGE_INDEX}},
+                {"add": {"index": "messages_new", "alias": MESSAGE_INDEX}},
+            ]
+        }
+    )
+    mock_es.indices.delete.assert_not_called()
+
+
+def test_finish_build_moves_the_alias(mock_es):
+    """The alias moves to the new index, then the previous index is deleted."""
+    mock_es.indices.get_alias.side_effect = None
+    mock_es.indices.get_alias.return_value = {
+        "messages_old": {"aliases": {MESSAGE_INDEX: {}}}
+    }
+    build = models.SearchIndexBuild.objects.create(index_name="messages_new")
+
+    finish_build(build.id)
+
+    mock_es.indices.update_aliases.assert_called_once_with(
+        body={
+            "actions": [
+                {"remove": {"index": "messages_old", "alias": MESSAGE_INDEX}},
+                {"add": {"index": "messages_new", "alias": MESSAGE_INDEX}},
+            ]
+        }
+    )
+    mock_es.indices.delete.assert_called_once_with(index="messages_old")
+
+
+@pytest.mark.usefixtures("mock_es", "threads")
+def test_enqueue_index_build_resumes_the_partitions_left():
+    """Only partitions not loaded yet are enqueued."""
+    build = start_build(partition_size=2)
+    loaded = build.partitions.first()
+    with mock.patch("core.services.search.index.bulk", return_value=(0, [])):
+        load_partition(loaded.id)
+
+    with mock.patch(
+        "core.services.search.tasks.rebuild_index_partition_task.delay"
+    ) as delay:
+        assert enqueue_index_build(build) == build.partitions.count() - 1
+
+    assert str(loaded.id) not in {call.args[0] for call in delay.call_args_list}
+
+
+def test_cancel_build_drops_the_index(mock_es):
+    """Cancelling deletes the index and the build."""
+    build = models.SearchIndexBuild.objects.create(index_name="messages_new")
+
+    cancel_build(build.id)
+
+    mock_es.indices.delete.assert_called_once_with(index="messages_new")
+    assert not models.SearchIndexBuild.objects.exists()
@@ -0,0 +1,136 @@
+"""Tests for the attachment preview renderings."""
+
+import io
+import secrets
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.utils import timezone
+
+import pytest
+from PIL import Image
+
+from core import factories, models
+from core.services import blob_preview
+
+
+def _image(size, image_format="PNG", **save_options):
+    """Encoded image of random pixels."""
+    width, height = size
+    image = Image.frombytes(
+        "RGB", size, secrets.token_bytes(width * height * 3)
+    ).convert("RGBA" if image_format == "PNG" else "RGB")
+    output = io.BytesIO()
+    image.save(output, format=image_format, **save_options)
+    return output.getvalue()
+
+
+class TestRenderPreview:
+    """Renderings are smaller WebP images, or ``None`` to serve the original."""
+
+    @pytest.fixture(autouse=True)
+    def _max_dimension(self, settings):
+        settings.BLOB_PREVIEW_MAX_DIMENSION = 100
+
+    @pytest.mark.parametrize("image_format", ["PNG", "JPEG"])
+    def test_downscales_to_webp(self, image_format):
+        """The longest side fits the configured dimension, ratio kept."""
+        rendered = blob_preview.render_preview(_image((400, 200), image_format))
+
+        image = Image.open(io.BytesIO(rendered))
+        assert image.format == "WEBP"
+        assert image.size == (100, 50)
+
+    def test_exif_orientation_is_applied(self):
+        """Rotated photos are rendered upright."""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90° clockwise
+        content = _image((400, 200), "JPEG", exif=exif)
+
+        rendered = blob_preview.render_preview(content)
+
+        assert Image.open(io.BytesIO(rendered)).size == (50, 100)
+
+    def test_animated_images_are_served_as_is(self):
+        """A still rendering would lose the animation."""
+        frames = [Image.new("RGB", (400, 400), color) for color in ("red", "blue")]
+        output = io.BytesIO()
+        frames[0].save(output, format="GIF", save_all=True, append_images=frames[1:])
+
+        assert blob_preview.render_preview(output.getvalue()) is None
+
+    def test_no_rendering_when_not_smaller(self):
+        """A blank bilevel PNG is cheaper to send as it is."""
+        output = io.BytesIO()
+        Image.new("1", (100, 100)).save(output, format="PNG")
+        content = output.getvalue()
+
+        assert blob_preview.render_preview(content) is None
+
+    def test_unreadable_image(self):
+        """Bytes sniffed as an image but not decodable are served as-is."""
+        assert blob_preview.render_preview(b"\x89PNG\r\n\x1a\ngarbage") is None
+
+
+@pytest.mark.django_db
+class TestStorePreview:
+    """Renderings are stored once per content and expire."""
+
+    @pytest.fixture(autouse=True)
+    def _max_dimension(self, settings):
+        settings.BLOB_PREVIEW_MAX_DIMENSION = 100
+
+    def test_store_records_the_sniffed_type(self):
+        """The row keeps the original's sniffed type next to the rendering."""
+        content = _image((400, 400))
+
+        entry = blob_preview.store_preview(content)
+
+        assert entry.source_type == "image/png"
+        assert entry.blob.content_type == "image/webp"
+        assert blob_preview.get_preview(entry.source_sha256) == entry
+
+    def test_non_images_have_no_rendering(self):
+        """PDFs and media are recorded without a rendering."""
+        entry = blob_preview.store_preview(b"%PDF-1.4\n%%EOF\n")
+
+        assert entry.source_type == "application/pdf"
+        assert entry.blob is None
+
+    def test_store_again_releases_the_previous_rendering(self, settings):
+        """Rendering again (e.g. after a settings change) hands the old blob to the GC."""
+        content = _image((400, 400))
+        previous = blob_preview.store_preview(content)
+        settings.BLOB_PREVIEW_MAX_DIMENSION = 50
+
+        with patch("core.services.blob_preview.schedule_for_gc") as schedule_for_gc:
+            entry = blob_preview.store_preview(content)
+
+        assert models.BlobPreview.objects.get() == entry
+        assert entry.blob_id != previous.blob_id
+        schedule_for_gc.assert_called_once_with(previous.blob_id)
+
+    def test_expired_entries_are_pruned(self):
+        """Expired rows go, their blobs are handed to the GC."""
+        expired = models.BlobPreview.objects.create(
+            source_sha256="a" * 64,
+            source_type="image/png",
+            blob=factories.BlobFactory(content=b"old", content_type="image/webp"),
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        models.BlobPreview.objects.create(
+            source_sha256="b" * 64,
+            source_type="application/pdf",
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        live = blob_preview.store_preview(_image((400, 400)))
+
+        assert blob_preview.get_preview(expired.source_sha256) is None
+        assert not models.Blob.objects.is_referenced(expired.blob_id)
+
+        with patch("core.services.blob_preview.schedule_for_gc") as schedule_for_gc:
+            result = blob_preview.prune_blob_previews_task()
+
+        assert result == {"success": True, "expired": 2}
+        schedule_for_gc.assert_called_once_with(expired.blob_id)
+        assert list(models.BlobPreview.objects.all()) == [live]
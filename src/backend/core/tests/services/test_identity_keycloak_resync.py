@@ -0,0 +1,356 @@
+"""Tests for the full Keycloak mailbox resync, against a fake admin API."""
+# pylint: disable=redefined-outer-name, unused-argument
+
+import json
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pytest
+
+from core import factories
+from core.services.identity import keycloak as keycloak_service
+
+REALM = "messages"
+GROUP_PREFIX = "/maildomains/"
+
+
+class _FakeKeycloakHandler(BaseHTTPRequestHandler):
+    """The subset of the Keycloak token and admin REST API used by the resync."""
+
+    routes = [
+        ("POST", r"/realms/[^/]+/protocol/openid-connect/token", "token"),
+        ("GET", r"/admin/realms/[^/]+/group-by-path/(.+)", "group_by_path"),
+        ("PUT", r"/admin/realms/[^/]+/groups/([^/]+)", "update_group"),
+        ("GET", r"/admin/realms/[^/]+/groups/([^/]+)/members", "group_members"),
+        ("GET", r"/admin/realms/[^/]+/users", "list_users"),
+        ("POST", r"/admin/realms/[^/]+/users", "create_user"),
+        ("PUT", r"/admin/realms/[^/]+/users/([^/]+)", "update_user"),
+        ("PUT", r"/admin/realms/[^/]+/users/([^/]+)/groups/([^/]+)", "add_to_group"),
+    ]
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        fake = self.server.fake
+        for route_method, pattern, name in self.routes:
+            match = re.fullmatch(pattern, url.path)
+            if route_method == method and match:
+                fake.calls.append((method, name, query))
+                if (
+                    name != "token"
+                    and fake.only_latest_token
+                    and self.headers.get("Authorization") != f"Bearer {fake.tokens[-1]}"
+                ):
+                    self._send(401, {"error": "HTTP 401 Unauthorized"})
+                    return
+                failure = fake.failures.get((name, match.groups()[-1:] or None))
+                if failure:
+                    self._send(failure.pop(0), {"error": "injected"})
+                    return
+                getattr(self, f"_{name}")(fake, query, body, *match.groups())
+                return
+        self._send(404, {"error": f"unexpected {method} {url.path}"})
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Dispatch GET requests."""
+        self._dispatch("GET")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Dispatch POST requests."""
+        self._dispatch("POST")
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        """Dispatch PUT requests."""
+        self._dispatch("PUT")
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def _page(items, query):
+        first = int(query.get("first", 0))
+        return items[first : first + int(query.get("max", 100))]
+
+    def _token(self, fake, query, body):
+        fake.tokens.append(f"token-{len(fake.tokens)}")
+        self._send(
+            200,
+            {
+                "access_token": fake.tokens[-1],
+                "token_type": "Bearer",
+                "expires_in": 300,
+            },
+        )
+
+    def _group_by_path(self, fake, query, body, path):
+        path = "/" + unquote(path).lstrip("/")
+        for group in fake.groups.values():
+            if group["path"] == path:
+                self._send(200, group)
+                return
+        self._send(404, {"error": "Group path does not exist"})
+
+    def _update_group(self, fake, query, body, group_id):
+        fake.groups[group_id]["attributes"] = json.loads(body)["attributes"]
+        self._send(204)
+
+    def _group_members(self, fake, query, body, group_id):
+        members = [fake.users[user_id] for user_id in sorted(fake.members[group_id])]
+        self._send(200, self._page(members, query))
+
+    def _list_users(self, fake, query, body):
+        users = sorted(fake.users.values(), key=lambda user: user["username"])
+        if "username" in query:
+            users = [u for u in users if u["username"] == query["username"].lower()]
+        self._send(200, self._page(users, query))
+
+    def _create_user(self, fake, query, body):
+        user = json.loads(body)
+        user["username"] = user["username"].lower()
+        if any(u["username"] == user["username"] for u in fake.users.values()):
+            self._send(409, {"errorMessage": "User exists with same username"})
+            return
+        user["id"] = str(uuid.uuid4())
+        fake.users[user["id"]] = user
+        location = f"http://{self.headers['Host']}{self.path}/{user['id']}"
+        self._send(201, headers={"Location": location})
+
+    def _update_user(self, fake, query, body, user_id):
+        fake.users[user_id].update(json.loads(body))
+        self._send(204)
+
+    def _add_to_group(self, fake, query, body, user_id, group_id):
+        fake.members[group_id].add(user_id)
+        self._send(204)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep test output quiet."""
+
+
+class FakeKeycloak:
+    """In-memory realm state served by ``_FakeKeycloakHandler``."""
+
+    def __init__(self):
+        self.users = {}
+        self.groups = {}
+        self.members = {}
+        self.calls = []
+        self.tokens = []
+        # When set, issuing a token expires all the previous ones.
+        self.only_latest_token = False
+        # (route name, (last path argument,) or None) -> status codes to
+        # answer with before serving the request normally.
+        self.failures = {}
+
+    def add_group(self, name):
+        """Create the group of a mail domain."""
+        group_id = str(uuid.uuid4())
+        self.groups[group_id] = {
+            "id": group_id,
+            "name": name,
+            "path": f"{GROUP_PREFIX}{name}",
+            "attributes": {},
+        }
+        self.members[group_id] = set()
+        return group_id
+
+    def add_user(self, username, group_id=None, **fields):
+        """Create a user, optionally member of ``group_id``."""
+        user_id = str(uuid.uuid4())
+        self.users[user_id] = {
+            "id": user_id,
+            "username": username,
+            "enabled": True,
+            **fields,
+        }
+        if group_id:
+            self.members[group_id].add(user_id)
+        return user_id
+
+    def user(self, username):
+        """Return the user named ``username``."""
+        return next(u for u in self.users.values() if u["username"] == username)
+
+
+@pytest.fixture
+def fake_keycloak(settings):
+    """Run the fake Keycloak and point the Keycloak settings at it."""
+    fake = FakeKeycloak()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeKeycloakHandler)
+    server.fake = fake
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    settings.KEYCLOAK_URL = f"http://127.0.0.1:{server.server_address[1]}/"
+    settings.KEYCLOAK_REALM = REALM
+    settings.KEYCLOAK_CLIENT_ID = "rest-api"
+    settings.KEYCLOAK_CLIENT_SECRET = "secret"
+    settings.KEYCLOAK_GROUP_PATH_PREFIX = GROUP_PREFIX
+    keycloak_service._admin_client_cache.update(  # pylint: disable=protected-access
+        client=None, expires_at=0.0
+    )
+    with (
+        patch.object(keycloak_service, "RESYNC_PAGE_SIZE", 2),
+        patch.object(keycloak_service, "RESYNC_RETRY_DELAY", 0),
+    ):
+        yield fake
+
+    keycloak_service._admin_client_cache.update(  # pylint: disable=protected-access
+        client=None, expires_at=0.0
+    )
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def domain(fake_keycloak):
+    """A synced mail domain whose group exists in Keycloak."""
+    maildomain = factories.MailDomainFactory(name="example.com", identity_sync=True)
+    maildomain.group_id = fake_keycloak.add_group("example.com")
+    return maildomain
+
+
+def _mailbox(domain, local_part, name):
+    mailbox = factories.MailboxFactory(domain=domain, local_part=local_part)
+    mailbox.set_display_name(name)
+    return mailbox
+
+
+def _attributes(mailbox):
+    return {
+        "mailbox_id": [str(mailbox.id)],
+        "maildomain_id": [str(mailbox.domain.id)],
+        "local_part": [mailbox.local_part],
+        "domain_name": [mailbox.domain.name],
+    }
+
+
+@pytest.mark.django_db
+def test_resync_pushes_only_changed_users(fake_keycloak, domain):
+    """Missing users are created, outdated ones updated, others left alone."""
+    new = _mailbox(domain, "new", "New User")
+    renamed = _mailbox(domain, "renamed", "Jane Doe")
+    synced = [_mailbox(domain, f"synced{i}", f"Synced {i}") for i in range(3)]
+    factories.MailboxFactory(domain=domain, local_part="alias", is_identity=False)
+    factories.MailboxFactory(
+        domain=factories.MailDomainFactory(identity_sync=False), local_part="other"
+    )
+
+    fake_keycloak.add_user(
+        "renamed@example.com",
+        domain.group_id,
+        email="renamed@example.com",
+        firstName="Jane",
+        lastName="Smith",
+        attributes=_attributes(renamed),
+    )
+    for index, mailbox in enumerate(synced):
+        fake_keycloak.add_user(
+            str(mailbox),
+            domain.group_id,
+            email=str(mailbox),
+            firstName="Synced",
+            lastName=str(index),
+            # Attributes Keycloak manages itself don't count as changes.
+            attributes={**_attributes(mailbox), "locale": ["fr"]},
+        )
+    fake_keycloak.add_user("someone@elsewhere.com")
+
+    result = keycloak_service.resync_all_mailboxes_to_keycloak(concurrency=4)
+
+    assert result == {
+        "synced_domains": 1,
+        "created": 1,
+        "updated": 1,
+        "unchanged": 3,
+        "failed": 0,
+    }
+    created = fake_keycloak.user("new@example.com")
+    assert created["firstName"] == "New"
+    assert created["emailVerified"] is True
+    assert created["attributes"] == _attributes(new)
+    assert created["id"] in fake_keycloak.members[domain.group_id]
+    assert fake_keycloak.user("renamed@example.com")["lastName"] == "Doe"
+
+    # One paged listing instead of a lookup per mailbox.
+    user_listings = [
+        query for _, name, query in fake_keycloak.calls if name == "list_users"
+    ]
+    assert all("username" not in query for query in user_listings)
+    assert len(user_listings) == 3  # 5 users, pages of 2
+    updates = [name for _, name, _ in fake_keycloak.calls if name == "update_user"]
+    assert updates == ["update_user"]
+
+
+@pytest.mark.django_db
+def test_resync_adds_missing_group_membership(fake_keycloak, domain):
+    """An up-to-date user outside its domain group is added to it."""
+    mailbox = _mailbox(domain, "jane", "Jane")
+    user_id = fake_keycloak.add_user(
+        "jane@example.com",
+        email="jane@example.com",
+        firstName="Jane",
+        attributes=_attributes(mailbox),
+    )
+
+    result = keycloak_service.resync_all_mailboxes_to_keycloak()
+
+    assert result["updated"] == 1
+    assert user_id in fake_keycloak.members[domain.group_id]
+    assert not any(name == "update_user" for _, name, _ in fake_keycloak.calls)
+
+
+@pytest.mark.django_db
+def test_resync_retries_transient_errors_and_counts_failures(fake_keycloak, domain):
+    """5xx answers are retried; a rejected user fails alone."""
+    flaky = _mailbox(domain, "flaky", "Flaky User")
+    _mailbox(domain, "rejected", "Rejected User")
+    flaky_id = fake_keycloak.add_user(
+        "flaky@example.com", domain.group_id, email="flaky@example.com"
+    )
+    rejected_id = fake_keycloak.add_user(
+        "rejected@example.com", domain.group_id, email="rejected@example.com"
+    )
+    fake_keycloak.failures[("update_user", (flaky_id,))] = [503, 502]
+    fake_keycloak.failures[("update_user", (rejected_id,))] = [400]
+
+    result = keycloak_service.resync_all_mailboxes_to_keycloak()
+
+    assert result["updated"] == 1
+    assert result["failed"] == 1
+    assert fake_keycloak.users[flaky_id]["attributes"] == _attributes(flaky)
+    assert "attributes" not in fake_keycloak.users[rejected_id]
+
+
+@pytest.mark.django_db
+def test_resync_survives_token_expiry(fake_keycloak, domain):
+    """Pages and pushes pick up a new token once the previous one expired."""
+    fake_keycloak.only_latest_token = True
+    mailboxes = [_mailbox(domain, f"user{i}", f"User {i}") for i in range(3)]
+
+    # Every client is cached for no time: each fetch gets a new token,
+    # which expires the one held by any client fetched before.
+    with (
+        patch.object(keycloak_service, "_TOKEN_EXPIRY_SAFETY_MARGIN", 300),
+        patch.object(keycloak_service, "_TOKEN_MIN_TTL", 0),
+    ):
+        result = keycloak_service.resync_all_mailboxes_to_keycloak(concurrency=1)
+
+    assert result["created"] == 3
+    assert result["failed"] == 0
+    for mailbox in mailboxes:
+        user_id = fake_keycloak.user(str(mailbox))["id"]
+        assert user_id in fake_keycloak.members[domain.group_id]
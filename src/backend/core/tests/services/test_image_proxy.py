@@ -0,0 +1,108 @@
+"""Tests for the image proxy cache service."""
+# pylint: disable=unused-argument
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.utils import timezone
+from django.utils.http import http_date
+
+import pytest
+
+from core import factories, models
+from core.services import image_proxy
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("HTTP://Example.COM/a.png", "http://example.com/a.png"),
+        ("https://example.com:443/a.png#x", "https://example.com/a.png"),
+        ("http://example.com:8080/A.png?s=Sig", "http://example.com:8080/A.png?s=Sig"),
+        ("http://example.com", "http://example.com/"),
+        ("http://[::1]:80/a.png", "http://[::1]/a.png"),
+    ],
+)
+def test_normalize_url(url, expected):
+    """Equivalent spellings of a URL share one cache key."""
+    assert image_proxy.normalize_url(url) == expected
+
+
+@pytest.mark.parametrize(
+    "headers,expected",
+    [
+        ({}, 3600),
+        ({"Cache-Control": "public, max-age=60"}, 60),
+        ({"Cache-Control": "max-age=60, s-maxage=120"}, 120),
+        ({"Cache-Control": "max-age=86400"}, 3600),
+        ({"Cache-Control": "max-age=oops"}, 0),
+        ({"Cache-Control": "no-store"}, 0),
+        ({"Cache-Control": "No-Cache"}, 0),
+        ({"Cache-Control": "private"}, 0),
+        ({"Vary": "*"}, 0),
+        ({"Expires": "0"}, 0),
+    ],
+)
+def test_cache_ttl(settings, headers, expected):
+    """Upstream headers can shorten or forbid caching, never extend it."""
+    settings.IMAGE_PROXY_STORAGE_TTL = 3600
+    assert image_proxy.cache_ttl(headers) == expected
+
+
+def test_cache_ttl_expires(settings):
+    """A future Expires date is honored."""
+    settings.IMAGE_PROXY_STORAGE_TTL = 3600
+    expires = http_date(timezone.now().timestamp() + 600)
+    assert 590 <= image_proxy.cache_ttl({"Expires": expires}) <= 600
+
+
+@pytest.mark.django_db
+class TestPruneImageProxyCache:
+    """Expired entries and entries over the size cap are dropped."""
+
+    def _entry(self, content, expires_in):
+        return models.ProxiedImage.objects.create(
+            url_hash=image_proxy.url_hash(f"http://example.com/{content.hex()}"),
+            blob=factories.BlobFactory(content=content, content_type="image/png"),
+            expires_at=timezone.now() + timedelta(seconds=expires_in),
+        )
+
+    def test_expired_entries_are_dropped(self):
+        """Expired rows go, their blobs are handed to the GC."""
+        expired = self._entry(b"old", expires_in=-1)
+        live = self._entry(b"new", expires_in=600)
+
+        with patch("core.services.image_proxy.schedule_for_gc") as schedule_for_gc:
+            result = image_proxy.prune_image_proxy_cache_task()
+
+        assert result == {"success": True, "expired": 1, "evicted": 0}
+        schedule_for_gc.assert_called_once_with(expired.blob_id)
+        assert list(models.ProxiedImage.objects.all()) == [live]
+
+    def test_size_cap_evicts_closest_to_expiry(self, settings):
+        """Over the cap, entries expiring first are evicted."""
+        settings.IMAGE_PROXY_STORAGE_MAX_SIZE = 250
+        first = self._entry(b"a" * 100, expires_in=100)
+        second = self._entry(b"b" * 100, expires_in=200)
+        third = self._entry(b"c" * 100, expires_in=300)
+
+        with patch("core.services.image_proxy.schedule_for_gc") as schedule_for_gc:
+            result = image_proxy.prune_image_proxy_cache_task()
+
+        assert result == {"success": True, "expired": 0, "evicted": 1}
+        schedule_for_gc.assert_called_once_with(first.blob_id)
+        assert set(models.ProxiedImage.objects.all()) == {second, third}
+
+    def test_store_replaces_entry(self):
+        """Storing a new version of a URL releases the previous blob."""
+        url = "http://example.com/logo.png"
+        image_proxy.store_image(url, b"v1", "image/png", ttl=60)
+        previous = models.ProxiedImage.objects.get()
+
+        with patch("core.services.image_proxy.schedule_for_gc") as schedule_for_gc:
+            image_proxy.store_image(url, b"v2", "image/png", ttl=60)
+
+        entry = models.ProxiedImage.objects.get()
+        assert entry.blob.get_content() == b"v2"
+        schedule_for_gc.assert_called_once_with(previous.blob_id)
+        assert image_proxy.get_cached_image(url) == (b"v2", "image/png")
@@ -0,0 +1,191 @@
+"""Tests for the incrementally maintained storage usage."""
+# pylint: disable=redefined-outer-name, unused-argument
+
+from importlib import import_module
+
+from django.apps import apps
+
+import pytest
+
+from core import factories, models
+from core.services.storage_usage import reconcile_storage_usage
+
+
+def _usage(owner):
+    """(messages_count, blobs_size) of a mailbox or domain."""
+    usage = models.StorageUsage.objects.get(
+        **{
+            "mailbox" if isinstance(owner, models.Mailbox) else "maildomain": owner,
+        }
+    )
+    return usage.messages_count, usage.blobs_size
+
+
+@pytest.fixture
+def mailbox(db):
+    """A mailbox with a usage row, as created by the signal handlers."""
+    return factories.MailboxFactory()
+
+
+@pytest.fixture
+def thread(mailbox, django_capture_on_commit_callbacks):
+    """A thread the mailbox has access to."""
+    thread = factories.ThreadFactory()
+    with django_capture_on_commit_callbacks(execute=True):
+        factories.ThreadAccessFactory(mailbox=mailbox, thread=thread)
+    return thread
+
+
+@pytest.mark.django_db
+class TestStorageUsageDeltas:
+    """Signal handlers keep the usage rows up to date."""
+
+    def test_rows_created_empty(self, mailbox):
+        """New mailboxes and domains start with an empty usage row."""
+        assert _usage(mailbox) == (0, 0)
+        assert _usage(mailbox.domain) == (0, 0)
+
+    def test_message_added_and_deleted(
+        self, mailbox, thread, django_capture_on_commit_callbacks
+    ):
+        """A message counts for its thread's mailboxes and their domains."""
+        with django_capture_on_commit_callbacks(execute=True):
+            message = factories.MessageFactory(thread=thread, raw_mime=b"x" * 500)
+        size = message.blob.size_compressed
+
+        assert _usage(mailbox) == (1, size)
+        assert _usage(mailbox.domain) == (1, size)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            message.delete()
+
+        assert _usage(mailbox) == (0, 0)
+        assert _usage(mailbox.domain) == (0, 0)
+
+    def test_deltas_wait_for_commit(self, mailbox, thread):
+        """Nothing is applied while the transaction is still open."""
+        factories.MessageFactory(thread=thread, raw_mime=b"x" * 500)
+
+        assert _usage(mailbox) == (0, 0)
+
+    def test_thread_access_shared_in_domain(
+        self, mailbox, thread, django_capture_on_commit_callbacks
+    ):
+        """A thread shared by two mailboxes of a domain counts once for it."""
+        with django_capture_on_commit_callbacks(execute=True):
+            message = factories.MessageFactory(thread=thread, raw_mime=b"x" * 500)
+        size = message.blob.size_compressed
+        other = factories.MailboxFactory(domain=mailbox.domain)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            access = factories.ThreadAccessFactory(mailbox=other, thread=thread)
+
+        assert _usage(other) == (1, size)
+        assert _usage(mailbox.domain) == (1, size)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            access.delete()
+
+        assert _usage(other) == (0, 0)
+        assert _usage(mailbox) == (1, size)
+        assert _usage(mailbox.domain) == (1, size)
+
+    def test_thread_deleted_counted_once(
+        self, mailbox, thread, django_capture_on_commit_callbacks
+    ):
+        """Deleting a thread removes its messages once, not per cascaded row."""
+        with django_capture_on_commit_callbacks(execute=True):
+            factories.MessageFactory(thread=thread, raw_mime=b"a" * 500)
+            factories.MessageFactory(thread=thread, raw_mime=b"b" * 500)
+        assert _usage(mailbox)[0] == 2
+
+        with django_capture_on_commit_callbacks(execute=True):
+            thread.delete()
+
+        assert _usage(mailbox) == (0, 0)
+        assert _usage(mailbox.domain) == (0, 0)
+
+    def test_blob_replaced(self, mailbox, thread, django_capture_on_commit_callbacks):
+        """Replacing a message's blob on save counts the size difference."""
+        with django_capture_on_commit_callbacks(execute=True):
+            message = factories.MessageFactory(thread=thread, raw_mime=b"x" * 500)
+        blob = factories.BlobFactory(mailbox=mailbox, content=b"y" * 5000)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            message.blob = blob
+            message.save(update_fields=["blob"])
+
+        assert _usage(mailbox) == (1, blob.size_compressed)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            message.save(update_fields=["subject"])
+
+        assert _usage(mailbox) == (1, blob.size_compressed)
+
+    def test_attachment_and_template(self, mailbox, django_capture_on_commit_callbacks):
+        """Attachments and templates count their blob for their owner."""
+        with django_capture_on_commit_callbacks(execute=True):
+            attachment = factories.AttachmentFactory(mailbox=mailbox)
+        size = attachment.blob.size_compressed
+
+        # The factory also creates the (blob-less) draft it is attached to.
+        assert _usage(mailbox) == (1, size)
+        assert _usage(mailbox.domain) == (1, size)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            attachment.delete()
+
+        assert _usage(mailbox) == (1, 0)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            template = factories.MessageTemplateFactory(
+                maildomain=mailbox.domain, raw_body="signature " * 50
+            )
+
+        assert _usage(mailbox.domain) == (1, template.blob.size_compressed)
+        assert _usage(mailbox) == (1, 0)
+
+
+@pytest.mark.django_db
+class TestReconcileStorageUsage:
+    """The reconciliation rewrites the rows that drifted."""
+
+    def test_corrects_drift(self, mailbox, thread):
+        """Deltas lost or never applied are fixed, in-sync rows left alone."""
+        message = factories.MessageFactory(thread=thread, raw_mime=b"x" * 500)
+        idle = factories.MailboxFactory()
+
+        assert reconcile_storage_usage() == {"mailboxes": 1, "maildomains": 1}
+
+        size = message.blob.size_compressed
+        assert _usage(mailbox) == (1, size)
+        assert _usage(mailbox.domain) == (1, size)
+        assert _usage(idle) == (0, 0)
+
+        assert reconcile_storage_usage() == {"mailboxes": 0, "maildomains": 0}
+
+    def test_creates_missing_rows(self, mailbox):
+        """Owners created before the usage rows existed get one."""
+        models.StorageUsage.objects.all().delete()
+
+        reconcile_storage_usage()
+
+        assert _usage(mailbox) == (0, 0)
+        assert _usage(mailbox.domain) == (0, 0)
+
+
+@pytest.mark.django_db
+def test_migration_backfills_existing_owners(mailbox, thread):
+    """The migration creating the rows of existing owners uses exact values."""
+    message = factories.MessageFactory(thread=thread, raw_mime=b"x" * 500)
+    attachment = factories.AttachmentFactory(mailbox=mailbox, message=message)
+    models.StorageUsage.objects.all().delete()
+    migration = import_module("core.migrations.0035_storageusage")
+
+    migration.backfill_storage_usage(apps, None)
+
+    size = message.blob.size_compressed + attachment.blob.size_compressed
+    assert _usage(mailbox) == (1, size)
+    assert _usage(mailbox.domain) == (1, size)
+    # Nothing left to correct
+    assert reconcile_storage_usage() == {"mailboxes": 0, "maildomains": 0}
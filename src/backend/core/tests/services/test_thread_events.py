@@ -742,3 +742,107 @@ class TestMentionCleanup:
             thread=thread,
             type=enums.UserEventTypeChoices.MENTION,
         ).exists()
+
+
+# ---------------------------------------------------------------------------
+# Denormalized thread state
+# ---------------------------------------------------------------------------
+
+
+def _state(thread, user):
+    """``(is_assigned, has_mention, has_unread_mention)``, or ``None``."""
+    return (
+        models.ThreadUserState.objects.filter(thread=thread, user=user)
+        .values_list("is_assigned", "has_mention", "has_unread_mention")
+        .first()
+    )
+
+
+class TestRefreshThreadState:
+    """Every service write keeps ``events_count``, ``has_assignees`` and
+    ``ThreadUserState`` in sync with the event rows."""
+
+    def test_assign_then_unassign(self):
+        author, target_user, thread, mailbox = _setup_thread_with_assignable_user()
+
+        thread_events_service.assign_users(
+            thread=thread,
+            author=author,
+            assignees_data=[{"id": str(target_user.id), "name": "Target"}],
+        )
+
+        thread.refresh_from_db()
+        assert thread.events_count == 1
+        assert thread.has_assignees is True
+        assert _state(thread, target_user) == (True, False, False)
+
+        other_author = factories.UserFactory()
+        factories.MailboxAccessFactory(
+            mailbox=mailbox, user=other_author, role=enums.MailboxRoleChoices.ADMIN
+        )
+        thread_events_service.unassign_users(
+            thread=thread,
+            author=other_author,
+            assignees_data=[{"id": str(target_user.id), "name": "Target"}],
+        )
+
+        thread.refresh_from_db()
+        assert thread.events_count == 2
+        assert thread.has_assignees is False
+        assert _state(thread, target_user) is None
+
+    def test_unassign_absorbed_by_undo_window(self):
+        author, target_user, thread, _ = _setup_thread_with_assignable_user()
+        assignees_data = [{"id": str(target_user.id), "name": "Target"}]
+        thread_events_service.assign_users(
+            thread=thread, author=author, assignees_data=assignees_data
+        )
+
+        thread_events_service.unassign_users(
+            thread=thread, author=author, assignees_data=assignees_data
+        )
+
+        thread.refresh_from_db()
+        assert thread.events_count == 0
+        assert thread.has_assignees is False
+        assert _state(thread, target_user) is None
+
+    def test_mention_read_and_deleted(self):
+        author, mentioned_user, thread, _ = _setup_thread_with_mentioned_user()
+        event = factories.ThreadEventFactory(
+            thread=thread,
+            author=author,
+            data={
+                "content": "Hello @John",
+                "mentions": [{"id": str(mentioned_user.id), "name": "John"}],
+            },
+        )
+
+        assert _state(thread, mentioned_user) == (False, True, True)
+
+        thread_events_service.read_mentions(thread_event=event, user=mentioned_user)
+
+        assert _state(thread, mentioned_user) == (False, True, False)
+
+        thread_events_service.delete_thread_event(thread_event=event)
+
+        thread.refresh_from_db()
+        assert thread.events_count == 0
+        assert _state(thread, mentioned_user) is None
+
+    def test_mention_cleaned_up_on_access_revoked(self):
+        author, mentioned_user, thread, mailbox = _setup_thread_with_mentioned_user()
+        factories.ThreadEventFactory(
+            thread=thread,
+            author=author,
+            data={
+                "content": "Hello @John",
+                "mentions": [{"id": str(mentioned_user.id), "name": "John"}],
+            },
+        )
+        thread_access = models.ThreadAccess.objects.get(thread=thread, mailbox=mailbox)
+        thread_access.delete()
+
+        thread_events_service.revoke_thread_access(thread_access=thread_access)
+
+        assert _state(thread, mentioned_user) is None
@@ -13,6 +13,7 @@ import pytest
 from core import models
 from core.factories import MailboxFactory, UserFactory
 from core.mda.inbound import deliver_inbound_message
+from core.mda.inbound_create import ImportThreadResolver
 from core.models import Message
 from core.services.importer.mbox_tasks import (
     extract_date_from_headers,
@@ -323,6 +324,39 @@ class TestProcessMboxFileTask:
         finally:
             s3_client.delete_object(Bucket=storage.bucket_name, Key=file_key)
 
+    def test_task_process_mbox_file_prefetches_threads(
+        self, mailbox, sample_mbox_content
+    ):
+        """The threads of each batch of messages are looked up at once."""
+        file_key, storage, s3_client = _upload_to_s3(sample_mbox_content)
+
+        try:
+            with (
+                patch.object(process_mbox_file_task, "update_state"),
+                patch(
+                    "core.services.importer.mbox_tasks.THREAD_PREFETCH_BATCH_SIZE", 2
+                ),
+                patch.object(
+                    ImportThreadResolver,
+                    "prefetch",
+                    autospec=True,
+                    side_effect=ImportThreadResolver.prefetch,
+                ) as prefetch,
+            ):
+                task_result = process_mbox_file_task(file_key, str(mailbox.id))
+
+            assert task_result["result"]["success_count"] == 3
+            batches = [
+                [parsed_email["subject"] for parsed_email in call.args[1]]
+                for call in prefetch.call_args_list
+            ]
+            assert batches == [
+                ["Test Message 1", "Test Message 2"],
+                ["Test Message 3"],
+            ]
+        finally:
+            s3_client.delete_object(Bucket=storage.bucket_name, Key=file_key)
+
     def test_task_process_mbox_file_mailbox_not_found(self, sample_mbox_content):  # pylint: disable=unused-argument
         """Test MBOX processing with non-existent mailbox."""
         mock_task = MagicMock()
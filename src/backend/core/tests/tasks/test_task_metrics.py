@@ -0,0 +1,106 @@
+"""Tests for the Celery task instrumentation."""
+
+# pylint: disable=redefined-outer-name, unused-argument, protected-access
+
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from core import task_metrics
+from core.metrics_tasks import refresh_db_metrics_task
+
+TASK_NAME = "core.metrics_tasks.refresh_db_metrics_task"
+
+
+def _fake_task(name="core.tests.fake_task", **request):
+    return SimpleNamespace(name=name, request=SimpleNamespace(**request))
+
+
+class TestTaskMessageStamping:
+    """Enqueue headers and queue wait computation."""
+
+    def test_stamp_adds_enqueue_time_and_payload_size(self):
+        """Published messages carry their enqueue time and payload size."""
+        headers = {}
+        before = time.time()
+        task_metrics.stamp_task_message(
+            body=(["a" * 100], {"flag": True}, {}), headers=headers
+        )
+
+        assert before <= headers["enqueued_at"] <= time.time()
+        assert headers["payload_size"] > 100
+
+    def test_queue_wait_since_enqueue(self):
+        """The wait is measured from the enqueue time."""
+        request = SimpleNamespace(enqueued_at=100.0, eta=None)
+        assert task_metrics._queue_wait(request, 112.5) == 12.5
+
+    def test_queue_wait_from_eta(self):
+        """Delayed tasks wait from their ETA, not from their enqueue time."""
+        eta = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+        enqueued_at = (eta - timedelta(minutes=5)).timestamp()
+        request = SimpleNamespace(enqueued_at=enqueued_at, eta=eta.isoformat())
+
+        assert task_metrics._queue_wait(request, eta.timestamp() + 2) == 2
+
+    def test_queue_wait_unknown_without_stamp(self):
+        """Messages published without the stamp (eager mode) have no wait."""
+        assert task_metrics._queue_wait(SimpleNamespace(), time.time()) is None
+
+    def test_queue_lengths_eager(self, settings):
+        """No broker is read in eager mode."""
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+        assert not task_metrics.get_queue_lengths()
+
+
+@pytest.mark.redis
+@pytest.mark.django_db
+class TestTaskStats:
+    """Counters recorded at the end of each task run."""
+
+    def test_task_run_is_recorded(self, redis_cache):
+        """A task run adds to its run time histogram."""
+        refresh_db_metrics_task.apply().get()
+
+        stats = task_metrics.get_stats()[TASK_NAME]
+        assert sum(stats["run"]["buckets"]) == 1
+        assert stats["run"]["sum"] > 0
+        assert sum(stats["wait"]["buckets"]) == 0
+        assert stats["retries"] == 0
+        assert stats["failures"] == 0
+
+    def test_wait_payload_and_outcomes(self, redis_cache):
+        """Stamped runs record their wait and payload; outcomes are counted."""
+        task = _fake_task(enqueued_at=time.time() - 20, eta=None, payload_size=2000)
+        task_metrics.start_task_timer(task_id="t1", task=task)
+        task_metrics.record_task_run(task_id="t1", task=task, state="RETRY")
+        task_metrics.start_task_timer(task_id="t2", task=task)
+        task_metrics.record_task_run(task_id="t2", task=task, state="FAILURE")
+
+        stats = task_metrics.get_stats()[task.name]
+        wait_index = task_metrics.WAIT_BUCKETS.index(30)
+        payload_index = task_metrics.PAYLOAD_BUCKETS.index(4096)
+        assert stats["wait"]["buckets"][wait_index] == 2
+        assert stats["payload"]["buckets"][payload_index] == 2
+        assert stats["payload"]["sum"] == 4000
+        assert stats["retries"] == 1
+        assert stats["failures"] == 1
+
+    def test_queue_lengths(self, redis_cache, settings):
+        """Queue depth sums every priority list of each broker queue."""
+        settings.CELERY_TASK_ALWAYS_EAGER = False
+        settings.CELERY_BROKER_URL = settings.CACHES["default"]["LOCATION"]
+        task_metrics._broker_client = None
+        try:
+            redis_cache.lpush("inbound", "m1", "m2")
+            redis_cache.lpush("inbound\x06\x163", "m3")
+
+            lengths = task_metrics.get_queue_lengths()
+        finally:
+            task_metrics._broker_client = None
+
+        assert lengths["inbound"] == 3
+        assert lengths["default"] == 0
+        assert set(lengths) == set(task_metrics.get_queues())
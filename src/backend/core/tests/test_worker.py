@@ -20,6 +20,7 @@ class TestWorkerQueueConfiguration:
             "inbound",
             "outbound",
             "default",
+            "ai",
             "imports",
             "reindex",
         ]
@@ -45,6 +46,9 @@ class TestWorkerQueueConfiguration:
         assert "core.mda.outbound_tasks.*" in routes
         assert routes["core.mda.outbound_tasks.*"]["queue"] == "outbound"
 
+        assert "core.ai.tasks.*" in routes
+        assert routes["core.ai.tasks.*"]["queue"] == "ai"
+
         assert "core.services.importer.mbox_tasks.*" in routes
         assert routes["core.services.importer.mbox_tasks.*"]["queue"] == "imports"
         assert "core.services.importer.eml_tasks.*" in routes
@@ -196,6 +200,7 @@ class TestWorkerQueueValidation:
             "inbound",
             "outbound",
             "default",
+            "ai",
             "imports",
             "reindex",
         ]
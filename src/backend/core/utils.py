@@ -2,9 +2,12 @@
 
 import json
 import logging
+import re
+import uuid
 from contextlib import contextmanager
 from contextvars import ContextVar
 
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured, ValidationError
 
 import jsonschema
@@ -30,6 +33,46 @@ def get_redis_client():
     return get_redis_connection("default")
 
 
+def is_redis_backend() -> bool:
+    """Return True when the default cache is backed by django_redis.
+
+    Gates every feature that needs raw Redis primitives from
+    ``get_redis_client``; callers fall back to plain ``cache`` operations
+    or skip the feature otherwise.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from django.conf import settings
+
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    return "django_redis" in backend
+
+
+def acquire_cache_slot(key_prefix: str, limit: int, timeout: int):
+    """Try to take one of ``limit`` slots named ``<key_prefix>:<index>``.
+
+    Slots are plain ``cache.add`` keys, so they work on any shared cache
+    backend and leak for at most ``timeout`` seconds if the holder dies.
+    Returns ``(key, token)`` on success — pass it to ``release_cache_slot``,
+    possibly from another process — or ``None`` when every slot is busy.
+    """
+    token = uuid.uuid4().hex
+    for index in range(limit):
+        key = f"{key_prefix}:{index}"
+        if cache.add(key, token, timeout=timeout):
+            return key, token
+    return None
+
+
+def release_cache_slot(key: str, token: str) -> None:
+    """Release a slot taken by ``acquire_cache_slot``.
+
+    Only our own slot is deleted: if the holder overran the timeout, the
+    key may already belong to someone else.
+    """
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
 def validate_json_schema(value, schema, *, field):
     """Validate ``value`` against ``schema`` and raise a Django ValidationError
     keyed by ``field`` when it does not match.
@@ -44,6 +87,30 @@ def validate_json_schema(value, schema, *, field):
         raise ValidationError({field: exception.message}) from exception
 
 
+# Reply / forward prefixes, with their i18n variants.
+_REPLY_PREFIXES_RE = re.compile(r"^((re|fwd|fw|rep|tr|rép)\s*:\s+)+", re.IGNORECASE)
+_REPLY_SUBJECT_RE = re.compile(
+    r"(re|fwd|fw|rep|tr|rép)\s*:\s*(.*)", re.IGNORECASE | re.DOTALL
+)
+
+
+def canonicalize_subject(subject: str | None) -> str:
+    """Strip leading ``Re:`` / ``Fwd:`` (and i18n variants) for thread match."""
+    return _REPLY_PREFIXES_RE.sub("", (subject or "").lower()).strip()
+
+
+def reply_subject_key(subject: str | None) -> str:
+    """Lowercased rest of a reply subject after its first ``Re:`` / ``Fwd:``.
+
+    Empty for subjects without a reply prefix. An imported message joins
+    the reply thread whose key equals its ``canonicalize_subject``: the
+    thread subject is one prefix, optional spaces, then that subject —
+    ``Re:Hello`` matches ``Hello``, ``Re: Re: Hello`` doesn't.
+    """
+    match = _REPLY_SUBJECT_RE.fullmatch((subject or "").lower())
+    return match.group(2) if match else ""
+
+
 class AbstractBatchingDeferrer:
     """
     Base class for scoped batching of deferred actions via ContextVar.
@@ -42,7 +42,7 @@ if not settings.DISABLE_CELERY_BEAT_SCHEDULE:
         },
         "process-inbound-messages-queue": {
             "task": "core.mda.inbound_tasks.process_inbound_messages_queue_task",
-            "schedule": 300.0,  # Every 5 minutes
+            "schedule": settings.INBOUND_RECOVERY_INTERVAL,
             "options": {"queue": "inbound"},
         },
         "process-pending-reindex": {
@@ -50,11 +50,21 @@ if not settings.DISABLE_CELERY_BEAT_SCHEDULE:
             "schedule": settings.SEARCH_REINDEX_TASKS_INTERVAL,
             "options": {"queue": "reindex"},
         },
+        "process-pending-ai": {
+            "task": "core.ai.tasks.process_pending_ai_task",
+            "schedule": settings.AI_TASKS_INTERVAL,
+            "options": {"queue": "ai"},
+        },
         "offload-blobs-to-object-storage": {
             "task": "core.services.tiered_storage_tasks.offload_blobs_task",
             "schedule": 3600.0,  # Every hour
             "options": {"queue": "default"},
         },
+        "refresh-db-metrics": {
+            "task": "core.metrics_tasks.refresh_db_metrics_task",
+            "schedule": settings.METRICS_DB_GAUGES_REFRESH_INTERVAL,
+            "options": {"queue": "default"},
+        },
         "gc-orphan-blobs": {
             # Drains the Redis candidate set populated by reference-source
             # post_delete signals. Hourly with a 55-min in-task budget;
@@ -66,4 +76,29 @@ if not settings.DISABLE_CELERY_BEAT_SCHEDULE:
             "schedule": 3600.0,
             "options": {"queue": "default"},
         },
+        "prune-image-proxy-cache": {
+            # Expires cached proxied images and enforces
+            # IMAGE_PROXY_STORAGE_MAX_SIZE; the blobs go to the GC above.
+            "task": "core.services.image_proxy.prune_image_proxy_cache_task",
+            "schedule": 3600.0,  # Every hour
+            "options": {"queue": "default"},
+        },
+        "prune-blob-previews": {
+            # Expires preview renderings; the blobs go to the GC above.
+            "task": "core.services.blob_preview.prune_blob_previews_task",
+            "schedule": 3600.0,  # Every hour
+            "options": {"queue": "default"},
+        },
+        "check-maildomains-dns": {
+            # Stores each domain's DNS check results on the MailDomain.
+            "task": "core.services.dns.tasks.check_maildomains_dns_task",
+            "schedule": 86400.0,  # Every day
+            "options": {"queue": "default"},
+        },
+        "reconcile-storage-usage": {
+            # Corrects the drift of the storage usage served by the metrics API.
+            "task": "core.services.storage_usage.reconcile_storage_usage_task",
+            "schedule": settings.METRICS_STORAGE_USAGE_RECONCILE_INTERVAL,
+            "options": {"queue": "default"},
+        },
     }
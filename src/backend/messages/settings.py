@@ -111,6 +111,20 @@ class Base(Configuration):
     OPENSEARCH_CA_CERTS = values.Value(
         None, environ_name="OPENSEARCH_CA_CERTS", environ_prefix=None
     )
+    # Filter searches on the unread/starred state copied onto the message
+    # documents instead of joining to their thread document (``has_parent``).
+    # Every indexing path writes the copies: run a full reindex before
+    # enabling it on an index built by an older version.
+    SEARCH_JOIN_FREE_MAILBOX_FILTERS = values.BooleanValue(
+        False, environ_name="SEARCH_JOIN_FREE_MAILBOX_FILTERS", environ_prefix=None
+    )
+    # Threads per partition of a ``search_index_rebuild`` build. Each
+    # partition is loaded by one ``reindex`` queue task and checkpointed
+    # once loaded: smaller partitions spread the load over more workers
+    # and lose less work when a task dies, at the cost of more tasks.
+    SEARCH_REBUILD_PARTITION_SIZE = values.PositiveIntegerValue(
+        20000, environ_name="SEARCH_REBUILD_PARTITION_SIZE", environ_prefix=None
+    )
     # Interval (seconds) at which the Celery Beat task drains the Redis
     # coalescing buffers (reindex + delete) and enqueues bulk thread tasks.
     # Longer intervals reduce Celery/OpenSearch load at the cost of search
@@ -173,11 +187,28 @@ class Base(Configuration):
         environ_prefix=None,
     )
 
+    # Autosaved draft bodies are buffered in the cache and stored as a
+    # blob at most every this many seconds. 0 stores every autosave.
+    DRAFT_AUTOSAVE_CHECKPOINT_SECONDS = values.PositiveIntegerValue(
+        30, environ_name="DRAFT_AUTOSAVE_CHECKPOINT_SECONDS", environ_prefix=None
+    )
+
     # Maximum total recipients (to + cc + bcc) allowed per message for the entire system
     MAX_RECIPIENTS_PER_MESSAGE = values.PositiveIntegerValue(
         500, environ_name="MAX_RECIPIENTS_PER_MESSAGE", environ_prefix=None
     )
 
+    # Maximum number of contacts returned by the contact autocomplete
+    CONTACTS_AUTOCOMPLETE_LIMIT = values.PositiveIntegerValue(
+        20, environ_name="CONTACTS_AUTOCOMPLETE_LIMIT", environ_prefix=None
+    )
+
+    # Number of message blobs the mailbox export fetches and decodes in
+    # parallel while it compresses and uploads the previous ones
+    EXPORT_FETCH_CONCURRENCY = values.PositiveIntegerValue(
+        8, environ_name="EXPORT_FETCH_CONCURRENCY", environ_prefix=None
+    )
+
     # Thread events
     # Time window (in seconds) during which a ThreadEvent can be edited or
     # deleted after creation. Set to 0 to disable the restriction and allow
@@ -223,6 +254,38 @@ class Base(Configuration):
         environ_name="IMAGE_PROXY_CACHE_TTL",
         environ_prefix=None,
     )
+    # Server-side cache of proxied images, stored as blobs. Entries live at
+    # most IMAGE_PROXY_STORAGE_TTL seconds (less if the upstream response
+    # says so); IMAGE_PROXY_STORAGE_MAX_SIZE caps the total cached bytes,
+    # 0 disables the cache.
+    IMAGE_PROXY_STORAGE_TTL = values.PositiveIntegerValue(
+        60 * 60 * 24 * 7,  # 7 days in seconds
+        environ_name="IMAGE_PROXY_STORAGE_TTL",
+        environ_prefix=None,
+    )
+    IMAGE_PROXY_STORAGE_MAX_SIZE = values.PositiveIntegerValue(
+        1024 * 1024 * 1024,  # 1 GiB
+        environ_name="IMAGE_PROXY_STORAGE_MAX_SIZE",
+        environ_prefix=None,
+    )
+
+    # Attachment previews. Images of at least BLOB_PREVIEW_MIN_SIZE bytes
+    # are rendered once per content, in the background, as WebP fitting in
+    # BLOB_PREVIEW_MAX_DIMENSION pixels (0 serves originals only), and the
+    # rendering is kept BLOB_PREVIEW_TTL seconds.
+    BLOB_PREVIEW_MAX_DIMENSION = values.PositiveIntegerValue(
+        1600, environ_name="BLOB_PREVIEW_MAX_DIMENSION", environ_prefix=None
+    )
+    BLOB_PREVIEW_MIN_SIZE = values.PositiveIntegerValue(
+        256 * 1024,  # 256 KiB
+        environ_name="BLOB_PREVIEW_MIN_SIZE",
+        environ_prefix=None,
+    )
+    BLOB_PREVIEW_TTL = values.PositiveIntegerValue(
+        60 * 60 * 24 * 30,  # 30 days in seconds
+        environ_name="BLOB_PREVIEW_TTL",
+        environ_prefix=None,
+    )
 
     # Security
     ALLOWED_HOSTS = values.ListValue([])
@@ -410,6 +473,17 @@ class Base(Configuration):
     CALDAV_DEFAULT_WEB_URL = values.Value(
         None, environ_name="CALDAV_DEFAULT_WEB_URL", environ_prefix=None
     )
+    # How long (seconds) the calendar home set and the calendar list of a
+    # CalDAV principal are reused across requests. The calendar list is
+    # only reused by conflict checks, so a calendar created meanwhile can
+    # be missing from them for that long.
+    CALDAV_DISCOVERY_CACHE_TTL = values.PositiveIntegerValue(
+        60, environ_name="CALDAV_DISCOVERY_CACHE_TTL", environ_prefix=None
+    )
+    # Calendars queried at the same time by a conflict check.
+    CALDAV_CONCURRENCY = values.PositiveIntegerValue(
+        4, environ_name="CALDAV_CONCURRENCY", environ_prefix=None
+    )
 
     # Spam filtering settings
 
@@ -429,6 +503,30 @@ class Base(Configuration):
     #                              core.mda.inbound_auth for semantics.
     SPAM_CONFIG = values.DictValue({}, environ_name="SPAM_CONFIG", environ_prefix=None)
 
+    # rspamd client (see core.mda.rspamd): seconds one scan may take,
+    # waiting for a slot included; scans in flight cluster-wide (0 for no
+    # cap); keep-alive connections per worker process and rspamd host;
+    # bytes of a message sent to rspamd; and the circuit breaker, which
+    # skips scans for a cooldown once that many scans failed within it.
+    RSPAMD_TIMEOUT = values.PositiveIntegerValue(
+        5, environ_name="RSPAMD_TIMEOUT", environ_prefix=None
+    )
+    RSPAMD_MAX_CONCURRENCY = values.PositiveIntegerValue(
+        16, environ_name="RSPAMD_MAX_CONCURRENCY", environ_prefix=None
+    )
+    RSPAMD_POOL_SIZE = values.PositiveIntegerValue(
+        4, environ_name="RSPAMD_POOL_SIZE", environ_prefix=None
+    )
+    RSPAMD_MAX_SCAN_SIZE = values.PositiveIntegerValue(
+        2 * 1024 * 1024, environ_name="RSPAMD_MAX_SCAN_SIZE", environ_prefix=None
+    )
+    RSPAMD_CIRCUIT_FAILURE_THRESHOLD = values.PositiveIntegerValue(
+        5, environ_name="RSPAMD_CIRCUIT_FAILURE_THRESHOLD", environ_prefix=None
+    )
+    RSPAMD_CIRCUIT_COOLDOWN = values.PositiveIntegerValue(
+        30, environ_name="RSPAMD_CIRCUIT_COOLDOWN", environ_prefix=None
+    )
+
     # MTA settings
 
     # "direct" or "relay"
@@ -538,6 +636,36 @@ class Base(Configuration):
         environ_prefix=None,
     )
 
+    # Inbound queue recovery (see core.mda.inbound_recovery): seconds
+    # between two runs, seconds a queued or re-dispatched message is left
+    # to its worker before being re-dispatched (doubling per attempt, up
+    # to the max backoff), and messages re-dispatched per run at most.
+    INBOUND_RECOVERY_INTERVAL = values.PositiveIntegerValue(
+        60, environ_name="INBOUND_RECOVERY_INTERVAL", environ_prefix=None
+    )
+    INBOUND_RECOVERY_LEASE = values.PositiveIntegerValue(
+        300, environ_name="INBOUND_RECOVERY_LEASE", environ_prefix=None
+    )
+    INBOUND_RECOVERY_MAX_BACKOFF = values.PositiveIntegerValue(
+        6 * 3600, environ_name="INBOUND_RECOVERY_MAX_BACKOFF", environ_prefix=None
+    )
+    INBOUND_RECOVERY_MAX_BATCH = values.PositiveIntegerValue(
+        500, environ_name="INBOUND_RECOVERY_MAX_BATCH", environ_prefix=None
+    )
+
+    # Periodic retry fan-out (see core.mda.retry_scheduler): messages per
+    # batch task, batches in flight cluster-wide (backpressure), and
+    # batches allowed to hit the same destination domain at once.
+    OUTBOUND_RETRY_BATCH_SIZE = values.PositiveIntegerValue(
+        20, environ_name="OUTBOUND_RETRY_BATCH_SIZE", environ_prefix=None
+    )
+    OUTBOUND_RETRY_MAX_BATCHES = values.PositiveIntegerValue(
+        8, environ_name="OUTBOUND_RETRY_MAX_BATCHES", environ_prefix=None
+    )
+    OUTBOUND_RETRY_DOMAIN_CONCURRENCY = values.PositiveIntegerValue(
+        2, environ_name="OUTBOUND_RETRY_DOMAIN_CONCURRENCY", environ_prefix=None
+    )
+
     # Default compression for new blobs.
     # Format: "<algo>" or "<algo>:<level>". Examples: "none", "zstd", "zstd:7".
     MESSAGES_BLOBS_COMPRESS = values.Value(
@@ -609,6 +737,22 @@ class Base(Configuration):
         environ_prefix=None,
     )
 
+    # Cache of the DNS TXT lookups of DKIM verification (seconds): record
+    # TTLs are capped to DNS_CACHE_MAX_TTL, missing records are cached
+    # for DNS_CACHE_NEGATIVE_TTL.
+    DNS_CACHE_MAX_TTL = values.PositiveIntegerValue(
+        3600, environ_name="DNS_CACHE_MAX_TTL", environ_prefix=None
+    )
+    DNS_CACHE_NEGATIVE_TTL = values.PositiveIntegerValue(
+        300, environ_name="DNS_CACHE_NEGATIVE_TTL", environ_prefix=None
+    )
+
+    # Mail domains whose DNS records are checked at the same time by the
+    # dns_check command and the periodic DNS check.
+    DNS_CHECK_CONCURRENCY = values.PositiveIntegerValue(
+        16, environ_name="DNS_CHECK_CONCURRENCY", environ_prefix=None
+    )
+
     # Block outgoing messages when SPF includes are not correctly set up
     MESSAGES_SPF_CHECK_OUTGOING = values.BooleanValue(
         default=False,
@@ -880,12 +1024,14 @@ class Base(Configuration):
     CELERY_TASK_DEFAULT_QUEUE = "default"
 
     # Queue routing - tasks are routed to specific queues based on their type
-    # Priority order: management > inbound > outbound > default > imports > reindex
+    # Priority order: management > inbound > outbound > default > ai > imports > reindex
     CELERY_TASK_ROUTES = {
         # Inbound email processing - highest priority, time-sensitive
         "core.mda.inbound_tasks.*": {"queue": "inbound"},
         # Outbound email sending - high priority
         "core.mda.outbound_tasks.*": {"queue": "outbound"},
+        # AI summaries and auto-labels - off the delivery path, debounced
+        "core.ai.tasks.*": {"queue": "ai"},
         # Import tasks - lower priority than regular tasks
         "core.services.importer.mbox_tasks.*": {"queue": "imports"},
         "core.services.importer.eml_tasks.*": {"queue": "imports"},
@@ -1044,6 +1190,20 @@ class Base(Configuration):
         None, environ_name="PROMETHEUS_API_KEY", environ_prefix=None
     )
 
+    # Seconds between two refreshes of the database gauges (message
+    # status counts, attachments). Scrapes read the cached values.
+    METRICS_DB_GAUGES_REFRESH_INTERVAL = values.PositiveIntegerValue(
+        60, environ_name="METRICS_DB_GAUGES_REFRESH_INTERVAL", environ_prefix=None
+    )
+
+    # Seconds between two reconciliations of the incrementally maintained
+    # storage usage served by the storage metrics API.
+    METRICS_STORAGE_USAGE_RECONCILE_INTERVAL = values.PositiveIntegerValue(
+        3600,
+        environ_name="METRICS_STORAGE_USAGE_RECONCILE_INTERVAL",
+        environ_prefix=None,
+    )
+
     # DEPRECATED: ignored since global api_key Channels landed.
     # Kept only so AppConfig.ready() can emit a deprecation warning when
     # either env var is set. Migrate to a global api_key Channel.
@@ -1065,6 +1225,37 @@ class Base(Configuration):
     AI_API_KEY = values.Value(None, environ_name="AI_API_KEY", environ_prefix=None)
     AI_BASE_URL = values.Value(None, environ_name="AI_BASE_URL", environ_prefix=None)
     AI_MODEL = values.Value(None, environ_name="AI_MODEL", environ_prefix=None)
+    # Quiet period (seconds) after the last inbound message on a thread
+    # before its summary / auto-labels are computed. A burst of replies
+    # within that window produces a single AI call.
+    AI_DEBOUNCE_SECONDS = values.PositiveIntegerValue(
+        60, environ_name="AI_DEBOUNCE_SECONDS", environ_prefix=None
+    )
+    # Upper bound (seconds) on the debounce delay, counted from the first
+    # message of a burst, so a thread that never goes quiet is still
+    # processed.
+    AI_DEBOUNCE_MAX_WAIT_SECONDS = values.PositiveIntegerValue(
+        600, environ_name="AI_DEBOUNCE_MAX_WAIT_SECONDS", environ_prefix=None
+    )
+    # Interval (seconds) at which the Celery Beat task hands due AI work
+    # to the ``ai`` queue.
+    AI_TASKS_INTERVAL = values.PositiveIntegerValue(
+        15, environ_name="AI_TASKS_INTERVAL", environ_prefix=None
+    )
+    # Maximum number of summary and auto-label tasks (each) enqueued per
+    # Beat tick. Leftovers stay scheduled for the next tick.
+    AI_FLUSH_BATCH_SIZE = values.PositiveIntegerValue(
+        500, environ_name="AI_FLUSH_BATCH_SIZE", environ_prefix=None
+    )
+    # Cluster-wide cap on concurrent calls to the AI endpoint.
+    AI_MAX_CONCURRENCY = values.PositiveIntegerValue(
+        4, environ_name="AI_MAX_CONCURRENCY", environ_prefix=None
+    )
+    # Lifetime (seconds) of the per-message extracted text cache used to
+    # build prompts without re-parsing every blob of the thread.
+    AI_MESSAGE_TEXT_CACHE_TIMEOUT = values.PositiveIntegerValue(
+        24 * 60 * 60, environ_name="AI_MESSAGE_TEXT_CACHE_TIMEOUT", environ_prefix=None
+    )
 
     # Entitlements
     ENTITLEMENTS_BACKEND = values.Value(
@@ -1259,6 +1450,7 @@ class Base(Configuration):
             self.MIDDLEWARE = [
                 "core.middlewares.PrometheusAuthMiddleware",
                 "django_prometheus.middleware.PrometheusBeforeMiddleware",
+                "core.middlewares.RequestMetricsMiddleware",
                 *self.MIDDLEWARE,
                 "django_prometheus.middleware.PrometheusAfterMiddleware",
             ]
@@ -1419,6 +1611,8 @@ class Development(Base):
             ),
             "OPTIONS": {
                 "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                # Counts Redis round trips per request, see core.instrumentation.
+                "REDIS_CLIENT_CLASS": "core.instrumentation.InstrumentedRedis",
             },
         },
         "session": {
@@ -1601,6 +1795,8 @@ class Production(Base):
             ),
             "OPTIONS": {
                 "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                # Counts Redis round trips per request, see core.instrumentation.
+                "REDIS_CLIENT_CLASS": "core.instrumentation.InstrumentedRedis",
             },
         },
     }
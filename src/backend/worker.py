@@ -14,8 +14,9 @@ Queue priority order (highest to lowest):
     2. inbound    - Inbound email processing (time-sensitive)
     3. outbound   - Outbound email sending
     4. default    - General tasks
-    5. imports    - File import processing (can be delayed)
-    6. reindex    - Search indexing (lowest priority)
+    5. ai         - AI summaries and auto-labels (debounced)
+    6. imports    - File import processing (can be delayed)
+    7. reindex    - Search indexing (lowest priority)
 """
 
 import argparse
@@ -37,7 +38,15 @@ install(check_options=True)
 from messages.celery_app import app  # pylint: disable=wrong-import-position
 
 # Queue definitions in priority order
-ALL_QUEUES = ["management", "inbound", "outbound", "default", "imports", "reindex"]
+ALL_QUEUES = [
+    "management",
+    "inbound",
+    "outbound",
+    "default",
+    "ai",
+    "imports",
+    "reindex",
+]
 DEFAULT_QUEUES = ALL_QUEUES  # By default, process all queues
 
 
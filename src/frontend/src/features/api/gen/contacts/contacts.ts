@@ -30,6 +30,10 @@ type SecondParameter<T extends (...args: never) => unknown> = Parameters<T>[1];
 For a mailbox, it returns all contacts in the mailbox and all contacts
 in the same domain as the mailbox.
 
+Results are ranked for autocomplete: contacts whose name or email
+starts with the query first, then the most recently written to, then
+by name. At most ``CONTACTS_AUTOCOMPLETE_LIMIT`` contacts are returned.
+
 Query parameters:
 - mailbox_id: Optional UUID to filter contacts by mailbox
 - q: Optional search query for name or email (case insensitive)
@@ -43,6 +43,8 @@ type SecondParameter<T extends (...args: never) => unknown> = Parameters<T>[1];
         The response returns labels in a tree structure where:
         - Labels are ordered alphabetically by name
         - Each label includes its children (sub-labels)
+        - Each label includes its number of threads and unread threads, not
+          counting trashed and spam threads
         - The hierarchy is determined by the label's name (e.g., "Inbox/Important" is a child of "Inbox")
 
         You can filter labels by mailbox using the mailbox_id query parameter.
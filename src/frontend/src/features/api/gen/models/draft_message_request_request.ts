@@ -40,4 +40,6 @@ export interface DraftMessageRequestRequest {
    * @nullable
    */
   signatureId?: string | null;
+  /** Periodic save of a draft being edited: the body may be buffered and stored later (updates only) */
+  autosave?: boolean;
 }
@@ -18,4 +18,6 @@ export interface TreeLabel {
   readonly children: readonly TreeLabel[];
   readonly description: string;
   readonly is_auto: boolean;
+  readonly threads_count: number;
+  readonly unread_threads_count: number;
 }
@@ -477,7 +477,7 @@ export const MessageForm = forwardRef<MessageFormHandle, MessageFormProps>(({
 
         // Start new timer
         autoSaveTimerRef.current = setInterval(() => {
-            form.handleSubmit(saveDraft)();
+            form.handleSubmit(autoSaveDraft)();
         }, 30000); // 30 seconds
     };
 
@@ -519,9 +519,11 @@ export const MessageForm = forwardRef<MessageFormHandle, MessageFormProps>(({
     /**
      * Update or create a draft message if any field to change.
      * When `force` is true, bypass the content check (used by ensureDraft).
+     * When `autosave` is true, flag the update as a periodic autosave so the
+     * backend may buffer it; only the 30s timer sets it.
      * Returns the draft id on success.
      */
-    const saveDraftInner = async (force = false): Promise<string | undefined> => {
+    const saveDraftInner = async (force = false, autosave = false): Promise<string | undefined> => {
         if (saveDraftPromiseRef.current) return saveDraftPromiseRef.current;
 
         const data = form.getValues();
@@ -575,7 +577,7 @@ export const MessageForm = forwardRef<MessageFormHandle, MessageFormProps>(({
                 } else {
                     response = await draftUpdateMutation.mutateAsync({
                         messageId: currentDraft.id,
-                        data: payload,
+                        data: autosave ? { ...payload, autosave: true } : payload,
                     });
                 }
 
@@ -598,6 +600,7 @@ export const MessageForm = forwardRef<MessageFormHandle, MessageFormProps>(({
     }
 
     const saveDraft = () => saveDraftInner(false);
+    const autoSaveDraft = () => saveDraftInner(false, true);
 
     /**
      * Ensure a draft exists, creating one if necessary.
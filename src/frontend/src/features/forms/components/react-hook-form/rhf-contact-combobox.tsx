@@ -1,30 +1,39 @@
 import { useContactsList } from "@/features/api/gen";
 import { ComboBox, ComboBoxProps } from "../combobox";
 import { useMemo, useState } from "react";
+import { keepPreviousData } from "@tanstack/react-query";
 import { useMailboxContext } from "@/features/providers/mailbox";
 import { UserRow } from "@gouvfr-lasuite/ui-kit";
 import { Controller, useFormContext } from "react-hook-form";
 import MailHelper from "@/features/utils/mail-helper";
+import { useDebounceCallback } from "@/hooks/use-debounce-callback";
 
 export const RhfContactComboBox = (props: Omit<ComboBoxProps, 'options'> & { name: string }) => {
     const { control, setValue } = useFormContext();
     const [searchQuery, setSearchQuery] = useState("");
+    const [remoteQuery, setRemoteQuery] = useState("");
+    const updateRemoteQuery = useDebounceCallback(setRemoteQuery, 250);
     const { selectedMailbox } = useMailboxContext();
-    const contactsQuery = useContactsList({ mailbox_id: selectedMailbox?.id }, {
+    // The endpoint returns a limited, ranked list of matches: search on the
+    // server, and filter the previous results locally while typing.
+    const contactsQuery = useContactsList({
+        mailbox_id: selectedMailbox?.id,
+        ...(remoteQuery ? { q: remoteQuery } : {}),
+    }, {
         query: {
             enabled: !!selectedMailbox?.id,
+            placeholderData: keepPreviousData,
         }
     });
-    // MARK: Currently the contact list endpoint is not paginated, so we get the full list of contact
-    // At first it is good as we are able to filter locally so we have a really good reactive UI
-    // But I don't sure this strategy scale well with a lot of contacts
     const contacts = useMemo(
         () => {
             const contacts = contactsQuery.data?.data || [];
             if (!searchQuery) return contacts;
+            // Server results already match the query (words in any order)
+            if (searchQuery === remoteQuery && !contactsQuery.isPlaceholderData) return contacts;
             return contacts.filter(contact => contact.name?.toLowerCase().includes(searchQuery.toLowerCase()) || contact.email.toLowerCase().includes(searchQuery.toLowerCase()));
         },
-        [contactsQuery.data?.data, searchQuery]
+        [contactsQuery.data?.data, contactsQuery.isPlaceholderData, searchQuery, remoteQuery]
     );
 
     const contactsOptions = useMemo(() => {
@@ -55,7 +64,10 @@ export const RhfContactComboBox = (props: Omit<ComboBoxProps, 'options'> & { nam
                     value={field.value}
                     valueValidator={MailHelper.isValidEmail}
                     onChange={(value) => setValue(props.name, value, { shouldDirty: true })}
-                    onInputChange={(value) => setSearchQuery(value.trim())}
+                    onInputChange={(value) => {
+                        setSearchQuery(value.trim());
+                        updateRemoteQuery(value.trim());
+                    }}
                     options={contactsOptions}
                 />
             )}
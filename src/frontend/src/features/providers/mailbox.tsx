@@ -94,9 +94,6 @@ export const isThreadEvent = (item: TimelineItem | null): item is Extract<Timeli
  *     pass `queryParams` to scope the cache per filter/label)
  *   - invalidation / optimistic-update sites that target the whole
  *     per-mailbox stats subtree (omit `queryParams` for prefix matching)
- *
- * Keep in sync with the `invalidateThreadsStats` predicate, which relies
- * on `queryParams` being the last entry to filter out `label_slug=*` keys.
  */
 export const getThreadsStatsQueryKey = (
     mailboxId: string | undefined,
@@ -533,15 +530,14 @@ export const MailboxProvider = ({ children }: PropsWithChildren) => {
     }
 
     const invalidateThreadsStats = async () => {
-        await queryClient.invalidateQueries({
-            queryKey: getThreadsStatsQueryKey(selectedMailbox?.id),
-            // Exclude per-label stats queries (`label_slug=…`) from the
-            // fan-out: a global invalidation would otherwise trigger one
-            // re-fetch per label in the sidebar, which is wasteful. Label
-            // counts stay fresh via their own targeted refetch paths
-            // (label mutations) and by the mailbox polling loop.
-            predicate: ({ queryKey }) => !(queryKey[queryKey.length - 1] as string).startsWith('label_slug=')
-        });
+        await Promise.all([
+            queryClient.invalidateQueries({
+                queryKey: getThreadsStatsQueryKey(selectedMailbox?.id),
+            }),
+            // Label unread counters come with the labels list: one request
+            // refreshes all of them.
+            queryClient.invalidateQueries({ queryKey: labelsQuery.queryKey }),
+        ]);
     }
 
     const invalidateLabels = async () => {